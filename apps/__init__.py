@@ -42,6 +42,28 @@ def configure_database(app):
             print('> Fallback to SQLite ')
             db.create_all()
 
+        # Índice de busca de clientes (pg_trgm / FTS5) e sincronização pelo ORM
+        from apps.services.busca_service import garantir_estrutura, registrar_eventos_busca
+        garantir_estrutura()
+        registrar_eventos_busca()
+
+        # Cache das estatísticas dos cards, invalidado nos commits do ORM
+        from apps.services.estatisticas import registrar_eventos_estatisticas
+        registrar_eventos_estatisticas()
+
+        # Linhas de log das execuções gravadas em lote nos flushes do ORM
+        from apps.services.logs_execucao import registrar_eventos_logs_execucao
+        registrar_eventos_logs_execucao()
+
+        # Consolidado diário das execuções atualizado nos flushes do ORM; só é
+        # lido depois de completo (banco novo ou migrar_execucao_stats_daily.py)
+        from apps.services.consolidado_execucoes import registrar_eventos_consolidado_execucoes, garantir_consolidado
+        registrar_eventos_consolidado_execucoes()
+        try:
+            garantir_consolidado()
+        except Exception as e:
+            print('> Error: consolidado das execuções: ' + str(e))
+
     @app.teardown_request
     def shutdown_session(exception=None):
         db.session.remove()
@@ -66,6 +88,7 @@ def create_app(config):
     from apps.processos import bp as processos_bp
     from apps.usuarios.routes_simple import usuarios_bp
     from apps.api_externa.routes_logs_tempo_real import api_logs_tempo_real_bp
+    from apps.api_externa.routes_webhook import api_webhook_bp
     from apps.agendamentos import agendamentos_bp
     from apps.execucoes import bp as execucoes_bp
 
@@ -74,6 +97,7 @@ def create_app(config):
     app.register_blueprint(processos_bp, url_prefix='/processos')
     app.register_blueprint(usuarios_bp, url_prefix='/usuarios')
     app.register_blueprint(api_logs_tempo_real_bp)
+    app.register_blueprint(api_webhook_bp)
     app.register_blueprint(agendamentos_bp, url_prefix='/agendamentos')
     app.register_blueprint(execucoes_bp)
 
@@ -0,0 +1,467 @@
+"""
+Armazenamento local de logs de jobs
+
+Os eventos de log recebidos pelo stream em tempo real são gravados em
+segmentos append-only por job (registros prefixados pelo tamanho). Quando
+o job termina o segmento é compactado com gzip e ganha um índice pequeno,
+de modo que o histórico pode ser lido com uma única leitura sequencial,
+sem chamar a API externa nem ler o Text de Execucao.mensagem_log.
+
+Apenas um processo grava o segmento de cada job (lock exclusivo no
+arquivo); os demais workers que recebem os mesmos eventos não os
+duplicam. O histórico só é considerado completo quando a captura começou
+na criação do job (iniciar) e não foi interrompida até o fechamento.
+
+Os segmentos fechados são removidos por idade (retenção) e, se o total
+ainda passar do tamanho máximo, dos mais antigos para os mais novos; a
+limpeza roda no fechamento dos segmentos, no máximo uma vez por intervalo.
+
+Arquivos por job:
+    <job_id>.seg      segmento aberto (job em andamento)
+    <job_id>.seg.gz   segmento fechado e compactado
+    <job_id>.idx      índice JSON (registros, bytes, intervalo de tempo, offsets esparsos, completo)
+    <job_id>.ini      marcador de captura desde a criação do job (removido se houver lacuna)
+"""
+
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+import struct
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Optional, Dict, Any, List, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Cabeçalho de cada registro: tamanho do payload (uint32 big-endian)
+CABECALHO = struct.Struct('>I')
+
+# A cada N registros o offset é guardado no índice
+INTERVALO_INDICE = 256
+
+_JOB_ID_VALIDO = re.compile(r'^[A-Za-z0-9_.-]{1,100}$')
+
+
+class ArmazenamentoLogs:
+    """Segmentos append-only de logs por job"""
+
+    def __init__(
+        self,
+        diretorio: str,
+        max_arquivos_abertos: int = 64,
+        retencao_segundos: Optional[int] = None,
+        tamanho_maximo: Optional[int] = None,
+        intervalo_limpeza: int = 3600
+    ):
+        """
+        Inicializa o armazenamento
+
+        Args:
+            diretorio: Diretório onde os segmentos são gravados
+            max_arquivos_abertos: Quantidade máxima de segmentos mantidos abertos
+            retencao_segundos: Idade máxima dos segmentos fechados (None: sem limite)
+            tamanho_maximo: Total máximo em bytes dos segmentos fechados (None: sem limite)
+            intervalo_limpeza: Intervalo mínimo em segundos entre limpezas automáticas
+        """
+        self.diretorio = diretorio
+        self.max_arquivos_abertos = max_arquivos_abertos
+        self.retencao_segundos = retencao_segundos
+        self.tamanho_maximo = tamanho_maximo
+        self.intervalo_limpeza = intervalo_limpeza
+        self._ultima_limpeza = 0.0
+        self._abertos: 'OrderedDict[str, Any]' = OrderedDict()
+        self._lock = threading.RLock()
+        os.makedirs(diretorio, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Caminhos
+    # ------------------------------------------------------------------
+
+    def _caminho(self, job_id: str, extensao: str) -> str:
+        if not _JOB_ID_VALIDO.match(job_id) or job_id.startswith('.'):
+            raise ValueError(f"job_id inválido para armazenamento: {job_id!r}")
+        return os.path.join(self.diretorio, f"{job_id}{extensao}")
+
+    def existe(self, job_id: str) -> bool:
+        """Indica se há logs armazenados para o job"""
+        try:
+            return (os.path.exists(self._caminho(job_id, '.seg'))
+                    or os.path.exists(self._caminho(job_id, '.seg.gz')))
+        except ValueError:
+            return False
+
+    def esta_fechado(self, job_id: str) -> bool:
+        """Indica se o segmento do job já foi fechado e compactado"""
+        return os.path.exists(self._caminho(job_id, '.seg.gz'))
+
+    def esta_completo(self, job_id: str) -> bool:
+        """
+        Indica se o segmento tem o histórico inteiro do job
+
+        Só segmentos fechados, capturados desde a criação do job e sem
+        interrupções; nos demais casos o histórico deve vir da API externa.
+        """
+        try:
+            if not self.esta_fechado(job_id):
+                return False
+            indice = self.obter_indice(job_id)
+        except ValueError:
+            return False
+        return bool(indice and indice.get('completo'))
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def _arquivo_aberto(self, job_id: str):
+        """
+        Segmento do job aberto para escrita por este processo
+
+        Returns:
+            O arquivo, ou None se outro processo grava o segmento ou ele já foi fechado
+        """
+        arquivo = self._abertos.get(job_id)
+        if arquivo is not None:
+            self._abertos.move_to_end(job_id)
+            return arquivo
+
+        if self.esta_fechado(job_id):
+            return None
+
+        caminho = self._caminho(job_id, '.seg')
+        arquivo = open(caminho, 'ab')
+        if fcntl:
+            try:
+                fcntl.flock(arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                # Outro worker já grava este job
+                arquivo.close()
+                return None
+
+        # O dono anterior pode ter fechado o segmento entre a verificação e o lock
+        if os.fstat(arquivo.fileno()).st_nlink == 0 or self.esta_fechado(job_id):
+            arquivo.close()
+            if self.esta_fechado(job_id) and os.path.exists(caminho) and os.path.getsize(caminho) == 0:
+                os.remove(caminho)
+            return None
+
+        self._abertos[job_id] = arquivo
+        while len(self._abertos) > self.max_arquivos_abertos:
+            antigo_job_id, antigo = self._abertos.popitem(last=False)
+            # Sem o lock outro processo pode assumir o segmento: a captura deixa de ser contínua
+            self._remover_marcador(antigo_job_id)
+            antigo.close()
+        return arquivo
+
+    def _remover_marcador(self, job_id: str):
+        try:
+            os.remove(self._caminho(job_id, '.ini'))
+        except FileNotFoundError:
+            pass
+
+    def iniciar(self, job_id: str) -> bool:
+        """
+        Começa a captura de um job recém-criado
+
+        Grava o marcador de captura desde o início e assume o segmento. Se já
+        houver logs armazenados para o job a captura não é considerada completa.
+
+        Returns:
+            bool: True se a captura desde o início foi registrada
+        """
+        with self._lock:
+            if self.existe(job_id):
+                return False
+            if self._arquivo_aberto(job_id) is None:
+                return False
+            open(self._caminho(job_id, '.ini'), 'w').close()
+            return True
+
+    def interromper(self, job_id: str):
+        """
+        Registra que este processo deixou de capturar o job antes do término
+
+        O marcador de captura completa é removido (o histórico tem uma lacuna)
+        e o segmento é liberado para outro processo.
+        """
+        with self._lock:
+            arquivo = self._abertos.pop(job_id, None)
+            if arquivo is None:
+                return
+            self._remover_marcador(job_id)
+            arquivo.close()
+
+    def anexar(self, job_id: str, dados: str):
+        """
+        Anexa um evento (JSON serializado) ao segmento do job
+
+        Eventos que chegam depois do fechamento do segmento, ou em um processo
+        que não grava o segmento do job, são ignorados.
+        """
+        payload = dados.encode('utf-8')
+        with self._lock:
+            arquivo = self._arquivo_aberto(job_id)
+            if arquivo is None:
+                return
+            arquivo.write(CABECALHO.pack(len(payload)) + payload)
+            arquivo.flush()
+
+    def fechar(self, job_id: str):
+        """Compacta o segmento do job e grava o índice (apenas no processo que o grava)"""
+        with self._lock:
+            arquivo = self._abertos.pop(job_id, None)
+            if arquivo is None:
+                return
+
+            # O lock do segmento é mantido até a remoção do .seg
+            try:
+                caminho = self._caminho(job_id, '.seg')
+                indice = self._gerar_indice(caminho)
+                indice['completo'] = os.path.exists(self._caminho(job_id, '.ini'))
+                with open(self._caminho(job_id, '.idx'), 'w') as arquivo_indice:
+                    json.dump(indice, arquivo_indice)
+
+                # Compactar em arquivo temporário para que leitores nunca vejam um .gz parcial
+                caminho_gz = self._caminho(job_id, '.seg.gz')
+                with open(caminho, 'rb') as origem, gzip.open(caminho_gz + '.tmp', 'wb') as destino:
+                    shutil.copyfileobj(origem, destino)
+                os.replace(caminho_gz + '.tmp', caminho_gz)
+
+                os.remove(caminho)
+                self._remover_marcador(job_id)
+            finally:
+                arquivo.close()
+
+        logger.info(f"Segmento de logs do job {job_id} fechado ({indice['registros']} registros)")
+
+        if time.time() - self._ultima_limpeza >= self.intervalo_limpeza:
+            self._ultima_limpeza = time.time()
+            try:
+                self.limpar()
+            except OSError as e:
+                logger.warning(f"Erro na limpeza dos segmentos de logs: {e}")
+
+    # ------------------------------------------------------------------
+    # Retenção
+    # ------------------------------------------------------------------
+
+    def limpar(self) -> int:
+        """
+        Remove os segmentos fechados fora da retenção
+
+        Primeiro os mais antigos que a retenção; depois, enquanto o total dos
+        segmentos fechados passar do tamanho máximo, os mais antigos. Segmentos
+        abertos (jobs em andamento) nunca são removidos.
+
+        Returns:
+            int: Quantidade de jobs removidos
+        """
+        fechados = []
+        for nome in os.listdir(self.diretorio):
+            if not nome.endswith('.seg.gz'):
+                continue
+            job_id = nome[:-len('.seg.gz')]
+            try:
+                estado = os.stat(os.path.join(self.diretorio, nome))
+                tamanho = estado.st_size
+                caminho_indice = self._caminho(job_id, '.idx')
+                if os.path.exists(caminho_indice):
+                    tamanho += os.path.getsize(caminho_indice)
+            except (OSError, ValueError):
+                continue
+            fechados.append((estado.st_mtime, tamanho, job_id))
+
+        # Do mais antigo (fechado há mais tempo) para o mais novo
+        fechados.sort()
+        total = sum(tamanho for _, tamanho, _ in fechados)
+        limite_idade = time.time() - self.retencao_segundos if self.retencao_segundos else None
+
+        removidos = 0
+        for fechado_em, tamanho, job_id in fechados:
+            expirado = limite_idade is not None and fechado_em < limite_idade
+            excedente = self.tamanho_maximo is not None and total > self.tamanho_maximo
+            if not (expirado or excedente):
+                break
+            self._remover_segmento(job_id)
+            total -= tamanho
+            removidos += 1
+
+        if removidos:
+            logger.info(f"{removidos} segmentos de logs removidos pela retenção")
+        return removidos
+
+    def _remover_segmento(self, job_id: str):
+        # O .seg.gz primeiro: sem ele o job deixa de ser considerado fechado/completo
+        for extensao in ('.seg.gz', '.idx'):
+            try:
+                os.remove(self._caminho(job_id, extensao))
+            except FileNotFoundError:
+                pass
+
+    def _gerar_indice(self, caminho: str) -> Dict[str, Any]:
+        registros = 0
+        offsets = []
+        primeiro = ultimo = None
+
+        with open(caminho, 'rb') as arquivo:
+            for offset, payload in self._iterar_registros(arquivo):
+                if registros % INTERVALO_INDICE == 0:
+                    offsets.append(offset)
+                timestamp = self._timestamp(payload)
+                if timestamp:
+                    primeiro = primeiro or timestamp
+                    ultimo = timestamp
+                registros += 1
+            total_bytes = arquivo.tell()
+
+        return {
+            'registros': registros,
+            'bytes': total_bytes,
+            'inicio': primeiro,
+            'fim': ultimo,
+            'intervalo_indice': INTERVALO_INDICE,
+            'offsets': offsets,
+            'fechado_em': time.time()
+        }
+
+    @staticmethod
+    def _timestamp(payload: bytes) -> Optional[str]:
+        try:
+            return json.loads(payload).get('timestamp') or None
+        except ValueError:
+            return None
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _iterar_registros(arquivo) -> Iterator:
+        """Itera (offset, payload) de um arquivo de registros prefixados"""
+        offset = arquivo.tell()
+        while True:
+            cabecalho = arquivo.read(CABECALHO.size)
+            if len(cabecalho) < CABECALHO.size:
+                return
+            tamanho, = CABECALHO.unpack(cabecalho)
+            payload = arquivo.read(tamanho)
+            if len(payload) < tamanho:
+                # Registro incompleto (escrita em andamento)
+                return
+            yield offset, payload
+            offset += CABECALHO.size + tamanho
+
+    def _abrir_leitura(self, job_id: str):
+        caminho_gz = self._caminho(job_id, '.seg.gz')
+        if os.path.exists(caminho_gz):
+            return gzip.open(caminho_gz, 'rb')
+        caminho = self._caminho(job_id, '.seg')
+        if os.path.exists(caminho):
+            return open(caminho, 'rb')
+        return None
+
+    def obter_indice(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Retorna o índice do job (apenas para segmentos fechados)"""
+        try:
+            with open(self._caminho(job_id, '.idx')) as arquivo:
+                return json.load(arquivo)
+        except FileNotFoundError:
+            # Sem índice, ou removido pela retenção
+            return None
+
+    def ler(self, job_id: str, inicio: int = 0, limite: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Lê os eventos de log do job em uma leitura sequencial
+
+        Args:
+            job_id: ID do job
+            inicio: Posição (0-based) do primeiro evento
+            limite: Quantidade máxima de eventos
+
+        Returns:
+            Lista de eventos decodificados
+        """
+        arquivo = self._abrir_leitura(job_id)
+        if arquivo is None:
+            return []
+
+        eventos = []
+        with arquivo:
+            # Pular direto para o bloco indexado mais próximo do início
+            indice = self.obter_indice(job_id) if inicio else None
+            posicao = 0
+            if indice and indice.get('offsets'):
+                bloco = min(inicio // indice['intervalo_indice'], len(indice['offsets']) - 1)
+                arquivo.seek(indice['offsets'][bloco])
+                posicao = bloco * indice['intervalo_indice']
+
+            for _, payload in self._iterar_registros(arquivo):
+                if posicao >= inicio:
+                    eventos.append(json.loads(payload))
+                    if limite is not None and len(eventos) >= limite:
+                        break
+                posicao += 1
+
+        return eventos
+
+    def cauda(self, job_id: str, quantidade: int = 100) -> List[Dict[str, Any]]:
+        """Retorna os últimos eventos de log do job"""
+        arquivo = self._abrir_leitura(job_id)
+        if arquivo is None:
+            return []
+
+        ultimos = deque(maxlen=quantidade)
+        with arquivo:
+            for _, payload in self._iterar_registros(arquivo):
+                ultimos.append(payload)
+        return [json.loads(payload) for payload in ultimos]
+
+    def contar(self, job_id: str) -> int:
+        """Quantidade de eventos armazenados para o job"""
+        indice = self.obter_indice(job_id)
+        if indice:
+            return indice['registros']
+
+        arquivo = self._abrir_leitura(job_id)
+        if arquivo is None:
+            return 0
+        with arquivo:
+            return sum(1 for _ in self._iterar_registros(arquivo))
+
+
+# Instância global do armazenamento
+_armazenamento_instance: Optional[ArmazenamentoLogs] = None
+_armazenamento_lock = threading.Lock()
+
+
+def get_armazenamento_logs(diretorio: Optional[str] = None) -> ArmazenamentoLogs:
+    """
+    Retorna a instância global do armazenamento de logs
+
+    Args:
+        diretorio: Diretório dos segmentos (usado apenas na primeira chamada;
+            padrão: LOGS_JOBS_DIR da configuração)
+    """
+    global _armazenamento_instance
+
+    with _armazenamento_lock:
+        if _armazenamento_instance is None:
+            from apps.config import Config
+            if diretorio is None:
+                diretorio = Config.LOGS_JOBS_DIR
+            _armazenamento_instance = ArmazenamentoLogs(
+                diretorio,
+                retencao_segundos=Config.LOGS_JOBS_RETENCAO_DIAS * 86400 or None,
+                tamanho_maximo=Config.LOGS_JOBS_TAMANHO_MAXIMO_MB * 1024 * 1024 or None
+            )
+
+    return _armazenamento_instance
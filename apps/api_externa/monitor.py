@@ -13,6 +13,8 @@ from .client import APIExternaClient
 from .models import JobStatus, ExecutionLog
 from .cache import get_cache
 
+from apps.processos.barramento_eventos import emitir_evento_sse, evento_de_status_job
+
 logger = logging.getLogger(__name__)
 
 
@@ -288,6 +290,9 @@ class JobMonitor:
 
     def _notify_status_change(self, job_id: str, status: JobStatus):
         """Notifica mudança de status"""
+        # Repassar aos clientes SSE (progresso agrupado pelo emissor)
+        emitir_evento_sse(evento_de_status_job(job_id, status))
+
         for callback in self.status_callbacks:
             try:
                 callback(job_id, status)
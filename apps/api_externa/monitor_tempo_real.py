@@ -12,6 +12,8 @@ import queue
 from .client import APIExternaClient
 from .models import JobStatus, ExecutionLog
 
+from apps.processos.barramento_eventos import emitir_evento_sse, evento_de_status_job
+
 logger = logging.getLogger(__name__)
 
 
@@ -214,6 +216,9 @@ class MonitorTempoReal:
                             logger.error(
                                 f"Erro em callback para job {job_id}: {e}")
 
+            # Repassar aos clientes SSE (progresso agrupado pelo emissor)
+            emitir_evento_sse(evento_de_status_job(job_id, status))
+
             logger.debug(
                 f"Evento processado para job {job_id}: {status.status}")
 
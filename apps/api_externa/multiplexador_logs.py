@@ -0,0 +1,540 @@
+"""
+Multiplexador de logs em tempo real
+
+Mantém uma única conexão com o stream /events/logs da API externa por
+processo e distribui cada evento, decodificado uma única vez, para as
+filas dos assinantes interessados no job_id correspondente.
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from collections import deque
+from typing import Optional, Dict, Set, Any, List, Tuple
+
+import requests
+from urllib3.exceptions import ReadTimeoutError
+
+logger = logging.getLogger(__name__)
+
+TIPOS_TERMINAIS = ('job_completed', 'job_failed')
+
+
+def formatar_evento_log(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Converte um evento bruto do stream de logs no formato enviado ao navegador
+
+    Args:
+        data: Evento decodificado da API externa
+
+    Returns:
+        Dict formatado ou None se o evento deve ser descartado
+    """
+    log_job_id = data.get('job_id')
+
+    # Logs históricos/UNKNOWN são DESCARTADOS para evitar poluição
+    if data.get('type') != 'log' or not log_job_id:
+        return None
+
+    # Garantir timestamp válido (fallback para agora se vazio)
+    timestamp = data.get('timestamp')
+    if not timestamp:
+        timestamp = datetime.utcnow().isoformat() + 'Z'
+
+    # Formatar para SSE (NÃO reescrever job_id!)
+    formatted_data = {
+        'type': data.get('type', 'log'),
+        'level': data.get('level', 'INFO'),
+        'message': data.get('message', ''),
+        'operadora': data.get('operadora', 'UNKNOWN'),
+        'job_id': log_job_id,
+        'timestamp': timestamp,
+        'service': data.get('service', 'rpa-api'),
+        'logger': data.get('logger', 'app.main')
+    }
+
+    # Detectar conclusão do job
+    message = (data.get('message') or '').lower()
+    level = data.get('level', 'INFO')
+
+    if level == 'WARN' and 'concluído' in message:
+        # Formato: "Job <job_id> concluído..."; mensagens de outro job são ignoradas
+        if f'job {log_job_id}'.lower() not in message:
+            return None
+
+        if 'completed' in message:
+            formatted_data['job_status'] = 'COMPLETED'
+            formatted_data['type'] = 'job_completed'
+        elif 'failed' in message or 'erro' in message:
+            formatted_data['job_status'] = 'FAILED'
+            formatted_data['type'] = 'job_failed'
+        else:
+            formatted_data['job_status'] = 'COMPLETED'
+            formatted_data['type'] = 'job_completed'
+
+    return formatted_data
+
+
+class BufferReplayJob:
+    """
+    Últimos eventos de log de um job, limitados em bytes, com ids crescentes
+
+    Permite que um cliente que reconecta receba apenas o que perdeu
+    (cabeçalho Last-Event-ID) sem nova chamada à API externa.
+    """
+
+    def __init__(self, job_id: str, limite_bytes: int = 256 * 1024):
+        self.job_id = job_id
+        self.limite_bytes = limite_bytes
+        self.itens: deque = deque()
+        self.total_bytes = 0
+        self.ultimo_id = 0
+        self.atualizado_em = time.time()
+        self.finalizado_em: Optional[float] = None
+
+    def adicionar(self, dados: str) -> int:
+        """Adiciona um evento serializado e retorna o id atribuído"""
+        self.ultimo_id += 1
+        self.itens.append((self.ultimo_id, dados))
+        self.total_bytes += len(dados)
+        self.atualizado_em = time.time()
+
+        while self.total_bytes > self.limite_bytes and len(self.itens) > 1:
+            _, removido = self.itens.popleft()
+            self.total_bytes -= len(removido)
+
+        return self.ultimo_id
+
+    def eventos_desde(self, ultimo_id: Optional[int]) -> List[Tuple[int, str]]:
+        """
+        Eventos com id maior que ultimo_id
+
+        Sem ultimo_id (primeira conexão) ou com um id que este processo não
+        emitiu (ex.: após reinício), retorna todo o buffer.
+        """
+        if ultimo_id is None or ultimo_id > self.ultimo_id:
+            return list(self.itens)
+        return [(event_id, dados) for event_id, dados in self.itens if event_id > ultimo_id]
+
+
+class AssinaturaLogs:
+    """Assinatura de um cliente SSE nos logs de um job"""
+
+    def __init__(self, job_id: str, tamanho_fila: int = 500):
+        self.job_id = job_id
+        self.fila: 'queue.Queue[Tuple[Optional[int], str]]' = queue.Queue(maxsize=tamanho_fila)
+        self.descartados = 0
+        self.entregues = 0
+        self.criada_em = time.time()
+
+    def publicar(self, dados: str, event_id: Optional[int] = None):
+        """Coloca o evento na fila, descartando o mais antigo se estiver cheia"""
+        while True:
+            try:
+                self.fila.put_nowait((event_id, dados))
+                self.entregues += 1
+                return
+            except queue.Full:
+                try:
+                    self.fila.get_nowait()
+                    self.descartados += 1
+                except queue.Empty:
+                    pass
+
+    def proximo(self, timeout: float) -> Optional[Tuple[Optional[int], str]]:
+        """Retorna o próximo (id, evento) ou None se nada chegou no intervalo"""
+        try:
+            return self.fila.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+def eh_timeout_leitura(erro: Exception) -> bool:
+    """
+    Indica se o erro é só o timeout de leitura de um stream silencioso
+
+    Com stream=True o timeout durante iter_lines chega como ConnectionError
+    envolvendo o ReadTimeoutError do urllib3, e não como ReadTimeout.
+    """
+    if isinstance(erro, requests.exceptions.ReadTimeout):
+        return True
+    if isinstance(erro, requests.exceptions.ConnectionError):
+        return any(isinstance(causa, ReadTimeoutError) for causa in (*erro.args, erro.__cause__, erro.__context__))
+    return False
+
+
+class MultiplexadorLogs:
+    """
+    Conexão compartilhada com o stream de logs da API externa
+
+    A thread de leitura é iniciada com o primeiro assinante e encerrada
+    quando não há mais assinantes. Quando o último assinante de um job sai,
+    o job continua assinado (eventos bufferizados e conexão mantida) por
+    `reconexao_carencia` segundos, para que um cliente que reconecta com
+    Last-Event-ID receba o que perdeu.
+    """
+
+    def __init__(
+        self,
+        backoff_inicial: float = 1.0,
+        backoff_maximo: float = 30.0,
+        timeout_leitura: int = 60,
+        replay_limite_bytes: int = 256 * 1024,
+        replay_carencia: int = 300,
+        replay_ttl_ocioso: int = 3600,
+        reconexao_carencia: int = 60
+    ):
+        """
+        Inicializa o multiplexador
+
+        Args:
+            backoff_inicial: Espera inicial em segundos antes de reconectar
+            backoff_maximo: Espera máxima em segundos entre reconexões
+            timeout_leitura: Timeout de leitura do stream (permite verificar se ainda há assinantes)
+            replay_limite_bytes: Tamanho máximo do buffer de replay de cada job
+            replay_carencia: Segundos que o buffer é mantido após o término do job
+            replay_ttl_ocioso: Segundos sem eventos após os quais o buffer de um job sem assinantes é removido
+            reconexao_carencia: Segundos em que um job continua assinado após a saída do último assinante
+        """
+        self.backoff_inicial = backoff_inicial
+        self.backoff_maximo = backoff_maximo
+        self.timeout_leitura = timeout_leitura
+        self.replay_limite_bytes = replay_limite_bytes
+        self.replay_carencia = replay_carencia
+        self.replay_ttl_ocioso = replay_ttl_ocioso
+        self.reconexao_carencia = reconexao_carencia
+
+        self.api_url: Optional[str] = None
+        self.token: Optional[str] = None
+        self.armazenamento = None
+
+        self._assinantes: Dict[str, Set[AssinaturaLogs]] = {}
+        self._buffers: Dict[str, BufferReplayJob] = {}
+        # Jobs sem assinantes ainda mantidos até o instante indicado (reconexão)
+        self._retidos: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self._thread: Optional[threading.Thread] = None
+        self._conectado = False
+
+        self.estatisticas = {
+            'conexoes': 0,
+            'reconexoes': 0,
+            'eventos_recebidos': 0,
+            'eventos_decodificados': 0,
+            'eventos_roteados': 0,
+            'timeouts_leitura': 0,
+            'ultimo_erro': None
+        }
+
+    def configurar(self, api_url: str, token: str, armazenamento=None):
+        """
+        Atualiza URL e token usados na próxima (re)conexão
+
+        Args:
+            api_url: URL base da API externa
+            token: Token JWT
+            armazenamento: ArmazenamentoLogs onde os eventos recebidos são persistidos (opcional)
+        """
+        self.api_url = api_url.rstrip('/')
+        self.token = token
+        if armazenamento is not None:
+            self.armazenamento = armazenamento
+
+    def assinar(self, job_id: str, tamanho_fila: int = 500, ultimo_id: Optional[int] = None) -> AssinaturaLogs:
+        """
+        Registra um assinante para os logs de um job
+
+        Args:
+            job_id: ID do job
+            tamanho_fila: Tamanho máximo da fila do assinante
+            ultimo_id: Último id recebido pelo cliente (Last-Event-ID), para replay
+
+        Returns:
+            AssinaturaLogs com a fila de eventos do assinante
+        """
+        assinatura = AssinaturaLogs(job_id, tamanho_fila)
+        with self._lock:
+            self._limpar_buffers()
+
+            # Replay e registro sob o mesmo lock: nenhum evento é perdido ou duplicado
+            buffer = self._buffers.get(job_id)
+            if buffer:
+                for event_id, dados in buffer.eventos_desde(ultimo_id):
+                    assinatura.publicar(dados, event_id)
+
+            self._assinantes.setdefault(job_id, set()).add(assinatura)
+            self._retidos.pop(job_id, None)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop_upstream, daemon=True)
+                self._thread.start()
+
+        logger.info(f"Assinante registrado para logs do job {job_id} (total: {self.total_assinantes()})")
+        return assinatura
+
+    def cancelar(self, assinatura: AssinaturaLogs):
+        """Remove um assinante"""
+        with self._lock:
+            assinantes = self._assinantes.get(assinatura.job_id)
+            if assinantes:
+                assinantes.discard(assinatura)
+                if not assinantes:
+                    del self._assinantes[assinatura.job_id]
+                    # Continua recebendo os eventos do job até o cliente reconectar
+                    buffer = self._buffers.get(assinatura.job_id)
+                    if not (buffer and buffer.finalizado_em):
+                        self._retidos[assinatura.job_id] = max(
+                            self._retidos.get(assinatura.job_id, 0), time.time() + self.reconexao_carencia
+                        )
+
+        logger.info(f"Assinante removido dos logs do job {assinatura.job_id} (total: {self.total_assinantes()})")
+
+    def capturar(self, job_id: str, duracao: float):
+        """
+        Captura os logs de um job recém-criado, mesmo sem assinantes
+
+        O job fica assinado até o evento terminal (ou por `duracao` segundos) e
+        o segmento local é marcado como capturado desde o início, o que permite
+        servir o histórico sem chamar a API externa depois que o job termina.
+
+        Args:
+            job_id: ID do job
+            duracao: Tempo máximo de captura em segundos
+        """
+        # O marcador precisa existir antes do primeiro evento gravado
+        if self.armazenamento is not None:
+            try:
+                self.armazenamento.iniciar(job_id)
+            except Exception as e:
+                logger.error(f"Erro ao iniciar armazenamento de logs do job {job_id}: {e}")
+
+        with self._lock:
+            self._retidos[job_id] = max(self._retidos.get(job_id, 0), time.time() + duracao)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop_upstream, daemon=True)
+                self._thread.start()
+
+        logger.info(f"Captura de logs do job {job_id} iniciada")
+
+    def total_assinantes(self) -> int:
+        """Quantidade total de assinantes conectados"""
+        with self._lock:
+            return sum(len(assinantes) for assinantes in self._assinantes.values())
+
+    def _limpar_retidos(self):
+        """Remove os jobs cuja carência de reconexão terminou (sob o lock)"""
+        agora = time.time()
+        for job_id, limite in list(self._retidos.items()):
+            if agora > limite:
+                del self._retidos[job_id]
+                if job_id not in self._assinantes:
+                    self._interromper_captura(job_id)
+
+    def _interromper_captura(self, job_id: str):
+        """Marca o segmento local do job como incompleto (eventos deixarão de ser recebidos)"""
+        if self.armazenamento is None:
+            return
+        try:
+            self.armazenamento.interromper(job_id)
+        except Exception as e:
+            logger.error(f"Erro ao interromper armazenamento de logs do job {job_id}: {e}")
+
+    def _jobs_assinados(self) -> Set[str]:
+        """Jobs com assinantes ou ainda na carência de reconexão"""
+        with self._lock:
+            self._limpar_retidos()
+            return set(self._assinantes.keys()) | set(self._retidos.keys())
+
+    def _em_uso(self) -> bool:
+        """Indica se a conexão upstream ainda é necessária"""
+        with self._lock:
+            self._limpar_retidos()
+            return bool(self._assinantes or self._retidos)
+
+    def _limpar_buffers(self):
+        """Remove buffers de jobs finalizados (após a carência) ou ociosos sem assinantes"""
+        agora = time.time()
+        self._limpar_retidos()
+        for job_id, buffer in list(self._buffers.items()):
+            if job_id in self._assinantes or job_id in self._retidos:
+                continue
+            if buffer.finalizado_em and agora - buffer.finalizado_em > self.replay_carencia:
+                del self._buffers[job_id]
+            elif agora - buffer.atualizado_em > self.replay_ttl_ocioso:
+                del self._buffers[job_id]
+
+    def _distribuir(self, evento: Dict[str, Any], dados: str):
+        """Guarda o evento no buffer de replay e o envia aos assinantes do job"""
+        job_id = evento['job_id']
+        with self._lock:
+            buffer = self._buffers.get(job_id)
+            if buffer is None:
+                buffer = self._buffers[job_id] = BufferReplayJob(job_id, self.replay_limite_bytes)
+            event_id = buffer.adicionar(dados)
+            if evento.get('type') in TIPOS_TERMINAIS:
+                buffer.finalizado_em = time.time()
+                # Job terminado: nada mais a receber para quem reconectar
+                self._retidos.pop(job_id, None)
+            assinantes = list(self._assinantes.get(job_id, ()))
+
+        for assinatura in assinantes:
+            assinatura.publicar(dados, event_id)
+
+        if self.armazenamento is not None:
+            try:
+                self.armazenamento.anexar(job_id, dados)
+                if evento.get('type') in TIPOS_TERMINAIS:
+                    self.armazenamento.fechar(job_id)
+            except Exception as e:
+                logger.error(f"Erro ao persistir log do job {job_id}: {e}")
+        if assinantes:
+            self.estatisticas['eventos_roteados'] += 1
+
+    def _broadcast(self, evento: Dict[str, Any]):
+        """Envia um evento de controle para todos os assinantes"""
+        dados = json.dumps(evento)
+        with self._lock:
+            assinantes = [a for conjunto in self._assinantes.values() for a in conjunto]
+        for assinatura in assinantes:
+            assinatura.publicar(dados)
+
+    def processar_linha(self, line: str):
+        """
+        Processa uma linha do stream upstream
+
+        O JSON só é decodificado quando algum job assinado aparece na linha,
+        evitando decodificar o firehose inteiro de todos os jobs.
+        """
+        if not line or not line.startswith('data: '):
+            return
+
+        self.estatisticas['eventos_recebidos'] += 1
+        json_data = line[6:]
+
+        jobs = self._jobs_assinados()
+        if not any(job_id in json_data for job_id in jobs):
+            return
+
+        try:
+            data = json.loads(json_data)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Erro ao decodificar JSON: {e}")
+            return
+
+        self.estatisticas['eventos_decodificados'] += 1
+        if data.get('job_id') not in jobs:
+            return
+
+        evento = formatar_evento_log(data)
+        if evento is not None:
+            self._distribuir(evento, json.dumps(evento))
+
+    def _encerrar_se_ocioso(self) -> bool:
+        """Libera a thread de leitura quando não há assinantes nem jobs retidos (sob o lock de assinatura)"""
+        with self._lock:
+            if self._em_uso():
+                return False
+            self._thread = None
+            return True
+
+    def _loop_upstream(self):
+        """Mantém a conexão com a API externa enquanto houver assinantes ou jobs retidos"""
+        backoff = self.backoff_inicial
+
+        while not self._encerrar_se_ocioso():
+            if not self.api_url or not self.token:
+                time.sleep(1)
+                continue
+
+            headers = {
+                'Authorization': f'Bearer {self.token}',
+                'Accept': 'text/event-stream',
+                'Cache-Control': 'no-cache'
+            }
+
+            try:
+                logger.info(f"Conectando ao stream de logs compartilhado: {self.api_url}/events/logs")
+                with requests.get(
+                    f"{self.api_url}/events/logs",
+                    headers=headers,
+                    stream=True,
+                    timeout=(10, self.timeout_leitura)
+                ) as response:
+                    response.raise_for_status()
+                    self._conectado = True
+                    self.estatisticas['conexoes'] += 1
+                    backoff = self.backoff_inicial
+
+                    for line in response.iter_lines(decode_unicode=True):
+                        if not self._em_uso():
+                            break
+                        try:
+                            self.processar_linha(line)
+                        except Exception as e:
+                            logger.error(f"Erro ao processar linha de log: {e}")
+
+            except requests.exceptions.RequestException as e:
+                if eh_timeout_leitura(e):
+                    # Stream silencioso: reconecta sem backoff para reavaliar os assinantes
+                    self.estatisticas['reconexoes'] += 1
+                    self.estatisticas['timeouts_leitura'] += 1
+                    continue
+
+                logger.error(f"Erro na conexão com o stream de logs: {e}")
+                self.estatisticas['ultimo_erro'] = str(e)
+                # Eventos emitidos até a reconexão são perdidos: o histórico local fica com lacuna
+                for job_id in self._jobs_assinados():
+                    self._interromper_captura(job_id)
+                self._broadcast({
+                    'type': 'error',
+                    'message': f'Erro de conexão: {str(e)}. Reconectando em {int(backoff)}s',
+                    'timestamp': ''
+                })
+
+            finally:
+                self._conectado = False
+
+            if not self._em_uso():
+                continue
+
+            self.estatisticas['reconexoes'] += 1
+            time.sleep(backoff)
+            backoff = min(backoff * 2, self.backoff_maximo)
+
+        logger.info("Stream de logs compartilhado encerrado (sem assinantes)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna métricas do multiplexador e dos assinantes"""
+        with self._lock:
+            assinantes = [a for conjunto in self._assinantes.values() for a in conjunto]
+            jobs = {job_id: len(conjunto) for job_id, conjunto in self._assinantes.items()}
+
+        return {
+            **self.estatisticas,
+            'conexoes_upstream_ativas': 1 if self._conectado else 0,
+            'assinantes': len(assinantes),
+            'jobs_assinados': jobs,
+            'jobs_retidos': len(self._retidos),
+            'eventos_descartados': sum(a.descartados for a in assinantes),
+            'buffers_replay': len(self._buffers),
+            'buffers_replay_bytes': sum(b.total_bytes for b in list(self._buffers.values())),
+            'fila_maxima': max((a.fila.qsize() for a in assinantes), default=0)
+        }
+
+
+# Instância global do multiplexador
+_multiplexador_instance: Optional[MultiplexadorLogs] = None
+_multiplexador_lock = threading.Lock()
+
+
+def get_multiplexador_logs() -> MultiplexadorLogs:
+    """Retorna a instância global do multiplexador de logs"""
+    global _multiplexador_instance
+
+    with _multiplexador_lock:
+        if _multiplexador_instance is None:
+            _multiplexador_instance = MultiplexadorLogs()
+
+    return _multiplexador_instance
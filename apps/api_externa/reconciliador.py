@@ -0,0 +1,333 @@
+"""
+Reconciliador de Execuções
+Finaliza em background as execuções cujo job já terminou na API externa,
+sem depender de uma aba do navegador aberta ou de polling por job
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Dict, List, Any
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from apps import db
+from apps.models import Execucao
+from apps.models.execucao import StatusExecucao
+from apps.models.perfis_carga import perfil_finalizacao_execucoes
+
+from .client import APIExternaClient
+from .models import JobStatus
+from .transicoes import aplicar_resultado_job, STATUS_JOB_SUCESSO
+
+logger = logging.getLogger(__name__)
+
+
+class ReconciliadorExecucoes:
+    """
+    Verifica periodicamente as execuções em andamento que possuem job_id,
+    consulta o status dos jobs em lote e aplica as transições finais
+    """
+
+    def __init__(
+        self,
+        intervalo_verificacao: int = 60,
+        tamanho_lote: int = 50,
+        timeout_minutos: int = 120,
+        limite_maximo_minutos: int = 1440,
+        app=None
+    ):
+        """
+        Inicializa o reconciliador
+
+        Args:
+            intervalo_verificacao: Intervalo em segundos entre verificações (padrão: 60s)
+            tamanho_lote: Quantidade de execuções por transação
+            timeout_minutos: Tempo após o qual uma execução cujo job não existe
+                na API externa é marcada como TIMEOUT
+            limite_maximo_minutos: Tempo após o qual a execução é marcada como
+                TIMEOUT mesmo com o job ainda em andamento na API externa
+            app: Instância do Flask app para contexto de aplicação
+        """
+        self.intervalo_verificacao = intervalo_verificacao
+        self.tamanho_lote = tamanho_lote
+        self.timeout_minutos = timeout_minutos
+        self.limite_maximo_minutos = limite_maximo_minutos
+        self.executando = False
+        self.thread: Optional[threading.Thread] = None
+        self.app = app
+
+        logger.info(
+            f"ReconciliadorExecucoes inicializado (intervalo: {intervalo_verificacao}s, "
+            f"lote: {tamanho_lote}, timeout: {timeout_minutos}min, limite: {limite_maximo_minutos}min)")
+
+    def iniciar(self):
+        """Inicia o reconciliador em background"""
+        if self.executando:
+            logger.warning("Reconciliador já está em execução")
+            return
+
+        self.executando = True
+        self.thread = threading.Thread(target=self._loop_verificacao, daemon=True)
+        self.thread.start()
+        logger.info("Reconciliador de execuções iniciado")
+
+    def parar(self):
+        """Para o reconciliador"""
+        self.executando = False
+        if self.thread:
+            self.thread.join(timeout=5)
+        logger.info("Reconciliador de execuções parado")
+
+    def _loop_verificacao(self):
+        """Loop principal que reconcilia execuções periodicamente"""
+        if not self.app:
+            logger.error("App não configurado no reconciliador. Não é possível reconciliar execuções.")
+            return
+
+        with self.app.app_context():
+            while self.executando:
+                try:
+                    self.reconciliar()
+                except Exception as e:
+                    logger.error(f"Erro no loop de reconciliação de execuções: {e}", exc_info=True)
+                finally:
+                    db.session.remove()
+
+                # Aguardar intervalo antes da próxima verificação
+                time.sleep(self.intervalo_verificacao)
+
+    def reconciliar(self) -> Dict[str, int]:
+        """
+        Executa um ciclo completo de reconciliação
+
+        Returns:
+            Dict com contadores do ciclo (verificadas, concluidas, falhas, timeout)
+        """
+        resumo = {'verificadas': 0, 'concluidas': 0, 'falhas': 0, 'timeout': 0}
+
+        ids_pendentes = [
+            row.id for row in db.session.query(Execucao.id).filter(
+                Execucao.job_id.isnot(None),
+                Execucao.status_execucao.in_([
+                    StatusExecucao.EXECUTANDO.value,
+                    StatusExecucao.TENTANDO_NOVAMENTE.value
+                ])
+            ).order_by(Execucao.data_inicio.asc()).all()
+        ]
+
+        if not ids_pendentes:
+            return resumo
+
+        logger.info(f"Reconciliando {len(ids_pendentes)} execução(ões) em andamento")
+
+        client = APIExternaClient(
+            base_url=self.app.config.get('API_EXTERNA_URL', 'http://191.252.218.230:8000'),
+            timeout=30
+        )
+        status_recentes = self._listar_status_recentes(client, len(ids_pendentes))
+
+        for inicio in range(0, len(ids_pendentes), self.tamanho_lote):
+            lote = ids_pendentes[inicio:inicio + self.tamanho_lote]
+            try:
+                parcial = self._reconciliar_lote(client, lote, status_recentes)
+                for chave, valor in parcial.items():
+                    resumo[chave] += valor
+            except SQLAlchemyError as e:
+                logger.error(f"Erro de banco ao reconciliar lote de execuções: {e}", exc_info=True)
+                db.session.rollback()
+
+        if resumo['concluidas'] or resumo['falhas'] or resumo['timeout']:
+            logger.info(
+                f"Reconciliação concluída: {resumo['verificadas']} verificadas, "
+                f"{resumo['concluidas']} concluídas, {resumo['falhas']} falhas, "
+                f"{resumo['timeout']} timeout")
+
+        return resumo
+
+    def _listar_status_recentes(self, client: APIExternaClient, quantidade: int) -> Dict[str, JobStatus]:
+        """
+        Busca o status dos jobs recentes em uma única requisição
+
+        Returns:
+            Dict job_id -> JobStatus (vazio se a listagem não estiver disponível)
+        """
+        try:
+            resposta = client.listar_jobs(limit=max(100, quantidade))
+        except Exception as e:
+            logger.warning(f"Listagem de jobs indisponível, usando consulta individual: {e}")
+            return {}
+
+        jobs = resposta.get('jobs', []) if isinstance(resposta, dict) else resposta
+        status_por_job = {}
+        for job in jobs or []:
+            if isinstance(job, dict) and job.get('job_id'):
+                status_por_job[job['job_id']] = JobStatus.from_api_response(job)
+        return status_por_job
+
+    def _consultar_status(
+        self,
+        client: APIExternaClient,
+        job_id: str,
+        status_recentes: Dict[str, JobStatus]
+    ) -> Optional[JobStatus]:
+        """
+        Obtém o status do job, consultando individualmente se não veio na listagem
+
+        Returns:
+            JobStatus ou None se o job não existe mais na API externa
+
+        Raises:
+            requests.RequestException: Se a API externa estiver indisponível
+        """
+        if job_id in status_recentes:
+            return status_recentes[job_id]
+
+        try:
+            return client.consultar_status(job_id)
+        except ValueError:
+            # Job não encontrado na API externa
+            return None
+
+    def _reconciliar_lote(
+        self,
+        client: APIExternaClient,
+        ids_execucoes: List[Any],
+        status_recentes: Dict[str, JobStatus]
+    ) -> Dict[str, int]:
+        """Reconcilia um lote de execuções em uma única transação"""
+        resumo = {'verificadas': 0, 'concluidas': 0, 'falhas': 0, 'timeout': 0}
+        eventos = []
+        agora = datetime.now()
+        limite_timeout = agora - timedelta(minutes=self.timeout_minutos)
+        limite_maximo = agora - timedelta(minutes=self.limite_maximo_minutos)
+
+        execucoes = Execucao.query.options(*perfil_finalizacao_execucoes()).filter(
+            Execucao.id.in_(ids_execucoes)
+        ).all()
+
+        for execucao in execucoes:
+            if not execucao.esta_em_andamento:
+                continue
+
+            resumo['verificadas'] += 1
+            try:
+                status = self._consultar_status(client, execucao.job_id, status_recentes)
+            except Exception as e:
+                # Sem resposta da API não é possível decidir; tenta no próximo ciclo
+                logger.warning(f"Não foi possível consultar status do job {execucao.job_id}: {e}")
+                continue
+
+            if status is not None and aplicar_resultado_job(status, execucao.processo, execucao):
+                sucesso = status.status == STATUS_JOB_SUCESSO
+                resumo['concluidas' if sucesso else 'falhas'] += 1
+                eventos.append({
+                    'type': 'job_completed' if sucesso else 'job_failed',
+                    'job_id': execucao.job_id,
+                    'processo_id': str(execucao.processo_id),
+                    'execucao_id': str(execucao.id),
+                    'status': execucao.status_execucao
+                })
+            elif self._expirou(execucao, status, limite_timeout, limite_maximo):
+                execucao.marcar_timeout()
+                resumo['timeout'] += 1
+                eventos.append({
+                    'type': 'job_timeout',
+                    'job_id': execucao.job_id,
+                    'processo_id': str(execucao.processo_id),
+                    'execucao_id': str(execucao.id),
+                    'status': execucao.status_execucao
+                })
+
+        if eventos:
+            db.session.commit()
+            self._notificar(eventos)
+
+        return resumo
+
+    @staticmethod
+    def _expirou(
+        execucao: Execucao,
+        status: Optional[JobStatus],
+        limite_timeout: datetime,
+        limite_maximo: datetime
+    ) -> bool:
+        """
+        Indica se a execução sem término deve ser marcada como TIMEOUT
+
+        Um job que a API externa ainda reporta (PENDING/RUNNING) só expira no
+        limite máximo; um job que ela não encontra expira no timeout normal.
+        """
+        if not execucao.data_inicio:
+            return False
+        inicio = execucao.data_inicio.replace(tzinfo=None)
+        if status is None:
+            return inicio < limite_timeout
+        return inicio < limite_maximo
+
+    def _notificar(self, eventos: List[Dict[str, Any]]):
+        """Envia os eventos de término para os clientes SSE conectados"""
+        try:
+            from apps.processos.routes import enviar_evento_sse
+            for evento in eventos:
+                enviar_evento_sse(evento)
+        except Exception as e:
+            logger.warning(f"Não foi possível notificar clientes SSE: {e}")
+
+
+# Instância global do reconciliador
+_reconciliador_instance: Optional[ReconciliadorExecucoes] = None
+
+
+def obter_reconciliador(app=None) -> Optional[ReconciliadorExecucoes]:
+    """
+    Retorna a instância global do reconciliador (singleton)
+
+    Args:
+        app: Instância do Flask app (necessária apenas na primeira chamada)
+
+    Returns:
+        Instância do ReconciliadorExecucoes ou None se não inicializado
+    """
+    global _reconciliador_instance
+
+    if _reconciliador_instance is None and app is not None:
+        # Com o webhook de jobs ativo o polling vira apenas um fallback
+        if app.config.get('WEBHOOK_SECRET'):
+            intervalo = app.config.get('RECONCILIADOR_INTERVALO_FALLBACK', 600)
+        else:
+            intervalo = app.config.get('RECONCILIADOR_INTERVALO', 60)
+
+        _reconciliador_instance = ReconciliadorExecucoes(
+            intervalo_verificacao=intervalo,
+            tamanho_lote=app.config.get('RECONCILIADOR_TAMANHO_LOTE', 50),
+            timeout_minutos=app.config.get('EXECUCAO_TIMEOUT_MINUTOS', 120),
+            limite_maximo_minutos=app.config.get('EXECUCAO_LIMITE_MAXIMO_MINUTOS', 1440),
+            app=app
+        )
+
+    return _reconciliador_instance
+
+
+def iniciar_reconciliador(app):
+    """
+    Inicia o reconciliador de execuções
+
+    Args:
+        app: Instância do Flask app
+    """
+    reconciliador = obter_reconciliador(app)
+    if reconciliador:
+        reconciliador.iniciar()
+
+
+def parar_reconciliador():
+    """Para o reconciliador de execuções"""
+    global _reconciliador_instance
+
+    if _reconciliador_instance is not None:
+        _reconciliador_instance.parar()
+        logger.info("Reconciliador de execuções parado via função global")
+    else:
+        logger.warning("Tentativa de parar reconciliador que não foi inicializado")
@@ -1,6 +1,10 @@
 """
 Sistema de Relatórios e Analytics para API Externa Funcional
 Gera relatórios detalhados, métricas e exportação de dados
+
+Performance, operadoras e tendências vêm do consolidado diário das
+execuções (execucao_stats_daily); a análise de erros, que precisa das
+mensagens, continua sobre o cache de jobs da API.
 """
 import logging
 import json
@@ -11,8 +15,18 @@ from dataclasses import dataclass, asdict
 from collections import defaultdict, Counter
 import io
 
+from flask import has_app_context
+
 logger = logging.getLogger(__name__)
 
+# Status dos jobs da API externa -> status das execuções no consolidado
+STATUS_EXECUCAO = {
+    'COMPLETED': 'CONCLUIDO',
+    'FAILED': 'FALHOU',
+    'CANCELLED': 'CANCELADO',
+    'TIMEOUT': 'TIMEOUT'
+}
+
 
 @dataclass
 class ReportConfig:
@@ -29,6 +43,10 @@ class ReportConfig:
     # Exportação
     export_formats: List[str] = None  # ['json', 'csv', 'xlsx']
 
+    # Origem dos dados de performance, operadoras e tendências:
+    # consolidado (execucao_stats_daily) ou cache (jobs recentes da API)
+    fonte_dados: str = "consolidado"
+
     def __post_init__(self):
         if self.export_formats is None:
             self.export_formats = ['json', 'csv']
@@ -108,17 +126,22 @@ class ReportGenerator:
         period = period or self.config.default_period
         start_date, end_date = self._parse_period(period)
 
-        # Obter jobs do período
-        jobs = self._get_jobs_in_period(start_date, end_date, operadora)
+        if self._usa_consolidado():
+            metrics, trends = self._performance_from_rollup(start_date, end_date, operadora)
+            if metrics is None:
+                return self._empty_report("performance")
+        else:
+            # Obter jobs do período
+            jobs = self._get_jobs_in_period(start_date, end_date, operadora)
 
-        if not jobs:
-            return self._empty_report("performance")
+            if not jobs:
+                return self._empty_report("performance")
 
-        # Calcular métricas
-        metrics = self._calculate_performance_metrics(jobs)
+            # Calcular métricas
+            metrics = self._calculate_performance_metrics(jobs)
 
-        # Calcular tendências
-        trends = self._calculate_trends(jobs, start_date, end_date)
+            # Calcular tendências
+            trends = self._calculate_trends(jobs, start_date, end_date)
 
         return {
             'tipo': 'performance',
@@ -136,14 +159,19 @@ class ReportGenerator:
         period = period or self.config.default_period
         start_date, end_date = self._parse_period(period)
 
-        # Obter jobs do período
-        jobs = self._get_jobs_in_period(start_date, end_date)
+        if self._usa_consolidado():
+            operator_metrics = self._operator_metrics_from_rollup(start_date, end_date)
+            if not operator_metrics:
+                return self._empty_report("operadoras")
+        else:
+            # Obter jobs do período
+            jobs = self._get_jobs_in_period(start_date, end_date)
 
-        if not jobs:
-            return self._empty_report("operadoras")
+            if not jobs:
+                return self._empty_report("operadoras")
 
-        # Agrupar por operadora
-        operator_metrics = self._calculate_operator_metrics(jobs)
+            # Agrupar por operadora
+            operator_metrics = self._calculate_operator_metrics(jobs)
 
         return {
             'tipo': 'operadoras',
@@ -190,15 +218,25 @@ class ReportGenerator:
 
         # Calcular métricas gerais
         start_date, end_date = self._parse_period(period)
-        jobs = self._get_jobs_in_period(start_date, end_date)
+
+        if self._usa_consolidado():
+            metricas = performance.get('metricas', {})
+            total_jobs = metricas.get('total_jobs', 0)
+            operadoras_ativas = operators.get('total_operadoras', 0)
+            taxa_sucesso = metricas.get('success_rate', 0.0)
+        else:
+            jobs = self._get_jobs_in_period(start_date, end_date)
+            total_jobs = len(jobs)
+            operadoras_ativas = len(set(job.operadora for job in jobs))
+            taxa_sucesso = self._calculate_success_rate(jobs)
 
         general_metrics = {
             'periodo_total': period,
-            'total_jobs': len(jobs),
+            'total_jobs': total_jobs,
             'periodo_dias': (end_date - start_date).days,
-            'jobs_por_dia': len(jobs) / max((end_date - start_date).days, 1),
-            'operadoras_ativas': len(set(job.operadora for job in jobs)),
-            'taxa_sucesso_geral': self._calculate_success_rate(jobs)
+            'jobs_por_dia': total_jobs / max((end_date - start_date).days, 1),
+            'operadoras_ativas': operadoras_ativas,
+            'taxa_sucesso_geral': taxa_sucesso
         }
 
         return {
@@ -243,6 +281,129 @@ class ReportGenerator:
 
         return start_date, end_date
 
+    def _usa_consolidado(self) -> bool:
+        """
+        Lê o consolidado diário das execuções (requer contexto da aplicação e
+        o consolidado completo; senão usa o cache de jobs)
+        """
+        if self.config.fonte_dados != 'consolidado' or not has_app_context():
+            return False
+        from apps.services.consolidado_execucoes import consolidado_disponivel
+        return consolidado_disponivel()
+
+    def _rollup_rows(self, start_date: datetime, end_date: datetime, *agrupamento,
+                     operadora: str = None) -> List[Tuple[Tuple, Any]]:
+        """
+        Linhas do consolidado diário do período, agrupadas
+
+        Returns:
+            Lista de (valores do agrupamento, Acumulado)
+        """
+        from apps import db
+        from apps.models import ExecucaoStatsDaily, Operadora
+        from apps.services import consolidado_execucoes as consolidado
+
+        tabela = ExecucaoStatsDaily.__table__
+        consulta = consolidado.consulta_consolidado(
+            *agrupamento, dia_inicio=start_date.date(), dia_fim=end_date.date()
+        ).join(Operadora, Operadora.id == tabela.c.operadora_id)
+        if operadora:
+            consulta = consulta.where(Operadora.codigo == operadora)
+
+        return [
+            (tuple(linha)[:len(agrupamento)], consolidado.acumulado_da_linha(linha))
+            for linha in db.session.execute(consulta)
+        ]
+
+    def _performance_from_rollup(self, start_date: datetime, end_date: datetime,
+                                 operadora: str = None) -> Tuple[Optional[PerformanceMetrics], List[TrendData]]:
+        """Métricas de performance e tendências diárias a partir do consolidado"""
+        from apps.models import ExecucaoStatsDaily
+        from apps.services import consolidado_execucoes as consolidado
+
+        tabela = ExecucaoStatsDaily.__table__
+        linhas = self._rollup_rows(start_date, end_date, tabela.c.dia, tabela.c.status_execucao,
+                                   operadora=operadora)
+        if not linhas:
+            return None, []
+
+        por_status = Counter()
+        por_dia = defaultdict(list)
+        for (dia, status), acumulado in linhas:
+            por_status[status] += acumulado.quantidade
+            por_dia[dia].append((status, acumulado))
+
+        total_jobs = sum(por_status.values())
+        duracoes = consolidado.somar_acumulados(acumulado for _, acumulado in linhas)
+        successful_jobs = por_status[STATUS_EXECUCAO['COMPLETED']]
+        failed_jobs = por_status[STATUS_EXECUCAO['FAILED']]
+        period_days = max((end_date - start_date).days, 1)
+
+        metrics = PerformanceMetrics(
+            total_jobs=total_jobs,
+            successful_jobs=successful_jobs,
+            failed_jobs=failed_jobs,
+            cancelled_jobs=por_status[STATUS_EXECUCAO['CANCELLED']],
+            timeout_jobs=por_status[STATUS_EXECUCAO['TIMEOUT']],
+            avg_duration=consolidado.duracao_media(duracoes),
+            min_duration=duracoes.min_duracao or 0,
+            max_duration=duracoes.max_duracao or 0,
+            success_rate=(successful_jobs / total_jobs * 100) if total_jobs > 0 else 0,
+            failure_rate=(failed_jobs / total_jobs * 100) if total_jobs > 0 else 0,
+            jobs_per_hour=total_jobs / (period_days * 24),
+            jobs_per_day=total_jobs / period_days
+        )
+
+        trends = []
+        for dia, grupos in sorted(por_dia.items()):
+            contagem = Counter()
+            for status, acumulado in grupos:
+                contagem[status] += acumulado.quantidade
+            trends.append(TrendData(
+                date=dia.isoformat(),
+                jobs_count=sum(contagem.values()),
+                success_count=contagem[STATUS_EXECUCAO['COMPLETED']],
+                failure_count=contagem[STATUS_EXECUCAO['FAILED']],
+                avg_duration=consolidado.duracao_media(
+                    consolidado.somar_acumulados(acumulado for _, acumulado in grupos)
+                )
+            ))
+
+        return metrics, trends
+
+    def _operator_metrics_from_rollup(self, start_date: datetime, end_date: datetime) -> List[OperatorMetrics]:
+        """Métricas por operadora a partir do consolidado"""
+        from apps.models import ExecucaoStatsDaily, Operadora
+        from apps.services import consolidado_execucoes as consolidado
+
+        tabela = ExecucaoStatsDaily.__table__
+        por_operadora = defaultdict(list)
+        for (codigo, status), acumulado in self._rollup_rows(
+                start_date, end_date, Operadora.codigo, tabela.c.status_execucao):
+            por_operadora[codigo].append((status, acumulado))
+
+        metrics = []
+        for codigo, grupos in por_operadora.items():
+            contagem = Counter()
+            for status, acumulado in grupos:
+                contagem[status] += acumulado.quantidade
+            total = sum(contagem.values())
+            duracoes = consolidado.somar_acumulados(acumulado for _, acumulado in grupos)
+
+            metrics.append(OperatorMetrics(
+                operadora=codigo,
+                total_jobs=total,
+                successful_jobs=contagem[STATUS_EXECUCAO['COMPLETED']],
+                failed_jobs=contagem[STATUS_EXECUCAO['FAILED']],
+                success_rate=(contagem[STATUS_EXECUCAO['COMPLETED']] / total * 100) if total > 0 else 0,
+                avg_duration=consolidado.duracao_media(duracoes),
+                total_duration=duracoes.soma_duracao
+            ))
+
+        # Ordenar por total de jobs
+        metrics.sort(key=lambda x: x.total_jobs, reverse=True)
+        return metrics
+
     def _get_jobs_in_period(self, start_date: datetime, end_date: datetime,
                             operadora: str = None) -> List[Any]:
         """Obtém jobs em um período"""
@@ -8,7 +8,10 @@ from flask_login import login_required
 import requests
 import json
 import logging
-from typing import Generator, Dict, Any
+from typing import Generator, Dict, Any, Optional
+
+from .multiplexador_logs import get_multiplexador_logs
+from .armazenamento_logs import get_armazenamento_logs
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -32,127 +35,76 @@ def get_api_token() -> str:
         raise
 
 
-def stream_logs_filtrados(job_id: str, api_url: str, token: str) -> Generator[str, None, None]:
+def capturar_logs_job(job_id: str):
+    """
+    Inicia a captura dos logs de um job recém-criado no armazenamento local
+
+    Só com LOGS_JOBS_CAPTURAR: mantém a conexão compartilhada com o stream de
+    logs enquanto o job estiver em andamento. Falhas não impedem a criação do
+    job; o histórico continua disponível pela API externa.
+    """
+    if not current_app.config.get('LOGS_JOBS_CAPTURAR'):
+        return
+
+    try:
+        multiplexador = get_multiplexador_logs()
+        multiplexador.configurar(
+            current_app.config.get('API_EXTERNA_URL', 'http://191.252.218.230:8000'),
+            get_api_token(),
+            get_armazenamento_logs()
+        )
+        multiplexador.capturar(job_id, current_app.config.get('EXECUCAO_TIMEOUT_MINUTOS', 120) * 60)
+    except Exception as e:
+        logger.warning(f"Não foi possível iniciar a captura de logs do job {job_id}: {e}")
+
+
+def stream_logs_filtrados(
+    job_id: str,
+    api_url: str,
+    token: str,
+    ultimo_id: Optional[int] = None
+) -> Generator[str, None, None]:
     """
     Stream de logs filtrados por job_id da API externa
 
+    Os eventos vêm da conexão compartilhada do multiplexador, de modo que
+    o número de conexões com a API externa não cresce com o número de abas.
+
     Args:
         job_id: ID do job para filtrar logs
         api_url: URL base da API externa
         token: Token JWT para autenticação
+        ultimo_id: Último id recebido pelo cliente (Last-Event-ID); apenas os
+            eventos posteriores são reenviados a partir do buffer de replay
 
     Yields:
         str: Dados de log formatados para SSE
     """
-    try:
-        # URL do endpoint de logs da API externa
-        url = f"{api_url}/events/logs"
-
-        # Headers com autenticação
-        headers = {
-            'Authorization': f'Bearer {token}',
-            'Accept': 'text/event-stream',
-            'Cache-Control': 'no-cache'
-        }
+    multiplexador = get_multiplexador_logs()
+    multiplexador.configurar(api_url, token, get_armazenamento_logs())
+    assinatura = multiplexador.assinar(job_id, ultimo_id=ultimo_id)
 
+    try:
         logger.info(f"Iniciando stream de logs para job_id: {job_id}")
 
-        # Fazer requisição para a API externa
-        # IMPORTANTE: Sem read timeout, apenas connect timeout
-        # SSE streams podem ficar silenciosos por longos períodos
-        response = requests.get(url, headers=headers, stream=True, timeout=(10, None))
-        response.raise_for_status()
+        while True:
+            item = assinatura.proximo(timeout=15)
+            if item is None:
+                # Manter conexão viva enquanto não chegam logs
+                yield ": keepalive\n\n"
+                continue
 
-        # Processar stream de dados
-        for line in response.iter_lines(decode_unicode=True):
-            if line:
-                # Verificar se é uma linha de dados SSE
-                if line.startswith('data: '):
-                    try:
-                        # Extrair dados JSON
-                        json_data = line[6:]  # Remove 'data: '
-                        data = json.loads(json_data)
-
-                        # Filtrar RIGOROSAMENTE por job_id
-                        log_job_id = data.get('job_id')
-                        
-                        # CRÍTICO: Só aceitar logs do job EXATO solicitado
-                        # Logs históricos/UNKNOWN são DESCARTADOS para evitar poluição
-                        if data.get('type') == 'log' and log_job_id == job_id:
-                            
-                            # Garantir timestamp válido (fallback para agora se vazio)
-                            from datetime import datetime
-                            timestamp = data.get('timestamp')
-                            if not timestamp or timestamp == '':
-                                timestamp = datetime.utcnow().isoformat() + 'Z'
-
-                            # Formatar para SSE (NÃO reescrever job_id!)
-                            formatted_data = {
-                                'type': data.get('type', 'log'),
-                                'level': data.get('level', 'INFO'),
-                                'message': data.get('message', ''),
-                                'operadora': data.get('operadora', 'UNKNOWN'),
-                                'job_id': log_job_id,  # Usar job_id ORIGINAL, não forçar
-                                'timestamp': timestamp,
-                                'service': data.get('service', 'rpa-api'),
-                                'logger': data.get('logger', 'app.main')
-                            }
-
-                            # Detectar conclusão do job
-                            message = data.get('message', '').lower()
-                            level = data.get('level', 'INFO')
-                            
-                            # CRÍTICO: Verificar se a mensagem de conclusão é do job ATUAL
-                            if level == 'WARN' and 'concluído' in message:
-                                # Extrair job_id da mensagem de conclusão
-                                # Formato: "Job <job_id> concluído..."
-                                if f'job {job_id}' in message.lower():
-                                    # Job ATUAL terminou - extrair status
-                                    if 'completed' in message.lower():
-                                        formatted_data['job_status'] = 'COMPLETED'
-                                        formatted_data['type'] = 'job_completed'
-                                    elif 'failed' in message.lower() or 'erro' in message:
-                                        formatted_data['job_status'] = 'FAILED'
-                                        formatted_data['type'] = 'job_failed'
-                                    else:
-                                        formatted_data['job_status'] = 'COMPLETED'
-                                        formatted_data['type'] = 'job_completed'
-                                # Se não é do job atual, ignorar (não enviar)
-                                else:
-                                    continue
-
-                            # Enviar dados formatados
-                            yield f"data: {json.dumps(formatted_data)}\n\n"
-
-                    except json.JSONDecodeError as e:
-                        logger.warning(f"Erro ao decodificar JSON: {e}")
-                        continue
-                    except Exception as e:
-                        logger.error(f"Erro ao processar linha de log: {e}")
-                        continue
-
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Erro na requisição para API externa: {e}")
-        # Enviar mensagem de erro
-        error_data = {
-            'type': 'error',
-            'message': f'Erro de conexão: {str(e)}',
-            'timestamp': ''
-        }
-        yield f"data: {json.dumps(error_data)}\n\n"
+            event_id, dados = item
+            if event_id is None:
+                yield f"data: {dados}\n\n"
+            else:
+                yield f"id: {event_id}\ndata: {dados}\n\n"
 
-    except Exception as e:
-        import traceback
-        tb = traceback.format_exc()
-        logger.error(f"Erro inesperado no stream de logs: {e}")
-        logger.error(f"Traceback completo:\n{tb}")
-        # Enviar mensagem de erro
-        error_data = {
-            'type': 'error',
-            'message': f'Erro interno: {str(e)}',
-            'timestamp': ''
-        }
-        yield f"data: {json.dumps(error_data)}\n\n"
+    except GeneratorExit:
+        logger.info(f"Cliente desconectou do stream de logs do job {job_id}")
+
+    finally:
+        multiplexador.cancelar(assinatura)
 
 
 @api_logs_tempo_real_bp.route('/stream/<job_id>')
@@ -186,17 +138,25 @@ def stream_logs(job_id: str):
         if not token:
             raise ValueError("Token JWT não configurado no sistema")
 
+        # Reconexão do EventSource: retomar a partir do último evento recebido
+        ultimo_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        try:
+            ultimo_id = int(ultimo_id) if ultimo_id else None
+        except ValueError:
+            ultimo_id = None
+
         def generate():
             # Enviar evento de conexão
             connection_data = {
                 'type': 'connection',
                 'message': f'Conectado ao stream de logs para job {job_id}',
-                'timestamp': ''
+                'timestamp': '',
+                'resumed': ultimo_id is not None
             }
             yield f"data: {json.dumps(connection_data)}\n\n"
 
             # Stream de logs filtrados (passar api_url e token como parâmetros)
-            for log_data in stream_logs_filtrados(job_id, api_url, token):
+            for log_data in stream_logs_filtrados(job_id, api_url, token, ultimo_id):
                 yield log_data
 
         return Response(
@@ -276,9 +236,8 @@ def atualizar_status_job(job_id: str):
         
         # Adicionar mensagem aos logs
         if mensagem:
-            logs_atuais = execucao.mensagem_log or ''
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            execucao.mensagem_log = f"{logs_atuais}\n[{timestamp}] {mensagem}"
+            execucao.adicionar_log(mensagem)
+            execucao.mensagem_log = mensagem
         
         # Salvar no banco
         db.session.commit()
@@ -419,3 +378,61 @@ def teste_conexao():
             'message': f'Erro interno: {str(e)}',
             'status_code': 500
         }
+
+
+@api_logs_tempo_real_bp.route('/metricas')
+@login_required
+def metricas_stream():
+    """
+    Métricas da conexão compartilhada com o stream de logs
+
+    Returns:
+        dict: Conexões upstream, reconexões, assinantes e eventos roteados
+    """
+    return {
+        'success': True,
+        'data': get_multiplexador_logs().get_stats()
+    }
+
+
+@api_logs_tempo_real_bp.route('/historico/<job_id>')
+@login_required
+def historico_logs(job_id: str):
+    """
+    Histórico de logs de um job a partir do armazenamento local
+
+    Query params:
+        inicio: Posição do primeiro evento (padrão: 0)
+        limite: Quantidade máxima de eventos (padrão: 500)
+        cauda: Se informado, retorna apenas os últimos N eventos
+
+    Returns:
+        dict: Eventos de log capturados do stream, sem chamar a API externa
+    """
+    try:
+        armazenamento = get_armazenamento_logs()
+        if not armazenamento.existe(job_id):
+            return {
+                'success': False,
+                'message': f'Nenhum log armazenado para o job {job_id}'
+            }, 404
+
+        cauda = request.args.get('cauda', type=int)
+        if cauda:
+            logs = armazenamento.cauda(job_id, min(cauda, 5000))
+        else:
+            inicio = max(request.args.get('inicio', 0, type=int), 0)
+            limite = min(max(request.args.get('limite', 500, type=int), 1), 5000)
+            logs = armazenamento.ler(job_id, inicio=inicio, limite=limite)
+
+        return {
+            'success': True,
+            'job_id': job_id,
+            'total': armazenamento.contar(job_id),
+            'fechado': armazenamento.esta_fechado(job_id),
+            'completo': armazenamento.esta_completo(job_id),
+            'logs': logs
+        }
+
+    except ValueError as e:
+        return {'success': False, 'message': str(e)}, 400
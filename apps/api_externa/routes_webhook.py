@@ -0,0 +1,137 @@
+"""
+Rotas para recebimento de eventos de jobs enviados pela API externa (webhook)
+"""
+
+from flask import Blueprint, request, jsonify, current_app
+from flask_login import login_required
+import json
+import logging
+
+from .webhook import (
+    CABECALHO_ASSINATURA,
+    CABECALHO_TIMESTAMP,
+    verificar_assinatura,
+    normalizar_sequence,
+    obter_deduplicador,
+    obter_escritor
+)
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+# Criar blueprint
+api_webhook_bp = Blueprint('api_webhook', __name__, url_prefix='/api/v2/webhook')
+
+
+@api_webhook_bp.route('/jobs', methods=['POST'])
+def receber_eventos_jobs():
+    """
+    Recebe transições de status de jobs enviadas pela API externa
+
+    Headers:
+        X-Webhook-Timestamp: epoch em segundos do envio
+        X-Webhook-Signature: sha256=<hmac_hex("<timestamp>.<corpo>")>
+
+    Expected JSON body (evento único ou lista em "events"):
+        {
+            "job_id": "abc-123",
+            "status": "COMPLETED",
+            "sequence": 7,
+            "operadora": "VIVO",
+            "progress": 100,
+            "result": {...},
+            "error": null
+        }
+
+    Returns:
+        JSON: Quantidade de eventos aceitos e duplicados
+    """
+    segredo = current_app.config.get('WEBHOOK_SECRET')
+    if not segredo:
+        return jsonify({
+            'success': False,
+            'error': 'WEBHOOK_DISABLED',
+            'message': 'Webhook de jobs não configurado'
+        }), 503
+
+    corpo = request.get_data()
+    valido, motivo = verificar_assinatura(
+        segredo,
+        request.headers.get(CABECALHO_TIMESTAMP),
+        request.headers.get(CABECALHO_ASSINATURA),
+        corpo,
+        tolerancia_segundos=current_app.config.get('WEBHOOK_TOLERANCIA_SEGUNDOS', 300)
+    )
+    if not valido:
+        logger.warning(f"Webhook de jobs rejeitado: {motivo}")
+        return jsonify({
+            'success': False,
+            'error': 'INVALID_SIGNATURE',
+            'message': motivo
+        }), 401
+
+    try:
+        payload = json.loads(corpo or b'{}')
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'INVALID_JSON',
+            'message': 'Corpo da requisição não é um JSON válido'
+        }), 400
+
+    eventos = payload.get('events', [payload]) if isinstance(payload, dict) else payload
+    if not isinstance(eventos, list):
+        eventos = []
+
+    # O sequence é validado antes de aceitar qualquer evento: um valor inválido
+    # não pode derrubar o lote gravado depois da resposta 202
+    for evento in eventos:
+        if not isinstance(evento, dict):
+            continue
+        sequence = normalizar_sequence(evento.get('sequence'))
+        if sequence is None:
+            return jsonify({
+                'success': False,
+                'error': 'INVALID_SEQUENCE',
+                'message': f"Campo sequence inválido no evento do job {evento.get('job_id')}: deve ser inteiro"
+            }), 400
+        evento['sequence'] = sequence
+
+    deduplicador = obter_deduplicador(current_app._get_current_object())
+    escritor = obter_escritor(current_app._get_current_object())
+
+    aceitos = 0
+    duplicados = 0
+    invalidos = 0
+    for evento in eventos:
+        if not isinstance(evento, dict) or not evento.get('job_id') or not evento.get('status'):
+            invalidos += 1
+            continue
+
+        chave = (str(evento['job_id']), str(evento['status']), evento['sequence'])
+        if not deduplicador.registrar(chave):
+            duplicados += 1
+            continue
+
+        escritor.enfileirar(evento, chave)
+        aceitos += 1
+
+    logger.info(f"Webhook de jobs: {aceitos} aceitos, {duplicados} duplicados, {invalidos} inválidos")
+
+    return jsonify({
+        'success': True,
+        'aceitos': aceitos,
+        'duplicados': duplicados,
+        'invalidos': invalidos
+    }), 202
+
+
+@api_webhook_bp.route('/jobs/stats', methods=['GET'])
+@login_required
+def estatisticas_webhook():
+    """Retorna estatísticas do escritor de eventos de jobs"""
+    escritor = obter_escritor()
+    return jsonify({
+        'success': True,
+        'data': escritor.get_stats() if escritor else None
+    })
@@ -246,12 +246,35 @@ class APIExternaService:
                 db.session.commit()
             raise
 
-    def executar_sat(self, processo: Processo) -> JobResponse:
+    @staticmethod
+    def criar_execucao_sat(processo: Processo) -> Execucao:
+        """
+        Cria (sem persistir) a execução de rastreamento de um upload SAT
+        
+        Args:
+            processo: Processo do banco de dados
+            
+        Returns:
+            Execucao em andamento para o processo
+        """
+        endpoint = "/executar/sat"
+        return Execucao(
+            processo_id=processo.id,
+            tipo_execucao=TipoExecucao.UPLOAD_SAT.value,
+            status_execucao=StatusExecucao.EXECUTANDO.value,
+            classe_rpa_utilizada="API_EXTERNA_SAT_PRODUCAO",
+            parametros_entrada={"endpoint": endpoint},
+            data_inicio=datetime.now()
+        )
+
+    def executar_sat(self, processo: Processo, execucao: Optional[Execucao] = None) -> JobResponse:
         """
         Executa upload no SAT (cria job assíncrono)
         
         Args:
             processo: Processo do banco de dados
+            execucao: Execução já criada para o processo (envio em lote);
+                se não informada, uma nova execução é criada
             
         Returns:
             JobResponse com informações do job criado
@@ -259,24 +282,16 @@ class APIExternaService:
         Raises:
             requests.RequestException: Se houver erro na comunicação
         """
-        execucao = None
-        
         try:
             endpoint = "/executar/sat"
             
             logger.info(f"Executando SAT para processo {processo.id}")
 
             # Criar execução para rastreamento
-            execucao = Execucao(
-                processo_id=processo.id,
-                tipo_execucao=TipoExecucao.UPLOAD_SAT.value,
-                status_execucao=StatusExecucao.EXECUTANDO.value,
-                classe_rpa_utilizada="API_EXTERNA_SAT_PRODUCAO",
-                parametros_entrada={"endpoint": endpoint},
-                data_inicio=datetime.now()
-            )
-            db.session.add(execucao)
-            db.session.commit()
+            if execucao is None:
+                execucao = self.criar_execucao_sat(processo)
+                db.session.add(execucao)
+                db.session.commit()
 
             # Criar payload
             payload = self.criar_payload_sat(processo)
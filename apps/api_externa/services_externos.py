@@ -16,6 +16,8 @@ from .models import (
 )
 from .cache import get_cache
 from .monitor import get_monitor
+from .transicoes import aplicar_resultado_sucesso, aplicar_resultado_falha
+from .armazenamento_logs import get_armazenamento_logs
 
 from apps.models import Processo, Cliente, Operadora, Execucao
 from apps import db
@@ -793,12 +795,7 @@ class APIExternaFuncionalService:
             if processo_id:
                 processo = Processo.query.get(processo_id)
                 if processo:
-                    # Determinar novo status baseado na operadora
-                    if status.operadora == "SAT":
-                        processo.status_processo = "SAT_CONCLUIDO"
-                    else:
-                        processo.status_processo = "DOWNLOAD_CONCLUIDO"
-
+                    aplicar_resultado_sucesso(status, processo)
                     db.session.commit()
                     logger.info(
                         f"Status do processo {processo_id} atualizado para sucesso")
@@ -812,7 +809,6 @@ class APIExternaFuncionalService:
                 message=f"Job {job_id} concluído com sucesso",
                 details={"result": status.result}
             )
-            logger.info(f"Job {job_id} concluído com sucesso: {status.result}")
 
         except Exception as e:
             logger.error(
@@ -824,12 +820,7 @@ class APIExternaFuncionalService:
             if processo_id:
                 processo = Processo.query.get(processo_id)
                 if processo:
-                    # Determinar novo status baseado na operadora
-                    if status.operadora == "SAT":
-                        processo.status_processo = "ERRO_SAT"
-                    else:
-                        processo.status_processo = "ERRO_DOWNLOAD"
-
+                    aplicar_resultado_falha(status, processo)
                     db.session.commit()
                     logger.info(
                         f"Status do processo {processo_id} atualizado para erro")
@@ -843,7 +834,6 @@ class APIExternaFuncionalService:
                 message=f"Job {job_id} falhou: {status.error}",
                 details={"error": status.error}
             )
-            logger.error(f"Job {job_id} falhou: {status.error}")
 
         except Exception as e:
             logger.error(
@@ -897,6 +887,12 @@ class APIExternaFuncionalService:
             Lista de logs
         """
         try:
+            # Histórico completo (capturado desde a criação do job e já
+            # fechado) vem do armazenamento local; parcial vem da API externa
+            armazenamento = get_armazenamento_logs()
+            if armazenamento.esta_completo(job_id):
+                return armazenamento.ler(job_id)
+
             return self.client.obter_logs(job_id)
         except Exception as e:
             logger.error(f"Erro ao obter logs do job {job_id}: {str(e)}")
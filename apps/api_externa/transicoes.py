@@ -0,0 +1,137 @@
+"""
+Transições de status de Execução/Processo a partir do resultado de jobs da API externa
+
+As funções deste módulo apenas alteram os objetos na sessão; o commit fica a
+cargo de quem chama, permitindo aplicar várias transições na mesma transação.
+"""
+import logging
+from datetime import datetime
+from typing import Optional
+
+from .models import JobStatus
+
+from apps.models import Processo, Execucao
+from apps.models.execucao import TipoExecucao
+
+logger = logging.getLogger(__name__)
+
+STATUS_JOB_SUCESSO = 'COMPLETED'
+STATUS_JOB_FALHA = 'FAILED'
+
+
+def _eh_job_sat(status: JobStatus, execucao: Optional[Execucao] = None) -> bool:
+    """Indica se o job corresponde a um envio para o SAT"""
+    if status.operadora == "SAT":
+        return True
+    return bool(execucao and execucao.tipo_execucao == TipoExecucao.UPLOAD_SAT.value)
+
+
+def aplicar_resultado_sucesso(
+    status: JobStatus,
+    processo: Optional[Processo] = None,
+    execucao: Optional[Execucao] = None
+) -> None:
+    """
+    Aplica a transição de sucesso de um job (sem commit)
+
+    Args:
+        status: Status final do job
+        processo: Processo associado (opcional)
+        execucao: Execução associada (opcional)
+    """
+    resultado = status.result if isinstance(status.result, dict) else {}
+    eh_sat = _eh_job_sat(status, execucao)
+
+    if execucao and execucao.esta_em_andamento:
+        execucao.finalizar_com_sucesso(
+            resultado={
+                **(execucao.resultado_saida or {}),
+                'status': STATUS_JOB_SUCESSO,
+                'result': status.result,
+                'finalizado_em': datetime.now().isoformat()
+            },
+            url_arquivo=resultado.get('arquivo_fatura')
+        )
+        execucao.adicionar_log(f"Job {status.job_id} concluído com sucesso")
+
+    if processo:
+        # Determinar novo status baseado na operadora
+        if eh_sat:
+            processo.status_processo = "SAT_CONCLUIDO"
+        else:
+            processo.status_processo = "DOWNLOAD_CONCLUIDO"
+
+    logger.info(f"Job {status.job_id} concluído com sucesso: {status.result}")
+
+
+def registrar_fatura_do_resultado(
+    status: JobStatus,
+    processo: Optional[Processo] = None,
+    execucao: Optional[Execucao] = None
+) -> None:
+    """
+    Grava no processo o arquivo da fatura baixada pelo job (sem commit)
+
+    Mesmo registro que a atualização de status por job fazia ao concluir um
+    download (url_fatura e caminho_s3_fatura com o arquivo_fatura do
+    resultado); envios para o SAT não alteram a fatura.
+    """
+    resultado = status.result if isinstance(status.result, dict) else {}
+    if processo and not _eh_job_sat(status, execucao) and resultado.get('arquivo_fatura'):
+        processo.url_fatura = resultado['arquivo_fatura']
+        processo.caminho_s3_fatura = resultado['arquivo_fatura']
+
+
+def aplicar_resultado_falha(
+    status: JobStatus,
+    processo: Optional[Processo] = None,
+    execucao: Optional[Execucao] = None
+) -> None:
+    """
+    Aplica a transição de falha de um job (sem commit)
+
+    Args:
+        status: Status final do job
+        processo: Processo associado (opcional)
+        execucao: Execução associada (opcional)
+    """
+    eh_sat = _eh_job_sat(status, execucao)
+
+    if execucao and execucao.esta_em_andamento:
+        execucao.finalizar_com_erro(
+            Exception('Job falhou na API externa'),
+            {'message': status.error or 'Job falhou sem detalhes', 'job_id': status.job_id}
+        )
+
+    if processo:
+        # Determinar novo status baseado na operadora
+        if eh_sat:
+            processo.status_processo = "ERRO_SAT"
+        else:
+            processo.status_processo = "ERRO_DOWNLOAD"
+
+    logger.error(f"Job {status.job_id} falhou: {status.error}")
+
+
+def aplicar_resultado_job(
+    status: JobStatus,
+    processo: Optional[Processo] = None,
+    execucao: Optional[Execucao] = None
+) -> bool:
+    """
+    Aplica a transição correspondente ao status final do job (sem commit)
+
+    Usada pelo reconciliador e pelo webhook, que substituem a atualização de
+    status por job: no sucesso também grava a fatura do resultado.
+
+    Returns:
+        bool: True se o job estava finalizado e a transição foi aplicada
+    """
+    if status.status == STATUS_JOB_SUCESSO:
+        aplicar_resultado_sucesso(status, processo, execucao)
+        registrar_fatura_do_resultado(status, processo, execucao)
+        return True
+    if status.status == STATUS_JOB_FALHA:
+        aplicar_resultado_falha(status, processo, execucao)
+        return True
+    return False
@@ -0,0 +1,385 @@
+"""
+Recebimento de eventos de jobs enviados pela API externa (push)
+
+Verificação de assinatura HMAC, proteção contra replay, deduplicação de
+eventos por (job_id, status, sequence) no banco e gravação em lote
+"""
+
+import hashlib
+import hmac
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Dict, List, Any, Tuple
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from apps import db
+from apps.models import Execucao, EventoWebhookJob
+from apps.models.perfis_carga import perfil_finalizacao_execucoes
+
+from .models import JobStatus
+from .transicoes import aplicar_resultado_job, STATUS_JOB_SUCESSO, STATUS_JOB_FALHA
+
+logger = logging.getLogger(__name__)
+
+CABECALHO_ASSINATURA = 'X-Webhook-Signature'
+CABECALHO_TIMESTAMP = 'X-Webhook-Timestamp'
+
+STATUS_JOB_FINAIS = (STATUS_JOB_SUCESSO, STATUS_JOB_FALHA)
+
+
+# ============================================================================
+# ASSINATURA E REPLAY
+# ============================================================================
+
+def calcular_assinatura(segredo: str, timestamp: str, corpo: bytes) -> str:
+    """
+    Calcula a assinatura HMAC-SHA256 de um payload
+
+    A mensagem assinada é "<timestamp>.<corpo>", para que o timestamp não
+    possa ser trocado sem invalidar a assinatura.
+    """
+    mensagem = timestamp.encode('utf-8') + b'.' + corpo
+    return 'sha256=' + hmac.new(segredo.encode('utf-8'), mensagem, hashlib.sha256).hexdigest()
+
+
+def verificar_assinatura(
+    segredo: str,
+    timestamp: Optional[str],
+    assinatura: Optional[str],
+    corpo: bytes,
+    tolerancia_segundos: int = 300
+) -> Tuple[bool, str]:
+    """
+    Verifica assinatura e janela de tempo de um payload recebido
+
+    Returns:
+        Tupla (válido, motivo)
+    """
+    if not timestamp or not assinatura:
+        return False, 'Cabeçalhos de assinatura ausentes'
+
+    try:
+        instante = int(timestamp)
+    except ValueError:
+        return False, 'Timestamp inválido'
+
+    if abs(time.time() - instante) > tolerancia_segundos:
+        return False, 'Timestamp fora da janela permitida'
+
+    esperada = calcular_assinatura(segredo, timestamp, corpo)
+    if not hmac.compare_digest(esperada, assinatura.strip()):
+        return False, 'Assinatura inválida'
+
+    return True, ''
+
+
+class DeduplicadorEventos:
+    """
+    Registra as chaves dos eventos aceitos na tabela webhook_eventos_jobs
+
+    A restrição única da tabela decide quem grava cada evento, de modo que um
+    reenvio é reconhecido como duplicado em qualquer worker e depois de
+    reinícios. Chaves mais antigas que a retenção são removidas
+    periodicamente.
+    """
+
+    def __init__(self, ttl_segundos: int = 86400, intervalo_limpeza: int = 300):
+        self.ttl_segundos = ttl_segundos
+        self.intervalo_limpeza = intervalo_limpeza
+        self._ultima_limpeza = 0.0
+        self._lock = threading.Lock()
+
+    def registrar(self, chave: Tuple[str, str, int]) -> bool:
+        """
+        Registra a chave do evento (insert-or-ignore)
+
+        Returns:
+            bool: True se o evento é novo, False se é duplicado
+        """
+        self._limpar_expirados()
+
+        tabela = EventoWebhookJob.__table__
+        valores = {'job_id': chave[0], 'status': chave[1], 'sequence': chave[2], 'recebido_em': datetime.now()}
+
+        dialeto = db.engine.dialect.name
+        if dialeto in ('postgresql', 'sqlite'):
+            insert = postgresql.insert if dialeto == 'postgresql' else sqlite.insert
+            comando = insert(tabela).values(**valores).on_conflict_do_nothing(
+                index_elements=['job_id', 'status', 'sequence']
+            )
+        elif dialeto in ('mysql', 'mariadb'):
+            comando = tabela.insert().prefix_with('IGNORE').values(**valores)
+        else:
+            comando = tabela.insert().values(**valores)
+
+        # Transação própria: a chave vale para os outros workers assim que a resposta sai
+        try:
+            with db.engine.begin() as conexao:
+                return conexao.execute(comando).rowcount == 1
+        except IntegrityError:
+            return False
+
+    def remover(self, chaves: List[Tuple[str, str, int]]):
+        """Esquece chaves de eventos que não foram gravados, para aceitar o reenvio"""
+        if not chaves:
+            return
+        tabela = EventoWebhookJob.__table__
+        with db.engine.begin() as conexao:
+            for job_id, status, sequence in chaves:
+                conexao.execute(tabela.delete().where(
+                    tabela.c.job_id == job_id, tabela.c.status == status, tabela.c.sequence == sequence
+                ))
+
+    def _limpar_expirados(self):
+        """Remove as chaves fora da retenção (no máximo uma vez por intervalo em cada worker)"""
+        agora = time.time()
+        with self._lock:
+            if agora - self._ultima_limpeza < self.intervalo_limpeza:
+                return
+            self._ultima_limpeza = agora
+
+        tabela = EventoWebhookJob.__table__
+        limite = datetime.now() - timedelta(seconds=self.ttl_segundos)
+        try:
+            with db.engine.begin() as conexao:
+                removidas = conexao.execute(tabela.delete().where(tabela.c.recebido_em < limite)).rowcount
+            if removidas:
+                logger.debug(f"{removidas} chaves de eventos de webhook expiradas removidas")
+        except SQLAlchemyError as e:
+            logger.warning(f"Erro ao limpar chaves de eventos de webhook: {e}")
+
+
+# ============================================================================
+# GRAVAÇÃO EM LOTE
+# ============================================================================
+
+class EscritorEventosJob:
+    """
+    Aplica eventos de jobs no banco em lotes, em uma thread dedicada
+
+    Os eventos de um mesmo job dentro de um lote são reduzidos ao último
+    (maior sequence), e todas as transições do lote são gravadas em um
+    único commit. Se o lote falhar, as chaves dos seus eventos são
+    removidas do deduplicador para que o reenvio da API externa seja aceito.
+    """
+
+    def __init__(self, app=None, tamanho_lote: int = 100, intervalo_ms: int = 200):
+        """
+        Inicializa o escritor
+
+        Args:
+            app: Instância do Flask app para contexto de aplicação
+            tamanho_lote: Máximo de eventos por transação
+            intervalo_ms: Tempo máximo de espera para completar um lote
+        """
+        self.app = app
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_ms = intervalo_ms
+        self.fila: 'queue.Queue[Tuple[Optional[Tuple[str, str, int]], Dict[str, Any]]]' = queue.Queue()
+        self.executando = False
+        self.thread: Optional[threading.Thread] = None
+        self.estatisticas = {'recebidos': 0, 'aplicados': 0, 'ignorados': 0, 'lotes': 0, 'erros': 0}
+
+    def iniciar(self):
+        """Inicia a thread de gravação"""
+        if self.executando:
+            return
+        self.executando = True
+        self.thread = threading.Thread(target=self._loop_gravacao, daemon=True)
+        self.thread.start()
+        logger.info("Escritor de eventos de jobs iniciado")
+
+    def parar(self):
+        """Para a thread de gravação"""
+        self.executando = False
+        if self.thread:
+            self.thread.join(timeout=5)
+        logger.info("Escritor de eventos de jobs parado")
+
+    def enfileirar(self, evento: Dict[str, Any], chave: Optional[Tuple[str, str, int]] = None):
+        """
+        Adiciona um evento já validado à fila de gravação
+
+        Args:
+            evento: Evento recebido, com "sequence" já convertido para int
+            chave: Chave registrada no deduplicador, liberada se o lote falhar
+        """
+        self.estatisticas['recebidos'] += 1
+        self.fila.put((chave, evento))
+
+    def _coletar_lote(self) -> List[Tuple[Optional[Tuple[str, str, int]], Dict[str, Any]]]:
+        """Aguarda o primeiro evento e junta os seguintes até completar o lote"""
+        try:
+            lote = [self.fila.get(timeout=1)]
+        except queue.Empty:
+            return []
+
+        limite = time.time() + self.intervalo_ms / 1000.0
+        while len(lote) < self.tamanho_lote:
+            restante = limite - time.time()
+            if restante <= 0:
+                break
+            try:
+                lote.append(self.fila.get(timeout=restante))
+            except queue.Empty:
+                break
+        return lote
+
+    def _loop_gravacao(self):
+        """Loop principal de gravação"""
+        if not self.app:
+            logger.error("App não configurado no escritor de eventos. Não é possível gravar eventos.")
+            return
+
+        with self.app.app_context():
+            while self.executando:
+                lote = self._coletar_lote()
+                if not lote:
+                    continue
+                try:
+                    self.aplicar_lote([evento for _, evento in lote])
+                except Exception as e:
+                    self.estatisticas['erros'] += 1
+                    logger.error(f"Erro ao gravar lote de eventos de jobs: {e}", exc_info=True)
+                    db.session.rollback()
+                    # Os eventos não foram gravados: o reenvio não pode ser tratado como duplicado
+                    obter_deduplicador().remover([chave for chave, _ in lote if chave is not None])
+                finally:
+                    db.session.remove()
+
+    def aplicar_lote(self, lote: List[Dict[str, Any]]) -> int:
+        """
+        Aplica um lote de eventos em uma única transação
+
+        Returns:
+            int: Quantidade de execuções finalizadas
+        """
+        # Manter apenas o evento mais relevante de cada job (terminal > maior sequence)
+        def prioridade(evento: Dict[str, Any]) -> Tuple[bool, int]:
+            return evento.get('status') in STATUS_JOB_FINAIS, evento.get('sequence') or 0
+
+        ultimos: Dict[str, Dict[str, Any]] = {}
+        for evento in lote:
+            atual = ultimos.get(evento['job_id'])
+            if atual is None or prioridade(evento) >= prioridade(atual):
+                ultimos[evento['job_id']] = evento
+
+        execucoes = Execucao.query.options(*perfil_finalizacao_execucoes()).filter(
+            Execucao.job_id.in_(list(ultimos.keys()))
+        ).all()
+        execucoes_por_job = {execucao.job_id: execucao for execucao in execucoes}
+
+        eventos_sse = []
+        finalizadas = 0
+        for job_id, evento in ultimos.items():
+            execucao = execucoes_por_job.get(job_id)
+            if execucao is None or not execucao.esta_em_andamento:
+                self.estatisticas['ignorados'] += 1
+                continue
+
+            status = JobStatus.from_api_response(evento)
+            if aplicar_resultado_job(status, execucao.processo, execucao):
+                finalizadas += 1
+                eventos_sse.append({
+                    'type': 'job_completed' if status.status == STATUS_JOB_SUCESSO else 'job_failed',
+                    'job_id': job_id,
+                    'processo_id': str(execucao.processo_id),
+                    'execucao_id': str(execucao.id),
+                    'status': execucao.status_execucao
+                })
+            else:
+                eventos_sse.append({
+                    'type': 'job_progress',
+                    'job_id': job_id,
+                    'processo_id': str(execucao.processo_id),
+                    'status': status.status,
+                    'progress': status.progress
+                })
+
+        if finalizadas:
+            db.session.commit()
+
+        self.estatisticas['aplicados'] += finalizadas
+        self.estatisticas['lotes'] += 1
+        self._notificar(eventos_sse)
+        return finalizadas
+
+    def _notificar(self, eventos: List[Dict[str, Any]]):
+        """Envia os eventos para os clientes SSE conectados"""
+        if not eventos:
+            return
+        try:
+            from apps.processos.routes import enviar_evento_sse
+            for evento in eventos:
+                enviar_evento_sse(evento)
+        except Exception as e:
+            logger.warning(f"Não foi possível notificar clientes SSE: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do escritor"""
+        return {**self.estatisticas, 'fila': self.fila.qsize(), 'executando': self.executando}
+
+
+# Instâncias globais
+_escritor_instance: Optional[EscritorEventosJob] = None
+_deduplicador_instance: Optional[DeduplicadorEventos] = None
+_instancias_lock = threading.Lock()
+
+
+def obter_escritor(app=None) -> Optional[EscritorEventosJob]:
+    """
+    Retorna a instância global do escritor de eventos, iniciando-a na primeira chamada
+
+    Args:
+        app: Instância do Flask app (necessária apenas na primeira chamada)
+    """
+    global _escritor_instance
+
+    with _instancias_lock:
+        if _escritor_instance is None and app is not None:
+            _escritor_instance = EscritorEventosJob(
+                app=app,
+                tamanho_lote=app.config.get('WEBHOOK_TAMANHO_LOTE', 100)
+            )
+            _escritor_instance.iniciar()
+
+    return _escritor_instance
+
+
+def normalizar_sequence(valor: Any) -> Optional[int]:
+    """
+    Converte o campo "sequence" de um evento para int
+
+    Returns:
+        O número da sequência (0 quando ausente) ou None se o valor for inválido
+    """
+    if valor is None or valor == '':
+        return 0
+    if isinstance(valor, bool) or isinstance(valor, float) and not valor.is_integer():
+        return None
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def obter_deduplicador(app=None) -> DeduplicadorEventos:
+    """
+    Retorna a instância global do deduplicador de eventos
+
+    Args:
+        app: Instância do Flask app com a retenção configurada (opcional)
+    """
+    global _deduplicador_instance
+
+    with _instancias_lock:
+        if _deduplicador_instance is None:
+            ttl = app.config.get('WEBHOOK_DEDUP_TTL_SEGUNDOS', 86400) if app is not None else 86400
+            _deduplicador_instance = DeduplicadorEventos(ttl_segundos=ttl)
+
+    return _deduplicador_instance
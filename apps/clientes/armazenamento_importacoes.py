@@ -0,0 +1,90 @@
+"""
+Armazenamento dos arquivos CSV enviados para importação
+
+O arquivo é gravado em disco (IMPORTACOES_DIR) ou no MinIO
+(IMPORTACOES_ARMAZENAMENTO=minio) antes de a importação ser enfileirada, e
+removido quando ela termina com sucesso. Com o MinIO, qualquer worker pode
+retomar a importação; o worker baixa o arquivo para um temporário e o lê
+em streaming a partir do disco.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Tuple, Iterator, BinaryIO
+
+from flask import current_app
+
+from apps.models.importacao import ArmazenamentoImportacao
+
+logger = logging.getLogger(__name__)
+
+PREFIXO_MINIO = 'importacoes/clientes'
+
+
+def _diretorio() -> str:
+    diretorio = current_app.config['IMPORTACOES_DIR']
+    os.makedirs(diretorio, exist_ok=True)
+    return diretorio
+
+
+def salvar_arquivo(arquivo, importacao_id) -> Tuple[str, str, int]:
+    """
+    Guarda o arquivo enviado
+
+    Args:
+        arquivo: FileStorage do upload
+        importacao_id: ID da importação (nome do arquivo guardado)
+
+    Returns:
+        Tupla (armazenamento, caminho ou chave, tamanho em bytes)
+    """
+    nome = f"{importacao_id}.csv"
+
+    if current_app.config.get('IMPORTACOES_ARMAZENAMENTO', 'local').lower() == 'minio':
+        from apps.services.minio_service import MinIOService
+
+        arquivo.stream.seek(0, os.SEEK_END)
+        tamanho = arquivo.stream.tell()
+        arquivo.stream.seek(0)
+
+        chave = f"{PREFIXO_MINIO}/{nome}"
+        MinIOService().upload_objeto(arquivo.stream, chave, content_type='text/csv')
+        return ArmazenamentoImportacao.MINIO.value, chave, tamanho
+
+    caminho = os.path.join(_diretorio(), nome)
+    with open(caminho, 'wb') as destino:
+        shutil.copyfileobj(arquivo.stream, destino)
+    return ArmazenamentoImportacao.LOCAL.value, caminho, os.path.getsize(caminho)
+
+
+@contextmanager
+def abrir_arquivo(importacao) -> Iterator[BinaryIO]:
+    """Abre o arquivo da importação para leitura binária"""
+    if importacao.armazenamento == ArmazenamentoImportacao.MINIO.value:
+        from apps.services.minio_service import MinIOService
+
+        with tempfile.TemporaryFile() as temporario:
+            MinIOService().download_objeto(importacao.caminho_arquivo, temporario)
+            temporario.seek(0)
+            yield temporario
+        return
+
+    if not os.path.exists(importacao.caminho_arquivo):
+        raise FileNotFoundError(f"Arquivo da importação não encontrado: {importacao.caminho_arquivo}")
+    with open(importacao.caminho_arquivo, 'rb') as arquivo:
+        yield arquivo
+
+
+def remover_arquivo(importacao):
+    """Remove o arquivo guardado (erros são apenas registrados)"""
+    try:
+        if importacao.armazenamento == ArmazenamentoImportacao.MINIO.value:
+            from apps.services.minio_service import MinIOService
+            MinIOService().delete_fatura(importacao.caminho_arquivo)
+        elif os.path.exists(importacao.caminho_arquivo):
+            os.remove(importacao.caminho_arquivo)
+    except Exception as e:
+        logger.warning(f"Não foi possível remover o arquivo da importação {importacao.id}: {e}")
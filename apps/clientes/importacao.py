@@ -0,0 +1,471 @@
+"""
+Importação de clientes via CSV em lotes
+
+O arquivo é lido em streaming (csv.DictReader sobre o stream do upload) e as
+linhas são gravadas em lotes:
+
+- o mapa chave natural (CNPJ, operadora, unidade, serviço) → id dos clientes
+  existentes é carregado com uma única consulta no início da importação
+- cada lote é gravado com um único INSERT ... ON CONFLICT sobre
+  uq_cliente_cnpj_operadora_unidade_servico (PostgreSQL/SQLite) e
+  confirmado com um commit; nos demais bancos, INSERT dos novos e UPDATE
+  por id dos existentes
+- se o lote falhar (ex.: hash_unico duplicada), as linhas são regravadas uma
+  a uma em savepoints para apontar o erro de cada linha sem perder as demais
+
+Como o INSERT em lote não passa pelo flush do ORM, o índice de busca dos
+clientes gravados é atualizado explicitamente em cada lote.
+
+Usado pela rota /clientes/importar e por scripts/importar_clientes_csv.py.
+"""
+
+import csv
+import io
+import logging
+import time
+import uuid
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Callable, Tuple
+
+from sqlalchemy import select, update, func, bindparam
+from sqlalchemy.dialects import postgresql, sqlite
+
+from apps import db
+from apps.models import Cliente, Operadora
+from apps.services.busca_service import indexar_clientes, indice_disponivel
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE_PADRAO = 500
+
+# Colunas da chave natural (uq_cliente_cnpj_operadora_unidade_servico)
+COLUNAS_CHAVE = ('cnpj', 'operadora_id', 'unidade', 'servico')
+
+# Colunas regravadas quando o cliente já existe
+COLUNAS_ATUALIZADAS = (
+    'hash_unico', 'razao_social', 'nome_sat', 'filtro', 'dados_sat', 'site_emissao',
+    'login_portal', 'senha_portal', 'cpf', 'status_ativo'
+)
+
+# Colunas opcionais: com preservar_existentes, um valor vazio no CSV mantém o atual
+COLUNAS_OPCIONAIS = ('filtro', 'dados_sat', 'site_emissao', 'login_portal', 'senha_portal', 'cpf')
+
+
+class ErroLinha(Exception):
+    """Linha do CSV inválida (a mensagem vai para o relatório da importação)"""
+
+
+def _normalizar_nome_operadora(nome: str) -> str:
+    return nome.upper().replace(' ', '').replace('-', '').replace('_', '').replace('.', '')
+
+
+def _somente_digitos(valor: Optional[str]) -> str:
+    return ''.join(filter(str.isdigit, valor or ''))
+
+
+class MapeadorOperadoras:
+    """
+    Resolve o nome da operadora informado no CSV
+
+    Tenta, em ordem: nome normalizado (sem espaços, hífens, pontos), nome
+    original, código e primeira palavra (ex.: "OI" → "OI S.A.").
+    """
+
+    def __init__(self, operadoras: Iterable[Operadora], criar_operadora: Optional[Callable[[str], Operadora]] = None):
+        self.criar_operadora = criar_operadora
+        self.operadoras: List[Operadora] = []
+        self._mapa: Dict[str, Operadora] = {}
+        for operadora in operadoras:
+            self.adicionar(operadora)
+
+    def adicionar(self, operadora: Operadora):
+        self.operadoras.append(operadora)
+        nome = operadora.nome.upper()
+        self._mapa[_normalizar_nome_operadora(nome)] = operadora
+        self._mapa[nome] = operadora
+        if operadora.codigo:
+            self._mapa.setdefault(operadora.codigo.upper(), operadora)
+        primeira_palavra = nome.split()[0] if nome.split() else nome
+        self._mapa.setdefault(primeira_palavra, operadora)
+
+    def resolver(self, texto: str) -> Operadora:
+        operadora_csv = texto.strip().upper()
+        operadora = (
+            self._mapa.get(_normalizar_nome_operadora(operadora_csv))
+            or self._mapa.get(operadora_csv)
+            or self._mapa.get(operadora_csv.split()[0])
+        )
+        if operadora:
+            return operadora
+
+        if self.criar_operadora:
+            operadora = self.criar_operadora(operadora_csv)
+            self.adicionar(operadora)
+            return operadora
+
+        disponiveis = ', '.join(sorted({o.nome for o in self.operadoras}))
+        raise ErroLinha(f"Operadora '{operadora_csv}' não encontrada. Operadoras disponíveis: {disponiveis}")
+
+
+class ResultadoImportacao:
+    """Contadores e relatório por linha de uma importação"""
+
+    def __init__(self):
+        self.linhas_lidas = 0
+        self.processados = 0
+        self.criados = 0
+        self.atualizados = 0
+        self.lotes = 0
+        self.ultima_linha_confirmada = 1  # cabeçalho
+        self.erros: List[Tuple[int, str]] = []
+        self.erros_omitidos = 0  # erros de uma execução anterior que não estão em self.erros
+        self.normalizacoes: List[str] = []
+        self.iniciar_medicao()
+
+    def iniciar_medicao(self):
+        """Reinicia a medição de vazão (linhas/s desta execução)"""
+        self.inicio = time.monotonic()
+        self._linhas_no_inicio = self.linhas_lidas
+
+    def registrar_erro(self, linha: int, mensagem: str):
+        self.erros.append((linha, mensagem))
+
+    @property
+    def total_erros(self) -> int:
+        return len(self.erros) + self.erros_omitidos
+
+    @property
+    def mensagens_erro(self) -> List[str]:
+        return [f"Linha {linha}: {mensagem}" for linha, mensagem in self.erros]
+
+    @property
+    def linhas_por_segundo(self) -> float:
+        duracao = time.monotonic() - self.inicio
+        lidas = self.linhas_lidas - self._linhas_no_inicio
+        return lidas / duracao if duracao > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'linhas_lidas': self.linhas_lidas,
+            'processados': self.processados,
+            'criados': self.criados,
+            'atualizados': self.atualizados,
+            'erros': self.total_erros,
+            'lotes': self.lotes,
+            'ultima_linha_confirmada': self.ultima_linha_confirmada,
+            'linhas_por_segundo': round(self.linhas_por_segundo, 1)
+        }
+
+
+def ler_csv(stream, encoding: str = 'utf-8-sig', errors: str = 'strict') -> Iterator[Dict[str, str]]:
+    """
+    Lê o CSV em streaming a partir de um stream binário ou de texto
+
+    Os nomes das colunas são normalizados (sem espaços nas pontas), então
+    'LOGIN ' e 'LOGIN' são a mesma coluna.
+    """
+    if isinstance(stream, io.TextIOBase):
+        texto = stream
+    else:
+        texto = io.TextIOWrapper(stream, encoding=encoding, errors=errors, newline='')
+
+    leitor = csv.DictReader(texto)
+    if leitor.fieldnames:
+        leitor.fieldnames = [(coluna or '').strip() for coluna in leitor.fieldnames]
+    return iter(leitor)
+
+
+class ImportadorClientes:
+    """
+    Importa clientes em lotes com upsert pela chave natural
+
+    Args:
+        sobrescrever: Atualiza os clientes existentes (senão a linha é um erro)
+        tamanho_lote: Linhas gravadas por commit
+        preservar_existentes: Valores opcionais vazios no CSV mantêm os atuais
+        limpar_texto: Função aplicada aos campos de texto (padrão: strip)
+        criar_operadora: Cria a operadora quando não encontrada (padrão: erro na linha)
+        ao_confirmar_lote: Chamada com o resultado parcial antes do commit de
+            cada lote, na mesma transação
+        apos_confirmar_lote: Chamada com o resultado parcial depois do commit
+            de cada lote (notificações que não podem anteceder os dados)
+    """
+
+    def __init__(
+        self,
+        sobrescrever: bool = False,
+        tamanho_lote: int = TAMANHO_LOTE_PADRAO,
+        preservar_existentes: bool = False,
+        limpar_texto: Optional[Callable[[str], str]] = None,
+        criar_operadora: Optional[Callable[[str], Operadora]] = None,
+        ao_confirmar_lote: Optional[Callable[[ResultadoImportacao], None]] = None,
+        apos_confirmar_lote: Optional[Callable[[ResultadoImportacao], None]] = None
+    ):
+        self.sobrescrever = sobrescrever
+        self.tamanho_lote = max(1, tamanho_lote)
+        self.preservar_existentes = preservar_existentes
+        self.limpar_texto = limpar_texto or (lambda texto: texto.strip())
+        self.ao_confirmar_lote = ao_confirmar_lote
+        self.apos_confirmar_lote = apos_confirmar_lote
+
+        self.operadoras = MapeadorOperadoras(Operadora.query.all(), criar_operadora)
+        self.existentes = self._carregar_chaves()
+
+    @staticmethod
+    def _carregar_chaves() -> Dict[Tuple, uuid.UUID]:
+        """Mapa chave natural → id de todos os clientes (uma consulta, só 5 colunas)"""
+        colunas = [getattr(Cliente, coluna) for coluna in COLUNAS_CHAVE]
+        return {
+            tuple(linha[:-1]): linha[-1]
+            for linha in db.session.execute(select(*colunas, Cliente.id))
+        }
+
+    # ------------------------------------------------------------------
+    # Leitura das linhas
+    # ------------------------------------------------------------------
+
+    def _texto(self, linha: Dict[str, str], coluna: str) -> Optional[str]:
+        return self.limpar_texto(linha.get(coluna) or '') or None
+
+    def converter_linha(self, linha: Dict[str, str], numero: int, resultado: ResultadoImportacao) -> Dict[str, Any]:
+        """Converte a linha do CSV nos valores da tabela de clientes"""
+        if not (linha.get('CNPJ') or '').strip() or not (linha.get('OPERADORA') or '').strip():
+            raise ErroLinha("CNPJ e OPERADORA são obrigatórios")
+
+        operadora = self.operadoras.resolver(linha['OPERADORA'])
+        operadora_csv = linha['OPERADORA'].strip().upper()
+        if operadora_csv != operadora.nome.upper():
+            mensagem = f"Linha {numero}: '{operadora_csv}' → '{operadora.nome}'"
+            if mensagem not in resultado.normalizacoes:
+                resultado.normalizacoes.append(mensagem)
+
+        valores = {
+            'cnpj': _somente_digitos(linha.get('CNPJ')),
+            'operadora_id': operadora.id,
+            'razao_social': self._texto(linha, 'RAZÃO SOCIAL'),
+            'nome_sat': self._texto(linha, 'NOME SAT'),
+            'servico': self._texto(linha, 'SERVIÇO'),
+            'unidade': self._texto(linha, 'UNIDADE / FILTRO SAT'),
+            'filtro': self._texto(linha, 'FILTRO'),
+            'dados_sat': self._texto(linha, 'DADOS SAT'),
+            'site_emissao': self._texto(linha, 'SITE PARA EMISSÃO'),
+            'login_portal': self._texto(linha, 'LOGIN'),
+            'senha_portal': self._texto(linha, 'SENHA'),
+            'cpf': _somente_digitos(linha.get('CPF')) or None,
+            'status_ativo': (linha.get('STATUS') or '1').strip() != '0'
+        }
+
+        if not all(valores[coluna] for coluna in ('cnpj', 'razao_social', 'nome_sat', 'servico', 'unidade')):
+            raise ErroLinha("Campos obrigatórios em falta")
+
+        observacoes = self._texto(linha, 'OBS')
+        if observacoes:
+            valores['dados_sat'] = f"{valores['dados_sat'] or ''}\nOBS: {observacoes}".strip()
+
+        valores['hash_unico'] = Cliente.calcular_hash_unico(
+            valores['nome_sat'], operadora.codigo, valores['servico'],
+            valores['dados_sat'], valores['filtro'], valores['unidade']
+        )
+        return valores
+
+    # ------------------------------------------------------------------
+    # Importação
+    # ------------------------------------------------------------------
+
+    def importar(
+        self,
+        linhas: Iterable[Dict[str, str]],
+        primeira_linha: int = 2,
+        resultado: Optional[ResultadoImportacao] = None
+    ) -> ResultadoImportacao:
+        """
+        Importa as linhas (dicionários por coluna do CSV)
+
+        Args:
+            linhas: Linhas do CSV (ex.: ler_csv(arquivo))
+            primeira_linha: Número da primeira linha no arquivo (2 = após o cabeçalho)
+            resultado: Resultado de uma importação interrompida; as linhas até
+                resultado.ultima_linha_confirmada são puladas e os contadores continuam
+        """
+        resultado = resultado or ResultadoImportacao()
+        resultado.iniciar_medicao()
+        lote: Dict[Tuple, Dict[str, Any]] = {}
+        numero = resultado.ultima_linha_confirmada
+
+        for numero, linha in enumerate(linhas, start=primeira_linha):
+            if numero <= resultado.ultima_linha_confirmada:
+                continue
+            resultado.linhas_lidas += 1
+            try:
+                valores = self.converter_linha(linha, numero, resultado)
+            except ErroLinha as e:
+                resultado.registrar_erro(numero, str(e))
+                continue
+            except Exception as e:
+                resultado.registrar_erro(numero, f"Erro ao processar - {str(e)}")
+                continue
+
+            chave = tuple(valores[coluna] for coluna in COLUNAS_CHAVE)
+            existente = chave in self.existentes or chave in lote
+            if existente and not self.sobrescrever:
+                resultado.registrar_erro(numero, f"Cliente já existe (CNPJ: {valores['cnpj']})")
+                continue
+
+            if chave in lote:
+                # Mesma chave repetida no lote: a última linha prevalece
+                valores['id'] = lote[chave]['id']
+                valores['_novo'] = lote[chave]['_novo']
+                valores['_linhas'] = lote.pop(chave)['_linhas'] + [numero]
+            else:
+                valores['id'] = self.existentes.get(chave) or uuid.uuid4()
+                valores['_novo'] = chave not in self.existentes
+                valores['_linhas'] = [numero]
+            lote[chave] = valores
+
+            if len(lote) >= self.tamanho_lote:
+                self._confirmar_lote(lote, numero, resultado)
+                lote = {}
+
+        self._confirmar_lote(lote, numero, resultado)
+
+        logger.info(f"Importação de clientes: {resultado.to_dict()}")
+        return resultado
+
+    def _confirmar_lote(self, lote: Dict[Tuple, Dict[str, Any]], ultima_linha: int, resultado: ResultadoImportacao):
+        """Grava o lote, atualiza o índice de busca e o progresso e faz o commit"""
+        gravados = []
+        if lote:
+            registros = list(lote.values())
+            try:
+                gravados = self._gravar(registros)
+                self._registrar_ignorados(registros, gravados, resultado)
+            except Exception as e:
+                db.session.rollback()
+                logger.warning(f"Lote da importação falhou ({str(getattr(e, 'orig', e))}); gravando linha a linha")
+                gravados = self._gravar_linha_a_linha(registros, resultado)
+
+            if gravados and indice_disponivel():
+                indexar_clientes(db.session.connection(), [registro['id'] for registro in gravados])
+
+            for registro in gravados:
+                resultado.processados += len(registro['_linhas'])
+                if registro['_novo']:
+                    resultado.criados += 1
+                    resultado.atualizados += len(registro['_linhas']) - 1
+                else:
+                    resultado.atualizados += len(registro['_linhas'])
+            resultado.lotes += 1
+
+        resultado.ultima_linha_confirmada = max(resultado.ultima_linha_confirmada, ultima_linha)
+        if self.ao_confirmar_lote:
+            # Na mesma transação do lote: o progresso gravado nunca fica à frente dos dados
+            self.ao_confirmar_lote(resultado)
+        db.session.commit()
+
+        for registro in gravados:
+            chave = tuple(registro[coluna] for coluna in COLUNAS_CHAVE)
+            self.existentes[chave] = registro['id']
+
+        if self.apos_confirmar_lote:
+            self.apos_confirmar_lote(resultado)
+
+    def _gravar_linha_a_linha(self, registros: List[Dict[str, Any]], resultado: ResultadoImportacao) -> List[Dict[str, Any]]:
+        gravados = []
+        for registro in registros:
+            try:
+                with db.session.begin_nested():
+                    gravado = self._gravar([registro])
+            except Exception as e:
+                for numero in registro['_linhas']:
+                    resultado.registrar_erro(numero, f"Erro ao gravar - {str(getattr(e, 'orig', e))}")
+                continue
+            self._registrar_ignorados([registro], gravado, resultado)
+            gravados.extend(gravado)
+        return gravados
+
+    @staticmethod
+    def _registrar_ignorados(registros: List[Dict[str, Any]], gravados: List[Dict[str, Any]], resultado: ResultadoImportacao):
+        """Registra como erro as linhas não gravadas pelo ON CONFLICT DO NOTHING (cliente criado por outra sessão)"""
+        gravados_ids = {id(registro) for registro in gravados}
+        for registro in registros:
+            if id(registro) not in gravados_ids:
+                for numero in registro['_linhas']:
+                    resultado.registrar_erro(numero, f"Cliente já existe (CNPJ: {registro['cnpj']})")
+
+    @staticmethod
+    def _valores_tabela(registros: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [
+            {coluna: valor for coluna, valor in registro.items() if not coluna.startswith('_')}
+            for registro in registros
+        ]
+
+    def _gravar(self, registros: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Grava os registros no banco
+
+        Returns:
+            Registros efetivamente gravados (um cliente criado por outra sessão
+            depois da carga das chaves não é sobrescrito sem sobrescrever=True)
+        """
+        tabela = Cliente.__table__
+        dialeto = db.session.get_bind().dialect.name
+
+        if dialeto in ('postgresql', 'sqlite'):
+            insert = postgresql.insert if dialeto == 'postgresql' else sqlite.insert
+            comando = insert(tabela)
+            if self.sobrescrever:
+                comando = comando.on_conflict_do_update(
+                    index_elements=list(COLUNAS_CHAVE),
+                    set_=self._colunas_atualizadas(tabela, comando.excluded)
+                )
+            else:
+                comando = comando.on_conflict_do_nothing(index_elements=list(COLUNAS_CHAVE))
+
+            colunas_retorno = [tabela.c.id] + [tabela.c[coluna] for coluna in COLUNAS_CHAVE]
+            gravados_por_chave = {
+                tuple(linha[1:]): linha[0]
+                for linha in db.session.execute(
+                    comando.returning(*colunas_retorno), self._valores_tabela(registros)
+                )
+            }
+
+            gravados = []
+            for registro in registros:
+                chave = tuple(registro[coluna] for coluna in COLUNAS_CHAVE)
+                if chave in gravados_por_chave:
+                    # No conflito o RETURNING traz o id do cliente existente
+                    registro['_novo'] = registro['_novo'] and gravados_por_chave[chave] == registro['id']
+                    registro['id'] = gravados_por_chave[chave]
+                    gravados.append(registro)
+            return gravados
+
+        novos = [registro for registro in registros if registro['_novo']]
+        existentes = [registro for registro in registros if not registro['_novo']]
+        if novos:
+            db.session.execute(tabela.insert(), self._valores_tabela(novos))
+        if existentes:
+            parametros = [
+                {'b_id': registro['id'], **{coluna: registro[coluna] for coluna in COLUNAS_ATUALIZADAS}}
+                for registro in existentes
+            ]
+            valores = {
+                coluna: bindparam(coluna) for coluna in COLUNAS_ATUALIZADAS
+            }
+            if self.preservar_existentes:
+                valores.update({
+                    coluna: func.coalesce(bindparam(coluna), tabela.c[coluna]) for coluna in COLUNAS_OPCIONAIS
+                })
+            db.session.execute(
+                update(tabela).where(tabela.c.id == bindparam('b_id'))
+                .values(**valores, data_atualizacao=func.now()),
+                parametros
+            )
+        return registros
+
+    def _colunas_atualizadas(self, tabela, excluido) -> Dict[str, Any]:
+        valores = {coluna: excluido[coluna] for coluna in COLUNAS_ATUALIZADAS}
+        if self.preservar_existentes:
+            valores.update({
+                coluna: func.coalesce(excluido[coluna], tabela.c[coluna]) for coluna in COLUNAS_OPCIONAIS
+            })
+        valores['data_atualizacao'] = func.now()
+        return valores
@@ -3,100 +3,95 @@
 Rotas para gerenciamento de clientes
 """
 
-import csv
-import io
 from flask import render_template, redirect, url_for, flash, request, jsonify, current_app
-from flask_login import login_required
-from sqlalchemy import or_, and_
+from flask_login import login_required, current_user
+from sqlalchemy import or_
 from werkzeug.utils import secure_filename
 
 from apps.clientes import bp
-from apps.models import Cliente, Operadora
+from apps.models import Cliente, Operadora, ImportacaoClientes
+from apps.models.perfis_carga import perfil_listagem_clientes
 from apps.clientes.forms import ClienteForm, FiltroClienteForm, ImportarClientesForm
+from apps.clientes.trabalhador_importacao import enfileirar_importacao, retomar_importacao
 from apps import db
+from apps.services.busca_service import BuscaService, normalizar_cnpj
+from apps.services.paginacao import paginar_por_cursor, DIRECAO_PROXIMA
+from apps.services.exportacao import resposta_exportacao, parametros_exportacao
+from apps.services.estatisticas import estatisticas_clientes
 
 
-@bp.route('/')
-@login_required
-def index():
-    """Lista todos os clientes com filtros e paginação"""
+# Chave estável da listagem de clientes (paginação por cursor)
+ORDEM_CLIENTES = [(Cliente.razao_social, False), (Cliente.id, False)]
 
-    # Formulário de filtros
-    form_filtro = FiltroClienteForm()
 
-    # Parâmetros de paginação
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)  # 20 clientes por página
-    
+def _filtrar_clientes(args):
+    """Monta a query de clientes com os filtros da requisição"""
+
     # Query base com join na operadora
     query = Cliente.query.join(Operadora)
 
-    # Aplicar filtros se fornecidos
-    if request.args.get('razao_social'):
-        query = query.filter(
-            Cliente.razao_social.ilike(f"%{request.args.get('razao_social')}%")
-        )
-        form_filtro.razao_social.data = request.args.get('razao_social')
+    # Nome e CNPJ usam o índice de busca (sem acentos, CNPJ só com dígitos)
+    termo_busca = args.get('razao_social', '').strip()
+    if termo_busca:
+        query = query.filter(BuscaService.filtro_cliente(Cliente.id, termo_busca))
 
-    if request.args.get('cnpj'):
-        cnpj_filtro = ''.join(filter(str.isdigit, request.args.get('cnpj')))
-        query = query.filter(Cliente.cnpj.like(f"%{cnpj_filtro}%"))
-        form_filtro.cnpj.data = request.args.get('cnpj')
+    if args.get('cnpj'):
+        cnpj_filtro = normalizar_cnpj(args.get('cnpj'))
+        query = query.filter(BuscaService.filtro_cliente(Cliente.id, cnpj_filtro))
 
-    if request.args.get('operadora'):
-        query = query.filter(Cliente.operadora_id == request.args.get('operadora'))
-        form_filtro.operadora.data = request.args.get('operadora')
+    if args.get('operadora'):
+        query = query.filter(Cliente.operadora_id == args.get('operadora'))
 
-    if request.args.get('servico'):
+    if args.get('servico'):
         query = query.filter(
-            Cliente.servico.ilike(f"%{request.args.get('servico')}%")
+            Cliente.servico.ilike(f"%{args.get('servico')}%")
         )
-        form_filtro.servico.data = request.args.get('servico')
 
-    if request.args.get('unidade'):
+    if args.get('unidade'):
         query = query.filter(
-            Cliente.unidade.ilike(f"%{request.args.get('unidade')}%")
+            Cliente.unidade.ilike(f"%{args.get('unidade')}%")
         )
-        form_filtro.unidade.data = request.args.get('unidade')
-
-    if request.args.get('status'):
-        if request.args.get('status') == 'ativo':
-            query = query.filter(Cliente.status_ativo == True)
-        elif request.args.get('status') == 'inativo':
-            query = query.filter(Cliente.status_ativo == False)
-        form_filtro.status.data = request.args.get('status')
-
-    # Ordenação
-    query = query.order_by(Cliente.razao_social)
-
-    # Paginação
-    pagination = query.paginate(
-        page=page, 
-        per_page=per_page, 
-        error_out=False
+
+    if args.get('status') == 'ativo':
+        query = query.filter(Cliente.status_ativo == True)
+    elif args.get('status') == 'inativo':
+        query = query.filter(Cliente.status_ativo == False)
+
+    return query
+
+
+@bp.route('/')
+@login_required
+def index():
+    """Lista todos os clientes com filtros e paginação"""
+
+    # Formulário de filtros
+    form_filtro = FiltroClienteForm()
+    for campo in ('razao_social', 'cnpj', 'operadora', 'servico', 'unidade', 'status'):
+        if request.args.get(campo):
+            getattr(form_filtro, campo).data = request.args.get(campo)
+
+    # Paginação por cursor (20 clientes por página)
+    pagination = paginar_por_cursor(
+        _filtrar_clientes(request.args).options(*perfil_listagem_clientes(operadora_no_join=True)),
+        ORDEM_CLIENTES,
+        cursor=request.args.get('cursor'),
+        direcao=request.args.get('dir', DIRECAO_PROXIMA),
+        per_page=request.args.get('per_page', 20, type=int),
+        contar=True
     )
     
     clientes = pagination.items
 
-    # Estatísticas para cards (consultas separadas para performance)
-    total_clientes = Cliente.query.count()
-    clientes_ativos = Cliente.query.filter_by(status_ativo=True).count()
-    clientes_com_rpa = Cliente.query.join(Operadora).filter(
-        and_(Cliente.status_ativo == True, Operadora.possui_rpa == True)
-    ).count()
-    clientes_sem_rpa = Cliente.query.join(Operadora).filter(
-        and_(Cliente.status_ativo == True, Operadora.possui_rpa == False)
-    ).count()
+    # Estatísticas para cards (uma consulta agregada, em cache)
+    estatisticas = estatisticas_clientes()
 
     return render_template(
         'clientes/index.html',
         clientes=clientes,
         pagination=pagination,
         form_filtro=form_filtro,
-        total_clientes=total_clientes,
-        clientes_ativos=clientes_ativos,
-        clientes_com_rpa=clientes_com_rpa,
-        clientes_sem_rpa=clientes_sem_rpa
+        **estatisticas
     )
 
 
@@ -269,176 +264,180 @@ def importar():
 
     if form.validate_on_submit():
         try:
-            arquivo = form.arquivo_csv.data
-            sobrescrever = form.sobrescrever_existentes.data
-            
-            # Lê o arquivo CSV
-            stream = io.StringIO(arquivo.stream.read().decode("UTF8"), newline=None)
-            csv_input = csv.DictReader(stream)
-            
-            clientes_processados = 0
-            clientes_criados = 0
-            clientes_atualizados = 0
-            nomes_normalizados = []
-            erros = []
-
-            # Mapeia operadoras por nome para busca rápida (normalizado)
-            operadoras_map = {}
-            operadoras_list = Operadora.query.all()
-            
-            for op in operadoras_list:
-                # Normaliza nome removendo espaços, acentos, hífens, pontos
-                nome_normalizado = op.nome.upper().replace(' ', '').replace('-', '').replace('_', '').replace('.', '')
-                operadoras_map[nome_normalizado] = op
-                # Também mapeia nome original
-                operadoras_map[op.nome.upper()] = op
-                # Mapeia primeira palavra (para casos como "OI" vs "OI S.A.")
-                primeira_palavra = op.nome.upper().split()[0]
-                if primeira_palavra not in operadoras_map:
-                    operadoras_map[primeira_palavra] = op
-
-            for row_num, row in enumerate(csv_input, start=2):  # Start=2 por causa do header
-                try:
-                    # Validações básicas
-                    if not row.get('CNPJ') or not row.get('OPERADORA'):
-                        erros.append(f"Linha {row_num}: CNPJ e OPERADORA são obrigatórios")
-                        continue
-
-                    # Busca operadora com normalização flexível
-                    operadora_csv = row.get('OPERADORA', '').strip().upper()
-                    operadora_normalizada = operadora_csv.replace(' ', '').replace('-', '').replace('_', '').replace('.', '')
-                    
-                    # Tenta múltiplas estratégias de busca:
-                    # 1. Nome normalizado completo
-                    operadora = operadoras_map.get(operadora_normalizada)
-                    # 2. Nome original
-                    if not operadora:
-                        operadora = operadoras_map.get(operadora_csv)
-                    # 3. Primeira palavra do CSV (ex: "OI" → "OI S.A.")
-                    if not operadora:
-                        primeira_palavra_csv = operadora_csv.split()[0]
-                        operadora = operadoras_map.get(primeira_palavra_csv)
-                    
-                    if not operadora:
-                        erros.append(f"Linha {row_num}: Operadora '{operadora_csv}' não encontrada. Operadoras disponíveis: {', '.join(sorted(set([o.nome for o in operadoras_list])))}")
-                        continue
-                    
-                    # Registra se o nome foi normalizado
-                    if operadora_csv != operadora.nome.upper():
-                        mensagem_normalizacao = f"Linha {row_num}: '{operadora_csv}' → '{operadora.nome}'"
-                        if mensagem_normalizacao not in nomes_normalizados:
-                            nomes_normalizados.append(mensagem_normalizacao)
-
-                    # Limpa dados
-                    cnpj = ''.join(filter(str.isdigit, row.get('CNPJ', '')))
-                    razao_social = row.get('RAZÃO SOCIAL', '').strip()
-                    nome_sat = row.get('NOME SAT', '').strip()
-                    servico = row.get('SERVIÇO', '').strip()
-                    unidade = row.get('UNIDADE / FILTRO SAT', '').strip()
-
-                    if not all([cnpj, razao_social, nome_sat, servico, unidade]):
-                        erros.append(f"Linha {row_num}: Campos obrigatórios em falta")
-                        continue
-
-                    # Verifica se cliente já existe
-                    cliente_existente = Cliente.query.filter_by(
-                        cnpj=cnpj,
-                        operadora_id=operadora.id,
-                        unidade=unidade,
-                        servico=servico
-                    ).first()
-
-                    if cliente_existente and not sobrescrever:
-                        erros.append(f"Linha {row_num}: Cliente já existe (CNPJ: {cnpj})")
-                        continue
-
-                    # Cria ou atualiza cliente
-                    if cliente_existente:
-                        cliente = cliente_existente
-                        clientes_atualizados += 1
-                    else:
-                        cliente = Cliente()
-                        clientes_criados += 1
-
-                    # Preenche dados
-                    cliente.razao_social = razao_social
-                    cliente.nome_sat = nome_sat
-                    cliente.cnpj = cnpj
-                    cliente.operadora_id = operadora.id
-                    cliente.servico = servico
-                    cliente.unidade = unidade
-                    cliente.filtro = row.get('FILTRO', '').strip() or None
-                    cliente.dados_sat = row.get('DADOS SAT', '').strip() or None
-                    cliente.site_emissao = row.get('SITE PARA EMISSÃO', '').strip() or None
-                    cliente.login_portal = row.get('LOGIN', '').strip() or None
-                    cliente.senha_portal = row.get('SENHA', '').strip() or None
-                    cliente.cpf = row.get('CPF', '').strip() or None
-                    cliente.status_ativo = row.get('STATUS', '1') != '0'
-
-                    # Atualiza hash
-                    cliente.atualizar_hash()
-
-                    if not cliente_existente:
-                        db.session.add(cliente)
-
-                    clientes_processados += 1
-
-                except Exception as e:
-                    erros.append(f"Linha {row_num}: Erro ao processar - {str(e)}")
-
-            # Salva no banco
-            db.session.commit()
-
-            # Mensagem de resultado
-            mensagem = f"Importação concluída! {clientes_processados} clientes processados. "
-            mensagem += f"Criados: {clientes_criados}, Atualizados: {clientes_atualizados}"
-            
-            if nomes_normalizados:
-                mensagem += f", Nomes normalizados: {len(nomes_normalizados)}"
-            
-            if erros:
-                mensagem += f", Erros: {len(erros)}"
-                
-            flash(mensagem, 'success' if not erros else 'warning')
-            
-            # Mostra normalizações (primeiros 5)
-            if nomes_normalizados:
-                flash("Nomes de operadoras normalizados para padrão do sistema:", 'info')
-                for norm in nomes_normalizados[:5]:
-                    flash(norm, 'info')
-                if len(nomes_normalizados) > 5:
-                    flash(f"... e mais {len(nomes_normalizados) - 5} normalizações", 'info')
-            
-            if erros:
-                # Mostra primeiros 10 erros
-                for erro in erros[:10]:
-                    flash(erro, 'error')
-                if len(erros) > 10:
-                    flash(f"... e mais {len(erros) - 10} erros", 'error')
-
-            return redirect(url_for('clientes_bp.index'))
+            # O arquivo é guardado e processado em background, em lotes
+            importacao = enfileirar_importacao(
+                form.arquivo_csv.data,
+                sobrescrever=form.sobrescrever_existentes.data,
+                tamanho_lote=current_app.config.get('IMPORTACAO_CLIENTES_TAMANHO_LOTE', 500),
+                criado_por=getattr(current_user, 'username', None)
+            )
+            flash('Arquivo recebido! A importação está sendo processada em segundo plano.', 'success')
+            return redirect(url_for('clientes_bp.importacao_detalhe', importacao_id=importacao.id))
 
         except Exception as e:
             db.session.rollback()
             flash(f'Erro ao processar arquivo: {str(e)}', 'error')
 
-    return render_template('clientes/importar.html', form=form)
+    importacoes_recentes = ImportacaoClientes.query.order_by(
+        ImportacaoClientes.data_criacao.desc()
+    ).limit(10).all()
 
+    return render_template('clientes/importar.html', form=form, importacoes_recentes=importacoes_recentes)
 
-@bp.route('/api/clientes-ativos')
+
+@bp.route('/importacoes/<uuid:importacao_id>')
 @login_required
-def api_clientes_ativos():
-    """API para buscar clientes ativos (para usar em selects)"""
+def importacao_detalhe(importacao_id):
+    """Acompanha o progresso de uma importação"""
+
+    importacao = ImportacaoClientes.query.get_or_404(importacao_id)
+    return render_template('clientes/importacao.html', importacao=importacao)
+
+
+@bp.route('/api/importacoes/<uuid:importacao_id>')
+@login_required
+def api_importacao(importacao_id):
+    """
+    Progresso da importação em JSON
+
+    Os mesmos dados são publicados no SSE (/processos/sse/status) nos eventos
+    importacao_progresso, importacao_concluida e importacao_falhou.
+    """
+    importacao = ImportacaoClientes.query.get_or_404(importacao_id)
+    erros = importacao.erros or []
+
+    return jsonify({
+        'success': True,
+        'data': {
+            **importacao.progresso_dict(),
+            'erros': [f"Linha {linha}: {mensagem}" for linha, mensagem in erros[:100]],
+            'normalizacoes': (importacao.normalizacoes or [])[:20]
+        }
+    })
+
+
+@bp.route('/importacoes/<uuid:importacao_id>/retomar', methods=['POST'])
+@login_required
+def retomar_importacao_view(importacao_id):
+    """Reenfileira uma importação que falhou, a partir da última linha confirmada"""
+
+    importacao = ImportacaoClientes.query.get_or_404(importacao_id)
+    if retomar_importacao(importacao):
+        flash('Importação reenfileirada.', 'success')
+    else:
+        flash('Apenas importações com falha podem ser retomadas.', 'warning')
+
+    return redirect(url_for('clientes_bp.importacao_detalhe', importacao_id=importacao_id))
 
-    clientes = Cliente.query.filter_by(status_ativo=True).order_by(Cliente.razao_social).all()
+
+@bp.route('/api/listar')
+@login_required
+def api_listar():
+    """
+    Lista clientes em JSON com paginação por cursor (rolagem infinita)
+
+    Query params: mesmos filtros da listagem, cursor, dir (next|prev),
+    per_page e total=1 para incluir o total (em cache)
+    """
+    pagina = paginar_por_cursor(
+        _filtrar_clientes(request.args).options(*perfil_listagem_clientes(operadora_no_join=True)),
+        ORDEM_CLIENTES,
+        cursor=request.args.get('cursor'),
+        direcao=request.args.get('dir', DIRECAO_PROXIMA),
+        per_page=request.args.get('per_page', 20, type=int),
+        contar=request.args.get('total') == '1'
+    )
+
+    return jsonify({
+        'success': True,
+        'items': [
+            {
+                'id': str(cliente.id),
+                'razao_social': cliente.razao_social,
+                'nome_sat': cliente.nome_sat,
+                'cnpj': cliente.cnpj,
+                'operadora': cliente.operadora.nome if cliente.operadora else None,
+                'servico': cliente.servico,
+                'unidade': cliente.unidade,
+                'status_ativo': cliente.status_ativo
+            }
+            for cliente in pagina.items
+        ],
+        **pagina.to_dict()
+    })
+
+
+@bp.route('/api/buscar')
+@login_required
+def api_buscar():
+    """Busca clientes por nome, CNPJ ou operadora, ordenados por relevância"""
+
+    limite = min(request.args.get('limite', 20, type=int), 100)
+    clientes = BuscaService.buscar_clientes(request.args.get('q', ''), limite=limite)
 
     return jsonify([
         {
             'id': str(cliente.id),
             'razao_social': cliente.razao_social,
             'cnpj': cliente.cnpj,
-            'operadora': cliente.operadora.nome if cliente.operadora else None,
-            'hash_unico': cliente.hash_unico
+            'operadora': cliente.operadora.nome if cliente.operadora else None
         }
         for cliente in clientes
     ])
+
+
+@bp.route('/api/clientes-ativos')
+@login_required
+def api_clientes_ativos():
+    """API para buscar clientes ativos (para usar em selects)"""
+
+    # Gerado em streaming direto do cursor (sem carregar os clientes na memória)
+    consulta = (
+        db.select(
+            Cliente.id,
+            Cliente.razao_social,
+            Cliente.cnpj,
+            Operadora.nome.label('operadora'),
+            Cliente.hash_unico
+        )
+        .outerjoin(Operadora, Cliente.operadora_id == Operadora.id)
+        .where(Cliente.status_ativo == True)
+        .order_by(Cliente.razao_social, Cliente.id)
+    )
+
+    return resposta_exportacao('clientes_ativos', consulta, formato='json', anexo=False)
+
+
+@bp.route('/exportar')
+@login_required
+def exportar():
+    """Exporta os clientes filtrados em CSV ou NDJSON (?formato=, ?compactar=1)"""
+
+    formato, compactar = parametros_exportacao(request.args)
+    if formato not in ('csv', 'ndjson'):
+        return jsonify({'success': False, 'message': 'Formato inválido. Use csv ou ndjson'}), 400
+
+    # Mesmos filtros da listagem; credenciais do portal não são exportadas
+    consulta = (
+        _filtrar_clientes(request.args)
+        .with_entities(
+            Cliente.id,
+            Cliente.razao_social,
+            Cliente.nome_sat,
+            Cliente.cnpj,
+            Operadora.nome.label('operadora'),
+            Operadora.codigo.label('operadora_codigo'),
+            Cliente.servico,
+            Cliente.unidade,
+            Cliente.filtro,
+            Cliente.dados_sat,
+            Cliente.site_emissao,
+            Cliente.status_ativo,
+            Cliente.data_criacao,
+            Cliente.data_atualizacao
+        )
+        .order_by(Cliente.razao_social, Cliente.id)
+        .statement
+    )
+
+    return resposta_exportacao('clientes', consulta, formato=formato, compactar=compactar)
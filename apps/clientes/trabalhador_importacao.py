@@ -0,0 +1,410 @@
+"""
+Trabalhador de importações de clientes em background
+
+A rota /clientes/importar guarda o arquivo e cria uma ImportacaoClientes
+PENDENTE; este trabalhador (uma thread por processo, iniciada no run.py)
+assume as importações pendentes e as processa com o ImportadorClientes.
+
+- a importação é assumida com um UPDATE com guarda de status, então vários
+  workers podem rodar sem processar o mesmo arquivo duas vezes
+- o progresso (linhas, erros, vazão) e o heartbeat são gravados na mesma
+  transação de cada lote; uma importação PROCESSANDO sem heartbeat recente
+  (worker reiniciado ou morto) é assumida de novo e retomada a partir da
+  última linha confirmada
+- cada lote confirmado publica um evento SSE 'importacao_progresso',
+  depois do commit (o evento nunca anuncia linhas ainda não gravadas)
+"""
+
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any
+
+from sqlalchemy import select, update, or_, and_
+
+from apps import db
+from apps.models.importacao import ImportacaoClientes, StatusImportacao
+from .armazenamento_importacoes import salvar_arquivo, abrir_arquivo, remover_arquivo
+from .importacao import ImportadorClientes, ResultadoImportacao, ler_csv
+
+logger = logging.getLogger(__name__)
+
+# Quantidade de erros/normalizações guardados na importação (o total é sempre contado)
+LIMITE_ERROS_GRAVADOS = 500
+LIMITE_NORMALIZACOES_GRAVADAS = 50
+
+
+class ImportacaoPerdida(Exception):
+    """A importação foi assumida por outro worker (heartbeat expirado)"""
+
+
+def enfileirar_importacao(arquivo, sobrescrever: bool, tamanho_lote: int, criado_por: Optional[str] = None) -> ImportacaoClientes:
+    """
+    Guarda o arquivo enviado e cria a importação PENDENTE
+
+    Args:
+        arquivo: FileStorage do upload
+        sobrescrever: Atualiza os clientes existentes
+        tamanho_lote: Linhas gravadas por commit
+        criado_por: Usuário que enviou o arquivo
+    """
+    importacao = ImportacaoClientes(
+        id=uuid.uuid4(),
+        nome_arquivo=arquivo.filename or 'clientes.csv',
+        sobrescrever=bool(sobrescrever),
+        tamanho_lote=tamanho_lote,
+        criado_por=criado_por
+    )
+    importacao.armazenamento, importacao.caminho_arquivo, importacao.tamanho_bytes = salvar_arquivo(
+        arquivo, importacao.id
+    )
+    db.session.add(importacao)
+    db.session.commit()
+
+    trabalhador = obter_trabalhador()
+    if trabalhador:
+        trabalhador.acordar()
+
+    logger.info(f"Importação {importacao.id} enfileirada ({importacao.nome_arquivo}, {importacao.tamanho_bytes} bytes)")
+    return importacao
+
+
+def _resultado_da_importacao(importacao: ImportacaoClientes) -> ResultadoImportacao:
+    """Restaura os contadores de uma importação interrompida"""
+    resultado = ResultadoImportacao()
+    resultado.linhas_lidas = importacao.linhas_lidas or 0
+    resultado.processados = importacao.processados or 0
+    resultado.criados = importacao.criados or 0
+    resultado.atualizados = importacao.atualizados or 0
+    resultado.ultima_linha_confirmada = importacao.ultima_linha_confirmada or 1
+    resultado.erros = [tuple(erro) for erro in (importacao.erros or [])]
+    resultado.erros_omitidos = max(0, (importacao.total_erros or 0) - len(resultado.erros))
+    resultado.normalizacoes = list(importacao.normalizacoes or [])
+    return resultado
+
+
+def _notificar(tipo: str, progresso: Dict[str, Any]):
+    """Publica o progresso da importação para os clientes SSE"""
+    try:
+        from apps.processos.routes import enviar_evento_sse
+        enviar_evento_sse({'type': tipo, 'job_id': progresso['id'], 'importacao': progresso})
+    except Exception as e:
+        logger.warning(f"Não foi possível notificar clientes SSE: {e}")
+
+
+class TrabalhadorImportacoes:
+    """Processa as importações de clientes pendentes ou interrompidas"""
+
+    def __init__(
+        self,
+        intervalo_verificacao: int = 5,
+        timeout_segundos: int = 300,
+        maximo_tentativas: int = 3,
+        app=None
+    ):
+        """
+        Inicializa o trabalhador
+
+        Args:
+            intervalo_verificacao: Intervalo em segundos entre verificações sem aviso de nova importação
+            timeout_segundos: Tempo sem heartbeat após o qual a importação é retomada
+            maximo_tentativas: Vezes que uma importação interrompida é retomada antes de falhar
+            app: Instância do Flask app para contexto de aplicação
+        """
+        self.intervalo_verificacao = intervalo_verificacao
+        self.timeout_segundos = timeout_segundos
+        self.maximo_tentativas = maximo_tentativas
+        self.executando = False
+        self.thread: Optional[threading.Thread] = None
+        self.app = app
+        self._acordar = threading.Event()
+
+        logger.info(
+            f"TrabalhadorImportacoes inicializado (intervalo: {intervalo_verificacao}s, "
+            f"timeout: {timeout_segundos}s)")
+
+    def iniciar(self):
+        """Inicia o trabalhador em background"""
+        if self.executando:
+            logger.warning("Trabalhador de importações já está em execução")
+            return
+
+        self.executando = True
+        self.thread = threading.Thread(target=self._loop, name='importacoes-clientes', daemon=True)
+        self.thread.start()
+        logger.info("Trabalhador de importações iniciado")
+
+    def parar(self):
+        """Para o trabalhador"""
+        self.executando = False
+        self._acordar.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+        logger.info("Trabalhador de importações parado")
+
+    def acordar(self):
+        """Avisa que há uma nova importação (evita esperar o intervalo)"""
+        self._acordar.set()
+
+    def _loop(self):
+        if not self.app:
+            logger.error("App não configurado no trabalhador de importações.")
+            return
+
+        with self.app.app_context():
+            while self.executando:
+                try:
+                    while self.executando and self.processar_proxima():
+                        pass
+                except Exception as e:
+                    logger.error(f"Erro no loop de importações: {e}", exc_info=True)
+                finally:
+                    db.session.remove()
+
+                self._acordar.wait(self.intervalo_verificacao)
+                self._acordar.clear()
+
+    # ------------------------------------------------------------------
+    # Seleção
+    # ------------------------------------------------------------------
+
+    def _filtro_disponiveis(self, agora: datetime):
+        limite = agora - timedelta(seconds=self.timeout_segundos)
+        return or_(
+            ImportacaoClientes.status_importacao == StatusImportacao.PENDENTE.value,
+            and_(
+                ImportacaoClientes.status_importacao == StatusImportacao.PROCESSANDO.value,
+                or_(ImportacaoClientes.data_heartbeat.is_(None), ImportacaoClientes.data_heartbeat < limite)
+            )
+        )
+
+    def _assumir(self) -> Optional[ImportacaoClientes]:
+        """Assume a próxima importação disponível (UPDATE com guarda)"""
+        agora = datetime.now()
+        candidatas = db.session.execute(
+            select(ImportacaoClientes.id, ImportacaoClientes.tentativas)
+            .where(self._filtro_disponiveis(agora))
+            .order_by(ImportacaoClientes.data_criacao)
+            .limit(10)
+        ).all()
+
+        for importacao_id, tentativas in candidatas:
+            if tentativas >= self.maximo_tentativas:
+                valores = {
+                    'status_importacao': StatusImportacao.FALHOU.value,
+                    'data_fim': agora,
+                    'mensagem_erro': f"Importação interrompida {tentativas} vezes"
+                }
+            else:
+                valores = {
+                    'status_importacao': StatusImportacao.PROCESSANDO.value,
+                    'data_heartbeat': agora,
+                    'tentativas': tentativas + 1
+                }
+
+            assumida = db.session.execute(
+                update(ImportacaoClientes)
+                .where(
+                    ImportacaoClientes.id == importacao_id,
+                    ImportacaoClientes.tentativas == tentativas,
+                    self._filtro_disponiveis(agora)
+                )
+                .values(**valores)
+                .execution_options(synchronize_session=False)
+            ).rowcount == 1
+            db.session.commit()
+
+            if assumida and valores['status_importacao'] == StatusImportacao.PROCESSANDO.value:
+                return db.session.get(ImportacaoClientes, importacao_id, populate_existing=True)
+            if assumida:
+                logger.error(f"Importação {importacao_id} falhou após {tentativas} tentativas")
+                _notificar('importacao_falhou', db.session.get(
+                    ImportacaoClientes, importacao_id, populate_existing=True).progresso_dict())
+        return None
+
+    # ------------------------------------------------------------------
+    # Processamento
+    # ------------------------------------------------------------------
+
+    def processar_proxima(self) -> bool:
+        """
+        Processa a próxima importação disponível
+
+        Returns:
+            bool: True se alguma importação foi processada
+        """
+        importacao = self._assumir()
+        if importacao is None:
+            return False
+        self.processar(importacao)
+        return True
+
+    def processar(self, importacao: ImportacaoClientes):
+        """Importa (ou retoma) o arquivo da importação já assumida"""
+        importacao_id = importacao.id
+        tentativa = importacao.tentativas
+        retomada = importacao.ultima_linha_confirmada > 1
+        importacao_tamanho = importacao.tamanho_bytes
+        logger.info(
+            f"{'Retomando' if retomada else 'Iniciando'} importação {importacao_id} "
+            f"(linha {importacao.ultima_linha_confirmada}, tentativa {tentativa})")
+
+        if importacao.data_inicio is None:
+            importacao.data_inicio = datetime.now()
+            db.session.commit()
+
+        arquivo_aberto = {}
+        progresso_confirmado = {}
+
+        def gravar_progresso(resultado: ResultadoImportacao):
+            arquivo = arquivo_aberto.get('arquivo')
+            bytes_lidos = arquivo.tell() if arquivo is not None else 0
+            progresso = {
+                'bytes_lidos': bytes_lidos,
+                'ultima_linha_confirmada': resultado.ultima_linha_confirmada,
+                'linhas_lidas': resultado.linhas_lidas,
+                'processados': resultado.processados,
+                'criados': resultado.criados,
+                'atualizados': resultado.atualizados,
+                'total_erros': resultado.total_erros,
+                'linhas_por_segundo': round(resultado.linhas_por_segundo, 1),
+                'erros': [list(erro) for erro in resultado.erros[:LIMITE_ERROS_GRAVADOS]],
+                'normalizacoes': resultado.normalizacoes[:LIMITE_NORMALIZACOES_GRAVADAS],
+                'data_heartbeat': datetime.now()
+            }
+            atualizadas = db.session.execute(
+                update(ImportacaoClientes)
+                .where(
+                    ImportacaoClientes.id == importacao_id,
+                    ImportacaoClientes.tentativas == tentativa,
+                    ImportacaoClientes.status_importacao == StatusImportacao.PROCESSANDO.value
+                )
+                .values(**progresso)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if atualizadas != 1:
+                raise ImportacaoPerdida(f"Importação {importacao_id} assumida por outro worker")
+
+            # Publicado por notificar_progresso, depois do commit do lote
+            progresso_confirmado['evento'] = {
+                'id': str(importacao_id),
+                'status': StatusImportacao.PROCESSANDO.value,
+                'percentual': min(99, int(bytes_lidos * 100 / importacao_tamanho)) if importacao_tamanho else 0,
+                **{chave: valor for chave, valor in progresso.items()
+                   if chave not in ('erros', 'normalizacoes', 'data_heartbeat')}
+            }
+
+        def notificar_progresso(resultado: ResultadoImportacao):
+            evento = progresso_confirmado.pop('evento', None)
+            if evento is not None:
+                _notificar('importacao_progresso', evento)
+
+        try:
+            importador = ImportadorClientes(
+                sobrescrever=importacao.sobrescrever,
+                tamanho_lote=importacao.tamanho_lote,
+                ao_confirmar_lote=gravar_progresso,
+                apos_confirmar_lote=notificar_progresso
+            )
+            with abrir_arquivo(importacao) as arquivo:
+                # A posição no arquivo binário (menos o buffer do leitor) indica o percentual
+                arquivo_aberto['arquivo'] = arquivo
+                importador.importar(ler_csv(arquivo), resultado=_resultado_da_importacao(importacao))
+
+            importacao = db.session.get(ImportacaoClientes, importacao_id, populate_existing=True)
+            importacao.status_importacao = StatusImportacao.CONCLUIDA.value
+            importacao.data_fim = datetime.now()
+            db.session.commit()
+            remover_arquivo(importacao)
+
+            logger.info(f"Importação {importacao_id} concluída: {importacao.progresso_dict()}")
+            _notificar('importacao_concluida', importacao.progresso_dict())
+
+        except ImportacaoPerdida as e:
+            db.session.rollback()
+            logger.warning(str(e))
+
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Erro na importação {importacao_id}: {e}", exc_info=True)
+            db.session.execute(
+                update(ImportacaoClientes)
+                .where(ImportacaoClientes.id == importacao_id, ImportacaoClientes.tentativas == tentativa)
+                .values(
+                    status_importacao=StatusImportacao.FALHOU.value,
+                    data_fim=datetime.now(),
+                    mensagem_erro=str(e)
+                )
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            _notificar('importacao_falhou', db.session.get(
+                ImportacaoClientes, importacao_id, populate_existing=True).progresso_dict())
+
+
+def retomar_importacao(importacao: ImportacaoClientes) -> bool:
+    """
+    Reenfileira uma importação que falhou (continua da última linha confirmada)
+
+    Returns:
+        bool: False se a importação não está com falha
+    """
+    if importacao.status_importacao != StatusImportacao.FALHOU.value:
+        return False
+
+    importacao.status_importacao = StatusImportacao.PENDENTE.value
+    importacao.tentativas = 0
+    importacao.data_fim = None
+    importacao.mensagem_erro = None
+    db.session.commit()
+
+    trabalhador = obter_trabalhador()
+    if trabalhador:
+        trabalhador.acordar()
+    return True
+
+
+# Instância global do trabalhador
+_trabalhador_instance: Optional[TrabalhadorImportacoes] = None
+
+
+def obter_trabalhador(app=None) -> Optional[TrabalhadorImportacoes]:
+    """
+    Retorna a instância global do trabalhador (singleton)
+
+    Args:
+        app: Instância do Flask app (necessária apenas na primeira chamada)
+
+    Returns:
+        Instância do TrabalhadorImportacoes ou None se não inicializado
+    """
+    global _trabalhador_instance
+
+    if _trabalhador_instance is None and app is not None:
+        _trabalhador_instance = TrabalhadorImportacoes(
+            intervalo_verificacao=app.config.get('IMPORTACAO_CLIENTES_INTERVALO', 5),
+            timeout_segundos=app.config.get('IMPORTACAO_CLIENTES_TIMEOUT_SEGUNDOS', 300),
+            maximo_tentativas=app.config.get('IMPORTACAO_CLIENTES_MAXIMO_TENTATIVAS', 3),
+            app=app
+        )
+
+    return _trabalhador_instance
+
+
+def iniciar_trabalhador_importacoes(app):
+    """
+    Inicia o trabalhador de importações
+
+    Args:
+        app: Instância do Flask app
+    """
+    trabalhador = obter_trabalhador(app)
+    if trabalhador:
+        trabalhador.iniciar()
+
+
+def parar_trabalhador_importacoes():
+    """Para o trabalhador de importações"""
+    if _trabalhador_instance is not None:
+        _trabalhador_instance.parar()
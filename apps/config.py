@@ -33,6 +33,76 @@ class Config(object):
     API_EXTERNA_URL = os.getenv('API_EXTERNA_URL', 'http://191.252.218.230:8000')
     API_EXTERNA_TOKEN = os.getenv('API_EXTERNA_TOKEN', None)
 
+    # Reconciliador de execuções (finaliza em background jobs já terminados)
+    RECONCILIADOR_INTERVALO    = int(os.getenv('RECONCILIADOR_INTERVALO', 60))
+    RECONCILIADOR_TAMANHO_LOTE = int(os.getenv('RECONCILIADOR_TAMANHO_LOTE', 50))
+    # Execução cujo job não existe mais na API externa: TIMEOUT após
+    # EXECUCAO_TIMEOUT_MINUTOS; job ainda em andamento: só após o limite máximo
+    EXECUCAO_TIMEOUT_MINUTOS       = int(os.getenv('EXECUCAO_TIMEOUT_MINUTOS', 120))
+    EXECUCAO_LIMITE_MAXIMO_MINUTOS = int(os.getenv('EXECUCAO_LIMITE_MAXIMO_MINUTOS', 1440))
+
+    # Webhook de jobs (push da API externa). Com o segredo configurado o
+    # reconciliador passa a ser apenas um fallback lento.
+    WEBHOOK_SECRET                    = os.getenv('WEBHOOK_SECRET', None)
+    WEBHOOK_TOLERANCIA_SEGUNDOS       = int(os.getenv('WEBHOOK_TOLERANCIA_SEGUNDOS', 300))
+    WEBHOOK_TAMANHO_LOTE              = int(os.getenv('WEBHOOK_TAMANHO_LOTE', 100))
+    # Retenção das chaves de eventos já aceitos (deduplicação de reenvios)
+    WEBHOOK_DEDUP_TTL_SEGUNDOS        = int(os.getenv('WEBHOOK_DEDUP_TTL_SEGUNDOS', 86400))
+    RECONCILIADOR_INTERVALO_FALLBACK  = int(os.getenv('RECONCILIADOR_INTERVALO_FALLBACK', 600))
+
+    # Barramento de eventos SSE entre workers: auto | postgres | arquivo | local
+    EVENTOS_SSE_BACKEND = os.getenv('EVENTOS_SSE_BACKEND', 'auto')
+    EVENTOS_SSE_ARQUIVO = os.getenv('EVENTOS_SSE_ARQUIVO', None)
+
+    # Filas dos clientes SSE: tamanho, política (descartar_antigos | agrupar_progresso)
+    # e tempo máximo com a fila cheia antes de desconectar o cliente
+    SSE_FILA_TAMANHO           = int(os.getenv('SSE_FILA_TAMANHO', 100))
+    SSE_FILA_POLITICA          = os.getenv('SSE_FILA_POLITICA', 'agrupar_progresso')
+    SSE_ATRASO_MAXIMO_SEGUNDOS = int(os.getenv('SSE_ATRASO_MAXIMO_SEGUNDOS', 60))
+    SSE_JANELA_PROGRESSO_MS    = int(os.getenv('SSE_JANELA_PROGRESSO_MS', 250))
+
+    # Long-poll das consultas de status (?wait=). Só habilitar quando a rota
+    # for servida pelo processo de streaming (workers assíncronos, ver
+    # nginx/appseed-app.conf); com workers síncronos cada espera prende um worker
+    LONG_POLL_HABILITADO    = os.getenv('LONG_POLL_HABILITADO', 'False') == 'True'
+    LONG_POLL_ESPERA_MAXIMA = int(os.getenv('LONG_POLL_ESPERA_MAXIMA', 30))
+    # Sem eventos do barramento (progresso de jobs em execução), o status é
+    # confirmado na API externa a cada intervalo durante a espera
+    LONG_POLL_INTERVALO_CONSULTA = int(os.getenv('LONG_POLL_INTERVALO_CONSULTA', 5))
+
+    # Ações em lote sobre processos: tamanho máximo do lote e requisições
+    # simultâneas à API externa no upload SAT em lote
+    PROCESSOS_LOTE_MAXIMO  = int(os.getenv('PROCESSOS_LOTE_MAXIMO', 500))
+    SAT_LOTE_CONCORRENCIA  = int(os.getenv('SAT_LOTE_CONCORRENCIA', 4))
+
+    # Importação de clientes via CSV: linhas gravadas por commit
+    IMPORTACAO_CLIENTES_TAMANHO_LOTE = int(os.getenv('IMPORTACAO_CLIENTES_TAMANHO_LOTE', 500))
+
+    # Importações em background: onde o arquivo enviado fica (local | minio),
+    # intervalo de verificação do worker, tempo sem sinal após o qual uma
+    # importação é considerada interrompida e retomada, e máximo de tentativas
+    IMPORTACOES_ARMAZENAMENTO              = os.getenv('IMPORTACOES_ARMAZENAMENTO', 'local')
+    IMPORTACOES_DIR                        = os.getenv('IMPORTACOES_DIR', os.path.join(basedir, '..', 'uploads', 'importacoes'))
+    IMPORTACAO_CLIENTES_INTERVALO          = int(os.getenv('IMPORTACAO_CLIENTES_INTERVALO', 5))
+    IMPORTACAO_CLIENTES_TIMEOUT_SEGUNDOS   = int(os.getenv('IMPORTACAO_CLIENTES_TIMEOUT_SEGUNDOS', 300))
+    IMPORTACAO_CLIENTES_MAXIMO_TENTATIVAS  = int(os.getenv('IMPORTACAO_CLIENTES_MAXIMO_TENTATIVAS', 3))
+
+    # Estatísticas das execuções: validade (segundos) do cache por filtros; 0 desativa
+    ESTATISTICAS_EXECUCOES_TTL = int(os.getenv('ESTATISTICAS_EXECUCOES_TTL', 30))
+
+    # Exportações em streaming: linhas buscadas do cursor no servidor por vez
+    EXPORTACAO_TAMANHO_LOTE = int(os.getenv('EXPORTACAO_TAMANHO_LOTE', 1000))
+
+    # Segmentos locais com os logs dos jobs capturados do stream em tempo real
+    LOGS_JOBS_DIR = os.getenv('LOGS_JOBS_DIR', os.path.join(basedir, '..', 'logs', 'jobs'))
+    # Captura os logs dos jobs criados pelo dashboard desde o início (histórico
+    # completo servido localmente); mantém a conexão com o stream de logs aberta
+    LOGS_JOBS_CAPTURAR = os.getenv('LOGS_JOBS_CAPTURAR', 'False') == 'True'
+    # Retenção dos segmentos fechados: idade máxima (dias) e tamanho total (MB);
+    # 0 desativa o limite. Os mais antigos são removidos primeiro
+    LOGS_JOBS_RETENCAO_DIAS     = int(os.getenv('LOGS_JOBS_RETENCAO_DIAS', 30))
+    LOGS_JOBS_TAMANHO_MAXIMO_MB = int(os.getenv('LOGS_JOBS_TAMANHO_MAXIMO_MB', 2048))
+
     DB_ENGINE   = os.getenv('DB_ENGINE'   , None)
     DB_USERNAME = os.getenv('DB_USERNAME' , None)
     DB_PASS     = os.getenv('DB_PASS'     , None)
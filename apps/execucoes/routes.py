@@ -3,10 +3,9 @@ Rotas do módulo de Execuções
 """
 
 import logging
-from flask import render_template, redirect, url_for, flash, request, jsonify
+from flask import render_template, redirect, url_for, flash, request, jsonify, Response, stream_with_context
 from flask_login import login_required, current_user
-from sqlalchemy import desc
-from sqlalchemy.orm import joinedload
+from sqlalchemy import desc, select
 
 from . import bp
 from .forms import ExecucaoFiltroForm
@@ -14,9 +13,16 @@ from .services import ExecucaoService, ExecucaoFiltros
 from apps import db
 from apps.models import Execucao, Processo, Cliente, Operadora
 from apps.models.execucao import StatusExecucao
+from apps.models.execucao_log import ExecucaoLog, formatar_linha_log
+from apps.models.perfis_carga import perfil_listagem_execucoes, perfil_detalhe_execucao
+from apps.services.paginacao import paginar_por_cursor, DIRECAO_PROXIMA
+from apps.services.exportacao import resposta_exportacao, parametros_exportacao, linhas_da_consulta
 
 logger = logging.getLogger(__name__)
 
+# Chave estável da listagem de execuções (paginação por cursor)
+ORDEM_EXECUCOES = [(Execucao.data_inicio, True), (Execucao.id, True)]
+
 
 @bp.route('/')
 @login_required
@@ -25,27 +31,24 @@ def index():
     try:
         logger.info("=== INICIANDO ROTA INDEX EXECUÇÕES ===")
         
-        # Paginação
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
-        
         # Filtros
         filtros = ExecucaoFiltros.from_request_args(request.args)
         
         # Query base
-        query = Execucao.query.options(
-            joinedload(Execucao.processo).joinedload(Processo.cliente).joinedload(Cliente.operadora),
-            joinedload(Execucao.executor)
-        )
+        query = Execucao.query.options(*perfil_listagem_execucoes())
         
         # Aplica filtros
         query = ExecucaoService.aplicar_filtros(query, filtros)
         
-        # Ordenação
-        query = query.order_by(desc(Execucao.data_inicio))
-        
-        # Paginação
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        # Paginação por cursor (ordenada por data de início e id)
+        pagination = paginar_por_cursor(
+            query,
+            ORDEM_EXECUCOES,
+            cursor=request.args.get('cursor'),
+            direcao=request.args.get('dir', DIRECAO_PROXIMA),
+            per_page=request.args.get('per_page', 20, type=int),
+            contar=True
+        )
         
         # Formulário de filtros
         form = ExecucaoFiltroForm(request.args)
@@ -59,7 +62,7 @@ def index():
         # Estatísticas
         stats = ExecucaoService.obter_estatisticas(filtros)
         
-        logger.info(f"Execuções carregadas: {pagination.total} total, página {page}")
+        logger.info(f"Execuções carregadas: {pagination.total} total, {len(pagination.items)} na página")
         
         return render_template(
             'execucoes/index.html',
@@ -76,6 +79,98 @@ def index():
         return redirect(url_for('home_blueprint.index'))
 
 
+@bp.route('/api/listar')
+@login_required
+def api_listar():
+    """
+    Lista execuções em JSON com paginação por cursor (rolagem infinita)
+
+    Query params: mesmos filtros da listagem, cursor, dir (next|prev),
+    per_page e total=1 para incluir o total (em cache)
+    """
+    try:
+        filtros = ExecucaoFiltros.from_request_args(request.args)
+        query = Execucao.query.options(*perfil_listagem_execucoes())
+        query = ExecucaoService.aplicar_filtros(query, filtros)
+
+        pagina = paginar_por_cursor(
+            query,
+            ORDEM_EXECUCOES,
+            cursor=request.args.get('cursor'),
+            direcao=request.args.get('dir', DIRECAO_PROXIMA),
+            per_page=request.args.get('per_page', 20, type=int),
+            contar=request.args.get('total') == '1'
+        )
+
+        return jsonify({
+            'success': True,
+            'items': [
+                {
+                    'id': str(execucao.id),
+                    'processo_id': str(execucao.processo_id),
+                    'cliente': execucao.processo.cliente.razao_social if execucao.processo and execucao.processo.cliente else None,
+                    'tipo_execucao': execucao.tipo_execucao,
+                    'status_execucao': execucao.status_execucao,
+                    'job_id': execucao.job_id,
+                    'data_inicio': execucao.data_inicio.isoformat() if execucao.data_inicio else None,
+                    'data_fim': execucao.data_fim.isoformat() if execucao.data_fim else None
+                }
+                for execucao in pagina.items
+            ],
+            **pagina.to_dict()
+        })
+
+    except Exception as e:
+        logger.error(f"Erro ao listar execuções (API): {e}", exc_info=True)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@bp.route('/exportar')
+@login_required
+def exportar():
+    """
+    Exporta as execuções filtradas em streaming (sem logs e detalhes de erro)
+
+    Query params: mesmos filtros da listagem, formato (csv | ndjson) e
+    compactar=1 para gzip
+    """
+    formato, compactar = parametros_exportacao(request.args)
+    if formato not in ('csv', 'ndjson'):
+        return jsonify({'success': False, 'error': 'Formato inválido. Use csv ou ndjson'}), 400
+
+    try:
+        filtros = ExecucaoFiltros.from_request_args(request.args)
+        consulta = (
+            ExecucaoService.aplicar_filtros(Execucao.query, filtros)
+            .outerjoin(Processo, Execucao.processo_id == Processo.id)
+            .outerjoin(Cliente, Processo.cliente_id == Cliente.id)
+            .with_entities(
+                Execucao.id,
+                Execucao.processo_id,
+                Cliente.razao_social.label('cliente'),
+                Processo.mes_ano,
+                Execucao.tipo_execucao,
+                Execucao.status_execucao,
+                Execucao.classe_rpa_utilizada,
+                Execucao.job_id,
+                Execucao.numero_tentativa,
+                Execucao.url_arquivo_s3,
+                Execucao.data_inicio,
+                Execucao.data_fim
+            )
+            .order_by(*[
+                coluna.desc() if descendente else coluna.asc()
+                for coluna, descendente in ORDEM_EXECUCOES
+            ])
+            .statement
+        )
+
+        return resposta_exportacao('execucoes', consulta, formato=formato, compactar=compactar)
+
+    except Exception as e:
+        logger.error(f"Erro ao exportar execuções: {e}", exc_info=True)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @bp.route('/detalhes/<string:execucao_id>')
 @login_required
 def detalhes(execucao_id):
@@ -83,17 +178,14 @@ def detalhes(execucao_id):
     try:
         logger.info(f"Carregando detalhes da execução {execucao_id}")
         
-        execucao = Execucao.query.options(
-            joinedload(Execucao.processo).joinedload(Processo.cliente).joinedload(Cliente.operadora),
-            joinedload(Execucao.executor)
-        ).get(execucao_id)
+        execucao = Execucao.query.options(*perfil_detalhe_execucao()).get(execucao_id)
         
         if not execucao:
             flash('Execução não encontrada', 'error')
             return redirect(url_for('execucoes_bp.index'))
         
         # Busca outras execuções do mesmo processo
-        outras_execucoes = Execucao.query.filter(
+        outras_execucoes = Execucao.query.options(*perfil_listagem_execucoes()).filter(
             Execucao.processo_id == execucao.processo_id,
             Execucao.id != execucao.id
         ).order_by(desc(Execucao.data_inicio)).limit(5).all()
@@ -110,6 +202,93 @@ def detalhes(execucao_id):
         return redirect(url_for('execucoes_bp.index'))
 
 
+# Página do log da execução (linhas)
+LINHAS_PAGINA_LOG = 500
+LINHAS_MAXIMO_PAGINA_LOG = 2000
+
+
+@bp.route('/api/<string:execucao_id>/log')
+@login_required
+def api_log(execucao_id):
+    """
+    Retorna um intervalo das linhas do log da execução (execucao_logs)
+
+    Query params:
+        apos: linhas com seq maior que o informado, em ordem (acompanhar)
+        antes: linhas com seq menor que o informado (carregar anteriores)
+        limite: quantidade de linhas (padrão 500, máximo 2000)
+
+    Sem apos/antes retorna as últimas linhas. Para acompanhar uma execução
+    em andamento, consulte novamente com apos=ultimo_seq.
+    """
+    try:
+        limite = max(1, min(request.args.get('limite', LINHAS_PAGINA_LOG, type=int), LINHAS_MAXIMO_PAGINA_LOG))
+        apos = request.args.get('apos', type=int)
+        antes = request.args.get('antes', type=int)
+
+        status_execucao = db.session.query(Execucao.status_execucao).filter(Execucao.id == execucao_id).scalar()
+        if status_execucao is None:
+            return jsonify({'success': False, 'message': 'Execução não encontrada'}), 404
+
+        query = db.session.query(ExecucaoLog).filter(ExecucaoLog.execucao_id == execucao_id)
+        if apos is not None:
+            linhas = query.filter(ExecucaoLog.seq > apos).order_by(ExecucaoLog.seq).limit(limite).all()
+            tem_anteriores = None
+        else:
+            if antes is not None:
+                query = query.filter(ExecucaoLog.seq < antes)
+            # Uma linha a mais indica se há linhas anteriores
+            linhas = query.order_by(ExecucaoLog.seq.desc()).limit(limite + 1).all()
+            tem_anteriores = len(linhas) > limite
+            linhas = linhas[:limite][::-1]
+
+        return jsonify({
+            'success': True,
+            'execucao_id': execucao_id,
+            'linhas': [dict(linha.to_dict(), texto=linha.formatar()) for linha in linhas],
+            'primeiro_seq': linhas[0].seq if linhas else antes,
+            'ultimo_seq': linhas[-1].seq if linhas else apos,
+            'tem_anteriores': tem_anteriores,
+            'em_andamento': status_execucao in (
+                StatusExecucao.EXECUTANDO.value, StatusExecucao.TENTANDO_NOVAMENTE.value
+            )
+        })
+
+    except Exception as e:
+        logger.error(f"Erro ao obter log da execução {execucao_id}: {e}", exc_info=True)
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@bp.route('/api/<string:execucao_id>/log/download')
+@login_required
+def download_log(execucao_id):
+    """Envia o log completo da execução em partes, lido do cursor sem montá-lo em memória"""
+    if not db.session.query(Execucao.id).filter(Execucao.id == execucao_id).first():
+        return jsonify({'success': False, 'message': 'Execução não encontrada'}), 404
+
+    consulta = (
+        select(ExecucaoLog.ts, ExecucaoLog.level, ExecucaoLog.message)
+        .where(ExecucaoLog.execucao_id == execucao_id)
+        .order_by(ExecucaoLog.seq)
+    )
+
+    def gerar():
+        bloco = []
+        for ts, nivel, mensagem in linhas_da_consulta(consulta):
+            bloco.append(formatar_linha_log(ts, nivel, mensagem) + '\n')
+            if len(bloco) >= LINHAS_MAXIMO_PAGINA_LOG:
+                yield ''.join(bloco)
+                bloco = []
+        if bloco:
+            yield ''.join(bloco)
+
+    return Response(
+        stream_with_context(gerar()),
+        mimetype='text/plain; charset=utf-8',
+        headers={'Content-Disposition': f'attachment; filename=execucao_{execucao_id}.log'}
+    )
+
+
 @bp.route('/retentar/<string:execucao_id>', methods=['POST'])
 @login_required
 def retentar(execucao_id):
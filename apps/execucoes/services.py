@@ -4,18 +4,26 @@ Serviços de negócio para Execuções
 
 import logging
 from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 from dataclasses import dataclass
 
-from sqlalchemy import and_, or_, func, desc
-from sqlalchemy.orm import joinedload
+from flask import current_app
+from sqlalchemy import and_, or_, func, desc, case
 
 from apps import db
-from apps.models import Execucao, Processo, Cliente, Operadora, Usuario
+from apps.models import Execucao, ExecucaoStatsDaily, Processo, Cliente, Operadora, Usuario
 from apps.models.execucao import StatusExecucao, TipoExecucao
+from apps.models.perfis_carga import perfil_listagem_execucoes
+from apps.services.busca_service import BuscaService
+from apps.services import consolidado_execucoes as consolidado
+from apps.services.estatisticas import em_cache
 
 logger = logging.getLogger(__name__)
 
+# Validade (segundos) das estatísticas em cache e percentis da duração
+TTL_ESTATISTICAS_EXECUCOES = 30
+PERCENTIS_DURACAO = (0.5, 0.95)
+
 
 @dataclass
 class ExecucaoFiltros:
@@ -75,13 +83,11 @@ class ExecucaoService:
         """Aplica filtros à query de execuções"""
         try:
             if filtros.busca:
-                # Busca por job_id ou dados relacionados
-                query = query.join(Execucao.processo).join(Processo.cliente)
+                # Busca por job_id ou pelo cliente do processo (índice de busca)
                 query = query.filter(
                     or_(
                         Execucao.job_id.like(f'%{filtros.busca}%'),
-                        Cliente.razao_social.like(f'%{filtros.busca}%'),
-                        Cliente.cnpj.like(f'%{filtros.busca}%')
+                        Execucao.processo.has(BuscaService.filtro_cliente(Processo.cliente_id, filtros.busca))
                     )
                 )
 
@@ -92,8 +98,9 @@ class ExecucaoService:
                 query = query.filter(Execucao.tipo_execucao == filtros.tipo)
 
             if filtros.operadora_id:
-                query = query.join(Execucao.processo).join(Processo.cliente)
-                query = query.filter(Cliente.operadora_id == filtros.operadora_id)
+                query = query.filter(
+                    Execucao.processo.has(Processo.cliente.has(Cliente.operadora_id == filtros.operadora_id))
+                )
 
             if filtros.data_inicio:
                 query = query.filter(Execucao.data_inicio >= filtros.data_inicio)
@@ -108,78 +115,194 @@ class ExecucaoService:
             raise
 
     @staticmethod
-    def obter_estatisticas(filtros: Optional[ExecucaoFiltros] = None) -> Dict[str, Any]:
-        """Obtém estatísticas das execuções"""
-        try:
-            query = Execucao.query
+    def obter_estatisticas(filtros: Optional[ExecucaoFiltros] = None, usar_cache: bool = True) -> Dict[str, Any]:
+        """
+        Obtém estatísticas das execuções, calculadas no banco
+
+        Com o consolidado diário completo (execucao_stats_daily), sem busca
+        textual e com o período em dias inteiros, lê o consolidado e conta à
+        parte as execuções em andamento; a mediana e o percentil 95 da duração
+        vêm do histograma. Nos demais casos agrega a tabela de execuções. O
+        resultado fica em cache por alguns segundos por combinação de filtros
+        (ESTATISTICAS_EXECUCOES_TTL; 0 desativa).
+        """
+        usar_consolidado = filtros is None or ExecucaoService._consolidado_atende(filtros)
+        if usar_consolidado and consolidado.consolidado_disponivel():
+            calcular = lambda: ExecucaoService._estatisticas_consolidadas(filtros or ExecucaoFiltros())
+        else:
+            calcular = lambda: ExecucaoService._calcular_estatisticas(filtros)
+
+        ttl = current_app.config.get('ESTATISTICAS_EXECUCOES_TTL', TTL_ESTATISTICAS_EXECUCOES)
+        if not usar_cache or ttl <= 0:
+            return calcular()
+
+        return em_cache(
+            f"execucoes:{filtros!r}",
+            (Execucao.__tablename__, ExecucaoStatsDaily.__tablename__),
+            calcular,
+            ttl=ttl
+        )
 
-            # Aplica filtros se fornecidos
-            if filtros:
-                query = ExecucaoService.aplicar_filtros(query, filtros)
+    @staticmethod
+    def _consolidado_atende(filtros: ExecucaoFiltros) -> bool:
+        """Os filtros podem ser respondidos pelo consolidado diário?"""
+        if filtros.busca:
+            return False
+        if filtros.data_inicio and filtros.data_inicio.time() != time.min:
+            return False
+        if filtros.data_fim and filtros.data_fim.time() < time(23, 59, 59):
+            return False
+        return True
 
-            # Total de execuções
-            total = query.count()
+    @staticmethod
+    def _montar_estatisticas(status_dict: Dict[str, int], tipo_dict: Dict[str, int],
+                             duracao_media: float, percentis: Dict[float, float]) -> Dict[str, Any]:
+        total = sum(status_dict.values())
+        concluidas = status_dict.get(StatusExecucao.CONCLUIDO.value, 0)
+        taxa_sucesso = (concluidas / total * 100) if total > 0 else 0
+
+        return {
+            'total': total,
+            'concluidas': concluidas,
+            'executando': status_dict.get(StatusExecucao.EXECUTANDO.value, 0),
+            'falhadas': status_dict.get(StatusExecucao.FALHOU.value, 0),
+            'canceladas': status_dict.get(StatusExecucao.CANCELADO.value, 0),
+            'timeout': status_dict.get(StatusExecucao.TIMEOUT.value, 0),
+            'downloads': tipo_dict.get(TipoExecucao.DOWNLOAD_FATURA.value, 0),
+            'uploads_sat': tipo_dict.get(TipoExecucao.UPLOAD_SAT.value, 0),
+            'uploads_manual': tipo_dict.get(TipoExecucao.UPLOAD_MANUAL.value, 0),
+            'taxa_sucesso': round(taxa_sucesso, 1),
+            'duracao_media_segundos': round(duracao_media, 1),
+            'duracao_p50_segundos': round(percentis[0.5], 1),
+            'duracao_p95_segundos': round(percentis[0.95], 1)
+        }
 
-            # Por status
-            stats_status = db.session.query(
-                Execucao.status_execucao,
-                func.count(Execucao.id).label('count')
+    @staticmethod
+    def _estatisticas_consolidadas(filtros: ExecucaoFiltros) -> Dict[str, Any]:
+        try:
+            tabela = ExecucaoStatsDaily.__table__
+            status_dict: Dict[str, int] = {}
+            tipo_dict: Dict[str, int] = {}
+            concluidas = []
+
+            grupos = db.session.execute(consolidado.consulta_consolidado(
+                tabela.c.status_execucao, tabela.c.tipo_execucao,
+                dia_inicio=filtros.data_inicio.date() if filtros.data_inicio else None,
+                dia_fim=filtros.data_fim.date() if filtros.data_fim else None,
+                operadora_id=filtros.operadora_id, tipo=filtros.tipo, status=filtros.status
+            ))
+            for linha in grupos:
+                status_dict[linha.status_execucao] = status_dict.get(linha.status_execucao, 0) + int(linha.quantidade)
+                tipo_dict[linha.tipo_execucao] = tipo_dict.get(linha.tipo_execucao, 0) + int(linha.quantidade)
+                if linha.status_execucao == StatusExecucao.CONCLUIDO.value:
+                    concluidas.append(consolidado.acumulado_da_linha(linha))
+
+            # Execuções em andamento ficam fora do consolidado
+            if not filtros.status or filtros.status in consolidado.STATUS_EM_ANDAMENTO:
+                em_andamento = db.session.execute(consolidado.contar_em_andamento(
+                    Execucao.status_execucao, Execucao.tipo_execucao,
+                    data_inicio=filtros.data_inicio, data_fim=filtros.data_fim,
+                    operadora_id=filtros.operadora_id, tipo=filtros.tipo, status=filtros.status
+                ))
+                for status, tipo, quantidade in em_andamento:
+                    status_dict[status] = status_dict.get(status, 0) + quantidade
+                    tipo_dict[tipo] = tipo_dict.get(tipo, 0) + quantidade
+
+            duracoes = consolidado.somar_acumulados(concluidas)
+            return ExecucaoService._montar_estatisticas(
+                status_dict, tipo_dict,
+                consolidado.duracao_media(duracoes),
+                consolidado.percentis_histograma(duracoes, PERCENTIS_DURACAO)
             )
-            
-            if filtros:
-                stats_status = ExecucaoService.aplicar_filtros(stats_status, filtros)
-            
-            stats_status = stats_status.group_by(Execucao.status_execucao).all()
 
-            status_dict = {status: count for status, count in stats_status}
+        except Exception as e:
+            logger.error(f"Erro ao obter estatísticas do consolidado: {e}")
+            raise
 
-            # Por tipo
-            stats_tipo = db.session.query(
+    @staticmethod
+    def _calcular_estatisticas(filtros: Optional[ExecucaoFiltros]) -> Dict[str, Any]:
+        try:
+            duracao = Execucao.expressao_duracao_segundos(db.engine.dialect.name)
+            concluida = and_(
+                Execucao.status_execucao == StatusExecucao.CONCLUIDO.value,
+                Execucao.data_fim.isnot(None)
+            )
+            duracao_concluida = case((concluida, duracao))
+
+            # Uma linha por (status, tipo) com a soma e a quantidade das durações
+            query = db.session.query(
+                Execucao.status_execucao,
                 Execucao.tipo_execucao,
-                func.count(Execucao.id).label('count')
+                func.count(Execucao.id),
+                func.sum(duracao_concluida),
+                func.count(duracao_concluida)
             )
-            
             if filtros:
-                stats_tipo = ExecucaoService.aplicar_filtros(stats_tipo, filtros)
-            
-            stats_tipo = stats_tipo.group_by(Execucao.tipo_execucao).all()
-
-            tipo_dict = {tipo: count for tipo, count in stats_tipo}
-
-            # Taxa de sucesso
-            concluidas = status_dict.get(StatusExecucao.CONCLUIDO.value, 0)
-            taxa_sucesso = (concluidas / total * 100) if total > 0 else 0
-
-            # Duração média das execuções concluídas
-            execucoes_concluidas = query.filter(
-                Execucao.status_execucao == StatusExecucao.CONCLUIDO.value,
-                Execucao.data_fim.isnot(None)
-            ).all()
+                query = ExecucaoService.aplicar_filtros(query, filtros)
+            grupos = query.group_by(Execucao.status_execucao, Execucao.tipo_execucao).all()
+
+            soma_duracoes = 0.0
+            quantidade_duracoes = 0
+            status_dict: Dict[str, int] = {}
+            tipo_dict: Dict[str, int] = {}
+            for status, tipo, quantidade, soma, com_duracao in grupos:
+                status_dict[status] = status_dict.get(status, 0) + quantidade
+                tipo_dict[tipo] = tipo_dict.get(tipo, 0) + quantidade
+                soma_duracoes += float(soma or 0)
+                quantidade_duracoes += com_duracao
+
+            # Duração das execuções concluídas
+            duracao_media = soma_duracoes / quantidade_duracoes if quantidade_duracoes else 0
+            percentis = ExecucaoService._percentis_duracao(
+                duracao, concluida, filtros, quantidade_duracoes, PERCENTIS_DURACAO
+            )
 
-            if execucoes_concluidas:
-                duracoes = [exec.duracao_segundos for exec in execucoes_concluidas if exec.duracao_segundos]
-                duracao_media = sum(duracoes) / len(duracoes) if duracoes else 0
-            else:
-                duracao_media = 0
-
-            return {
-                'total': total,
-                'concluidas': status_dict.get(StatusExecucao.CONCLUIDO.value, 0),
-                'executando': status_dict.get(StatusExecucao.EXECUTANDO.value, 0),
-                'falhadas': status_dict.get(StatusExecucao.FALHOU.value, 0),
-                'canceladas': status_dict.get(StatusExecucao.CANCELADO.value, 0),
-                'timeout': status_dict.get(StatusExecucao.TIMEOUT.value, 0),
-                'downloads': tipo_dict.get(TipoExecucao.DOWNLOAD_FATURA.value, 0),
-                'uploads_sat': tipo_dict.get(TipoExecucao.UPLOAD_SAT.value, 0),
-                'uploads_manual': tipo_dict.get(TipoExecucao.UPLOAD_MANUAL.value, 0),
-                'taxa_sucesso': round(taxa_sucesso, 1),
-                'duracao_media_segundos': round(duracao_media, 1)
-            }
+            return ExecucaoService._montar_estatisticas(status_dict, tipo_dict, duracao_media, percentis)
 
         except Exception as e:
             logger.error(f"Erro ao obter estatísticas: {e}")
             raise
 
+    @staticmethod
+    def _percentis_duracao(duracao, concluida, filtros: Optional[ExecucaoFiltros],
+                           quantidade: int, percentis) -> Dict[float, float]:
+        """
+        Percentis da duração das execuções concluídas (interpolação linear,
+        como percentile_cont)
+
+        No PostgreSQL usa percentile_cont em uma única consulta; nos demais
+        bancos busca, para cada percentil, os dois valores vizinhos na ordem
+        das durações (ORDER BY ... LIMIT 2 OFFSET n).
+        """
+        if not quantidade:
+            return {percentil: 0.0 for percentil in percentis}
+
+        def consulta(*colunas):
+            query = db.session.query(*colunas).filter(concluida)
+            return ExecucaoService.aplicar_filtros(query, filtros) if filtros else query
+
+        if db.engine.dialect.name == 'postgresql':
+            valores = consulta(*[
+                func.percentile_cont(percentil).within_group(duracao) for percentil in percentis
+            ]).one()
+            return {percentil: float(valor or 0) for percentil, valor in zip(percentis, valores)}
+
+        resultado = {}
+        for percentil in percentis:
+            posicao = percentil * (quantidade - 1)
+            inicio = int(posicao)
+            vizinhos = [
+                float(valor) for valor, in
+                consulta(duracao).order_by(duracao).offset(inicio).limit(2).all()
+            ]
+            if not vizinhos:
+                resultado[percentil] = 0.0
+            elif len(vizinhos) == 1:
+                resultado[percentil] = vizinhos[0]
+            else:
+                resultado[percentil] = vizinhos[0] + (vizinhos[1] - vizinhos[0]) * (posicao - inicio)
+        return resultado
+
     @staticmethod
     def retentar_execucao(execucao_id: str, usuario_id: str) -> Execucao:
         """
@@ -226,10 +349,7 @@ class ExecucaoService:
     def obter_execucoes_recentes(limite: int = 10) -> List[Execucao]:
         """Obtém as execuções mais recentes"""
         try:
-            return Execucao.query.options(
-                joinedload(Execucao.processo).joinedload(Processo.cliente).joinedload(Cliente.operadora),
-                joinedload(Execucao.executor)
-            ).order_by(desc(Execucao.data_inicio)).limit(limite).all()
+            return Execucao.query.options(*perfil_listagem_execucoes()).order_by(desc(Execucao.data_inicio)).limit(limite).all()
         except Exception as e:
             logger.error(f"Erro ao obter execuções recentes: {e}")
             raise
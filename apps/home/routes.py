@@ -7,14 +7,20 @@ from apps.home import blueprint
 from flask import render_template, request, Blueprint
 from flask_login import login_required
 from jinja2 import TemplateNotFound
-from sqlalchemy import func
 from apps import db
 from apps.models import Processo, Cliente, Operadora
 from apps.models.processo import StatusProcesso
+from apps.models.perfis_carga import perfil_listagem_processos
+from apps.services.estatisticas import estatisticas_processos, estatisticas_clientes
+from apps.execucoes.services import ExecucaoService, ExecucaoFiltros
+from datetime import date, datetime, time, timedelta
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Dias considerados no card de execuções do dashboard
+DIAS_RESUMO_EXECUCOES = 30
+
 # Blueprint específico para home
 home_bp = Blueprint('home_bp', __name__, url_prefix='/home')
 
@@ -26,35 +32,17 @@ def index():
     try:
         logger.info("Iniciando carregamento do dashboard")
 
-        # Calcular métricas básicas
+        # Calcular métricas básicas (uma consulta agregada por tabela, em cache)
         logger.debug("Calculando métricas básicas")
-        total_processos = db.session.query(Processo).count()
-        logger.debug("Total de processos: %d", total_processos)
-
-        # Usar strings diretamente para evitar problemas com enums
-        processos_ativos = db.session.query(Processo).filter(
-            Processo.status_processo.notin_(['CONCLUIDO', 'CANCELADO', 'REJEITADO'])
-        ).count()
-        logger.debug("Processos ativos: %d", processos_ativos)
-
-        aguardando_aprovacao = db.session.query(Processo).filter(
-            Processo.status_processo == 'PENDENTE_APROVACAO'
-        ).count()
-        logger.debug("Aguardando aprovação: %d", aguardando_aprovacao)
-
-        aprovados = db.session.query(Processo).filter(
-            Processo.status_processo == 'APROVADO'
-        ).count()
-        logger.debug("Aprovados: %d", aprovados)
-
-        total_clientes = db.session.query(Cliente).filter_by(status_ativo=True).count()
-        logger.debug(f"Total clientes: {total_clientes}")
+        estatisticas = estatisticas_processos()
+        total_clientes = estatisticas_clientes()['clientes_ativos']
+        logger.debug("Estatísticas de processos: %s", estatisticas)
 
         # Processos recentes - simplificado
         logger.debug("Buscando processos recentes")
         try:
             processos_recentes = db.session.query(Processo)\
-                .join(Cliente)\
+                .options(*perfil_listagem_processos())\
                 .order_by(Processo.data_atualizacao.desc())\
                 .limit(10).all()
             logger.debug(f"Processos recentes encontrados: {len(processos_recentes)}")
@@ -65,13 +53,10 @@ def index():
         # Resumo por status - simplificado
         logger.debug("Calculando resumo por status")
         try:
-            status_counts = db.session.query(
-                Processo.status_processo,
-                func.count(Processo.id).label('quantidade')
-            ).group_by(Processo.status_processo).all()
+            status_counts = estatisticas['por_status']
 
             resumo_status = []
-            total_for_percentage = sum([s.quantidade for s in status_counts])
+            total_for_percentage = sum(status_counts.values())
 
             status_mapping = {
                 'AGUARDANDO_DOWNLOAD': {'nome': 'Aguardando Download', 'cor': 'warning'},
@@ -82,13 +67,13 @@ def index():
                 'ENVIADO_SAT': {'nome': 'Enviado SAT', 'cor': 'blue'}
             }
 
-            for status in status_counts:
-                if status.status_processo in status_mapping:
-                    info = status_mapping[status.status_processo]
-                    percentual = (status.quantidade / total_for_percentage * 100) if total_for_percentage > 0 else 0
+            for status, quantidade in status_counts.items():
+                if status in status_mapping:
+                    info = status_mapping[status]
+                    percentual = (quantidade / total_for_percentage * 100) if total_for_percentage > 0 else 0
                     resumo_status.append({
                         'nome': info['nome'],
-                        'quantidade': status.quantidade,
+                        'quantidade': quantidade,
                         'cor': info['cor'],
                         'percentual': round(percentual, 1)
                     })
@@ -109,11 +94,19 @@ def index():
             logger.error("Erro ao calcular resumo por operadora: %s", str(e))
             resumo_operadoras = []
 
+        # Execuções dos últimos dias (consolidado diário das execuções)
+        try:
+            inicio_periodo = datetime.combine(date.today() - timedelta(days=DIAS_RESUMO_EXECUCOES - 1), time.min)
+            estatisticas_execucoes = ExecucaoService.obter_estatisticas(ExecucaoFiltros(data_inicio=inicio_periodo))
+        except Exception as e:
+            logger.error("Erro ao calcular estatísticas das execuções: %s", str(e))
+            estatisticas_execucoes = None
+
         metricas = {
-            'total_processos': total_processos,
-            'processos_ativos': processos_ativos,
-            'aguardando_aprovacao': aguardando_aprovacao,
-            'aprovados': aprovados,
+            'total_processos': estatisticas['total_processos'],
+            'processos_ativos': estatisticas['processos_ativos'],
+            'aguardando_aprovacao': estatisticas['aguardando_aprovacao'],
+            'aprovados': estatisticas['aprovados'],
             'total_clientes': total_clientes
         }
 
@@ -125,7 +118,9 @@ def index():
                              metricas=metricas,
                              processos_recentes=processos_recentes,
                              resumo_status=resumo_status,
-                             operadoras_resumo=resumo_operadoras)
+                             operadoras_resumo=resumo_operadoras,
+                             estatisticas_execucoes=estatisticas_execucoes,
+                             dias_resumo_execucoes=DIAS_RESUMO_EXECUCOES)
 
     except Exception as e:
         logger.error(f"Erro geral no dashboard: {e}")
@@ -7,9 +7,13 @@ from .operadora import Operadora
 from .cliente import Cliente
 from .processo import Processo, StatusProcesso
 from .execucao import Execucao
+from .execucao_log import ExecucaoLog
+from .execucao_stats_daily import ExecucaoStatsDaily, ExecucaoStatsDailyControle
 from .usuario import Usuario, PerfilUsuario
 from .notificacao import Notificacao, TipoNotificacao, StatusEnvio
 from .agendamento import Agendamento, TipoAgendamento
+from .importacao import ImportacaoClientes, StatusImportacao
+from .evento_webhook import EventoWebhookJob
 
 __all__ = [
     'BaseModel',
@@ -18,11 +22,17 @@ __all__ = [
     'Processo',
     'StatusProcesso',
     'Execucao',
+    'ExecucaoLog',
+    'ExecucaoStatsDaily',
+    'ExecucaoStatsDailyControle',
     'Usuario',
     'PerfilUsuario',
     'Notificacao',
     'TipoNotificacao',
     'StatusEnvio',
     'Agendamento',
-    'TipoAgendamento'
+    'TipoAgendamento',
+    'ImportacaoClientes',
+    'StatusImportacao',
+    'EventoWebhookJob'
 ]
\ No newline at end of file
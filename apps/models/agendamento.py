@@ -7,7 +7,7 @@ from datetime import datetime
 from typing import Optional, Dict, Any
 from enum import Enum
 
-from sqlalchemy import Column, String, Boolean, Text, DateTime, JSON
+from sqlalchemy import Column, String, Boolean, Text, DateTime, JSON, Index
 
 from .base import BaseModel
 
@@ -89,6 +89,16 @@ class Agendamento(BaseModel):
         comment="Parâmetros específicos para execução (JSON)"
     )
     
+    # Agendamentos ativos pela próxima execução (consulta do executor);
+    # índice parcial onde o banco suporta
+    __table_args__ = (
+        Index(
+            'ix_agendamentos_ativos_proxima_execucao', 'proxima_execucao',
+            postgresql_where=status_ativo == True,
+            sqlite_where=status_ativo == True
+        ),
+    )
+    
     def __repr__(self) -> str:
         return f"<Agendamento(nome='{self.nome_agendamento}', tipo='{self.tipo_agendamento}', ativo={self.status_ativo})>"
     
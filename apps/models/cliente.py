@@ -129,7 +129,7 @@ class Cliente(BaseModel):
     operadora: Mapped["Operadora"] = relationship(
         "Operadora",
         back_populates="clientes",
-        lazy="joined"
+        lazy="select"
     )
     
     processos: Mapped[List["Processo"]] = relationship(
@@ -167,14 +167,29 @@ class Cliente(BaseModel):
         else:
             operadora_codigo = self._operadora_codigo
         
+        return self.calcular_hash_unico(
+            self.nome_sat, operadora_codigo, self.servico,
+            self.dados_sat, self.filtro, self.unidade
+        )
+    
+    @staticmethod
+    def calcular_hash_unico(
+        nome_sat: Optional[str],
+        operadora_codigo: Optional[str],
+        servico: Optional[str],
+        dados_sat: Optional[str],
+        filtro: Optional[str],
+        unidade: Optional[str]
+    ) -> str:
+        """Calcula a hash única a partir dos valores (sem precisar de uma instância)"""
         # Normaliza os dados para hash
         dados_hash = [
-            self.nome_sat or '',
+            nome_sat or '',
             operadora_codigo or '',
-            self.servico or '',
-            self.dados_sat or '',
-            self.filtro or '',
-            self.unidade or ''
+            servico or '',
+            dados_sat or '',
+            filtro or '',
+            unidade or ''
         ]
         
         # Converte tudo para string, remove espaços e transforma em minúsculo
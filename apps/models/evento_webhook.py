@@ -0,0 +1,50 @@
+"""
+Modelo das chaves de eventos de jobs recebidos pelo webhook
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Column, String, DateTime, Integer, BigInteger, Index, UniqueConstraint
+
+from apps import db
+
+
+class EventoWebhookJob(db.Model):
+    """
+    Chave de um evento de job já aceito pelo webhook
+
+    A restrição única em (job_id, status, sequence) faz a deduplicação valer
+    entre workers e reinícios: cada evento é registrado com insert-or-ignore
+    e só quem inseriu a linha grava o evento. As linhas mais antigas que a
+    retenção são removidas pelo próprio deduplicador.
+    """
+
+    __tablename__ = 'webhook_eventos_jobs'
+
+    id = Column(
+        BigInteger().with_variant(Integer(), 'sqlite'),
+        primary_key=True,
+        autoincrement=True
+    )
+
+    job_id = Column(String(255), nullable=False, comment="ID do job na API externa")
+
+    status = Column(String(50), nullable=False, comment="Status informado no evento")
+
+    sequence = Column(BigInteger, nullable=False, comment="Sequência do evento no job")
+
+    recebido_em = Column(
+        DateTime,
+        nullable=False,
+        default=datetime.now,
+        comment="Data e hora do recebimento"
+    )
+
+    __table_args__ = (
+        UniqueConstraint('job_id', 'status', 'sequence', name='uq_webhook_eventos_jobs_chave'),
+        # Limpeza por idade: DELETE WHERE recebido_em < :limite
+        Index('ix_webhook_eventos_jobs_recebido_em', 'recebido_em'),
+    )
+
+    def __repr__(self) -> str:
+        return f"<EventoWebhookJob(job_id='{self.job_id}', status='{self.status}', sequence={self.sequence})>"
@@ -6,10 +6,11 @@ from datetime import datetime
 from typing import Optional, Dict, Any, TYPE_CHECKING
 from enum import Enum
 
-from sqlalchemy import Column, String, DateTime, Text, Integer, JSON, ForeignKey
-from sqlalchemy.orm import relationship, Mapped
+from sqlalchemy import Column, String, DateTime, Text, Integer, JSON, ForeignKey, Index, func, select, exists, text
+from sqlalchemy.orm import relationship, Mapped, deferred, query_expression
 
 from .base import BaseModel, GUID
+from .execucao_log import ExecucaoLog, NivelLog
 
 if TYPE_CHECKING:
     from .processo import Processo
@@ -83,18 +84,19 @@ class Execucao(BaseModel):
         comment="ID do job na API externa para rastreamento via SSE"
     )
 
-    # Dados de entrada e saída (JSON)
-    parametros_entrada = Column(
+    # Dados de entrada e saída (JSON). As colunas pesadas são carregadas
+    # sob demanda: os JSON juntos (grupo "dados") e o log separadamente
+    parametros_entrada = deferred(Column(
         JSON,
         nullable=True,
         comment="Parâmetros de entrada da execução (JSON)"
-    )
+    ), group='dados')
 
-    resultado_saida = Column(
+    resultado_saida = deferred(Column(
         JSON,
         nullable=True,
         comment="Resultado da execução (JSON)"
-    )
+    ), group='dados')
 
     # Timestamps de execução
     data_inicio = Column(
@@ -110,12 +112,12 @@ class Execucao(BaseModel):
         comment="Data e hora de fim da execução"
     )
 
-    # Logs e arquivos
-    mensagem_log = Column(
+    # Logs e arquivos (as linhas do log ficam em execucao_logs)
+    mensagem_log = deferred(Column(
         Text,
         nullable=True,
-        comment="Log detalhado da execução"
-    )
+        comment="Resumo do log (mensagem final da execução)"
+    ), group='log')
 
     url_arquivo_s3 = Column(
         String(500),
@@ -132,11 +134,11 @@ class Execucao(BaseModel):
     )
 
     # Detalhes de erro (JSON)
-    detalhes_erro = Column(
+    detalhes_erro = deferred(Column(
         JSON,
         nullable=True,
         comment="Detalhes do erro quando a execução falha (JSON)"
-    )
+    ), group='dados')
 
     # Usuário executor (para uploads manuais)
     executado_por_usuario_id = Column(
@@ -163,7 +165,7 @@ class Execucao(BaseModel):
     processo: Mapped["Processo"] = relationship(
         "Processo",
         back_populates="execucoes",
-        lazy="joined"
+        lazy="select"
     )
 
     executor: Mapped[Optional["Usuario"]] = relationship(
@@ -172,6 +174,58 @@ class Execucao(BaseModel):
         lazy="select"
     )
 
+    # Índices compostos dos caminhos mais consultados
+    __table_args__ = (
+        # Processo.execucoes (ordenado por data_inicio desc) e última execução do processo
+        Index(
+            'ix_execucoes_processo_data_inicio', 'processo_id', 'data_inicio',
+            postgresql_include=['status_execucao']
+        ),
+        # Estatísticas por status em um intervalo de datas
+        Index('ix_execucoes_status_data_inicio', 'status_execucao', 'data_inicio'),
+    )
+
+    # Resumo do log e existência de linhas calculados no banco
+    # (with_expression), para as telas que não precisam do log completo
+    resumo_log = query_expression()
+    possui_log = query_expression()
+
+    @staticmethod
+    def expressao_resumo_log(tamanho: int = 50):
+        """
+        Expressão SQL com o início do resumo (um caractere a mais para indicar
+        corte); enquanto a execução não tem resumo, usa a última linha do log
+        """
+        ultima_linha = (
+            select(ExecucaoLog.message)
+            .where(ExecucaoLog.execucao_id == Execucao.id)
+            .order_by(ExecucaoLog.seq.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        return func.substr(func.coalesce(Execucao.mensagem_log, ultima_linha), 1, tamanho + 1)
+
+    @staticmethod
+    def expressao_possui_log():
+        """Expressão SQL indicando se a execução tem linhas de log"""
+        return exists().where(ExecucaoLog.execucao_id == Execucao.id)
+
+    @staticmethod
+    def expressao_duracao_segundos(dialeto: str):
+        """
+        Expressão SQL com a duração da execução em segundos (NULL sem data_fim)
+
+        Args:
+            dialeto: Nome do dialeto do banco (engine.dialect.name)
+        """
+        if dialeto == 'postgresql':
+            return func.extract('epoch', Execucao.data_fim - Execucao.data_inicio)
+        if dialeto == 'sqlite':
+            return (func.julianday(Execucao.data_fim) - func.julianday(Execucao.data_inicio)) * 86400.0
+        if dialeto in ('mysql', 'mariadb'):
+            return func.timestampdiff(text('SECOND'), Execucao.data_inicio, Execucao.data_fim)
+        raise ValueError(f"Dialeto sem cálculo de duração: {dialeto}")
+
     def __repr__(self) -> str:
         return f"<Execucao(processo_id={self.processo_id}, tipo='{self.tipo_execucao}', status='{self.status_execucao}')>"
 
@@ -236,6 +290,7 @@ class Execucao(BaseModel):
 
         if mensagem:
             self.mensagem_log = mensagem
+            self.adicionar_log(mensagem)
 
     def finalizar_com_erro(
         self,
@@ -252,6 +307,7 @@ class Execucao(BaseModel):
         self.status_execucao = StatusExecucao.FALHOU.value
         self.data_fim = datetime.now()
         self.mensagem_log = str(erro)
+        self.adicionar_log(str(erro), nivel=NivelLog.ERRO)
 
         # Monta detalhes do erro
         detalhes_erro = {
@@ -270,6 +326,7 @@ class Execucao(BaseModel):
         self.status_execucao = StatusExecucao.TIMEOUT.value
         self.data_fim = datetime.now()
         self.mensagem_log = "Execução cancelada por timeout"
+        self.adicionar_log(self.mensagem_log, nivel=NivelLog.AVISO)
 
     def cancelar(self, motivo: Optional[str] = None) -> None:
         """
@@ -285,21 +342,21 @@ class Execucao(BaseModel):
             self.mensagem_log = f"Execução cancelada: {motivo}"
         else:
             self.mensagem_log = "Execução cancelada pelo usuário"
+        self.adicionar_log(self.mensagem_log, nivel=NivelLog.AVISO)
 
-    def adicionar_log(self, mensagem: str) -> None:
+    def adicionar_log(self, mensagem: str, nivel: str = NivelLog.INFO) -> None:
         """
-        Adiciona uma mensagem ao log da execução
+        Adiciona uma linha ao log da execução
+
+        A linha é gravada em execucao_logs no próximo flush/commit da sessão,
+        em lote com as demais linhas pendentes.
 
         Args:
             mensagem: Mensagem a ser adicionada
+            nivel: Nível da linha (INFO, WARNING, ERROR)
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        nova_linha = f"[{timestamp}] {mensagem}"
-
-        if self.mensagem_log:
-            self.mensagem_log += f"\n{nova_linha}"
-        else:
-            self.mensagem_log = nova_linha
+        from apps.services.logs_execucao import anexar_log
+        anexar_log(self, mensagem, nivel)
 
     def get_parametros_rpa(self) -> Dict[str, Any]:
         """Retorna os parâmetros de entrada formatados para RPA"""
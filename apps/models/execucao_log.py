@@ -0,0 +1,92 @@
+"""
+Modelo das linhas de log da Execução
+"""
+
+from datetime import datetime
+from typing import Dict, Any
+
+from sqlalchemy import Column, String, DateTime, Text, Integer, BigInteger, ForeignKey, Index
+
+from apps import db
+from .base import GUID
+
+
+class NivelLog:
+    """Níveis das linhas de log"""
+    INFO = "INFO"
+    AVISO = "WARNING"
+    ERRO = "ERROR"
+
+
+class ExecucaoLog(db.Model):
+    """
+    Linha de log de uma execução
+
+    Tabela append-only: cada linha é inserida uma única vez (em lote, pelo
+    escritor de logs da sessão) e lida por intervalos de seq, sem reescrever
+    o log inteiro a cada linha como acontecia com Execucao.mensagem_log.
+    """
+
+    __tablename__ = 'execucao_logs'
+
+    # Sequência crescente (global); ordena as linhas de cada execução
+    seq = Column(
+        BigInteger().with_variant(Integer(), 'sqlite'),
+        primary_key=True,
+        autoincrement=True
+    )
+
+    execucao_id = Column(
+        GUID(),
+        ForeignKey('execucoes.id', ondelete='CASCADE'),
+        nullable=False,
+        comment="ID da execução"
+    )
+
+    ts = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=datetime.now,
+        comment="Data e hora da linha"
+    )
+
+    level = Column(
+        String(10),
+        nullable=False,
+        default=NivelLog.INFO,
+        comment="Nível da linha (INFO, WARNING, ERROR)"
+    )
+
+    message = Column(
+        Text,
+        nullable=False,
+        comment="Mensagem"
+    )
+
+    __table_args__ = (
+        # Leitura por intervalo: WHERE execucao_id = :id AND seq > :seq ORDER BY seq
+        Index('ix_execucao_logs_execucao_seq', 'execucao_id', 'seq'),
+    )
+
+    def __repr__(self) -> str:
+        return f"<ExecucaoLog(execucao_id={self.execucao_id}, seq={self.seq}, level='{self.level}')>"
+
+    def formatar(self) -> str:
+        """Linha no formato do log texto: [AAAA-MM-DD HH:MM:SS] mensagem"""
+        return formatar_linha_log(self.ts, self.level, self.message)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'seq': self.seq,
+            'ts': self.ts.isoformat() if self.ts else None,
+            'nivel': self.level,
+            'mensagem': self.message
+        }
+
+
+def formatar_linha_log(ts: datetime, nivel: str, mensagem: str) -> str:
+    """Formata uma linha de log como no antigo mensagem_log"""
+    prefixo = f"[{ts.strftime('%Y-%m-%d %H:%M:%S')}] " if ts else ""
+    if nivel and nivel != NivelLog.INFO:
+        return f"{prefixo}{nivel}: {mensagem}"
+    return f"{prefixo}{mensagem}"
@@ -0,0 +1,96 @@
+"""
+Modelo do consolidado diário das Execuções
+"""
+
+from datetime import datetime
+from typing import List, Tuple
+
+from sqlalchemy import Column, String, Date, DateTime, Integer, BigInteger, Float, Table
+
+from apps import db
+from .base import GUID
+
+
+# Limites superiores (segundos) das faixas do histograma de duração; a
+# última faixa guarda as durações acima do maior limite
+LIMITES_HISTOGRAMA: Tuple[int, ...] = (5, 10, 15, 30, 45, 60, 90, 120, 180, 300, 450, 600, 900, 1800, 3600, 7200)
+
+COLUNAS_HISTOGRAMA: List[str] = (
+    [f"faixa_ate_{limite}s" for limite in LIMITES_HISTOGRAMA]
+    + [f"faixa_acima_{LIMITES_HISTOGRAMA[-1]}s"]
+)
+
+
+def faixa_histograma(duracao: float) -> int:
+    """Índice da faixa do histograma em que a duração cai"""
+    for indice, limite in enumerate(LIMITES_HISTOGRAMA):
+        if duracao <= limite:
+            return indice
+    return len(LIMITES_HISTOGRAMA)
+
+
+def _contador(nome: str, comentario: str) -> Column:
+    return Column(nome, BigInteger().with_variant(Integer(), 'sqlite'), nullable=False, default=0,
+                  server_default='0', comment=comentario)
+
+
+class ExecucaoStatsDaily(db.Model):
+    """
+    Consolidado diário das execuções finalizadas
+
+    Uma linha por dia (de data_inicio) × operadora × tipo × status, com a
+    quantidade de execuções, soma/mínimo/máximo da duração e o histograma
+    da duração em faixas fixas (LIMITES_HISTOGRAMA). Mantido de forma
+    incremental pelos flushes do ORM (apps.services.consolidado_execucoes);
+    execuções em andamento não entram no consolidado.
+    """
+
+    __table__ = Table(
+        'execucao_stats_daily',
+        db.metadata,
+        Column('dia', Date, primary_key=True, comment="Dia de início das execuções"),
+        Column('operadora_id', GUID(), primary_key=True, comment="ID da operadora do cliente do processo"),
+        Column('tipo_execucao', String(50), primary_key=True, comment="Tipo da execução"),
+        Column('status_execucao', String(50), primary_key=True, comment="Status final da execução"),
+        _contador('quantidade', "Quantidade de execuções"),
+        _contador('quantidade_com_duracao', "Execuções com data_fim (entram na duração)"),
+        Column('soma_duracao', Float, nullable=False, default=0, server_default='0',
+               comment="Soma das durações (segundos)"),
+        Column('min_duracao', Float, nullable=True, comment="Menor duração (segundos)"),
+        Column('max_duracao', Float, nullable=True, comment="Maior duração (segundos)"),
+        *[_contador(coluna, "Execuções na faixa do histograma de duração") for coluna in COLUNAS_HISTOGRAMA]
+    )
+
+    def __repr__(self) -> str:
+        return (f"<ExecucaoStatsDaily(dia={self.dia}, operadora_id={self.operadora_id}, "
+                f"tipo='{self.tipo_execucao}', status='{self.status_execucao}', quantidade={self.quantidade})>")
+
+    @property
+    def histograma(self) -> List[int]:
+        """Quantidades por faixa, na ordem de COLUNAS_HISTOGRAMA"""
+        return [getattr(self, coluna) or 0 for coluna in COLUNAS_HISTOGRAMA]
+
+
+class ExecucaoStatsDailyControle(db.Model):
+    """
+    Marcador de consolidado completo
+
+    A linha é gravada pela reconstrução de todo o histórico (ou na criação
+    do consolidado em um banco sem execuções finalizadas). Até ela existir o
+    consolidado pode estar vazio ou parcial e as estatísticas são calculadas
+    sobre a tabela de execuções.
+    """
+
+    __tablename__ = 'execucao_stats_daily_controle'
+
+    chave = Column(String(50), primary_key=True, comment="Identificação do marcador")
+
+    concluido_em = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=datetime.now,
+        comment="Data e hora em que o consolidado ficou completo"
+    )
+
+    def __repr__(self) -> str:
+        return f"<ExecucaoStatsDailyControle(chave='{self.chave}', concluido_em={self.concluido_em})>"
@@ -0,0 +1,213 @@
+"""
+Modelo da Importação de Clientes
+"""
+
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Any, Optional
+
+from sqlalchemy import Column, String, Boolean, Text, Integer, Float, DateTime, JSON, Index
+
+from .base import BaseModel
+
+
+class StatusImportacao(Enum):
+    """Status da importação em background"""
+    PENDENTE = "PENDENTE"
+    PROCESSANDO = "PROCESSANDO"
+    CONCLUIDA = "CONCLUIDA"
+    FALHOU = "FALHOU"
+
+
+class ArmazenamentoImportacao(Enum):
+    """Onde o arquivo enviado fica guardado até o fim da importação"""
+    LOCAL = "LOCAL"
+    MINIO = "MINIO"
+
+
+class ImportacaoClientes(BaseModel):
+    """
+    Modelo da Importação de Clientes
+
+    Representa um arquivo CSV de clientes enviado para importação em
+    background. O progresso é gravado na mesma transação de cada lote, então
+    uma importação interrompida é retomada a partir de ultima_linha_confirmada.
+    """
+
+    __tablename__ = 'importacoes_clientes'
+
+    # Arquivo enviado
+    nome_arquivo = Column(
+        String(255),
+        nullable=False,
+        comment="Nome original do arquivo CSV"
+    )
+
+    armazenamento = Column(
+        String(20),
+        nullable=False,
+        default=ArmazenamentoImportacao.LOCAL.value,
+        comment="Onde o arquivo está guardado (LOCAL, MINIO)"
+    )
+
+    caminho_arquivo = Column(
+        String(500),
+        nullable=False,
+        comment="Caminho local ou chave do objeto no MinIO"
+    )
+
+    tamanho_bytes = Column(
+        Integer,
+        nullable=True,
+        comment="Tamanho do arquivo em bytes"
+    )
+
+    bytes_lidos = Column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="Posição de leitura no arquivo no último lote confirmado (percentual)"
+    )
+
+    # Opções
+    sobrescrever = Column(
+        Boolean,
+        default=False,
+        nullable=False,
+        comment="Atualiza os clientes existentes"
+    )
+
+    tamanho_lote = Column(
+        Integer,
+        default=500,
+        nullable=False,
+        comment="Linhas gravadas por commit"
+    )
+
+    criado_por = Column(
+        String(100),
+        nullable=True,
+        comment="Usuário que enviou o arquivo"
+    )
+
+    # Estado
+    status_importacao = Column(
+        String(20),
+        nullable=False,
+        default=StatusImportacao.PENDENTE.value,
+        comment="Status da importação"
+    )
+
+    data_inicio = Column(
+        DateTime,
+        nullable=True,
+        comment="Início do processamento"
+    )
+
+    data_fim = Column(
+        DateTime,
+        nullable=True,
+        comment="Fim do processamento"
+    )
+
+    data_heartbeat = Column(
+        DateTime,
+        nullable=True,
+        comment="Último sinal do worker; sem sinal recente a importação é retomada por outro worker"
+    )
+
+    tentativas = Column(
+        Integer,
+        default=0,
+        nullable=False,
+        comment="Quantidade de vezes que o processamento foi iniciado"
+    )
+
+    # Progresso
+    ultima_linha_confirmada = Column(
+        Integer,
+        default=1,
+        nullable=False,
+        comment="Última linha do CSV com o lote já confirmado (1 = cabeçalho)"
+    )
+
+    linhas_lidas = Column(Integer, default=0, nullable=False)
+    processados = Column(Integer, default=0, nullable=False)
+    criados = Column(Integer, default=0, nullable=False)
+    atualizados = Column(Integer, default=0, nullable=False)
+    total_erros = Column(Integer, default=0, nullable=False)
+
+    linhas_por_segundo = Column(
+        Float,
+        nullable=True,
+        comment="Vazão do processamento em linhas por segundo"
+    )
+
+    erros = Column(
+        JSON,
+        nullable=True,
+        comment="Primeiros erros por linha ([linha, mensagem])"
+    )
+
+    normalizacoes = Column(
+        JSON,
+        nullable=True,
+        comment="Primeiras normalizações de nome de operadora"
+    )
+
+    mensagem_erro = Column(
+        Text,
+        nullable=True,
+        comment="Erro que interrompeu a importação"
+    )
+
+    __table_args__ = (
+        # Worker: importações pendentes ou interrompidas, por ordem de chegada
+        Index('ix_importacoes_clientes_status_data_criacao', 'status_importacao', 'data_criacao'),
+    )
+
+    def __repr__(self) -> str:
+        return f"<ImportacaoClientes(arquivo='{self.nome_arquivo}', status='{self.status_importacao}')>"
+
+    @property
+    def esta_em_andamento(self) -> bool:
+        return self.status_importacao in (StatusImportacao.PENDENTE.value, StatusImportacao.PROCESSANDO.value)
+
+    @property
+    def percentual(self) -> int:
+        if self.status_importacao == StatusImportacao.CONCLUIDA.value:
+            return 100
+        if not self.tamanho_bytes:
+            return 0
+        return min(99, int((self.bytes_lidos or 0) * 100 / self.tamanho_bytes))
+
+    @property
+    def duracao_segundos(self) -> Optional[float]:
+        if not self.data_inicio:
+            return None
+        fim = self.data_fim or datetime.now()
+        return (fim - self.data_inicio).total_seconds()
+
+    def progresso_dict(self) -> Dict[str, Any]:
+        """Progresso serializado para a API e para os eventos SSE"""
+        return {
+            'id': str(self.id),
+            'nome_arquivo': self.nome_arquivo,
+            'status': self.status_importacao,
+            'linhas_lidas': self.linhas_lidas,
+            'processados': self.processados,
+            'criados': self.criados,
+            'atualizados': self.atualizados,
+            'total_erros': self.total_erros,
+            'ultima_linha_confirmada': self.ultima_linha_confirmada,
+            'linhas_por_segundo': self.linhas_por_segundo,
+            'tamanho_bytes': self.tamanho_bytes,
+            'bytes_lidos': self.bytes_lidos,
+            'percentual': self.percentual,
+            'tentativas': self.tentativas,
+            'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None,
+            'data_inicio': self.data_inicio.isoformat() if self.data_inicio else None,
+            'data_fim': self.data_fim.isoformat() if self.data_fim else None,
+            'duracao_segundos': self.duracao_segundos,
+            'mensagem_erro': self.mensagem_erro
+        }
@@ -0,0 +1,129 @@
+"""
+Perfis de carregamento das consultas
+
+Os relacionamentos dos modelos são carregados sob demanda (lazy="select").
+Cada caso de uso aplica o seu perfil com `query.options(*perfil_...())`,
+trazendo apenas os relacionamentos e colunas que a tela usa:
+
+- listagem: relacionamentos muitos-para-um com join e apenas as colunas
+  exibidas; colunas pesadas (JSON/Text) adiadas; demais relacionamentos
+  bloqueados com raiseload para evitar N+1 silencioso
+- detalhe: o registro completo com os relacionamentos exibidos na página
+
+As colunas JSON e o log de Execucao já são adiadas no próprio modelo; o log
+completo é lido em páginas por /execucoes/api/<id>/log.
+
+As contagens (Query.count e contar_com_cache) já desativam o carregamento
+antecipado e não precisam de perfil.
+"""
+
+from typing import List
+
+from sqlalchemy.orm import joinedload, selectinload, contains_eager, defer, raiseload, undefer_group, with_expression
+
+from .cliente import Cliente
+from .execucao import Execucao
+from .operadora import Operadora
+from .processo import Processo
+
+# Colunas da operadora usadas nas listagens (nome/código e regras de RPA)
+COLUNAS_OPERADORA_LISTAGEM = (
+    Operadora.nome,
+    Operadora.codigo,
+    Operadora.possui_rpa,
+    Operadora.status_ativo
+)
+
+
+# ============================================================================
+# PROCESSOS
+# ============================================================================
+
+def perfil_listagem_processos() -> List:
+    """Listagem de processos: cliente (razão social, CNPJ) e nome da operadora"""
+    return [
+        defer(Processo.observacoes),
+        joinedload(Processo.cliente).load_only(
+            Cliente.razao_social, Cliente.cnpj, Cliente.operadora_id
+        ).joinedload(Cliente.operadora).load_only(*COLUNAS_OPERADORA_LISTAGEM),
+        raiseload(Processo.aprovador)
+    ]
+
+
+def perfil_detalhe_processo() -> List:
+    """Detalhe do processo: cliente, operadora e aprovador completos"""
+    return [
+        joinedload(Processo.cliente).joinedload(Cliente.operadora),
+        joinedload(Processo.aprovador)
+    ]
+
+
+# ============================================================================
+# CLIENTES
+# ============================================================================
+
+def perfil_listagem_clientes(operadora_no_join: bool = False) -> List:
+    """
+    Listagem de clientes: sem dados SAT/credenciais, operadora resumida
+
+    Args:
+        operadora_no_join: True se a query já faz join com Operadora (os
+            dados da operadora são lidos desse join, sem um segundo join)
+    """
+    if operadora_no_join:
+        operadora = contains_eager(Cliente.operadora)
+    else:
+        operadora = joinedload(Cliente.operadora)
+
+    return [
+        defer(Cliente.dados_sat),
+        defer(Cliente.login_portal),
+        defer(Cliente.senha_portal),
+        operadora.load_only(*COLUNAS_OPERADORA_LISTAGEM)
+    ]
+
+
+# ============================================================================
+# EXECUÇÕES
+# ============================================================================
+
+def perfil_listagem_execucoes() -> List:
+    """Listagem de execuções: sem JSON/logs, processo com cliente e operadora resumidos"""
+    return [
+        defer(Execucao.user_agent),
+        joinedload(Execucao.processo).load_only(
+            Processo.cliente_id, Processo.mes_ano, Processo.status_processo
+        ).joinedload(Processo.cliente).load_only(
+            Cliente.razao_social, Cliente.operadora_id
+        ).joinedload(Cliente.operadora).load_only(*COLUNAS_OPERADORA_LISTAGEM),
+        raiseload(Execucao.executor)
+    ]
+
+
+def perfil_execucoes_do_processo() -> List:
+    """Execuções na página do processo: sem JSON, com o início do log calculado no banco"""
+    return [
+        defer(Execucao.user_agent),
+        with_expression(Execucao.resumo_log, Execucao.expressao_resumo_log())
+    ]
+
+
+def perfil_detalhe_execucao() -> List:
+    """Detalhe da execução: JSON, processo, cliente, operadora e executor; do log apenas se existe"""
+    return [
+        undefer_group('dados'),
+        with_expression(Execucao.possui_log, Execucao.expressao_possui_log()),
+        joinedload(Execucao.processo).joinedload(Processo.cliente).joinedload(Cliente.operadora),
+        joinedload(Execucao.executor)
+    ]
+
+
+def perfil_finalizacao_execucoes() -> List:
+    """
+    Lote de execuções finalizadas em background (reconciliador e webhook):
+    processos em uma única consulta e os JSON alterados pelas transições
+    """
+    return [
+        undefer_group('dados'),
+        selectinload(Execucao.processo)
+    ]
@@ -8,8 +8,8 @@ from datetime import datetime
 from enum import Enum
 from decimal import Decimal
 
-from sqlalchemy import Column, String, Boolean, Text, Date, DateTime, ForeignKey, UniqueConstraint, DECIMAL
-from sqlalchemy.orm import relationship, Mapped
+from sqlalchemy import Column, String, Boolean, Text, Date, DateTime, ForeignKey, UniqueConstraint, DECIMAL, Integer, Index
+from sqlalchemy.orm import relationship, Mapped, validates
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 import uuid
 
@@ -58,6 +58,13 @@ class Processo(BaseModel):
         comment="Mês e ano do processo no formato MM/AAAA"
     )
 
+    # Período ordenável (AAAAMM), derivado de mes_ano
+    periodo = Column(
+        Integer,
+        nullable=False,
+        comment="Período do processo no formato AAAAMM (ordenável)"
+    )
+
     # Status do processo
     status_processo = Column(
         String(50),
@@ -191,7 +198,7 @@ class Processo(BaseModel):
     cliente: Mapped["Cliente"] = relationship(
         "Cliente",
         back_populates="processos",
-        lazy="joined"
+        lazy="select"
     )
 
     aprovador: Mapped[Optional["Usuario"]] = relationship(
@@ -208,25 +215,41 @@ class Processo(BaseModel):
         order_by="Execucao.data_inicio.desc()"
     )
 
-    # Constraints de unicidade
+    # Constraints de unicidade (um processo por cliente e período; também
+    # atende às consultas por cliente ordenadas por período)
     __table_args__ = (
         UniqueConstraint(
-            'cliente_id', 'mes_ano',
-            name='uq_processo_cliente_mes_ano'
+            'cliente_id', 'periodo',
+            name='uq_processo_cliente_periodo'
         ),
+        Index('ix_processos_status_periodo', 'status_processo', 'periodo'),
+        # Processos por status ordenados pela criação (rpa/processos-pendentes)
+        Index('ix_processos_status_data_criacao', 'status_processo', 'data_criacao'),
+        # Chave da paginação por cursor da listagem
+        Index('ix_processos_data_criacao_id', 'data_criacao', 'id'),
     )
 
     def __repr__(self) -> str:
         return f"<Processo(cliente_id={self.cliente_id}, mes_ano='{self.mes_ano}', status='{self.status_processo}')>"
 
+    @validates('mes_ano')
+    def _sincronizar_periodo(self, chave: str, mes_ano: str) -> str:
+        """Mantém o período (AAAAMM) coerente com o mes_ano informado"""
+        self.periodo = self.periodo_de_mes_ano(mes_ano)
+        return mes_ano
+
     @property
     def mes(self) -> int:
         """Retorna o mês do processo"""
+        if self.periodo:
+            return self.periodo % 100
         return int(self.mes_ano.split('/')[0])
 
     @property
     def ano(self) -> int:
         """Retorna o ano do processo"""
+        if self.periodo:
+            return self.periodo // 100
         return int(self.mes_ano.split('/')[1])
 
     @property
@@ -335,6 +358,35 @@ class Processo(BaseModel):
         agora = datetime.now()
         return f"{agora.month:02d}/{agora.year}"
 
+    @staticmethod
+    def periodo_de_mes_ano(mes_ano: Optional[str]) -> Optional[int]:
+        """
+        Converte MM/AAAA (ou AAAAMM) para o período inteiro AAAAMM
+
+        Returns:
+            Período ou None se o formato for inválido
+        """
+        if not mes_ano:
+            return None
+        valor = str(mes_ano).strip()
+        try:
+            if '/' in valor:
+                mes, ano = (int(parte) for parte in valor.split('/'))
+            elif len(valor) == 6 and valor.isdigit():
+                ano, mes = int(valor[:4]), int(valor[4:])
+            else:
+                return None
+        except ValueError:
+            return None
+        if not 1 <= mes <= 12:
+            return None
+        return ano * 100 + mes
+
+    @staticmethod
+    def mes_ano_de_periodo(periodo: int) -> str:
+        """Converte o período AAAAMM para MM/AAAA"""
+        return f"{periodo % 100:02d}/{periodo // 100}"
+
     @classmethod
     def validar_formato_mes_ano(cls, mes_ano: str) -> bool:
         """
@@ -10,6 +10,7 @@ from apps.operadoras import bp
 from apps.models import Operadora
 from apps.operadoras.forms import OperadoraForm, FiltroOperadoraForm
 from apps import db
+from apps.services.estatisticas import estatisticas_operadoras
 
 
 @bp.route('/')
@@ -56,20 +57,17 @@ def index():
     # Buscar todas as operadoras para a lista (sem paginação por enquanto)
     operadoras = query.all()
 
-    # Estatísticas para cards
-    total_operadoras = len(operadoras)
-    operadoras_ativas = Operadora.query.filter_by(status_ativo=True).count()
-    operadoras_com_rpa = Operadora.query.filter_by(possui_rpa=True).count()
-    operadoras_sem_rpa = Operadora.query.filter_by(possui_rpa=False).count()
+    # Estatísticas para cards (uma consulta agregada, em cache)
+    estatisticas = estatisticas_operadoras()
 
     return render_template(
         'operadoras/index.html',
         operadoras=operadoras,
         form_filtro=form_filtro,
-        total_operadoras=total_operadoras,
-        operadoras_ativas=operadoras_ativas,
-        operadoras_com_rpa=operadoras_com_rpa,
-        operadoras_sem_rpa=operadoras_sem_rpa
+        total_operadoras=len(operadoras),
+        operadoras_ativas=estatisticas['operadoras_ativas'],
+        operadoras_com_rpa=estatisticas['operadoras_com_rpa'],
+        operadoras_sem_rpa=estatisticas['operadoras_sem_rpa']
     )
 
 
@@ -0,0 +1,286 @@
+"""
+Ações em lote sobre processos (aprovar, rejeitar e enviar para o SAT)
+
+Em vez de carregar e salvar cada processo, o estado dos processos do lote é
+validado com uma única consulta e a transição é aplicada com um UPDATE com
+guarda de status (`WHERE id IN (...) AND status_processo = :esperado`), com
+a mesma semântica de Processo.aprovar/rejeitar/enviar_para_sat. Um processo
+que mudou de status entre a validação e o UPDATE não é alterado e aparece no
+resultado como 'status_alterado'.
+
+O envio em lote com execução do RPA cria todas as execuções em uma única
+transação e dispara os jobs na API externa em background.
+"""
+
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Iterable
+
+from sqlalchemy import select, update
+
+from apps import db
+from apps.models import Processo, Execucao
+from apps.models.processo import StatusProcesso
+from apps.models.execucao import TipoExecucao, StatusExecucao
+
+logger = logging.getLogger(__name__)
+
+# Resultados possíveis por processo
+RESULTADO_ID_INVALIDO = 'id_invalido'
+RESULTADO_NAO_ENCONTRADO = 'nao_encontrado'
+RESULTADO_STATUS_INVALIDO = 'status_invalido'
+RESULTADO_STATUS_ALTERADO = 'status_alterado'
+RESULTADO_EM_ANDAMENTO = 'em_andamento'
+
+STATUS_EXECUCAO_EM_ANDAMENTO = [
+    StatusExecucao.EXECUTANDO.value,
+    StatusExecucao.TENTANDO_NOVAMENTE.value
+]
+
+
+class ResultadoLote:
+    """Resultado por processo de uma ação em lote"""
+
+    def __init__(self, acao: str):
+        self.acao = acao
+        self.resultados: Dict[str, Dict[str, Any]] = {}
+
+    def registrar(self, processo_id: str, resultado: str, **detalhes):
+        self.resultados[processo_id] = {'resultado': resultado, **detalhes}
+
+    def ids_com(self, resultado: str) -> List[str]:
+        return [pid for pid, item in self.resultados.items() if item['resultado'] == resultado]
+
+    def resumo(self) -> Dict[str, int]:
+        contagem: Dict[str, int] = {}
+        for item in self.resultados.values():
+            contagem[item['resultado']] = contagem.get(item['resultado'], 0) + 1
+        return contagem
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'acao': self.acao,
+            'total': len(self.resultados),
+            'resumo': self.resumo(),
+            'resultados': self.resultados
+        }
+
+
+def _normalizar_ids(ids: Iterable[Any], resultado: ResultadoLote) -> List[uuid.UUID]:
+    """Converte os ids recebidos para UUID, registrando os inválidos"""
+    validos = []
+    vistos = set()
+    for valor in ids:
+        try:
+            processo_id = uuid.UUID(str(valor))
+        except (ValueError, TypeError, AttributeError):
+            resultado.registrar(str(valor), RESULTADO_ID_INVALIDO)
+            continue
+        if processo_id not in vistos:
+            vistos.add(processo_id)
+            validos.append(processo_id)
+    return validos
+
+
+def _validar_status(ids: List[uuid.UUID], status_esperado: str, resultado: ResultadoLote) -> List[uuid.UUID]:
+    """
+    Valida com uma consulta o status atual dos processos
+
+    Returns:
+        IDs que estão no status esperado
+    """
+    status_atuais = dict(db.session.execute(
+        select(Processo.id, Processo.status_processo).where(Processo.id.in_(ids))
+    ).all())
+
+    aptos = []
+    for processo_id in ids:
+        status_atual = status_atuais.get(processo_id)
+        if status_atual is None:
+            resultado.registrar(str(processo_id), RESULTADO_NAO_ENCONTRADO)
+        elif status_atual != status_esperado:
+            resultado.registrar(str(processo_id), RESULTADO_STATUS_INVALIDO, status_atual=status_atual)
+        else:
+            aptos.append(processo_id)
+    return aptos
+
+
+def _atualizar_com_guarda(ids: List[uuid.UUID], status_esperado: str, valores: Dict[str, Any]) -> List[uuid.UUID]:
+    """
+    Aplica o UPDATE apenas aos processos que ainda estão no status esperado
+
+    Returns:
+        IDs efetivamente atualizados
+    """
+    if not ids:
+        return []
+
+    comando = update(Processo).where(
+        Processo.id.in_(ids),
+        Processo.status_processo == status_esperado
+    ).values(**valores).execution_options(synchronize_session=False)
+
+    if db.engine.dialect.update_returning:
+        return list(db.session.execute(comando.returning(Processo.id)).scalars())
+
+    db.session.execute(comando)
+    return list(db.session.execute(
+        select(Processo.id).where(Processo.id.in_(ids), Processo.status_processo == valores['status_processo'])
+    ).scalars())
+
+
+def _aplicar_transicao(
+    acao: str,
+    ids: Iterable[Any],
+    status_esperado: str,
+    valores: Dict[str, Any],
+    resultado_sucesso: str
+) -> ResultadoLote:
+    resultado = ResultadoLote(acao)
+    aptos = _validar_status(_normalizar_ids(ids, resultado), status_esperado, resultado)
+
+    atualizados = set(_atualizar_com_guarda(aptos, status_esperado, valores))
+    db.session.commit()
+
+    for processo_id in aptos:
+        if processo_id in atualizados:
+            resultado.registrar(str(processo_id), resultado_sucesso, status_novo=valores['status_processo'])
+        else:
+            resultado.registrar(str(processo_id), RESULTADO_STATUS_ALTERADO)
+
+    logger.info(f"Ação em lote '{acao}': {resultado.resumo()}")
+    return resultado
+
+
+def aprovar_em_lote(ids: Iterable[Any], usuario_id: uuid.UUID, observacoes: Optional[str] = None) -> ResultadoLote:
+    """Aprova os processos em AGUARDANDO_APROVACAO (semântica de Processo.aprovar)"""
+    valores = {
+        'status_processo': StatusProcesso.AGUARDANDO_ENVIO_SAT.value,
+        'aprovado_por_usuario_id': usuario_id,
+        'data_aprovacao': datetime.now()
+    }
+    if observacoes:
+        valores['observacoes'] = observacoes
+
+    return _aplicar_transicao(
+        'aprovar', ids, StatusProcesso.AGUARDANDO_APROVACAO.value, valores, 'aprovado'
+    )
+
+
+def rejeitar_em_lote(ids: Iterable[Any], observacoes: Optional[str] = None) -> ResultadoLote:
+    """Rejeita os processos em AGUARDANDO_APROVACAO (semântica de Processo.rejeitar)"""
+    valores = {
+        'status_processo': StatusProcesso.AGUARDANDO_DOWNLOAD.value,
+        'aprovado_por_usuario_id': None,
+        'data_aprovacao': None
+    }
+    if observacoes:
+        valores['observacoes'] = observacoes
+
+    return _aplicar_transicao(
+        'rejeitar', ids, StatusProcesso.AGUARDANDO_APROVACAO.value, valores, 'rejeitado'
+    )
+
+
+def enviar_sat_em_lote(ids: Iterable[Any]) -> ResultadoLote:
+    """Marca os processos em AGUARDANDO_ENVIO_SAT como enviados (semântica de Processo.enviar_para_sat)"""
+    valores = {
+        'status_processo': StatusProcesso.UPLOAD_REALIZADO.value,
+        'enviado_para_sat': True,
+        'data_envio_sat': datetime.now()
+    }
+
+    return _aplicar_transicao(
+        'enviar_sat', ids, StatusProcesso.AGUARDANDO_ENVIO_SAT.value, valores, 'enviado'
+    )
+
+
+# ============================================================================
+# EXECUÇÃO DO UPLOAD SAT EM LOTE
+# ============================================================================
+
+def executar_upload_sat_em_lote(ids: Iterable[Any], app, concorrencia: int = 4) -> ResultadoLote:
+    """
+    Enfileira o upload SAT (RPA) dos processos em AGUARDANDO_ENVIO_SAT
+
+    Todas as execuções são criadas em uma única transação; os jobs são
+    criados na API externa em background. Processos que já têm um upload SAT
+    em andamento não recebem outra execução.
+
+    Args:
+        ids: IDs dos processos
+        app: Instância do Flask app (contexto das threads de envio)
+        concorrencia: Requisições simultâneas à API externa
+    """
+    from apps.api_externa.services import APIExternaService
+
+    resultado = ResultadoLote('executar_upload_sat')
+    aptos = _validar_status(
+        _normalizar_ids(ids, resultado), StatusProcesso.AGUARDANDO_ENVIO_SAT.value, resultado
+    )
+
+    em_andamento = set()
+    if aptos:
+        em_andamento = set(db.session.execute(
+            select(Execucao.processo_id).where(
+                Execucao.processo_id.in_(aptos),
+                Execucao.tipo_execucao == TipoExecucao.UPLOAD_SAT.value,
+                Execucao.status_execucao.in_(STATUS_EXECUCAO_EM_ANDAMENTO)
+            )
+        ).scalars())
+
+    processos = {
+        processo.id: processo
+        for processo in Processo.query.filter(Processo.id.in_([p for p in aptos if p not in em_andamento]))
+    }
+
+    execucoes = []
+    for processo_id in aptos:
+        if processo_id in em_andamento:
+            resultado.registrar(str(processo_id), RESULTADO_EM_ANDAMENTO)
+        else:
+            execucoes.append(APIExternaService.criar_execucao_sat(processos[processo_id]))
+
+    db.session.add_all(execucoes)
+    db.session.commit()
+
+    for execucao in execucoes:
+        resultado.registrar(str(execucao.processo_id), 'enfileirado', execucao_id=str(execucao.id))
+
+    if execucoes:
+        ids_execucoes = [execucao.id for execucao in execucoes]
+        threading.Thread(
+            target=_disparar_jobs_sat,
+            args=(app, ids_execucoes, concorrencia),
+            name='envio-sat-lote',
+            daemon=True
+        ).start()
+
+    logger.info(f"Upload SAT em lote: {resultado.resumo()}")
+    return resultado
+
+
+def _disparar_jobs_sat(app, ids_execucoes: List[uuid.UUID], concorrencia: int):
+    """Cria os jobs SAT na API externa para as execuções enfileiradas"""
+    with ThreadPoolExecutor(max_workers=max(1, concorrencia), thread_name_prefix='envio-sat') as executor:
+        list(executor.map(lambda execucao_id: _disparar_job_sat(app, execucao_id), ids_execucoes))
+    logger.info(f"Envio SAT em lote finalizado: {len(ids_execucoes)} jobs")
+
+
+def _disparar_job_sat(app, execucao_id: uuid.UUID):
+    from apps.api_externa.services import APIExternaService
+
+    with app.app_context():
+        try:
+            execucao = db.session.get(Execucao, execucao_id)
+            if execucao is None or not execucao.esta_em_andamento:
+                return
+            APIExternaService().executar_sat(execucao.processo, execucao=execucao)
+        except Exception as e:
+            # executar_sat já finaliza a execução com erro
+            logger.error(f"Erro ao criar job SAT da execução {execucao_id}: {str(e)}")
+        finally:
+            db.session.remove()
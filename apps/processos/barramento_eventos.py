@@ -0,0 +1,695 @@
+"""
+Barramento de eventos SSE entre workers
+
+Os eventos publicados por qualquer worker são distribuídos a todos os
+workers por um backend compartilhado (PostgreSQL LISTEN/NOTIFY ou arquivo
+local para instalações single-node com SQLite). Cada worker mantém um
+único listener que repassa os eventos às filas dos clientes SSE locais.
+"""
+
+import json
+import logging
+import os
+import queue
+import select
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Optional, Dict, Any, List
+
+from sqlalchemy import text
+
+from .versoes_job import obter_registro_versoes
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CANAL_PADRAO = 'tirus_eventos_sse'
+
+# Limite do payload do NOTIFY no PostgreSQL (8000 bytes) com margem
+TAMANHO_MAXIMO_NOTIFY = 7900
+
+
+# ============================================================================
+# BACKENDS
+# ============================================================================
+
+class BackendLocal:
+    """Entrega apenas no próprio processo (sem compartilhamento entre workers)"""
+
+    nome = 'local'
+
+    def __init__(self):
+        self._fila: 'queue.Queue[str]' = queue.Queue()
+
+    def publicar(self, payload: str):
+        self._fila.put(payload)
+
+    def escutar(self, entregar, ativo):
+        while ativo():
+            try:
+                entregar(self._fila.get(timeout=1))
+            except queue.Empty:
+                continue
+
+
+class BackendPostgres:
+    """Compartilha eventos via LISTEN/NOTIFY do PostgreSQL"""
+
+    nome = 'postgres'
+
+    def __init__(self, engine, canal: str = CANAL_PADRAO):
+        self.engine = engine
+        self.canal = canal
+
+    def publicar(self, payload: str):
+        if len(payload.encode('utf-8')) > TAMANHO_MAXIMO_NOTIFY:
+            raise ValueError('Evento excede o tamanho máximo do NOTIFY')
+
+        with self.engine.begin() as conn:
+            conn.execute(text("SELECT pg_notify(:canal, :payload)"),
+                         {'canal': self.canal, 'payload': payload})
+
+    def escutar(self, entregar, ativo):
+        # Conexão dedicada: fora do pool, o autocommit do LISTEN nunca chega às sessões do ORM
+        conexao = self.engine.raw_connection()
+        conexao.detach()
+        try:
+            dbapi_conn = conexao.driver_connection
+            dbapi_conn.autocommit = True
+            cursor = dbapi_conn.cursor()
+            cursor.execute(f'LISTEN "{self.canal}"')
+            logger.info(f"Listener LISTEN/NOTIFY ativo no canal {self.canal}")
+
+            while ativo():
+                prontos, _, _ = select.select([dbapi_conn], [], [], 1.0)
+                if not prontos:
+                    continue
+                dbapi_conn.poll()
+                while dbapi_conn.notifies:
+                    entregar(dbapi_conn.notifies.pop(0).payload)
+        finally:
+            conexao.close()
+
+
+class BackendArquivo:
+    """
+    Compartilha eventos entre processos do mesmo host por um arquivo
+    append-only (uma linha JSON por evento)
+    """
+
+    nome = 'arquivo'
+
+    def __init__(self, caminho: str, tamanho_maximo: int = 5 * 1024 * 1024, intervalo: float = 0.2):
+        self.caminho = caminho
+        self.tamanho_maximo = tamanho_maximo
+        self.intervalo = intervalo
+
+    def publicar(self, payload: str):
+        linha = (payload.replace('\n', ' ') + '\n').encode('utf-8')
+        with open(self.caminho, 'ab') as arquivo:
+            if fcntl:
+                fcntl.flock(arquivo, fcntl.LOCK_EX)
+
+            # Truncar quando o arquivo cresce demais (os leitores detectam e recomeçam)
+            if arquivo.tell() > self.tamanho_maximo:
+                arquivo.truncate(0)
+            arquivo.write(linha)
+            arquivo.flush()
+
+            if fcntl:
+                fcntl.flock(arquivo, fcntl.LOCK_UN)
+
+    def escutar(self, entregar, ativo):
+        if not os.path.exists(self.caminho):
+            open(self.caminho, 'ab').close()
+
+        # Começar do fim: eventos anteriores à inicialização não interessam
+        posicao = os.path.getsize(self.caminho)
+        pendente = b''
+
+        while ativo():
+            tamanho = os.path.getsize(self.caminho) if os.path.exists(self.caminho) else 0
+            if tamanho < posicao:
+                posicao, pendente = 0, b''
+
+            if tamanho > posicao:
+                with open(self.caminho, 'rb') as arquivo:
+                    arquivo.seek(posicao)
+                    dados = arquivo.read()
+                    posicao = arquivo.tell()
+
+                linhas = (pendente + dados).split(b'\n')
+                pendente = linhas.pop()
+                for linha in linhas:
+                    if linha:
+                        entregar(linha.decode('utf-8'))
+            else:
+                time.sleep(self.intervalo)
+
+
+# ============================================================================
+# FILAS DE ASSINANTES
+# ============================================================================
+
+POLITICA_DESCARTAR_ANTIGOS = 'descartar_antigos'
+POLITICA_AGRUPAR_PROGRESSO = 'agrupar_progresso'
+
+TIPOS_PROGRESSO = ('job_progress', 'importacao_progresso')
+TIPOS_TERMINAIS = ('job_completed', 'job_failed', 'job_timeout', 'importacao_concluida', 'importacao_falhou')
+
+
+class EventoSSE:
+    """
+    Evento já codificado no formato SSE
+
+    O JSON é gerado uma única vez e os mesmos bytes são enviados a todos
+    os assinantes.
+    """
+
+    __slots__ = ('tipo', 'job_id', 'quadro')
+
+    def __init__(self, tipo: str, job_id: Optional[str], dados: str):
+        self.tipo = tipo or 'message'
+        self.job_id = job_id
+        self.quadro = f"event: {self.tipo}\ndata: {dados}\n\n".encode('utf-8')
+
+    @classmethod
+    def de_evento(cls, evento: Dict[str, Any]) -> 'EventoSSE':
+        return cls(evento.get('type', 'message'), evento.get('job_id'), json.dumps(evento, default=str))
+
+
+class FilaAssinante:
+    """
+    Fila circular limitada de um cliente SSE
+
+    Quando cheia, aplica a política de descarte configurada:
+    - descartar_antigos: remove o evento mais antigo
+    - agrupar_progresso: substitui o progresso pendente do mesmo job e,
+      se ainda assim não houver espaço, remove o progresso mais antigo
+      (ou o evento mais antigo, se não houver progresso pendente)
+
+    Um assinante que permanece com a fila cheia por mais de
+    ``atraso_maximo`` segundos é marcado para desconexão.
+    """
+
+    def __init__(
+        self,
+        tamanho_maximo: int = 100,
+        politica: str = POLITICA_AGRUPAR_PROGRESSO,
+        atraso_maximo: float = 60.0
+    ):
+        self.id = uuid.uuid4().hex[:8]
+        self.tamanho_maximo = tamanho_maximo
+        self.politica = politica
+        self.atraso_maximo = atraso_maximo
+        self._itens: deque = deque()
+        self._condicao = threading.Condition()
+        self.criada_em = time.time()
+        self.cheia_desde: Optional[float] = None
+        self.desconectada = False
+        self.entregues = 0
+        self.descartados = 0
+        self.agrupados = 0
+
+    def _agrupar_progresso(self, evento: EventoSSE) -> bool:
+        """Substitui o progresso pendente do mesmo job; retorna True se agrupou"""
+        if evento.tipo not in TIPOS_PROGRESSO:
+            return False
+        for indice, pendente in enumerate(self._itens):
+            if pendente.tipo in TIPOS_PROGRESSO and pendente.job_id == evento.job_id:
+                self._itens[indice] = evento
+                self.agrupados += 1
+                return True
+        return False
+
+    def _descartar_um(self):
+        """Descarta preferencialmente o progresso mais antigo, preservando transições"""
+        if self.politica == POLITICA_AGRUPAR_PROGRESSO:
+            for indice, pendente in enumerate(self._itens):
+                if pendente.tipo in TIPOS_PROGRESSO:
+                    del self._itens[indice]
+                    self.descartados += 1
+                    return
+        self._itens.popleft()
+        self.descartados += 1
+
+    def colocar(self, evento: EventoSSE) -> bool:
+        """
+        Adiciona um evento sem bloquear
+
+        Returns:
+            bool: False se o assinante foi (ou já estava) marcado para desconexão
+        """
+        with self._condicao:
+            if self.desconectada:
+                return False
+
+            if self.politica == POLITICA_AGRUPAR_PROGRESSO and self._agrupar_progresso(evento):
+                self._condicao.notify()
+                return True
+
+            if len(self._itens) >= self.tamanho_maximo:
+                agora = time.time()
+                if self.cheia_desde is None:
+                    self.cheia_desde = agora
+                elif agora - self.cheia_desde > self.atraso_maximo:
+                    self.desconectada = True
+                    self._itens.clear()
+                    self._condicao.notify()
+                    return False
+
+                self._descartar_um()
+
+            self._itens.append(evento)
+            self._condicao.notify()
+            return True
+
+    def obter(self, timeout: float) -> Optional[EventoSSE]:
+        """Retorna o próximo evento ou None se nada chegou no intervalo (ou se desconectada)"""
+        with self._condicao:
+            if not self._itens and not self.desconectada:
+                self._condicao.wait(timeout)
+            if self.desconectada or not self._itens:
+                return None
+
+            evento = self._itens.popleft()
+            self.entregues += 1
+            if len(self._itens) < self.tamanho_maximo:
+                self.cheia_desde = None
+            return evento
+
+    def qsize(self) -> int:
+        return len(self._itens)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas do assinante"""
+        return {
+            'id': self.id,
+            'profundidade': len(self._itens),
+            'entregues': self.entregues,
+            'descartados': self.descartados,
+            'agrupados': self.agrupados,
+            'conectado_ha_segundos': int(time.time() - self.criada_em),
+            'desconectada': self.desconectada
+        }
+
+
+# ============================================================================
+# BARRAMENTO
+# ============================================================================
+
+class BarramentoEventos:
+    """Publica eventos no backend compartilhado e distribui aos clientes SSE locais"""
+
+    def __init__(
+        self,
+        backend,
+        amostras_latencia: int = 1000,
+        tamanho_fila: int = 100,
+        politica_fila: str = POLITICA_AGRUPAR_PROGRESSO,
+        atraso_maximo: float = 60.0
+    ):
+        self.backend = backend
+        self.id_worker = uuid.uuid4().hex[:12]
+        self.tamanho_fila = tamanho_fila
+        self.politica_fila = politica_fila
+        self.atraso_maximo = atraso_maximo
+        self._assinantes: List[FilaAssinante] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._executando = False
+        self._latencias = deque(maxlen=amostras_latencia)
+        self.estatisticas = {
+            'publicados': 0,
+            'entregues': 0,
+            'falhas_publicacao': 0,
+            'erros_listener': 0,
+            'assinantes_desconectados': 0
+        }
+
+    def iniciar(self):
+        """Inicia o listener do worker"""
+        if self._executando:
+            return
+        self._executando = True
+        self._thread = threading.Thread(target=self._loop_listener, daemon=True)
+        self._thread.start()
+        logger.info(f"Barramento de eventos iniciado (backend: {self.backend.nome}, worker: {self.id_worker})")
+
+    def parar(self):
+        """Para o listener do worker"""
+        self._executando = False
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _loop_listener(self):
+        espera = 1
+        while self._executando:
+            try:
+                self.backend.escutar(self._entregar, lambda: self._executando)
+            except Exception as e:
+                self.estatisticas['erros_listener'] += 1
+                logger.error(f"Erro no listener do barramento de eventos: {e}", exc_info=True)
+                time.sleep(espera)
+                espera = min(espera * 2, 30)
+
+    def assinar(self) -> FilaAssinante:
+        """Registra uma fila limitada de cliente SSE local"""
+        fila = FilaAssinante(self.tamanho_fila, self.politica_fila, self.atraso_maximo)
+        with self._lock:
+            self._assinantes.append(fila)
+        return fila
+
+    def cancelar(self, fila: FilaAssinante):
+        """Remove uma fila de cliente SSE local"""
+        with self._lock:
+            if fila in self._assinantes:
+                self._assinantes.remove(fila)
+
+    def publicar(self, evento: Dict[str, Any]):
+        """
+        Publica um evento para todos os workers
+
+        Se o backend falhar, o evento é entregue ao menos aos clientes locais.
+        """
+        envelope = json.dumps({
+            'origem': self.id_worker,
+            'publicado_em': time.time(),
+            'tipo': evento.get('type', 'message'),
+            'job_id': evento.get('job_id'),
+            'dados': json.dumps(evento, default=str)
+        })
+
+        try:
+            self.backend.publicar(envelope)
+            self.estatisticas['publicados'] += 1
+        except Exception as e:
+            self.estatisticas['falhas_publicacao'] += 1
+            logger.warning(f"Falha ao publicar evento no barramento ({self.backend.nome}), entregando localmente: {e}")
+            self._entregar(envelope)
+
+    def _entregar(self, envelope: str):
+        """Distribui um evento recebido do backend às filas locais"""
+        try:
+            dados = json.loads(envelope)
+        except ValueError:
+            logger.warning("Evento inválido recebido no barramento")
+            return
+
+        publicado_em = dados.get('publicado_em')
+        if publicado_em:
+            self._latencias.append(max(0.0, time.time() - publicado_em))
+
+        # Manter a versão de status dos jobs acompanhados por long-poll
+        job_id = dados.get('job_id')
+        registro = obter_registro_versoes()
+        if job_id and registro.acompanha(job_id):
+            try:
+                registro.registrar_evento(job_id, json.loads(dados.get('dados', '{}')))
+            except ValueError:
+                pass
+
+        # Codificado uma única vez para todos os assinantes
+        evento = EventoSSE(dados.get('tipo'), job_id, dados.get('dados', '{}'))
+        with self._lock:
+            assinantes = list(self._assinantes)
+        for fila in assinantes:
+            if not fila.colocar(evento) and fila in self._assinantes:
+                # Consumidor lento: a conexão é encerrada pelo próprio stream
+                logger.warning(f"Assinante SSE {fila.id} desconectado por atraso")
+                self.estatisticas['assinantes_desconectados'] += 1
+                self.cancelar(fila)
+        self.estatisticas['entregues'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna métricas do barramento, incluindo latência publicação→entrega"""
+        latencias = sorted(self._latencias)
+        total = len(latencias)
+        with self._lock:
+            assinantes = [fila.get_stats() for fila in self._assinantes]
+
+        return {
+            **self.estatisticas,
+            'backend': self.backend.nome,
+            'worker': self.id_worker,
+            'assinantes_locais': len(assinantes),
+            'assinantes': assinantes,
+            'descartados': sum(a['descartados'] for a in assinantes),
+            'latencia_ms': {
+                'amostras': total,
+                'media': round(sum(latencias) / total * 1000, 2) if total else None,
+                'p95': round(latencias[min(total - 1, int(total * 0.95))] * 1000, 2) if total else None,
+                'max': round(latencias[-1] * 1000, 2) if total else None
+            }
+        }
+
+
+def criar_backend(app):
+    """
+    Cria o backend de acordo com EVENTOS_SSE_BACKEND (auto, postgres, arquivo, local)
+
+    No modo auto usa LISTEN/NOTIFY quando o banco é PostgreSQL e o arquivo
+    compartilhado nos demais casos. O arquivo padrão fica no diretório
+    temporário, que só é compartilhado entre workers do mesmo container; com
+    o processo de streaming em outro container EVENTOS_SSE_ARQUIVO deve
+    apontar para um volume comum (ver exigir_barramento_compartilhado).
+    """
+    from apps import db
+
+    tipo = (app.config.get('EVENTOS_SSE_BACKEND') or 'auto').lower()
+
+    if tipo in ('auto', 'postgres'):
+        engine = db.engine
+        if engine.dialect.name == 'postgresql':
+            return BackendPostgres(engine, app.config.get('EVENTOS_SSE_CANAL', CANAL_PADRAO))
+        if tipo == 'postgres':
+            logger.warning("EVENTOS_SSE_BACKEND=postgres mas o banco não é PostgreSQL; usando arquivo")
+
+    if tipo == 'local':
+        return BackendLocal()
+
+    caminho = app.config.get('EVENTOS_SSE_ARQUIVO')
+    if not caminho:
+        caminho = os.path.join(tempfile.gettempdir(), f'{CANAL_PADRAO}.jsonl')
+        logger.warning(f"EVENTOS_SSE_ARQUIVO não definido; eventos SSE só chegam a processos que vejam {caminho}")
+    return BackendArquivo(caminho)
+
+
+def exigir_barramento_compartilhado(app):
+    """
+    Falha se os eventos SSE não puderem chegar a outro container
+
+    Usado pelo processo de streaming, que roda separado do processo
+    principal: sem PostgreSQL o barramento usa o arquivo, que precisa estar
+    em um volume compartilhado (EVENTOS_SSE_ARQUIVO).
+
+    Raises:
+        RuntimeError: Se o barramento ficaria restrito ao container
+    """
+    from apps import db
+
+    tipo = (app.config.get('EVENTOS_SSE_BACKEND') or 'auto').lower()
+    if tipo == 'local':
+        raise RuntimeError("EVENTOS_SSE_BACKEND=local não entrega eventos ao processo de streaming")
+
+    with app.app_context():
+        postgres = db.engine.dialect.name == 'postgresql'
+
+    if not postgres and not app.config.get('EVENTOS_SSE_ARQUIVO'):
+        raise RuntimeError(
+            "Banco sem LISTEN/NOTIFY: defina EVENTOS_SSE_ARQUIVO em um volume "
+            "compartilhado com o processo principal"
+        )
+
+
+# ============================================================================
+# EMISSOR COM AGRUPAMENTO DE PROGRESSO
+# ============================================================================
+
+class EmissorEventos:
+    """
+    Agrupa eventos de progresso por job antes de publicá-los no barramento
+
+    Dentro da janela configurada só o último progresso de cada job é
+    publicado. Transições terminais passam direto (descartando o progresso
+    pendente do job) e os demais eventos do job publicam antes o progresso
+    pendente, preservando a ordem. As publicações (descarga da janela e
+    eventos diretos) são serializadas, para que um progresso já retirado
+    pela descarga nunca seja publicado depois do evento terminal do job.
+    """
+
+    def __init__(self, barramento: BarramentoEventos, janela_ms: int = 250):
+        self.barramento = barramento
+        self.janela = janela_ms / 1000.0
+        self._pendentes: Dict[str, Dict[str, Any]] = {}
+        self._condicao = threading.Condition()
+        # Adquirido antes de _condicao; mantido durante a publicação
+        self._publicacao = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.estatisticas = {'recebidos': 0, 'publicados': 0, 'agrupados': 0}
+
+    def emitir(self, evento: Dict[str, Any]):
+        """Emite um evento, agrupando progresso dentro da janela"""
+        self.estatisticas['recebidos'] += 1
+        tipo = evento.get('type')
+        job_id = evento.get('job_id')
+
+        if tipo in TIPOS_PROGRESSO and job_id and self.janela > 0:
+            with self._condicao:
+                if job_id in self._pendentes:
+                    self.estatisticas['agrupados'] += 1
+                self._pendentes[job_id] = evento
+                self._garantir_thread()
+                self._condicao.notify()
+            return
+
+        with self._publicacao:
+            pendente = None
+            if job_id:
+                with self._condicao:
+                    pendente = self._pendentes.pop(job_id, None)
+
+            if pendente is not None:
+                if tipo in TIPOS_TERMINAIS:
+                    self.estatisticas['agrupados'] += 1
+                else:
+                    self._publicar(pendente)
+
+            self._publicar(evento)
+
+    def _publicar(self, evento: Dict[str, Any]):
+        self.estatisticas['publicados'] += 1
+        self.barramento.publicar(evento)
+
+    def _garantir_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop_descarga, daemon=True)
+            self._thread.start()
+
+    def _loop_descarga(self):
+        """Publica o progresso acumulado ao fim de cada janela"""
+        while True:
+            with self._condicao:
+                while not self._pendentes:
+                    self._condicao.wait()
+
+            time.sleep(self.janela)
+
+            with self._publicacao:
+                with self._condicao:
+                    pendentes, self._pendentes = self._pendentes, {}
+
+                for evento in pendentes.values():
+                    try:
+                        self._publicar(evento)
+                    except Exception as e:
+                        logger.error(f"Erro ao publicar progresso agrupado: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._condicao:
+            pendentes = len(self._pendentes)
+        return {**self.estatisticas, 'pendentes': pendentes, 'janela_ms': int(self.janela * 1000)}
+
+
+# Instância global do barramento (uma por worker)
+_barramento_instance: Optional[BarramentoEventos] = None
+_barramento_lock = threading.Lock()
+
+
+def obter_barramento(app=None) -> Optional[BarramentoEventos]:
+    """
+    Retorna o barramento do worker, criando e iniciando o listener na primeira chamada
+
+    Args:
+        app: Instância do Flask app (usa current_app se omitido)
+    """
+    global _barramento_instance
+
+    if _barramento_instance is not None:
+        return _barramento_instance
+
+    with _barramento_lock:
+        if _barramento_instance is None:
+            if app is None:
+                from flask import current_app
+                app = current_app._get_current_object()
+
+            with app.app_context():
+                backend = criar_backend(app)
+            _barramento_instance = BarramentoEventos(
+                backend,
+                tamanho_fila=app.config.get('SSE_FILA_TAMANHO', 100),
+                politica_fila=app.config.get('SSE_FILA_POLITICA', POLITICA_AGRUPAR_PROGRESSO),
+                atraso_maximo=app.config.get('SSE_ATRASO_MAXIMO_SEGUNDOS', 60)
+            )
+            _barramento_instance.iniciar()
+
+    return _barramento_instance
+
+
+_emissor_instance: Optional[EmissorEventos] = None
+
+
+def obter_emissor(app=None) -> EmissorEventos:
+    """
+    Retorna o emissor do worker (agrupamento de progresso sobre o barramento)
+
+    Args:
+        app: Instância do Flask app (usa current_app se omitido)
+    """
+    global _emissor_instance
+
+    if _emissor_instance is not None:
+        return _emissor_instance
+
+    barramento = obter_barramento(app)
+    with _barramento_lock:
+        if _emissor_instance is None:
+            if app is None:
+                from flask import current_app
+                app = current_app._get_current_object()
+            _emissor_instance = EmissorEventos(
+                barramento, janela_ms=app.config.get('SSE_JANELA_PROGRESSO_MS', 250))
+
+    return _emissor_instance
+
+
+def evento_de_status_job(job_id: str, status) -> Dict[str, Any]:
+    """Monta o evento SSE correspondente a um JobStatus da API externa"""
+    if status.status == 'COMPLETED':
+        tipo = 'job_completed'
+    elif status.status in ('FAILED', 'CANCELLED'):
+        tipo = 'job_failed'
+    else:
+        tipo = 'job_progress'
+
+    return {
+        'type': tipo,
+        'job_id': job_id,
+        'status': status.status,
+        'progress': status.progress
+    }
+
+
+def emitir_evento_sse(evento: Dict[str, Any]) -> bool:
+    """
+    Emite um evento a partir de threads de background
+
+    Returns:
+        bool: False se o barramento ainda não foi iniciado e não há app context
+    """
+    try:
+        emissor = obter_emissor()
+    except RuntimeError:
+        logger.debug("Barramento de eventos não iniciado; evento SSE ignorado")
+        return False
+
+    emissor.emitir(evento)
+    return True
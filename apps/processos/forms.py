@@ -33,6 +33,18 @@ class ProcessoFiltroForm(FlaskForm):
         render_kw={'placeholder': 'MM/AAAA'}
     )
 
+    periodo_de = StringField(
+        'De (Mês/Ano)',
+        validators=[Optional(), Length(max=7)],
+        render_kw={'placeholder': 'MM/AAAA'}
+    )
+
+    periodo_ate = StringField(
+        'Até (Mês/Ano)',
+        validators=[Optional(), Length(max=7)],
+        render_kw={'placeholder': 'MM/AAAA'}
+    )
+
     operadora = SelectField(
         'Operadora',
         choices=[('', 'Todas')],
@@ -1,7 +1,7 @@
 import logging
 import traceback
-import queue
 import json
+import time
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 from dataclasses import dataclass
@@ -16,13 +16,19 @@ from .forms import ProcessoForm, ProcessoFiltroForm, AprovacaoForm, CriarProcess
 from apps import db
 from apps.models import Processo, Cliente, Operadora, Execucao, Usuario
 from apps.models.processo import StatusProcesso
+from apps.models.perfis_carga import perfil_listagem_processos, perfil_detalhe_processo, perfil_execucoes_do_processo
 from apps.authentication.util import verify_user_jwt
 from apps.api_externa.services import APIExternaService
+from apps.api_externa.routes_logs_tempo_real import capturar_logs_job
+from .barramento_eventos import obter_barramento, obter_emissor
+from .versoes_job import obter_registro_versoes
+from .acoes_lote import aprovar_em_lote, rejeitar_em_lote, enviar_sat_em_lote, executar_upload_sat_em_lote
+from apps.services.busca_service import BuscaService
+from apps.services.paginacao import paginar_por_cursor, DIRECAO_PROXIMA
+from apps.services.exportacao import resposta_exportacao, parametros_exportacao
 
 logger = logging.getLogger(__name__)
 
-sse_queues = []
-
 @dataclass
 class ProcessoFiltros:
     """Classe para organizar filtros de processos"""
@@ -30,6 +36,8 @@ class ProcessoFiltros:
     status: Optional[str] = None
     mes_ano: Optional[str] = None
     operadora_id: Optional[str] = None
+    periodo_de: Optional[int] = None
+    periodo_ate: Optional[int] = None
 
     @classmethod
     def from_request_args(cls, args) -> 'ProcessoFiltros':
@@ -40,6 +48,11 @@ class ProcessoFiltros:
             status = args.get('status', '').strip() or None
             mes_ano = args.get('mes_ano', '').strip() or None
             operadora_id = args.get('operadora', '').strip() or None
+            # Intervalo de períodos (MM/AAAA ou AAAAMM)
+            periodo_de = cls._periodo(args, 'periodo_de')
+            periodo_ate = cls._periodo(args, 'periodo_ate')
+            # Um mês/ano inválido não pode virar "sem período" e esvaziar a listagem
+            cls._periodo(args, 'mes_ano')
 
             logger.debug("Filtros extraídos - busca: %s, status: %s, mes_ano: %s, operadora_id: %s", 
                         busca, status, mes_ano, operadora_id)
@@ -48,69 +61,41 @@ class ProcessoFiltros:
                 busca=busca,
                 status=status,
                 mes_ano=mes_ano,
-                operadora_id=operadora_id
+                operadora_id=operadora_id,
+                periodo_de=periodo_de,
+                periodo_ate=periodo_ate
             )
+        except ValueError:
+            raise
         except Exception as e:
             logger.error("Erro ao criar filtros: %s", str(e))
             logger.error("Traceback: %s", traceback.format_exc())
             raise
 
-class ProcessoService:
-    """Serviço para operações com processos"""
-
     @staticmethod
-    def buscar_clientes_por_termo(termo: str) -> List[int]:
-        """Busca IDs de clientes por termo de pesquisa"""
-        try:
-            logger.debug("Iniciando busca de clientes por termo: '%s'", termo)
-            cliente_ids = set()
-
-            # Buscar clientes por nome/cnpj
-            logger.debug("Buscando clientes por nome/CNPJ")
-            try:
-                clientes_encontrados = Cliente.query.filter(
-                    or_(
-                        Cliente.razao_social.like(f'%{termo}%'),
-                        Cliente.nome_sat.like(f'%{termo}%'),
-                        Cliente.cnpj.like(f'%{termo}%')
-                    )
-                ).all()
-                logger.debug("Encontrados %d clientes por nome/CNPJ", len(clientes_encontrados))
-
-                for cliente in clientes_encontrados:
-                    cliente_ids.add(cliente.id)
+    def _periodo(args, nome: str) -> Optional[int]:
+        """
+        Lê um filtro de período (MM/AAAA ou AAAAMM)
+
+        Raises:
+            ValueError: Se o valor informado não for um período válido
+        """
+        valor = args.get(nome, '').strip()
+        if not valor:
+            return None
+        periodo = Processo.periodo_de_mes_ano(valor)
+        if periodo is None:
+            raise ValueError(f"Filtro {nome} inválido: '{valor}'. Use MM/AAAA ou AAAAMM")
+        return periodo
+
+# Chave estável da listagem de processos (paginação por cursor). A data de
+# criação não muda: com data_atualizacao (onupdate) um processo alterado
+# entre duas páginas saltaria para antes do cursor e não seria listado.
+ORDEM_PROCESSOS = [(Processo.data_criacao, True), (Processo.id, True)]
 
-            except SQLAlchemyError as e:
-                logger.error("Erro na query de clientes por nome/CNPJ: %s", str(e))
-                raise
 
-            # Buscar clientes por operadora
-            logger.debug("Buscando clientes por operadora")
-            try:
-                operadoras_encontradas = Operadora.query.filter(
-                    Operadora.nome.like(f'%{termo}%')
-                ).all()
-                logger.debug("Encontradas %d operadoras", len(operadoras_encontradas))
-
-                for operadora in operadoras_encontradas:
-                    logger.debug("Buscando clientes da operadora: %s", operadora.nome)
-                    clientes_op = Cliente.query.filter_by(operadora_id=operadora.id).all()
-                    logger.debug("Encontrados %d clientes para operadora %s", len(clientes_op), operadora.nome)
-
-                    for cliente in clientes_op:
-                        cliente_ids.add(cliente.id)
-
-            except SQLAlchemyError as e:
-                logger.error("Erro na query de clientes por operadora: %s", str(e))
-                raise
-
-            logger.debug("Total de IDs de clientes encontrados: %d", len(cliente_ids))
-            return list(cliente_ids)
-
-        except Exception as e:
-            logger.error("Erro geral ao buscar clientes por termo '%s': %s", termo, str(e))
-            logger.error("Traceback: %s", traceback.format_exc())
-            raise
+class ProcessoService:
+    """Serviço para operações com processos"""
 
     @staticmethod
     def aplicar_filtros(query, filtros: ProcessoFiltros):
@@ -120,51 +105,27 @@ class ProcessoService:
 
             if filtros.busca:
                 logger.debug("Aplicando filtro de busca: '%s'", filtros.busca)
-                try:
-                    cliente_ids = ProcessoService.buscar_clientes_por_termo(filtros.busca)
-                    if cliente_ids:
-                        logger.debug("Aplicando filtro com %d IDs de clientes", len(cliente_ids))
-                        query = query.filter(Processo.cliente_id.in_(cliente_ids))
-                    else:
-                        logger.debug("Nenhum cliente encontrado, retornando query vazia")
-                        query = query.filter(Processo.id.is_(None))
-                except Exception as e:
-                    logger.error("Erro ao aplicar filtro de busca: %s", str(e))
-                    raise
+                query = query.filter(BuscaService.filtro_cliente(Processo.cliente_id, filtros.busca))
 
             if filtros.status:
                 logger.debug("Aplicando filtro de status: '%s'", filtros.status)
-                try:
-                    query = query.filter(Processo.status_processo == filtros.status)
-                except Exception as e:
-                    logger.error("Erro ao aplicar filtro de status: %s", str(e))
-                    raise
+                query = query.filter(Processo.status_processo == filtros.status)
 
             if filtros.mes_ano:
                 logger.debug("Aplicando filtro de mês/ano: '%s'", filtros.mes_ano)
-                try:
-                    query = query.filter(Processo.mes_ano == filtros.mes_ano)
-                except Exception as e:
-                    logger.error("Erro ao aplicar filtro de mês/ano: %s", str(e))
-                    raise
+                query = query.filter(Processo.periodo == Processo.periodo_de_mes_ano(filtros.mes_ano))
+
+            if filtros.periodo_de:
+                logger.debug("Aplicando filtro de período inicial: '%s'", filtros.periodo_de)
+                query = query.filter(Processo.periodo >= filtros.periodo_de)
+
+            if filtros.periodo_ate:
+                logger.debug("Aplicando filtro de período final: '%s'", filtros.periodo_ate)
+                query = query.filter(Processo.periodo <= filtros.periodo_ate)
 
             if filtros.operadora_id:
                 logger.debug("Aplicando filtro de operadora: '%s'", filtros.operadora_id)
-                try:
-                    clientes_da_operadora = Cliente.query.filter_by(
-                        operadora_id=filtros.operadora_id
-                    ).all()
-                    logger.debug("Encontrados %d clientes para operadora", len(clientes_da_operadora))
-
-                    if clientes_da_operadora:
-                        operadora_cliente_ids = [c.id for c in clientes_da_operadora]
-                        query = query.filter(Processo.cliente_id.in_(operadora_cliente_ids))
-                    else:
-                        logger.debug("Nenhum cliente encontrado para operadora, retornando query vazia")
-                        query = query.filter(Processo.id.is_(None))
-                except Exception as e:
-                    logger.error("Erro ao aplicar filtro de operadora: %s", str(e))
-                    raise
+                query = query.filter(Processo.cliente.has(Cliente.operadora_id == filtros.operadora_id))
 
             logger.debug("Filtros aplicados com sucesso")
             return query
@@ -181,17 +142,21 @@ def index():
     logger.info("=== INICIANDO ROTA INDEX ===")
 
     try:
-        # Paginação
+        # Paginação por cursor
         logger.debug("Extraindo parâmetros de paginação")
-        page = request.args.get('page', 1, type=int)
+        cursor = request.args.get('cursor')
+        direcao = request.args.get('dir', DIRECAO_PROXIMA)
         per_page = 10
-        logger.debug("Parâmetros de paginação - page: %d, per_page: %d", page, per_page)
+        logger.debug("Parâmetros de paginação - cursor: %s, direção: %s, per_page: %d", cursor, direcao, per_page)
 
         # Parâmetros de filtro
         logger.debug("Extraindo parâmetros de filtro")
         try:
             filtros = ProcessoFiltros.from_request_args(request.args)
             logger.debug("Filtros criados com sucesso")
+        except ValueError as e:
+            flash(str(e), 'warning')
+            return redirect(url_for('processos_bp.index'))
         except Exception as e:
             logger.error("ERRO ao criar filtros: %s", str(e))
             raise
@@ -199,7 +164,7 @@ def index():
         # Query inicial
         logger.debug("Criando query inicial")
         try:
-            query = Processo.query
+            query = Processo.query.options(*perfil_listagem_processos())
             logger.debug("Query inicial criada")
         except Exception as e:
             logger.error("ERRO ao criar query inicial: %s", str(e))
@@ -214,25 +179,13 @@ def index():
             logger.error("ERRO ao aplicar filtros: %s", str(e))
             raise
 
-        # Ordenação
-        logger.debug("Aplicando ordenação")
-        try:
-            query = query.order_by(Processo.data_atualizacao.desc())
-            logger.debug("Ordenação aplicada")
-        except Exception as e:
-            logger.error("ERRO ao aplicar ordenação: %s", str(e))
-            raise
-
-        # Paginação
+        # Paginação (ordenada por data de criação e id)
         logger.debug("Executando paginação")
         try:
-            logger.debug("Chamando query.paginate com page=%d, per_page=%d", page, per_page)
-            processos = query.paginate(
-                page=page,
-                per_page=per_page,
-                error_out=False
+            processos = paginar_por_cursor(
+                query, ORDEM_PROCESSOS, cursor=cursor, direcao=direcao, per_page=per_page, contar=True
             )
-            logger.debug("Paginação executada com sucesso. Total de itens: %d", processos.total if hasattr(processos, 'total') else 0)
+            logger.debug("Paginação executada com sucesso. Total de itens: %s", processos.total)
         except Exception as e:
             logger.error("ERRO na paginação: %s", str(e))
             logger.error("Traceback da paginação: %s", traceback.format_exc())
@@ -253,7 +206,8 @@ def index():
             result = render_template(
                 'processos/index.html',
                 processos=processos,
-                form=form
+                form=form,
+                long_poll_habilitado=current_app.config.get('LONG_POLL_HABILITADO', False)
             )
             logger.info("=== ROTA INDEX FINALIZADA COM SUCESSO ===")
             return result
@@ -287,6 +241,125 @@ def index():
         flash('Erro ao carregar processos. Tente novamente.', 'danger')
         return redirect(url_for('home_blueprint.index'))
 
+@bp.route('/api/listar', methods=['GET'])
+@verify_user_jwt
+def api_listar():
+    """
+    Lista processos em JSON com paginação por cursor (rolagem infinita)
+
+    Query params: mesmos filtros da listagem, cursor, dir (next|prev),
+    per_page e total=1 para incluir o total (em cache)
+    """
+    try:
+        filtros = ProcessoFiltros.from_request_args(request.args)
+        query = ProcessoService.aplicar_filtros(Processo.query.options(*perfil_listagem_processos()), filtros)
+        pagina = paginar_por_cursor(
+            query,
+            ORDEM_PROCESSOS,
+            cursor=request.args.get('cursor'),
+            direcao=request.args.get('dir', DIRECAO_PROXIMA),
+            per_page=request.args.get('per_page', 20, type=int),
+            contar=request.args.get('total') == '1'
+        )
+
+        return jsonify({
+            'success': True,
+            'items': [
+                {
+                    'id': str(processo.id),
+                    'cliente_id': str(processo.cliente_id),
+                    'cliente': processo.cliente.razao_social if processo.cliente else None,
+                    'cnpj': processo.cliente.cnpj if processo.cliente else None,
+                    'operadora': processo.cliente.operadora.nome if processo.cliente and processo.cliente.operadora else None,
+                    'mes_ano': processo.mes_ano,
+                    'periodo': processo.periodo,
+                    'status_processo': processo.status_processo,
+                    'valor_fatura': float(processo.valor_fatura) if processo.valor_fatura is not None else None,
+                    'data_vencimento': processo.data_vencimento.isoformat() if processo.data_vencimento else None,
+                    'data_atualizacao': processo.data_atualizacao.isoformat() if processo.data_atualizacao else None
+                }
+                for processo in pagina.items
+            ],
+            **pagina.to_dict()
+        })
+
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': 'INVALID_FILTER',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        logger.error("Erro ao listar processos (API): %s", str(e))
+        return jsonify({
+            'success': False,
+            'error': 'LIST_ERROR',
+            'message': f'Erro ao listar processos: {str(e)}'
+        }), 500
+
+
+
+@bp.route('/exportar', methods=['GET'])
+@verify_user_jwt
+def exportar():
+    """
+    Exporta os processos filtrados em streaming
+
+    Query params: mesmos filtros da listagem, formato (csv | ndjson) e
+    compactar=1 para gzip
+    """
+    formato, compactar = parametros_exportacao(request.args)
+    if formato not in ('csv', 'ndjson'):
+        return jsonify({'success': False, 'message': 'Formato inválido. Use csv ou ndjson'}), 400
+
+    try:
+        filtros = ProcessoFiltros.from_request_args(request.args)
+        consulta = (
+            ProcessoService.aplicar_filtros(Processo.query, filtros)
+            .join(Cliente, Processo.cliente_id == Cliente.id)
+            .outerjoin(Operadora, Cliente.operadora_id == Operadora.id)
+            .with_entities(
+                Processo.id,
+                Processo.cliente_id,
+                Cliente.razao_social.label('cliente'),
+                Cliente.cnpj,
+                Operadora.nome.label('operadora'),
+                Processo.mes_ano,
+                Processo.periodo,
+                Processo.status_processo,
+                Processo.valor_fatura,
+                Processo.data_vencimento,
+                Processo.url_fatura,
+                Processo.enviado_para_sat,
+                Processo.data_envio_sat,
+                Processo.data_aprovacao,
+                Processo.upload_manual,
+                Processo.data_criacao,
+                Processo.data_atualizacao
+            )
+            .order_by(*[
+                coluna.desc() if descendente else coluna.asc()
+                for coluna, descendente in ORDEM_PROCESSOS
+            ])
+            .statement
+        )
+
+        return resposta_exportacao('processos', consulta, formato=formato, compactar=compactar)
+
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': 'INVALID_FILTER',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        logger.error("Erro ao exportar processos: %s", str(e))
+        return jsonify({
+            'success': False,
+            'error': 'EXPORT_ERROR',
+            'message': f'Erro ao exportar processos: {str(e)}'
+        }), 500
+
 # Mantendo as outras rotas sem alteração por enquanto, focando no debug da rota principal
 @bp.route('/novo', methods=['GET', 'POST'])
 @verify_user_jwt
@@ -303,7 +376,7 @@ def novo():
             processo_existente = db.session.query(Processo).filter(
                 and_(
                     Processo.cliente_id == form.cliente_id.data,
-                    Processo.mes_ano == form.mes_ano.data
+                    Processo.periodo == Processo.periodo_de_mes_ano(form.mes_ano.data)
                 )
             ).first()
 
@@ -400,7 +473,7 @@ def criar_processos_mensais():
                 processo_existente = Processo.query.filter(
                     and_(
                         Processo.cliente_id == cliente.id,
-                        Processo.mes_ano == form.mes_ano.data
+                        Processo.periodo == Processo.periodo_de_mes_ano(form.mes_ano.data)
                     )
                 ).first()
 
@@ -441,13 +514,10 @@ def criar_processos_mensais():
 def visualizar(id):
     """Visualizar detalhes de um processo"""
     try:
-        processo = Processo.query.options(
-            joinedload(Processo.cliente).joinedload(Cliente.operadora),
-            joinedload(Processo.aprovador)
-        ).get_or_404(id)
+        processo = Processo.query.options(*perfil_detalhe_processo()).get_or_404(id)
         
         # Carregar execuções relacionadas ao processo
-        execucoes = processo.execucoes.all()
+        execucoes = processo.execucoes.options(*perfil_execucoes_do_processo()).all()
         
         return render_template('processos/detalhes.html', processo=processo, execucoes=execucoes)
     
@@ -474,7 +544,7 @@ def editar(id):
                 processo_existente = db.session.query(Processo).filter(
                     and_(
                         Processo.cliente_id == form.cliente_id.data,
-                        Processo.mes_ano == form.mes_ano.data,
+                        Processo.periodo == Processo.periodo_de_mes_ano(form.mes_ano.data),
                         Processo.id != processo.id
                     )
                 ).first()
@@ -592,6 +662,7 @@ def executar_download(id):
         job_response = api_service.executar_operadora(processo)
         
         logger.info(f"Job criado com sucesso: {job_response.job_id}")
+        capturar_logs_job(job_response.job_id)
         
         return jsonify({
             'success': True,
@@ -632,6 +703,7 @@ def executar_upload_sat(id):
         job_response = api_service.executar_sat(processo)
         
         logger.info(f"Job SAT criado com sucesso: {job_response.job_id}")
+        capturar_logs_job(job_response.job_id)
         
         return jsonify({
             'success': True,
@@ -656,23 +728,26 @@ def consultar_status_job(job_id):
     
     Retorna informações atualizadas sobre a execução do job,
     incluindo status, progresso e mensagens.
+
+    Long-poll (opcional):
+        wait: segundos que a requisição pode aguardar por uma alteração
+        since: versão já conhecida pelo cliente (campo "version" da resposta)
+
+    Com `wait`, a resposta volta assim que a versão do status for diferente
+    de `since`, ou com {"unchanged": true} ao fim da espera. Sem
+    LONG_POLL_HABILITADO o parâmetro é ignorado e a consulta é imediata.
     """
     try:
+        espera = request.args.get('wait', type=float)
+        if espera is not None and current_app.config.get('LONG_POLL_HABILITADO'):
+            return _consultar_status_job_long_poll(job_id, espera, request.args.get('since'))
+
         logger.info(f"Consultando status do job {job_id}")
         
-        api_service = APIExternaService()
-        job_status = api_service.consultar_status(job_id)
-        
-        return jsonify({
-            'success': True,
-            'job_id': job_status.job_id,
-            'status': job_status.status,
-            'message': job_status.message,
-            'progress': job_status.progress,
-            'created_at': job_status.created_at,
-            'updated_at': job_status.updated_at,
-            'error': job_status.error
-        })
+        status = _consultar_status_job_api(job_id)
+        versao = obter_registro_versoes().atualizar(job_id, status)
+
+        return jsonify({'success': True, **status, 'version': versao})
         
     except ValueError as e:
         return jsonify({
@@ -687,6 +762,65 @@ def consultar_status_job(job_id):
         }), 500
 
 
+def _consultar_status_job_api(job_id: str) -> Dict[str, Any]:
+    """Consulta o status do job na API Externa e retorna os campos da resposta"""
+    job_status = APIExternaService().consultar_status(job_id)
+    return {
+        'job_id': job_status.job_id,
+        'status': job_status.status,
+        'message': getattr(job_status, 'message', None),
+        'progress': job_status.progress,
+        'created_at': job_status.created_at,
+        'updated_at': getattr(job_status, 'updated_at', None) or job_status.completed_at or job_status.started_at,
+        'error': job_status.error
+    }
+
+
+def _consultar_status_job_long_poll(job_id: str, espera: float, versao_cliente: Optional[str]):
+    """
+    Responde à consulta de status em modo long-poll
+
+    A requisição aguarda na condição do job no registro de versões, que é
+    atualizado pelos eventos do barramento SSE. Os eventos do barramento só
+    cobrem o fim do job; enquanto ele roda, o status é confirmado na API
+    Externa a cada LONG_POLL_INTERVALO_CONSULTA segundos sem atualização (o
+    mesmo intervalo do polling da página), e a consulta feita por uma
+    requisição acorda todas as que aguardam o mesmo job.
+    """
+    espera = max(0.0, min(espera, current_app.config.get('LONG_POLL_ESPERA_MAXIMA', 30)))
+    intervalo = min(espera, current_app.config.get('LONG_POLL_INTERVALO_CONSULTA', 5))
+    limite = time.time() + espera
+    registro = obter_registro_versoes()
+
+    # Garante que o listener do barramento está ativo neste worker
+    obter_barramento(current_app._get_current_object())
+
+    conhecido = registro.obter(job_id)
+    if conhecido is None:
+        registro.atualizar(job_id, _consultar_status_job_api(job_id))
+        conhecido = registro.obter(job_id)
+    versao, status, _ = conhecido
+
+    if versao_cliente != versao:
+        return jsonify({'success': True, **status, 'version': versao})
+
+    alterado = None
+    while alterado is None and time.time() < limite:
+        alterado = registro.aguardar(job_id, versao_cliente, min(limite - time.time(), intervalo))
+        if alterado is None:
+            # Nenhuma atualização no intervalo: confirma na API Externa
+            # (uma única consulta por intervalo, compartilhada entre as requisições)
+            if registro.reservar_consulta(job_id, intervalo):
+                registro.atualizar(job_id, _consultar_status_job_api(job_id))
+                alterado = registro.aguardar(job_id, versao_cliente, 0)
+
+    if alterado is None:
+        return jsonify({'success': True, 'job_id': job_id, 'unchanged': True, 'version': versao_cliente})
+
+    versao, status = alterado
+    return jsonify({'success': True, **status, 'version': versao})
+
+
 @bp.route('/health-api-externa', methods=['GET'])
 @verify_user_jwt  
 def health_api_externa():
@@ -819,6 +953,151 @@ def rejeitar(id):
         }), 500
 
 
+# ============================================================================
+# AÇÕES EM LOTE
+# ============================================================================
+
+def _ids_do_lote(dados: Dict[str, Any], status_esperado: str) -> List[Any]:
+    """
+    Obtém os IDs de uma ação em lote: lista `ids` ou `filtros` da listagem
+
+    Com filtros, apenas os processos no status esperado são selecionados.
+
+    Raises:
+        ValueError: Se nenhum critério foi informado ou o lote excede o limite
+    """
+    maximo = current_app.config.get('PROCESSOS_LOTE_MAXIMO', 500)
+
+    if dados.get('ids'):
+        ids = dados['ids']
+        if not isinstance(ids, list):
+            raise ValueError('O campo ids deve ser uma lista')
+    elif isinstance(dados.get('filtros'), dict):
+        filtros = ProcessoFiltros.from_request_args(
+            {chave: str(valor) for chave, valor in dados['filtros'].items() if valor is not None}
+        )
+        query = ProcessoService.aplicar_filtros(db.session.query(Processo.id), filtros)
+        ids = [str(processo_id) for (processo_id,) in query.filter(
+            Processo.status_processo == status_esperado
+        ).limit(maximo + 1)]
+    else:
+        raise ValueError('Informe a lista de ids ou os filtros do lote')
+
+    if len(ids) > maximo:
+        raise ValueError(f'O lote excede o limite de {maximo} processos')
+    return ids
+
+
+def _notificar_lote(resultado, status_antigo: str):
+    """Envia um único evento SSE com os processos alterados pelo lote"""
+    alterados = [
+        processo_id for processo_id, item in resultado.resultados.items()
+        if item.get('status_novo')
+    ]
+    if alterados:
+        enviar_evento_sse({
+            'type': 'status_changed',
+            'lote': True,
+            'processo_ids': alterados,
+            'status_antigo': status_antigo,
+            'status_novo': resultado.resultados[alterados[0]]['status_novo']
+        })
+
+
+@bp.route('/lote/aprovar', methods=['POST'])
+@verify_user_jwt
+def aprovar_lote():
+    """
+    Aprova vários processos em AGUARDANDO_APROVACAO
+
+    Body JSON: {"ids": [...]} ou {"filtros": {...}}, "observacoes" opcional.
+    Retorna o resultado de cada processo.
+    """
+    try:
+        from flask_login import current_user
+
+        dados = request.get_json(silent=True) or {}
+        ids = _ids_do_lote(dados, StatusProcesso.AGUARDANDO_APROVACAO.value)
+
+        usuario = Usuario.query.filter_by(username=current_user.username).first()
+        if not usuario:
+            return jsonify({'success': False, 'message': 'Usuário não encontrado'}), 404
+
+        resultado = aprovar_em_lote(ids, usuario.id, dados.get('observacoes'))
+        _notificar_lote(resultado, StatusProcesso.AGUARDANDO_APROVACAO.value)
+
+        return jsonify({'success': True, **resultado.to_dict()})
+
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Erro ao aprovar processos em lote: {str(e)}")
+        return jsonify({'success': False, 'message': f'Erro ao aprovar processos: {str(e)}'}), 500
+
+
+@bp.route('/lote/rejeitar', methods=['POST'])
+@verify_user_jwt
+def rejeitar_lote():
+    """
+    Rejeita vários processos em AGUARDANDO_APROVACAO
+
+    Body JSON: {"ids": [...]} ou {"filtros": {...}}, "observacoes" obrigatório.
+    """
+    try:
+        dados = request.get_json(silent=True) or {}
+        observacoes = (dados.get('observacoes') or '').strip()
+        if not observacoes:
+            return jsonify({'success': False, 'message': 'Motivo da rejeição é obrigatório'}), 400
+
+        ids = _ids_do_lote(dados, StatusProcesso.AGUARDANDO_APROVACAO.value)
+        resultado = rejeitar_em_lote(ids, observacoes)
+        _notificar_lote(resultado, StatusProcesso.AGUARDANDO_APROVACAO.value)
+
+        return jsonify({'success': True, **resultado.to_dict()})
+
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Erro ao rejeitar processos em lote: {str(e)}")
+        return jsonify({'success': False, 'message': f'Erro ao rejeitar processos: {str(e)}'}), 500
+
+
+@bp.route('/lote/enviar-sat', methods=['POST'])
+@verify_user_jwt
+def enviar_sat_lote():
+    """
+    Envia vários processos em AGUARDANDO_ENVIO_SAT para o SAT
+
+    Body JSON: {"ids": [...]} ou {"filtros": {...}}.
+    Com "executar": true, enfileira o upload via RPA (API Externa) de todos
+    os processos de uma vez; sem ele, apenas marca como enviados (como /enviar-sat).
+    """
+    try:
+        dados = request.get_json(silent=True) or {}
+        ids = _ids_do_lote(dados, StatusProcesso.AGUARDANDO_ENVIO_SAT.value)
+
+        if dados.get('executar'):
+            resultado = executar_upload_sat_em_lote(
+                ids,
+                current_app._get_current_object(),
+                concorrencia=current_app.config.get('SAT_LOTE_CONCORRENCIA', 4)
+            )
+        else:
+            resultado = enviar_sat_em_lote(ids)
+            _notificar_lote(resultado, StatusProcesso.AGUARDANDO_ENVIO_SAT.value)
+
+        return jsonify({'success': True, **resultado.to_dict()})
+
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Erro ao enviar processos para SAT em lote: {str(e)}")
+        return jsonify({'success': False, 'message': f'Erro ao enviar processos para SAT: {str(e)}'}), 500
+
+
 @bp.route('/fatura-dados/<id>', methods=['GET'])
 @verify_user_jwt
 def fatura_dados(id):
@@ -862,25 +1141,29 @@ def sse_status():
     - job_failed: Job falhou
     - status_changed: Status do processo mudou
     """
+    barramento = obter_barramento()
+
     def event_stream():
-        messages = queue.Queue()
-        sse_queues.append(messages)
+        messages = barramento.assinar()
         
         try:
             while True:
-                try:
-                    msg = messages.get(timeout=30)
-                    
-                    event_type = msg.get('type', 'message')
-                    data = json.dumps(msg)
-                    
-                    yield f"event: {event_type}\ndata: {data}\n\n"
-                    
-                except queue.Empty:
-                    yield f": keepalive\n\n"
+                msg = messages.obter(timeout=30)
+
+                if messages.desconectada:
+                    # Cliente não acompanha o ritmo dos eventos: encerra para ele reconectar
+                    yield b'event: disconnected\ndata: {"reason": "slow_consumer"}\n\n'
+                    break
+
+                if msg is None:
+                    yield b": keepalive\n\n"
+                    continue
+
+                # Bytes já codificados, compartilhados entre todos os clientes
+                yield msg.quadro
                     
         finally:
-            sse_queues.remove(messages)
+            barramento.cancelar(messages)
     
     return Response(
         stream_with_context(event_stream()),
@@ -895,13 +1178,26 @@ def sse_status():
 
 def enviar_evento_sse(evento: Dict[str, Any]):
     """
-    Envia evento para todos os clientes conectados via SSE
+    Envia evento para todos os clientes conectados via SSE, em qualquer worker
     """
-    for q in sse_queues:
-        try:
-            q.put_nowait(evento)
-        except queue.Full:
-            pass
+    try:
+        obter_emissor().emitir(evento)
+    except Exception as e:
+        logger.error("Erro ao publicar evento SSE: %s", str(e))
+
+
+@bp.route('/sse/metricas')
+@verify_user_jwt
+def sse_metricas():
+    """Métricas do barramento de eventos SSE deste worker"""
+    return jsonify({
+        'success': True,
+        'data': {
+            **obter_barramento().get_stats(),
+            'emissor': obter_emissor().get_stats(),
+            'long_poll': obter_registro_versoes().get_stats()
+        }
+    })
 
 
 def criar_processos_mensais_automatico(mes_ano: Optional[str] = None, operadora_id: Optional[str] = None) -> Dict[str, Any]:
@@ -955,7 +1251,7 @@ def criar_processos_mensais_automatico(mes_ano: Optional[str] = None, operadora_
             processo_existente = Processo.query.filter(
                 and_(
                     Processo.cliente_id == cliente.id,
-                    Processo.mes_ano == mes_ano
+                    Processo.periodo == Processo.periodo_de_mes_ano(mes_ano)
                 )
             ).first()
             
@@ -0,0 +1,226 @@
+"""
+Versões de status de jobs para long-poll
+
+Guarda o último status conhecido dos jobs que estão sendo consultados e
+uma versão derivada do conteúdo. As requisições de long-poll aguardam na
+condição do job até a versão mudar, em vez de consultar a API externa a
+cada intervalo. O registro é alimentado pelos eventos do barramento SSE,
+que chegam a todos os workers.
+
+Como a versão é calculada a partir do conteúdo do status, um cliente que
+alterna entre workers continua recebendo versões comparáveis.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Campos que compõem a versão do status
+CAMPOS_VERSAO = ('status', 'progress', 'message', 'error')
+
+# Status da API externa correspondente a cada tipo de evento terminal
+STATUS_POR_TIPO_EVENTO = {
+    'job_completed': 'COMPLETED',
+    'job_failed': 'FAILED',
+    'job_timeout': 'FAILED'
+}
+
+STATUS_API = ('PENDING', 'RUNNING', 'COMPLETED', 'FAILED', 'CANCELLED')
+
+
+def calcular_versao(status: Dict[str, Any]) -> str:
+    """Calcula a versão (hash curto) dos campos relevantes de um status"""
+    conteudo = json.dumps({campo: status.get(campo) for campo in CAMPOS_VERSAO}, sort_keys=True, default=str)
+    return hashlib.sha1(conteudo.encode('utf-8')).hexdigest()[:12]
+
+
+class _EntradaJob:
+    """Status atual de um job e a condição em que os long-polls aguardam"""
+
+    __slots__ = ('status', 'versao', 'atualizado_em', 'aguardando', 'condicao')
+
+    def __init__(self, lock: threading.Lock):
+        self.status: Dict[str, Any] = {}
+        self.versao: Optional[str] = None
+        self.atualizado_em = 0.0
+        self.aguardando = 0
+        self.condicao = threading.Condition(lock)
+
+
+class RegistroVersoesJob:
+    """Último status conhecido e versão de cada job consultado por long-poll"""
+
+    def __init__(self, max_jobs: int = 5000):
+        """
+        Inicializa o registro
+
+        Args:
+            max_jobs: Quantidade máxima de jobs mantidos (os mais antigos sem
+                requisições aguardando são descartados)
+        """
+        self.max_jobs = max_jobs
+        self._lock = threading.Lock()
+        self._jobs: 'OrderedDict[str, _EntradaJob]' = OrderedDict()
+        self.estatisticas = {'aguardas': 0, 'alteracoes': 0, 'sem_alteracao': 0}
+
+    def _entrada(self, job_id: str) -> _EntradaJob:
+        entrada = self._jobs.get(job_id)
+        if entrada is None:
+            entrada = _EntradaJob(self._lock)
+            self._jobs[job_id] = entrada
+            self._descartar_antigos()
+        else:
+            self._jobs.move_to_end(job_id)
+        return entrada
+
+    def _descartar_antigos(self):
+        excedente = len(self._jobs) - self.max_jobs
+        if excedente <= 0:
+            return
+        for job_id in [j for j, e in self._jobs.items() if not e.aguardando][:excedente]:
+            del self._jobs[job_id]
+
+    def _aplicar(self, entrada: _EntradaJob, status: Dict[str, Any]) -> bool:
+        """Atualiza a entrada (com o lock adquirido) e acorda quem aguarda se a versão mudou"""
+        versao = calcular_versao(status)
+        entrada.status = status
+        entrada.atualizado_em = time.time()
+        if versao == entrada.versao:
+            return False
+        entrada.versao = versao
+        self.estatisticas['alteracoes'] += 1
+        entrada.condicao.notify_all()
+        return True
+
+    def acompanha(self, job_id: str) -> bool:
+        """Indica se o job está no registro"""
+        return job_id in self._jobs
+
+    def obter(self, job_id: str) -> Optional[Tuple[str, Dict[str, Any], float]]:
+        """
+        Retorna o status conhecido do job
+
+        Returns:
+            Tupla (versão, status, idade em segundos) ou None se o job não é conhecido
+        """
+        with self._lock:
+            entrada = self._jobs.get(job_id)
+            if entrada is None or entrada.versao is None:
+                return None
+            return entrada.versao, dict(entrada.status), time.time() - entrada.atualizado_em
+
+    def reservar_consulta(self, job_id: str, intervalo: float) -> bool:
+        """
+        Reserva a próxima consulta do job à API externa
+
+        Só uma requisição por intervalo recebe a reserva; as demais aguardam
+        o resultado dela na condição do job.
+
+        Returns:
+            bool: True se o status não foi atualizado no intervalo e a consulta cabe a quem chamou
+        """
+        with self._lock:
+            entrada = self._jobs.get(job_id)
+            agora = time.time()
+            if entrada is not None and agora - entrada.atualizado_em < intervalo:
+                return False
+            if entrada is not None:
+                entrada.atualizado_em = agora
+            return True
+
+    def atualizar(self, job_id: str, status: Dict[str, Any]) -> str:
+        """
+        Registra o status consultado na API externa
+
+        Returns:
+            str: Versão atual do status
+        """
+        with self._lock:
+            entrada = self._entrada(job_id)
+            self._aplicar(entrada, dict(status))
+            return entrada.versao
+
+    def registrar_evento(self, job_id: str, evento: Dict[str, Any]):
+        """
+        Aplica um evento SSE ao status de um job já conhecido
+
+        Jobs que ninguém está consultando são ignorados, para que o registro
+        contenha apenas os jobs acompanhados por long-poll.
+        """
+        with self._lock:
+            entrada = self._jobs.get(job_id)
+            if entrada is None or entrada.versao is None:
+                return
+
+            status = dict(entrada.status)
+            tipo = evento.get('type')
+            if tipo in STATUS_POR_TIPO_EVENTO:
+                status['status'] = evento.get('status') if evento.get('status') in STATUS_API \
+                    else STATUS_POR_TIPO_EVENTO[tipo]
+                if status['status'] == 'COMPLETED':
+                    status['progress'] = 100
+            elif evento.get('status') in STATUS_API:
+                status['status'] = evento['status']
+
+            for campo in ('progress', 'message', 'error'):
+                if evento.get(campo) is not None:
+                    status[campo] = evento[campo]
+
+            self._aplicar(entrada, status)
+
+    def aguardar(self, job_id: str, versao: str, timeout: float) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Aguarda até a versão do job ser diferente de `versao`
+
+        Args:
+            job_id: ID do job
+            versao: Versão já conhecida pelo cliente
+            timeout: Tempo máximo de espera em segundos
+
+        Returns:
+            Tupla (versão, status) se houve alteração, None no timeout
+        """
+        limite = time.time() + timeout
+        with self._lock:
+            entrada = self._entrada(job_id)
+            entrada.aguardando += 1
+            self.estatisticas['aguardas'] += 1
+            try:
+                while entrada.versao == versao:
+                    restante = limite - time.time()
+                    if restante <= 0:
+                        self.estatisticas['sem_alteracao'] += 1
+                        return None
+                    entrada.condicao.wait(restante)
+                return entrada.versao, dict(entrada.status)
+            finally:
+                entrada.aguardando -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estatísticas do registro"""
+        with self._lock:
+            aguardando = sum(entrada.aguardando for entrada in self._jobs.values())
+            jobs = len(self._jobs)
+        return {**self.estatisticas, 'jobs': jobs, 'aguardando': aguardando}
+
+
+# Instância global do registro (uma por worker)
+_registro_instance: Optional[RegistroVersoesJob] = None
+_registro_lock = threading.Lock()
+
+
+def obter_registro_versoes() -> RegistroVersoesJob:
+    """Retorna a instância global do registro de versões de jobs"""
+    global _registro_instance
+
+    with _registro_lock:
+        if _registro_instance is None:
+            _registro_instance = RegistroVersoesJob()
+
+    return _registro_instance
@@ -29,7 +29,7 @@ def listar_processos():
             query = query.filter(Processo.status == filtros['status'])
 
         if filtros['mes_ano']:
-            query = query.filter(Processo.mes_ano == filtros['mes_ano'])
+            query = query.filter(Processo.periodo == Processo.periodo_de_mes_ano(filtros['mes_ano']))
 
         if filtros['operadora']:
             query = query.filter(Processo.operadora_id == filtros['operadora'])
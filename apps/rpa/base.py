@@ -434,8 +434,11 @@ class ServicoRPA:
             'dados_especificos': resultado.dados_especificos
         }
 
-        if resultado.logs_execucao:
-            execucao.mensagem_log = "\n".join(resultado.logs_execucao)
+        for linha in resultado.logs_execucao or []:
+            execucao.adicionar_log(linha)
+
+        if resultado.mensagem:
+            execucao.mensagem_log = resultado.mensagem
 
         if resultado.url_s3:
             execucao.url_arquivo_s3 = resultado.url_s3
@@ -5,13 +5,15 @@ Rotas do módulo RPA - Sistema de Orquestração RPA BEG Telecomunicações
 from apps import db
 from apps.authentication.util import verify_user_jwt
 from apps.models.execucao import TipoExecucao, StatusExecucao
-from apps.models import Processo, Execucao, Operadora
+from apps.models import Processo, Execucao, Operadora, Cliente, ExecucaoStatsDaily
+from apps.services import consolidado_execucoes as consolidado
 from .base import ServicoRPA, TipoOperacao, StatusExecucaoRPA
 import logging
 from datetime import datetime
 from typing import Dict, Any, Optional
 
 from flask import jsonify, request, current_app
+from sqlalchemy import func, select, true
 from sqlalchemy.exc import SQLAlchemyError
 from flask import Blueprint
 bp = Blueprint('rpa', __name__, url_prefix='/api/v1/rpa')
@@ -240,6 +242,9 @@ def relatorio_execucoes():
     """
     Relatório de execuções com estatísticas
 
+    Lê o consolidado diário das execuções (execucao_stats_daily), quando
+    completo, e conta à parte as execuções em andamento.
+
     Query params:
         - data_inicio: Data de início (YYYY-MM-DD)
         - data_fim: Data de fim (YYYY-MM-DD)
@@ -247,23 +252,17 @@ def relatorio_execucoes():
         - tipo_execucao: Filtrar por tipo
     """
     try:
-        from datetime import datetime, timedelta
-
         # Parâmetros de filtro
         data_inicio_str = request.args.get('data_inicio')
         data_fim_str = request.args.get('data_fim')
         operadora_id = request.args.get('operadora_id')
         tipo_execucao = request.args.get('tipo_execucao')
 
-        # Query base
-        query = Execucao.query.join(Execucao.processo).join(
-            Processo.cliente).join(Operadora)
-
-        # Aplicar filtros de data
+        # Filtros de data (dias inteiros, como no consolidado diário)
+        dia_inicio = dia_fim = None
         if data_inicio_str:
             try:
-                data_inicio = datetime.strptime(data_inicio_str, '%Y-%m-%d')
-                query = query.filter(Execucao.data_inicio >= data_inicio)
+                dia_inicio = datetime.strptime(data_inicio_str, '%Y-%m-%d').date()
             except ValueError:
                 return jsonify({
                     'success': False,
@@ -272,49 +271,80 @@ def relatorio_execucoes():
 
         if data_fim_str:
             try:
-                data_fim = datetime.strptime(
-                    data_fim_str, '%Y-%m-%d') + timedelta(days=1)
-                query = query.filter(Execucao.data_inicio < data_fim)
+                dia_fim = datetime.strptime(data_fim_str, '%Y-%m-%d').date()
             except ValueError:
                 return jsonify({
                     'success': False,
                     'message': 'Formato de data_fim inválido. Use YYYY-MM-DD'
                 }), 400
 
-        # Aplicar outros filtros
-        if operadora_id:
-            query = query.filter(Operadora.id == operadora_id)
-
-        if tipo_execucao:
-            query = query.filter(Execucao.tipo_execucao == tipo_execucao)
-
-        # Executar query
-        execucoes = query.all()
-
-        # Calcular estatísticas
-        total_execucoes = len(execucoes)
-        sucessos = sum(1 for e in execucoes if e.status_execucao ==
-                       StatusExecucao.CONCLUIDO.value)
-        falhas = sum(1 for e in execucoes if e.status_execucao ==
-                     StatusExecucao.FALHOU.value)
-        em_andamento = sum(1 for e in execucoes if e.esta_em_andamento)
-
-        # Estatísticas por operadora
+        # Execuções finalizadas por operadora e status: do consolidado diário
+        # quando completo, senão agregadas sobre a tabela de execuções
+        if consolidado.consolidado_disponivel():
+            tabela = ExecucaoStatsDaily.__table__
+            consulta_finalizadas = consolidado.consulta_consolidado(
+                Operadora.nome, tabela.c.status_execucao,
+                dia_inicio=dia_inicio, dia_fim=dia_fim,
+                operadora_id=operadora_id, tipo=tipo_execucao
+            ).join(Operadora, Operadora.id == tabela.c.operadora_id)
+        else:
+            consulta_finalizadas = (
+                select(Operadora.nome, Execucao.status_execucao, func.count(Execucao.id))
+                .join(Processo, Execucao.processo_id == Processo.id)
+                .join(Cliente, Processo.cliente_id == Cliente.id)
+                .join(Operadora, Cliente.operadora_id == Operadora.id)
+                .where(Execucao.status_execucao.notin_(consolidado.STATUS_EM_ANDAMENTO))
+                .group_by(Operadora.nome, Execucao.status_execucao)
+            )
+            if dia_inicio:
+                consulta_finalizadas = consulta_finalizadas.where(
+                    Execucao.data_inicio >= datetime.combine(dia_inicio, datetime.min.time()))
+            if dia_fim:
+                consulta_finalizadas = consulta_finalizadas.where(
+                    Execucao.data_inicio <= datetime.combine(dia_fim, datetime.max.time()))
+            if operadora_id:
+                consulta_finalizadas = consulta_finalizadas.where(Operadora.id == operadora_id)
+            if tipo_execucao:
+                consulta_finalizadas = consulta_finalizadas.where(Execucao.tipo_execucao == tipo_execucao)
+        finalizadas = db.session.execute(consulta_finalizadas).all()
+
+        # Execuções em andamento (fora do consolidado) por operadora
+        andamento = db.session.execute(
+            consolidado.contar_em_andamento(
+                Operadora.nome,
+                data_inicio=datetime.combine(dia_inicio, datetime.min.time()) if dia_inicio else None,
+                data_fim=datetime.combine(dia_fim, datetime.max.time()) if dia_fim else None,
+                tipo=tipo_execucao
+            )
+            .join(Processo, Execucao.processo_id == Processo.id)
+            .join(Cliente, Processo.cliente_id == Cliente.id)
+            .join(Operadora, Cliente.operadora_id == Operadora.id)
+            .where(Operadora.id == operadora_id if operadora_id else true())
+        ).all()
+
+        # Estatísticas gerais e por operadora
+        total_execucoes = sucessos = falhas = em_andamento = 0
         stats_por_operadora = {}
-        for execucao in execucoes:
-            operadora_nome = execucao.processo.cliente.operadora.nome
-            if operadora_nome not in stats_por_operadora:
-                stats_por_operadora[operadora_nome] = {
-                    'total': 0,
-                    'sucessos': 0,
-                    'falhas': 0
-                }
-
-            stats_por_operadora[operadora_nome]['total'] += 1
-            if execucao.status_execucao == StatusExecucao.CONCLUIDO.value:
-                stats_por_operadora[operadora_nome]['sucessos'] += 1
-            elif execucao.status_execucao == StatusExecucao.FALHOU.value:
-                stats_por_operadora[operadora_nome]['falhas'] += 1
+
+        def stats_da_operadora(nome):
+            return stats_por_operadora.setdefault(nome, {'total': 0, 'sucessos': 0, 'falhas': 0})
+
+        for operadora_nome, status, quantidade, *_ in finalizadas:
+            quantidade = int(quantidade)
+            stats = stats_da_operadora(operadora_nome)
+            stats['total'] += quantidade
+            total_execucoes += quantidade
+            if status == StatusExecucao.CONCLUIDO.value:
+                stats['sucessos'] += quantidade
+                sucessos += quantidade
+            elif status == StatusExecucao.FALHOU.value:
+                stats['falhas'] += quantidade
+                falhas += quantidade
+
+        for operadora_nome, quantidade in andamento:
+            stats_da_operadora(operadora_nome)['total'] += quantidade
+            total_execucoes += quantidade
+            em_andamento += quantidade
 
         return jsonify({
             'success': True,
@@ -0,0 +1,397 @@
+"""
+Índice de busca de clientes
+
+Mantém a tabela sombra `busca_clientes` com um documento normalizado por
+cliente (razão social, nome SAT, CNPJ só com dígitos e nome da operadora),
+sem acentos e em minúsculas. A busca por termo deixa de ser um
+`LIKE '%termo%'` sobre as tabelas principais:
+
+- PostgreSQL: tabela comum com índice GIN `gin_trgm_ops` (extensão pg_trgm),
+  ranking por `word_similarity`
+- SQLite: tabela virtual FTS5 com tokenizer trigram, ranking por `bm25`
+
+A tabela é atualizada por eventos do ORM no mesmo flush que grava o
+cliente ou a operadora. Em outros bancos, ou enquanto o índice não foi
+criado, a busca usa LIKE sobre as colunas originais.
+
+Uso nas listagens (processos, clientes e execuções):
+
+    query = query.filter(BuscaService.filtro_cliente(Processo.cliente_id, termo))
+    query = BuscaService.ordenar_por_relevancia(query, Cliente.id, termo, Cliente.razao_social)
+
+Para criar o índice e reindexar os clientes existentes: `python migrar_indice_busca.py`
+"""
+
+import logging
+import re
+import unicodedata
+from typing import Optional, Dict, Any, List, Iterable, Set
+
+from sqlalchemy import event, select, table, column, func, or_, and_, inspect, text, literal, literal_column
+from sqlalchemy.orm import Session
+
+from apps import db
+from apps.models import Cliente, Operadora
+from apps.models.perfis_carga import perfil_listagem_clientes
+
+logger = logging.getLogger(__name__)
+
+TABELA_BUSCA = 'busca_clientes'
+
+# Tamanho mínimo de token que usa o índice de trigramas
+TAMANHO_MINIMO_TRIGRAMA = 3
+
+# Lote de clientes por INSERT na reindexação
+TAMANHO_LOTE_REINDEXACAO = 1000
+
+busca_clientes = table(TABELA_BUSCA, column('cliente_id'), column('documento'))
+
+_RE_SEPARADORES = re.compile(r'[^a-z0-9]+')
+_RE_DOCUMENTO = re.compile(r'^[\d./\-\s]+$')
+
+
+# ============================================================================
+# NORMALIZAÇÃO
+# ============================================================================
+
+def normalizar_texto(valor: Optional[str]) -> str:
+    """Remove acentos, converte para minúsculas e reduz separadores a um espaço"""
+    if not valor:
+        return ''
+    sem_acentos = unicodedata.normalize('NFKD', str(valor))
+    sem_acentos = ''.join(c for c in sem_acentos if not unicodedata.combining(c))
+    return _RE_SEPARADORES.sub(' ', sem_acentos.lower()).strip()
+
+
+def normalizar_cnpj(valor: Optional[str]) -> str:
+    """Mantém apenas os dígitos do CNPJ/CPF"""
+    return ''.join(filter(str.isdigit, valor or ''))
+
+
+def tokens_busca(termo: Optional[str]) -> List[str]:
+    """
+    Converte o termo digitado em tokens normalizados
+
+    Um termo formado só por dígitos e pontuação de documento
+    (ex.: 12.345.678/0001-90) vira um único token com os dígitos.
+    """
+    if not termo or not termo.strip():
+        return []
+    if _RE_DOCUMENTO.match(termo) and len(normalizar_cnpj(termo)) >= TAMANHO_MINIMO_TRIGRAMA:
+        return [normalizar_cnpj(termo)]
+    return normalizar_texto(termo).split()
+
+
+def montar_documento(razao_social: Optional[str], nome_sat: Optional[str],
+                     cnpj: Optional[str], operadora_nome: Optional[str]) -> str:
+    """Monta o documento indexado de um cliente"""
+    partes = [
+        normalizar_texto(razao_social),
+        normalizar_texto(nome_sat),
+        normalizar_cnpj(cnpj),
+        normalizar_texto(operadora_nome)
+    ]
+    return ' '.join(parte for parte in partes if parte)
+
+
+# ============================================================================
+# ESTRUTURA
+# ============================================================================
+
+_disponibilidade: Dict[str, bool] = {}
+
+
+def indice_disponivel(engine=None) -> bool:
+    """Indica se o índice de busca existe no banco (resultado em cache por engine)"""
+    engine = engine or db.engine
+    chave = str(engine.url)
+    if chave not in _disponibilidade:
+        try:
+            _disponibilidade[chave] = (
+                engine.dialect.name in ('postgresql', 'sqlite')
+                and inspect(engine).has_table(TABELA_BUSCA)
+            )
+        except Exception as e:
+            logger.warning(f"Não foi possível verificar o índice de busca: {e}")
+            return False
+    return _disponibilidade[chave]
+
+
+def garantir_estrutura(engine=None) -> bool:
+    """
+    Cria a tabela e os índices de busca, se ainda não existirem
+
+    Se o índice está vazio e já existem clientes (tabela recém-criada em um
+    banco com dados), reindexa todos os clientes antes de liberar o uso do
+    índice pelas buscas.
+
+    Returns:
+        bool: True se o índice está disponível no banco
+    """
+    engine = engine or db.engine
+    dialeto = engine.dialect.name
+
+    try:
+        with engine.begin() as conexao:
+            if dialeto == 'postgresql':
+                conexao.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                conexao.execute(text(f"""
+                    CREATE TABLE IF NOT EXISTS {TABELA_BUSCA} (
+                        cliente_id UUID PRIMARY KEY REFERENCES clientes(id) ON DELETE CASCADE,
+                        documento TEXT NOT NULL DEFAULT ''
+                    )
+                """))
+                conexao.execute(text(f"""
+                    CREATE INDEX IF NOT EXISTS idx_{TABELA_BUSCA}_documento_trgm
+                    ON {TABELA_BUSCA} USING gin (documento gin_trgm_ops)
+                """))
+            elif dialeto == 'sqlite':
+                conexao.execute(text(f"""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_BUSCA}
+                    USING fts5(documento, cliente_id UNINDEXED, tokenize='trigram')
+                """))
+            else:
+                logger.info(f"Índice de busca não suportado no banco {dialeto}; usando LIKE")
+                return False
+    except Exception as e:
+        logger.warning(f"Não foi possível criar o índice de busca ({dialeto}): {e}")
+        return False
+    finally:
+        _disponibilidade.pop(str(engine.url), None)
+
+    if indice_vazio(engine):
+        try:
+            logger.info("Índice de busca vazio com clientes cadastrados; reindexando")
+            reindexar_todos(engine=engine)
+        except Exception as e:
+            logger.warning(f"Não foi possível reindexar os clientes; buscas usando LIKE: {e}")
+            _disponibilidade[str(engine.url)] = False
+            return False
+
+    return indice_disponivel(engine)
+
+
+def indice_vazio(engine=None) -> bool:
+    """Indica se o índice não tem documentos embora existam clientes"""
+    engine = engine or db.engine
+    with engine.connect() as conexao:
+        possui_clientes = conexao.execute(select(Cliente.id).limit(1)).first() is not None
+        if not possui_clientes:
+            return False
+        return conexao.execute(select(busca_clientes.c.cliente_id).limit(1)).first() is None
+
+
+# ============================================================================
+# SINCRONIZAÇÃO
+# ============================================================================
+
+def _documentos_clientes(conexao, cliente_ids: Iterable) -> List[Dict[str, Any]]:
+    """Lê os dados dos clientes e monta os documentos indexados"""
+    linhas = conexao.execute(
+        select(Cliente.id, Cliente.razao_social, Cliente.nome_sat, Cliente.cnpj, Operadora.nome)
+        .join(Operadora, Operadora.id == Cliente.operadora_id)
+        .where(Cliente.id.in_(list(cliente_ids)))
+    )
+    return [
+        {'cliente_id': str(cliente_id), 'documento': montar_documento(razao, nome_sat, cnpj, operadora)}
+        for cliente_id, razao, nome_sat, cnpj, operadora in linhas
+    ]
+
+
+def _remover(conexao, cliente_ids: Iterable):
+    ids = [str(cliente_id) for cliente_id in cliente_ids]
+    if ids:
+        conexao.execute(busca_clientes.delete().where(busca_clientes.c.cliente_id.in_(ids)))
+
+
+def indexar_clientes(conexao, cliente_ids: Iterable):
+    """Regrava os documentos dos clientes informados"""
+    ids = list(cliente_ids)
+    if not ids:
+        return
+    # delete + insert funciona igual em PostgreSQL e FTS5 (que não tem upsert)
+    _remover(conexao, ids)
+    documentos = _documentos_clientes(conexao, ids)
+    if documentos:
+        conexao.execute(busca_clientes.insert(), documentos)
+
+
+def _apos_flush(session: Session, flush_context):
+    """Atualiza o índice com os clientes e operadoras alterados no flush"""
+    if not indice_disponivel(session.get_bind()):
+        return
+
+    indexar: Set = set()
+    remover: Set = set()
+    operadoras: Set = set()
+
+    for objeto in session.new:
+        if isinstance(objeto, Cliente):
+            indexar.add(objeto.id)
+    for objeto in session.dirty:
+        if isinstance(objeto, Cliente) and session.is_modified(objeto, include_collections=False):
+            indexar.add(objeto.id)
+        elif isinstance(objeto, Operadora) and inspect(objeto).attrs.nome.history.has_changes():
+            operadoras.add(objeto.id)
+    for objeto in session.deleted:
+        if isinstance(objeto, Cliente):
+            remover.add(objeto.id)
+
+    if not (indexar or remover or operadoras):
+        return
+
+    conexao = session.connection()
+    if operadoras:
+        indexar.update(
+            cliente_id for cliente_id, in conexao.execute(
+                select(Cliente.id).where(Cliente.operadora_id.in_(list(operadoras))))
+        )
+    _remover(conexao, remover)
+    indexar_clientes(conexao, indexar - remover)
+
+
+_eventos_registrados = False
+
+
+def registrar_eventos_busca():
+    """Registra (uma única vez) a sincronização do índice nos flushes do ORM"""
+    global _eventos_registrados
+    if not _eventos_registrados:
+        event.listen(Session, 'after_flush', _apos_flush)
+        _eventos_registrados = True
+
+
+def reindexar_todos(tamanho_lote: int = TAMANHO_LOTE_REINDEXACAO, engine=None) -> int:
+    """
+    Reconstrói o índice de busca a partir das tabelas de clientes e operadoras
+
+    Returns:
+        int: Quantidade de clientes indexados
+    """
+    total = 0
+    with (engine or db.engine).begin() as conexao:
+        conexao.execute(busca_clientes.delete())
+        ids = [cliente_id for cliente_id, in conexao.execute(select(Cliente.id).order_by(Cliente.id))]
+        for inicio in range(0, len(ids), tamanho_lote):
+            lote = ids[inicio:inicio + tamanho_lote]
+            documentos = _documentos_clientes(conexao, lote)
+            if documentos:
+                conexao.execute(busca_clientes.insert(), documentos)
+            total += len(documentos)
+    logger.info(f"Índice de busca reconstruído: {total} clientes")
+    return total
+
+
+# ============================================================================
+# CONSULTA
+# ============================================================================
+
+class BuscaService:
+    """API de busca compartilhada pelas listagens"""
+
+    @staticmethod
+    def _condicao_indice(tokens: List[str], dialeto: str):
+        """Condição sobre a tabela de busca para todos os tokens (AND)"""
+        condicoes = []
+        frase = []
+        for token in tokens:
+            if dialeto != 'sqlite':
+                condicoes.append(busca_clientes.c.documento.like(f'%{token}%'))
+            elif len(token) >= TAMANHO_MINIMO_TRIGRAMA:
+                frase.append('"' + token + '"')
+            else:
+                # instr em vez de LIKE: LIKE curto junto com MATCH na tabela
+                # trigram derruba o processo em versões do SQLite anteriores à 3.41
+                condicoes.append(func.instr(busca_clientes.c.documento, token) > 0)
+        if frase:
+            condicoes.append(literal_column(TABELA_BUSCA).op('MATCH')(' AND '.join(frase)))
+        return and_(*condicoes)
+
+    @staticmethod
+    def _filtro_like(coluna_cliente_id, tokens: List[str], termo: str):
+        """Busca sem índice: LIKE nas colunas originais"""
+        padrao = f'%{termo.strip()}%'
+        condicoes = [
+            Cliente.razao_social.ilike(padrao),
+            Cliente.nome_sat.ilike(padrao),
+            Cliente.operadora.has(Operadora.nome.ilike(padrao))
+        ]
+        digitos = normalizar_cnpj(termo)
+        if digitos and len(tokens) == 1 and tokens[0] == digitos:
+            condicoes.append(Cliente.cnpj.like(f'%{digitos}%'))
+        else:
+            condicoes.append(Cliente.cnpj.like(padrao))
+        return coluna_cliente_id.in_(select(Cliente.id).where(or_(*condicoes)))
+
+    @staticmethod
+    def subconsulta_clientes(termo: str):
+        """
+        SELECT dos IDs de clientes que atendem ao termo
+
+        Returns:
+            Select com a coluna cliente_id, ou None se o índice não está disponível
+        """
+        tokens = tokens_busca(termo)
+        if not tokens or not indice_disponivel():
+            return None
+        condicao = BuscaService._condicao_indice(tokens, db.engine.dialect.name)
+        return select(busca_clientes.c.cliente_id).where(condicao)
+
+    @staticmethod
+    def filtro_cliente(coluna_cliente_id, termo: str):
+        """
+        Condição para filtrar uma listagem pela coluna de cliente
+
+        Args:
+            coluna_cliente_id: Coluna com o ID do cliente (ex.: Processo.cliente_id)
+            termo: Texto digitado pelo usuário (nome, CNPJ ou operadora)
+        """
+        tokens = tokens_busca(termo)
+        if not tokens:
+            return literal(True)
+
+        subconsulta = BuscaService.subconsulta_clientes(termo)
+        if subconsulta is None:
+            return BuscaService._filtro_like(coluna_cliente_id, tokens, termo)
+        return coluna_cliente_id.in_(subconsulta)
+
+    @staticmethod
+    def ordenar_por_relevancia(query, coluna_cliente_id, termo: str, *desempate):
+        """
+        Ordena a query pela relevância do cliente para o termo
+
+        Args:
+            query: Query da listagem
+            coluna_cliente_id: Coluna com o ID do cliente
+            termo: Texto digitado pelo usuário
+            desempate: Ordenação usada entre resultados de mesma relevância
+                (e como ordenação única quando não há ranking)
+        """
+        tokens = tokens_busca(termo)
+        if not tokens or not indice_disponivel():
+            return query.order_by(*desempate)
+
+        dialeto = db.engine.dialect.name
+        if dialeto == 'postgresql':
+            relevancia = func.word_similarity(' '.join(tokens), busca_clientes.c.documento)
+        elif any(len(token) >= TAMANHO_MINIMO_TRIGRAMA for token in tokens):
+            # bm25 retorna valores menores para os melhores resultados
+            relevancia = -func.bm25(literal_column(TABELA_BUSCA))
+        else:
+            return query.order_by(*desempate)
+
+        ranking = (
+            select(busca_clientes.c.cliente_id, relevancia.label('relevancia'))
+            .where(BuscaService._condicao_indice(tokens, dialeto))
+            .subquery('ranking_busca')
+        )
+        query = query.outerjoin(ranking, ranking.c.cliente_id == coluna_cliente_id)
+        return query.order_by(ranking.c.relevancia.desc(), *desempate)
+
+    @staticmethod
+    def buscar_clientes(termo: str, limite: int = 20) -> List[Cliente]:
+        """Retorna os clientes mais relevantes para o termo"""
+        if not tokens_busca(termo):
+            return []
+        query = Cliente.query.options(*perfil_listagem_clientes()).filter(BuscaService.filtro_cliente(Cliente.id, termo))
+        return BuscaService.ordenar_por_relevancia(query, Cliente.id, termo, Cliente.razao_social).limit(limite).all()
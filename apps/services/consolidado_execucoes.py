@@ -0,0 +1,531 @@
+"""
+Consolidado diário das execuções (tabela execucao_stats_daily)
+
+As telas de estatísticas e relatórios leem o consolidado (algumas centenas
+de linhas por período) em vez de varrer a tabela de execuções. O
+consolidado é mantido de forma incremental: a cada flush do ORM, as
+execuções inseridas, alteradas ou removidas têm a contribuição anterior
+subtraída e a nova somada (upsert por dia × operadora × tipo × status), na
+mesma transação da execução. Execuções em andamento não entram no
+consolidado; quem precisa delas conta as poucas linhas vivas com
+contar_em_andamento.
+
+Alterações feitas fora do ORM (update/delete em lote, cascata no banco) e a
+troca de operadora de um cliente não são refletidas; o mínimo e o máximo da
+duração só crescem. reconstruir_consolidado (migrar_execucao_stats_daily.py)
+recalcula o consolidado de um período a partir das execuções.
+
+O consolidado só é lido depois de completo (consolidado_disponivel): em um
+banco que já tinha execuções, a tabela criada pelo create_all começa vazia e
+as estatísticas continuam calculadas sobre a tabela de execuções até a
+reconstrução de todo o histórico gravar o marcador em
+execucao_stats_daily_controle.
+"""
+
+import logging
+import time as relogio
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import case, event, func, inspect, literal, select, delete, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session, attributes
+
+from apps import db
+from apps.models import Cliente, Execucao, Processo
+from apps.models.execucao import StatusExecucao
+from apps.models.execucao_stats_daily import (
+    ExecucaoStatsDaily, ExecucaoStatsDailyControle, COLUNAS_HISTOGRAMA, LIMITES_HISTOGRAMA, faixa_histograma
+)
+
+logger = logging.getLogger(__name__)
+
+# Status que não entram no consolidado (a execução ainda vai mudar)
+STATUS_EM_ANDAMENTO = (StatusExecucao.EXECUTANDO.value, StatusExecucao.TENTANDO_NOVAMENTE.value)
+
+# Colunas da chave e atributos da execução que definem a sua contribuição
+COLUNAS_CHAVE = ('dia', 'operadora_id', 'tipo_execucao', 'status_execucao')
+ATRIBUTOS_CONTRIBUICAO = ('status_execucao', 'tipo_execucao', 'data_inicio', 'data_fim', 'processo_id')
+
+COLUNAS_CONTADORES = ('quantidade', 'quantidade_com_duracao', 'soma_duracao', *COLUNAS_HISTOGRAMA)
+
+# Execuções lidas do cursor por vez na reconstrução
+TAMANHO_LOTE_RECONSTRUCAO = 5000
+
+# Marcador gravado quando o consolidado cobre todo o histórico
+CHAVE_HISTORICO_COMPLETO = 'historico_completo'
+
+# Intervalo (segundos) entre verificações do marcador enquanto ausente
+INTERVALO_VERIFICACAO_MARCADOR = 60
+
+
+def duracao_execucao(inicio: Optional[datetime], fim: Optional[datetime]) -> Optional[float]:
+    """Duração em segundos (None sem data_fim)"""
+    if not inicio or not fim:
+        return None
+    if (inicio.tzinfo is None) != (fim.tzinfo is None):
+        inicio, fim = inicio.replace(tzinfo=None), fim.replace(tzinfo=None)
+    return max((fim - inicio).total_seconds(), 0.0)
+
+
+class Acumulado:
+    """Contadores de uma linha do consolidado (ou a variação a aplicar nela)"""
+
+    def __init__(self):
+        self.quantidade = 0
+        self.quantidade_com_duracao = 0
+        self.soma_duracao = 0.0
+        self.min_duracao: Optional[float] = None
+        self.max_duracao: Optional[float] = None
+        self.faixas = [0] * len(COLUNAS_HISTOGRAMA)
+
+    def somar(self, duracao: Optional[float], sinal: int = 1):
+        """Soma (sinal=1) ou subtrai (sinal=-1) uma execução"""
+        self.quantidade += sinal
+        if duracao is None:
+            return
+        self.quantidade_com_duracao += sinal
+        self.soma_duracao += sinal * duracao
+        self.faixas[faixa_histograma(duracao)] += sinal
+        if sinal > 0:
+            self.min_duracao = duracao if self.min_duracao is None else min(self.min_duracao, duracao)
+            self.max_duracao = duracao if self.max_duracao is None else max(self.max_duracao, duracao)
+
+    @property
+    def vazio(self) -> bool:
+        return not self.quantidade and not self.quantidade_com_duracao and self.min_duracao is None
+
+    def valores(self, chave: Tuple) -> Dict[str, Any]:
+        """Parâmetros do upsert da linha"""
+        valores = dict(zip(COLUNAS_CHAVE, chave))
+        valores.update(
+            quantidade=self.quantidade,
+            quantidade_com_duracao=self.quantidade_com_duracao,
+            soma_duracao=self.soma_duracao,
+            min_duracao=self.min_duracao,
+            max_duracao=self.max_duracao
+        )
+        valores.update(zip(COLUNAS_HISTOGRAMA, self.faixas))
+        return valores
+
+
+# ============================================================================
+# GRAVAÇÃO
+# ============================================================================
+
+def _menor(atual, novo):
+    return case((novo.is_(None), atual), (atual.is_(None), novo), (novo < atual, novo), else_=atual)
+
+
+def _maior(atual, novo):
+    return case((novo.is_(None), atual), (atual.is_(None), novo), (novo > atual, novo), else_=atual)
+
+
+def _incrementos(tabela, novos) -> Dict[str, Any]:
+    """Valores da linha existente somados aos da linha nova (excluded/inserted)"""
+    valores = {coluna: tabela.c[coluna] + novos[coluna] for coluna in COLUNAS_CONTADORES}
+    valores['min_duracao'] = _menor(tabela.c.min_duracao, novos['min_duracao'])
+    valores['max_duracao'] = _maior(tabela.c.max_duracao, novos['max_duracao'])
+    return valores
+
+
+def gravar_acumulados(conexao, acumulados: Dict[Tuple, Acumulado]) -> int:
+    """
+    Soma os acumulados às linhas do consolidado (upsert por chave)
+
+    Returns:
+        int: Quantidade de linhas gravadas
+    """
+    linhas = [acumulado.valores(chave) for chave, acumulado in acumulados.items() if not acumulado.vazio]
+    if not linhas:
+        return 0
+
+    tabela = ExecucaoStatsDaily.__table__
+    dialeto = conexao.dialect.name
+
+    if dialeto in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialeto == 'postgresql' else sqlite.insert
+        comando = insert(tabela)
+        conexao.execute(
+            comando.on_conflict_do_update(
+                index_elements=list(COLUNAS_CHAVE),
+                set_=_incrementos(tabela, comando.excluded)
+            ),
+            linhas
+        )
+    elif dialeto in ('mysql', 'mariadb'):
+        comando = mysql.insert(tabela)
+        conexao.execute(comando.on_duplicate_key_update(_incrementos(tabela, comando.inserted)), linhas)
+    else:
+        for linha in linhas:
+            chave = [tabela.c[coluna] == linha[coluna] for coluna in COLUNAS_CHAVE]
+            novos = {coluna: literal(linha[coluna]) for coluna in (*COLUNAS_CONTADORES, 'min_duracao', 'max_duracao')}
+            if not conexao.execute(update(tabela).where(*chave).values(_incrementos(tabela, novos))).rowcount:
+                conexao.execute(tabela.insert(), linha)
+
+    return len(linhas)
+
+
+# ============================================================================
+# MANUTENÇÃO INCREMENTAL PELOS EVENTOS DA SESSÃO
+# ============================================================================
+
+def _valor_anterior(execucao, atributo: str):
+    historico = attributes.get_history(execucao, atributo)
+    if historico.deleted:
+        return historico.deleted[0]
+    if historico.unchanged:
+        return historico.unchanged[0]
+    return None
+
+
+def _contribuicao(valores: Dict[str, Any]) -> Optional[Tuple]:
+    """(dia, processo_id, tipo, status, duração) de uma execução finalizada"""
+    status = valores['status_execucao']
+    inicio = valores['data_inicio']
+    if not status or status in STATUS_EM_ANDAMENTO or not inicio or not valores['processo_id']:
+        return None
+    return (
+        inicio.date(), valores['processo_id'], valores['tipo_execucao'], status,
+        duracao_execucao(inicio, valores['data_fim'])
+    )
+
+
+def _variacoes_do_flush(session) -> List[Tuple[Tuple, int]]:
+    """Contribuições a subtrair (-1) e a somar (+1) pelas execuções do flush"""
+    variacoes = []
+    for execucao in session.new:
+        if isinstance(execucao, Execucao):
+            variacoes.append((_contribuicao({a: getattr(execucao, a) for a in ATRIBUTOS_CONTRIBUICAO}), 1))
+
+    for execucao in session.dirty:
+        if not isinstance(execucao, Execucao):
+            continue
+        estado = inspect(execucao)
+        if not any(estado.attrs[a].history.has_changes() for a in ATRIBUTOS_CONTRIBUICAO):
+            continue
+        variacoes.append((_contribuicao({a: _valor_anterior(execucao, a) for a in ATRIBUTOS_CONTRIBUICAO}), -1))
+        variacoes.append((_contribuicao({a: getattr(execucao, a) for a in ATRIBUTOS_CONTRIBUICAO}), 1))
+
+    for execucao in session.deleted:
+        if isinstance(execucao, Execucao):
+            variacoes.append((_contribuicao({a: _valor_anterior(execucao, a) for a in ATRIBUTOS_CONTRIBUICAO}), -1))
+
+    return [(contribuicao, sinal) for contribuicao, sinal in variacoes if contribuicao]
+
+
+def _operadoras_dos_processos(conexao, processos: Iterable) -> Dict[Any, Any]:
+    return dict(conexao.execute(
+        select(Processo.id, Cliente.operadora_id)
+        .join(Cliente, Processo.cliente_id == Cliente.id)
+        .where(Processo.id.in_(list(processos)))
+    ).all())
+
+
+def _apos_flush(session, contexto):
+    variacoes = _variacoes_do_flush(session)
+    if not variacoes:
+        return
+
+    conexao = session.connection()
+    operadoras = _operadoras_dos_processos(conexao, {processo_id for (_, processo_id, *_), _ in variacoes})
+
+    acumulados: Dict[Tuple, Acumulado] = {}
+    for (dia, processo_id, tipo, status, duracao), sinal in variacoes:
+        operadora_id = operadoras.get(processo_id)
+        if operadora_id is None:
+            # Processo removido no mesmo flush: a reconstrução corrige o período
+            logger.debug(f"Execução do processo {processo_id} sem operadora; consolidado não atualizado")
+            continue
+        chave = (dia, operadora_id, tipo, status)
+        acumulados.setdefault(chave, Acumulado()).somar(duracao, sinal)
+
+    gravar_acumulados(conexao, acumulados)
+
+
+def _carregar_valor_anterior(execucao, valor, anterior, iniciador):
+    pass
+
+
+_eventos_registrados = False
+
+
+def registrar_eventos_consolidado_execucoes():
+    """Registra (uma única vez) a atualização do consolidado nos flushes do ORM"""
+    global _eventos_registrados
+    if not _eventos_registrados:
+        event.listen(Session, 'after_flush', _apos_flush)
+        # active_history carrega o valor anterior mesmo com o atributo expirado
+        # (após um commit), para subtrair a contribuição antiga da execução
+        for atributo in ATRIBUTOS_CONTRIBUICAO:
+            event.listen(getattr(Execucao, atributo), 'set', _carregar_valor_anterior, active_history=True)
+        _eventos_registrados = True
+
+
+# ============================================================================
+# DISPONIBILIDADE
+# ============================================================================
+
+# Por engine: True (definitivo) ou o instante da última verificação sem marcador
+_disponibilidade: Dict[str, Any] = {}
+
+
+def consolidado_disponivel(engine=None) -> bool:
+    """
+    Indica se o consolidado cobre todo o histórico e pode ser lido
+
+    O resultado positivo fica em cache; enquanto o marcador não existe, o
+    banco é consultado novamente a cada INTERVALO_VERIFICACAO_MARCADOR segundos.
+    """
+    engine = engine or db.engine
+    chave = str(engine.url)
+    estado = _disponibilidade.get(chave)
+    if estado is True:
+        return True
+    if estado is not None and relogio.monotonic() - estado < INTERVALO_VERIFICACAO_MARCADOR:
+        return False
+
+    try:
+        with engine.connect() as conexao:
+            marcado = conexao.execute(
+                select(ExecucaoStatsDailyControle.chave)
+                .where(ExecucaoStatsDailyControle.chave == CHAVE_HISTORICO_COMPLETO)
+            ).first() is not None
+    except Exception as e:
+        logger.warning(f"Não foi possível verificar o consolidado das execuções: {e}")
+        marcado = False
+
+    _disponibilidade[chave] = True if marcado else relogio.monotonic()
+    return marcado
+
+
+def _marcar_completo(conexao):
+    tabela = ExecucaoStatsDailyControle.__table__
+    conexao.execute(delete(tabela).where(tabela.c.chave == CHAVE_HISTORICO_COMPLETO))
+    conexao.execute(tabela.insert().values(chave=CHAVE_HISTORICO_COMPLETO, concluido_em=datetime.now()))
+
+
+def garantir_consolidado(engine=None) -> bool:
+    """
+    Verifica na inicialização se o consolidado pode ser usado
+
+    Sem execuções finalizadas o consolidado vazio já está completo e o
+    marcador é gravado; com histórico, as estatísticas usam a tabela de
+    execuções até migrar_execucao_stats_daily.py reconstruir o consolidado.
+
+    Returns:
+        bool: True se o consolidado está disponível
+    """
+    engine = engine or db.engine
+    if consolidado_disponivel(engine):
+        return True
+
+    with engine.begin() as conexao:
+        possui_historico = conexao.execute(
+            select(Execucao.id).where(Execucao.status_execucao.notin_(STATUS_EM_ANDAMENTO)).limit(1)
+        ).first() is not None
+        if not possui_historico:
+            _marcar_completo(conexao)
+
+    _disponibilidade.pop(str(engine.url), None)
+    if possui_historico:
+        logger.warning(
+            "Consolidado das execuções ainda não construído; estatísticas calculadas sobre a tabela "
+            "de execuções até a execução de migrar_execucao_stats_daily.py"
+        )
+        return False
+    return consolidado_disponivel(engine)
+
+
+# ============================================================================
+# RECONSTRUÇÃO
+# ============================================================================
+
+def reconstruir_consolidado(desde: Optional[date] = None, ate: Optional[date] = None,
+                            tamanho_lote: int = TAMANHO_LOTE_RECONSTRUCAO) -> int:
+    """
+    Recalcula o consolidado do período a partir das execuções
+
+    Apaga as linhas dos dias do período e soma novamente as execuções
+    finalizadas, lidas com cursor no servidor, em uma única transação. A
+    reconstrução de todo o histórico (sem desde/ate) grava o marcador que
+    libera a leitura do consolidado.
+
+    Args:
+        desde: Primeiro dia (inclusive); None para desde o início
+        ate: Último dia (inclusive); None para até hoje
+
+    Returns:
+        int: Quantidade de execuções consolidadas
+    """
+    tabela = ExecucaoStatsDaily.__table__
+    consulta = (
+        select(Execucao.status_execucao, Execucao.tipo_execucao, Execucao.data_inicio,
+               Execucao.data_fim, Cliente.operadora_id)
+        .join(Processo, Execucao.processo_id == Processo.id)
+        .join(Cliente, Processo.cliente_id == Cliente.id)
+        .where(Execucao.status_execucao.notin_(STATUS_EM_ANDAMENTO))
+    )
+    remocao = delete(tabela)
+    if desde:
+        consulta = consulta.where(Execucao.data_inicio >= datetime.combine(desde, time.min))
+        remocao = remocao.where(tabela.c.dia >= desde)
+    if ate:
+        consulta = consulta.where(Execucao.data_inicio < datetime.combine(ate + timedelta(days=1), time.min))
+        remocao = remocao.where(tabela.c.dia <= ate)
+
+    total = 0
+    acumulados: Dict[Tuple, Acumulado] = {}
+    with db.engine.begin() as conexao:
+        conexao.execute(remocao)
+        for status, tipo, inicio, fim, operadora_id in conexao.execution_options(yield_per=tamanho_lote).execute(consulta):
+            if not inicio:
+                continue
+            chave = (inicio.date(), operadora_id, tipo, status)
+            acumulados.setdefault(chave, Acumulado()).somar(duracao_execucao(inicio, fim))
+            total += 1
+        gravar_acumulados(conexao, acumulados)
+        if desde is None and ate is None:
+            _marcar_completo(conexao)
+
+    _disponibilidade.pop(str(db.engine.url), None)
+
+    logger.info(f"Consolidado reconstruído: {total} execuções em {len(acumulados)} linhas")
+    return total
+
+
+# ============================================================================
+# LEITURA
+# ============================================================================
+
+def consulta_consolidado(*agrupamento, dia_inicio: Optional[date] = None, dia_fim: Optional[date] = None,
+                         operadora_id=None, tipo: Optional[str] = None, status: Optional[str] = None):
+    """
+    Consulta agregada do consolidado
+
+    Args:
+        agrupamento: Colunas de ExecucaoStatsDaily (ou de tabelas unidas) do GROUP BY
+        dia_inicio, dia_fim: Intervalo de dias (inclusive)
+
+    Returns:
+        Select com as colunas do agrupamento seguidas de quantidade,
+        quantidade_com_duracao, soma_duracao, min_duracao, max_duracao e as
+        faixas do histograma
+    """
+    tabela = ExecucaoStatsDaily.__table__
+    consulta = select(
+        *agrupamento,
+        *[func.coalesce(func.sum(tabela.c[coluna]), 0).label(coluna)
+          for coluna in ('quantidade', 'quantidade_com_duracao', 'soma_duracao')],
+        func.min(tabela.c.min_duracao).label('min_duracao'),
+        func.max(tabela.c.max_duracao).label('max_duracao'),
+        *[func.coalesce(func.sum(tabela.c[coluna]), 0).label(coluna) for coluna in COLUNAS_HISTOGRAMA]
+    ).select_from(tabela)
+
+    if dia_inicio:
+        consulta = consulta.where(tabela.c.dia >= dia_inicio)
+    if dia_fim:
+        consulta = consulta.where(tabela.c.dia <= dia_fim)
+    if operadora_id:
+        consulta = consulta.where(tabela.c.operadora_id == operadora_id)
+    if tipo:
+        consulta = consulta.where(tabela.c.tipo_execucao == tipo)
+    if status:
+        consulta = consulta.where(tabela.c.status_execucao == status)
+    if agrupamento:
+        consulta = consulta.group_by(*agrupamento)
+    return consulta
+
+
+def acumulado_da_linha(linha) -> Acumulado:
+    """Converte uma linha de consulta_consolidado em Acumulado"""
+    acumulado = Acumulado()
+    acumulado.quantidade = int(linha.quantidade)
+    acumulado.quantidade_com_duracao = int(linha.quantidade_com_duracao)
+    acumulado.soma_duracao = float(linha.soma_duracao)
+    acumulado.min_duracao = linha.min_duracao
+    acumulado.max_duracao = linha.max_duracao
+    acumulado.faixas = [int(linha._mapping[coluna]) for coluna in COLUNAS_HISTOGRAMA]
+    return acumulado
+
+
+def somar_acumulados(acumulados: Iterable[Acumulado]) -> Acumulado:
+    """Junta vários acumulados em um"""
+    total = Acumulado()
+    for acumulado in acumulados:
+        total.quantidade += acumulado.quantidade
+        total.quantidade_com_duracao += acumulado.quantidade_com_duracao
+        total.soma_duracao += acumulado.soma_duracao
+        total.faixas = [a + b for a, b in zip(total.faixas, acumulado.faixas)]
+        if acumulado.min_duracao is not None:
+            total.min_duracao = acumulado.min_duracao if total.min_duracao is None else min(total.min_duracao, acumulado.min_duracao)
+        if acumulado.max_duracao is not None:
+            total.max_duracao = acumulado.max_duracao if total.max_duracao is None else max(total.max_duracao, acumulado.max_duracao)
+    return total
+
+
+def duracao_media(acumulado: Acumulado) -> float:
+    if not acumulado.quantidade_com_duracao:
+        return 0.0
+    return acumulado.soma_duracao / acumulado.quantidade_com_duracao
+
+
+def percentis_histograma(acumulado: Acumulado, percentis: Sequence[float]) -> Dict[float, float]:
+    """
+    Percentis aproximados da duração a partir do histograma
+
+    Localiza a faixa do percentil (posição p * (n - 1), como percentile_cont)
+    e interpola linearmente dentro dela; os limites da primeira e da última
+    faixa são o mínimo e o máximo registrados.
+    """
+    quantidade = sum(acumulado.faixas)
+    if quantidade <= 0:
+        return {percentil: 0.0 for percentil in percentis}
+
+    minimo = acumulado.min_duracao if acumulado.min_duracao is not None else 0.0
+    maximo = acumulado.max_duracao if acumulado.max_duracao is not None else float(LIMITES_HISTOGRAMA[-1])
+    limites = (0.0, *LIMITES_HISTOGRAMA, max(maximo, LIMITES_HISTOGRAMA[-1]))
+
+    resultado = {}
+    for percentil in percentis:
+        posicao = percentil * (quantidade - 1)
+        anteriores = 0
+        valor = maximo
+        for indice, na_faixa in enumerate(acumulado.faixas):
+            if na_faixa > 0 and posicao < anteriores + na_faixa:
+                inferior = max(limites[indice], minimo)
+                superior = min(limites[indice + 1], maximo)
+                valor = inferior + (superior - inferior) * (posicao - anteriores + 0.5) / na_faixa
+                break
+            anteriores += na_faixa
+        resultado[percentil] = min(max(valor, minimo), maximo)
+    return resultado
+
+
+def contar_em_andamento(*agrupamento, data_inicio: Optional[datetime] = None, data_fim: Optional[datetime] = None,
+                        operadora_id=None, tipo: Optional[str] = None, status: Optional[str] = None):
+    """
+    Consulta das execuções em andamento (fora do consolidado) com a
+    quantidade por agrupamento; usa o índice por status e data de início
+
+    Args:
+        status: Um dos STATUS_EM_ANDAMENTO; None para ambos
+    """
+    consulta = select(*agrupamento, func.count(Execucao.id).label('quantidade')).select_from(Execucao)
+    if status:
+        consulta = consulta.where(Execucao.status_execucao == status)
+    else:
+        consulta = consulta.where(Execucao.status_execucao.in_(STATUS_EM_ANDAMENTO))
+    if data_inicio:
+        consulta = consulta.where(Execucao.data_inicio >= data_inicio)
+    if data_fim:
+        consulta = consulta.where(Execucao.data_inicio <= data_fim)
+    if tipo:
+        consulta = consulta.where(Execucao.tipo_execucao == tipo)
+    if operadora_id:
+        consulta = consulta.where(
+            Execucao.processo.has(Processo.cliente.has(Cliente.operadora_id == operadora_id))
+        )
+    if agrupamento:
+        consulta = consulta.group_by(*agrupamento)
+    return consulta
@@ -0,0 +1,197 @@
+"""
+Estatísticas dos cards das listagens
+
+Cada página calcula os seus cards em uma única consulta agregada
+(SUM(CASE ...) ou GROUP BY) e o resultado fica em cache por alguns
+segundos. O cache de uma estatística é invalidado quando uma transação que
+alterou uma das tabelas de que ela depende é confirmada: as tabelas
+alteradas são anotadas na sessão nos flushes do ORM e nos comandos em lote
+(update/insert via session.execute) e descartadas no after_commit.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Set, Tuple
+
+from sqlalchemy import case, event, func, select
+from sqlalchemy.orm import Session
+
+from apps import db
+from apps.models import Cliente, Operadora, Processo
+
+# Validade (segundos) das estatísticas em cache
+TTL_ESTATISTICAS = 60
+
+# Chave em Session.info com as tabelas alteradas na transação
+CHAVE_TABELAS_ALTERADAS = 'estatisticas_tabelas_alteradas'
+
+# Status que encerram o processo (não contam como ativos)
+STATUS_PROCESSO_ENCERRADOS = ('CONCLUIDO', 'CANCELADO', 'REJEITADO')
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+_cache: Dict[str, Tuple[float, Any]] = {}
+_dependencias: Dict[str, Set[str]] = {}
+_cache_lock = threading.Lock()
+
+
+def em_cache(chave: str, tabelas: Iterable[str], calcular: Callable[[], Any], ttl: int = TTL_ESTATISTICAS) -> Any:
+    """
+    Devolve o valor em cache ou o calcula
+
+    Args:
+        chave: Nome da estatística
+        tabelas: Tabelas cuja alteração invalida o valor
+        calcular: Função que calcula o valor
+        ttl: Validade em segundos
+    """
+    agora = time.time()
+    with _cache_lock:
+        em_memoria = _cache.get(chave)
+        if em_memoria and agora - em_memoria[0] < ttl:
+            return em_memoria[1]
+
+    valor = calcular()
+
+    with _cache_lock:
+        # Chaves por filtro: descartar entradas vencidas para o cache não crescer indefinidamente
+        if len(_cache) > 500:
+            for item in [k for k, (instante, _) in _cache.items() if agora - instante >= ttl]:
+                _cache.pop(item, None)
+                _dependencias.pop(item, None)
+        _cache[chave] = (agora, valor)
+        _dependencias[chave] = set(tabelas)
+    return valor
+
+
+def invalidar(*tabelas: str):
+    """Descarta as estatísticas que dependem das tabelas (todas, se nenhuma for informada)"""
+    with _cache_lock:
+        if not tabelas:
+            _cache.clear()
+            _dependencias.clear()
+            return
+        for chave, dependencias in list(_dependencias.items()):
+            if dependencias.intersection(tabelas):
+                _cache.pop(chave, None)
+                _dependencias.pop(chave, None)
+
+
+# ============================================================================
+# INVALIDAÇÃO PELOS EVENTOS DA SESSÃO
+# ============================================================================
+
+def _tabelas_alteradas(session) -> Set[str]:
+    return session.info.setdefault(CHAVE_TABELAS_ALTERADAS, set())
+
+
+def _apos_flush(session, contexto):
+    alteradas = _tabelas_alteradas(session)
+    for objeto in (*session.new, *session.dirty, *session.deleted):
+        tabela = getattr(objeto, '__tablename__', None)
+        if tabela:
+            alteradas.add(tabela)
+
+
+def _ao_executar(estado):
+    # Comandos em lote (update/insert/delete) não passam pelo flush
+    if estado.is_insert or estado.is_update or estado.is_delete:
+        tabela = getattr(estado.statement, 'table', None)
+        if tabela is not None and getattr(tabela, 'name', None):
+            _tabelas_alteradas(estado.session).add(tabela.name)
+
+
+def _apos_commit(session):
+    alteradas = session.info.pop(CHAVE_TABELAS_ALTERADAS, None)
+    if alteradas:
+        invalidar(*alteradas)
+
+
+def _apos_rollback(session):
+    session.info.pop(CHAVE_TABELAS_ALTERADAS, None)
+
+
+_eventos_registrados = False
+
+
+def registrar_eventos_estatisticas():
+    """Registra (uma única vez) a invalidação do cache nos commits do ORM"""
+    global _eventos_registrados
+    if not _eventos_registrados:
+        event.listen(Session, 'after_flush', _apos_flush)
+        event.listen(Session, 'do_orm_execute', _ao_executar)
+        event.listen(Session, 'after_commit', _apos_commit)
+        event.listen(Session, 'after_rollback', _apos_rollback)
+        _eventos_registrados = True
+
+
+# ============================================================================
+# ESTATÍSTICAS
+# ============================================================================
+
+def _soma_se(condicao):
+    return func.coalesce(func.sum(case((condicao, 1), else_=0)), 0)
+
+
+def _calcular_clientes() -> Dict[str, int]:
+    linha = db.session.execute(
+        select(
+            func.count(Cliente.id).label('total_clientes'),
+            _soma_se(Cliente.status_ativo == True).label('clientes_ativos'),
+            _soma_se((Cliente.status_ativo == True) & (Operadora.possui_rpa == True)).label('clientes_com_rpa'),
+            _soma_se((Cliente.status_ativo == True) & (Operadora.possui_rpa == False)).label('clientes_sem_rpa')
+        ).select_from(Cliente).outerjoin(Operadora, Cliente.operadora_id == Operadora.id)
+    ).one()
+    return {chave: int(valor) for chave, valor in linha._mapping.items()}
+
+
+def estatisticas_clientes() -> Dict[str, int]:
+    """Cards da listagem de clientes: total, ativos, ativos com e sem RPA"""
+    return em_cache('clientes', (Cliente.__tablename__, Operadora.__tablename__), _calcular_clientes)
+
+
+def _calcular_operadoras() -> Dict[str, int]:
+    linha = db.session.execute(
+        select(
+            func.count(Operadora.id).label('total_operadoras'),
+            _soma_se(Operadora.status_ativo == True).label('operadoras_ativas'),
+            _soma_se(Operadora.possui_rpa == True).label('operadoras_com_rpa'),
+            _soma_se(Operadora.possui_rpa == False).label('operadoras_sem_rpa')
+        )
+    ).one()
+    return {chave: int(valor) for chave, valor in linha._mapping.items()}
+
+
+def estatisticas_operadoras() -> Dict[str, int]:
+    """Cards da listagem de operadoras: total, ativas, com e sem RPA"""
+    return em_cache('operadoras', (Operadora.__tablename__,), _calcular_operadoras)
+
+
+def _calcular_processos() -> Dict[str, Any]:
+    por_status = {
+        status: quantidade
+        for status, quantidade in db.session.execute(
+            select(Processo.status_processo, func.count(Processo.id)).group_by(Processo.status_processo)
+        )
+    }
+    return {
+        'total_processos': sum(por_status.values()),
+        'processos_ativos': sum(
+            quantidade for status, quantidade in por_status.items()
+            if status not in STATUS_PROCESSO_ENCERRADOS
+        ),
+        'aguardando_aprovacao': por_status.get('PENDENTE_APROVACAO', 0),
+        'aprovados': por_status.get('APROVADO', 0),
+        'por_status': por_status
+    }
+
+
+def estatisticas_processos() -> Dict[str, Any]:
+    """
+    Cards do dashboard de processos: total, ativos, aguardando aprovação,
+    aprovados e a quantidade por status (uma consulta com GROUP BY)
+    """
+    return em_cache('processos', (Processo.__tablename__,), _calcular_processos)
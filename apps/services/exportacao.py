@@ -0,0 +1,193 @@
+"""
+Exportação de dados em streaming (CSV, NDJSON ou array JSON)
+
+A consulta (um select apenas das colunas exportadas, sem objetos do ORM) é
+executada em uma conexão própria com cursor no servidor (yield_per: cursor
+nomeado no PostgreSQL) e as linhas são serializadas e enviadas em blocos,
+de modo que a memória usada não depende do tamanho do resultado. Com
+compactar=True a saída é comprimida em gzip à medida que é gerada.
+
+Uso nas rotas:
+    return resposta_exportacao('clientes', consulta, formato='csv', compactar=True)
+"""
+
+import csv
+import io
+import json
+import uuid
+import zlib
+from datetime import datetime, date
+from decimal import Decimal
+from typing import Iterator, Iterable, List, Any, Optional
+
+from flask import Response, current_app, stream_with_context
+
+from apps import db
+
+# Linhas buscadas do cursor por vez
+LINHAS_POR_LOTE = 1000
+
+# Bytes acumulados antes de enviar um bloco da resposta
+TAMANHO_BLOCO = 64 * 1024
+
+FORMATOS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'json': ('application/json', 'json'),
+}
+
+
+def _valor_json(valor: Any) -> Any:
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, uuid.UUID):
+        return str(valor)
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return valor
+
+
+def _valor_csv(valor: Any) -> Any:
+    if valor is None:
+        return ''
+    if isinstance(valor, bool):
+        # Mesmo formato da coluna STATUS da importação
+        return '1' if valor else '0'
+    return _valor_json(valor)
+
+
+def linhas_da_consulta(consulta, tamanho_lote: Optional[int] = None) -> Iterator[Any]:
+    """Executa a consulta com cursor no servidor e devolve as linhas sob demanda"""
+    if tamanho_lote is None:
+        tamanho_lote = current_app.config.get('EXPORTACAO_TAMANHO_LOTE', LINHAS_POR_LOTE)
+
+    with db.engine.connect() as conexao:
+        resultado = conexao.execution_options(yield_per=tamanho_lote).execute(consulta)
+        for linha in resultado:
+            yield linha
+
+
+def _em_blocos(partes: Iterable[str]) -> Iterator[bytes]:
+    """Agrupa as partes em blocos de ~TAMANHO_BLOCO bytes"""
+    buffer = []
+    tamanho = 0
+    for parte in partes:
+        buffer.append(parte)
+        tamanho += len(parte)
+        if tamanho >= TAMANHO_BLOCO:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            tamanho = 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def gerar_csv(colunas: List[str], linhas: Iterable[Any]) -> Iterator[bytes]:
+    def partes():
+        saida = io.StringIO()
+        escritor = csv.writer(saida)
+        escritor.writerow(colunas)
+        # BOM para o Excel reconhecer UTF-8 (a importação também aceita)
+        yield '\ufeff' + saida.getvalue()
+        for linha in linhas:
+            saida.seek(0)
+            saida.truncate()
+            escritor.writerow([_valor_csv(valor) for valor in linha])
+            yield saida.getvalue()
+
+    return _em_blocos(partes())
+
+
+def gerar_ndjson(colunas: List[str], linhas: Iterable[Any]) -> Iterator[bytes]:
+    return _em_blocos(
+        json.dumps(dict(zip(colunas, map(_valor_json, linha))), ensure_ascii=False) + '\n'
+        for linha in linhas
+    )
+
+
+def gerar_json(colunas: List[str], linhas: Iterable[Any]) -> Iterator[bytes]:
+    """Array JSON ([{...}, {...}]) gerado item a item"""
+    def partes():
+        yield '['
+        separador = ''
+        for linha in linhas:
+            yield separador + json.dumps(dict(zip(colunas, map(_valor_json, linha))), ensure_ascii=False)
+            separador = ','
+        yield ']'
+
+    return _em_blocos(partes())
+
+
+GERADORES = {
+    'csv': gerar_csv,
+    'ndjson': gerar_ndjson,
+    'json': gerar_json,
+}
+
+
+def compactar_gzip(blocos: Iterable[bytes], nivel: int = 6) -> Iterator[bytes]:
+    """Comprime os blocos em gzip de forma incremental"""
+    compressor = zlib.compressobj(nivel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for bloco in blocos:
+        comprimido = compressor.compress(bloco)
+        if comprimido:
+            yield comprimido
+    yield compressor.flush()
+
+
+def gerar_exportacao(consulta, formato: str = 'csv', compactar: bool = False) -> Iterator[bytes]:
+    """
+    Gera o conteúdo da exportação em blocos
+
+    Args:
+        consulta: select das colunas exportadas (os rótulos viram os nomes das colunas)
+        formato: csv, ndjson ou json
+        compactar: Comprime a saída em gzip
+
+    Raises:
+        ValueError: Formato não suportado
+    """
+    if formato not in GERADORES:
+        raise ValueError(f"Formato de exportação inválido: {formato}. Use: {', '.join(FORMATOS)}")
+
+    colunas = [coluna.key for coluna in consulta.selected_columns]
+    blocos = GERADORES[formato](colunas, linhas_da_consulta(consulta))
+    return compactar_gzip(blocos) if compactar else blocos
+
+
+def resposta_exportacao(nome: str, consulta, formato: str = 'csv', compactar: bool = False, anexo: bool = True) -> Response:
+    """
+    Resposta HTTP em streaming com a exportação
+
+    Args:
+        nome: Prefixo do nome do arquivo (ex.: 'clientes')
+        consulta: select das colunas exportadas
+        formato: csv, ndjson ou json
+        compactar: Envia o arquivo .gz
+        anexo: Envia como download (Content-Disposition)
+
+    Raises:
+        ValueError: Formato não suportado
+    """
+    conteudo = gerar_exportacao(consulta, formato, compactar)
+    mimetype, extensao = FORMATOS[formato]
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    if anexo:
+        nome_arquivo = f"{nome}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extensao}"
+        if compactar:
+            nome_arquivo += '.gz'
+        headers['Content-Disposition'] = f'attachment; filename={nome_arquivo}'
+
+    return Response(
+        stream_with_context(conteudo),
+        mimetype='application/gzip' if compactar else mimetype,
+        headers=headers
+    )
+
+
+def parametros_exportacao(args) -> tuple:
+    """Lê formato (csv | ndjson) e compactar (1 | true | gzip) dos parâmetros da requisição"""
+    formato = (args.get('formato') or 'csv').strip().lower()
+    compactar = (args.get('compactar') or '').strip().lower() in ('1', 'true', 'sim', 'gzip')
+    return formato, compactar
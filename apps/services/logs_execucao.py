@@ -0,0 +1,118 @@
+"""
+Escrita em lote das linhas de log das execuções (tabela execucao_logs)
+
+Execucao.adicionar_log apenas acumula a linha no escritor da sessão. As
+linhas pendentes são inseridas com um único INSERT em lote (executemany)
+no próximo flush da sessão, ou no commit se nada mais foi alterado, na
+mesma transação da execução. Em caso de rollback as linhas são descartadas
+junto com as demais alterações.
+"""
+
+import logging
+from datetime import datetime
+from typing import List, Tuple, Any, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from apps import db
+from apps.models.execucao_log import ExecucaoLog, NivelLog
+
+logger = logging.getLogger(__name__)
+
+# Chave em Session.info com o escritor de logs da sessão
+CHAVE_ESCRITOR = 'escritor_logs_execucao'
+
+
+class EscritorLogsExecucao:
+    """Buffer das linhas de log de uma sessão, gravadas em lote"""
+
+    def __init__(self):
+        self._pendentes: List[Tuple[Any, datetime, str, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._pendentes)
+
+    def anexar(self, execucao, mensagem: str, nivel: str = NivelLog.INFO, ts: Optional[datetime] = None):
+        """Acumula uma linha de log da execução"""
+        self._pendentes.append((execucao, ts or datetime.now(), nivel, str(mensagem)))
+
+    def descarregar(self, conexao) -> int:
+        """
+        Insere as linhas pendentes das execuções já gravadas no banco
+
+        Linhas de execuções ainda não inseridas continuam no buffer até o
+        próximo flush.
+
+        Returns:
+            int: Quantidade de linhas inseridas
+        """
+        if not self._pendentes:
+            return 0
+
+        linhas = []
+        restantes = []
+        for pendente in self._pendentes:
+            execucao, ts, nivel, mensagem = pendente
+            if inspect(execucao).has_identity:
+                linhas.append({'execucao_id': execucao.id, 'ts': ts, 'level': nivel, 'message': mensagem})
+            else:
+                restantes.append(pendente)
+
+        if linhas:
+            conexao.execute(ExecucaoLog.__table__.insert(), linhas)
+        self._pendentes = restantes
+        return len(linhas)
+
+    def descartar(self):
+        self._pendentes = []
+
+
+def escritor_da_sessao(session) -> EscritorLogsExecucao:
+    """Escritor de logs associado à sessão (criado sob demanda)"""
+    escritor = session.info.get(CHAVE_ESCRITOR)
+    if escritor is None:
+        escritor = session.info[CHAVE_ESCRITOR] = EscritorLogsExecucao()
+    return escritor
+
+
+def anexar_log(execucao, mensagem: str, nivel: str = NivelLog.INFO, ts: Optional[datetime] = None):
+    """Acumula uma linha de log no escritor da sessão da execução"""
+    session = object_session(execucao) or db.session()
+    escritor_da_sessao(session).anexar(execucao, mensagem, nivel, ts)
+
+
+def _apos_flush(session, contexto):
+    escritor = session.info.get(CHAVE_ESCRITOR)
+    if escritor:
+        escritor.descarregar(session.connection())
+
+
+def _antes_do_commit(session):
+    # Um commit sem outras alterações não dispara o flush
+    escritor = session.info.get(CHAVE_ESCRITOR)
+    if escritor:
+        session.flush()
+        escritor.descarregar(session.connection())
+        if escritor:
+            logger.warning(f"{len(escritor)} linhas de log descartadas: execução não adicionada à sessão")
+            escritor.descartar()
+
+
+def _apos_rollback(session):
+    escritor = session.info.get(CHAVE_ESCRITOR)
+    if escritor:
+        escritor.descartar()
+
+
+_eventos_registrados = False
+
+
+def registrar_eventos_logs_execucao():
+    """Registra (uma única vez) a gravação das linhas de log nos flushes do ORM"""
+    global _eventos_registrados
+    if not _eventos_registrados:
+        event.listen(Session, 'after_flush', _apos_flush)
+        event.listen(Session, 'before_commit', _antes_do_commit)
+        event.listen(Session, 'after_rollback', _apos_rollback)
+        _eventos_registrados = True
@@ -165,6 +165,33 @@ class MinIOService:
             logger.error(f"Erro ao remover fatura: {str(e)}")
             return False
     
+    def upload_objeto(self, fileobj, object_key, content_type='application/octet-stream'):
+        """
+        Faz upload de um arquivo qualquer para o bucket
+        
+        Args:
+            fileobj: Objeto de arquivo (binário)
+            object_key: Chave do objeto no S3
+            content_type: Content-Type do objeto
+        """
+        self.s3_client.upload_fileobj(
+            fileobj,
+            self.bucket_name,
+            object_key,
+            ExtraArgs={'ContentType': content_type}
+        )
+        logger.info(f"Arquivo enviado ao MinIO: {object_key}")
+    
+    def download_objeto(self, object_key, fileobj):
+        """
+        Baixa um objeto do bucket para o arquivo informado (em streaming)
+        
+        Args:
+            object_key: Chave do objeto no S3
+            fileobj: Objeto de arquivo (binário) de destino
+        """
+        self.s3_client.download_fileobj(self.bucket_name, object_key, fileobj)
+    
     def list_faturas_processo(self, processo):
         """
         Lista todas as faturas de um processo específico
@@ -0,0 +1,240 @@
+"""
+Paginação por cursor (keyset) para as listagens
+
+Em vez de `LIMIT/OFFSET`, cada página é buscada a partir das chaves de
+ordenação do último (ou primeiro) item da página anterior, por exemplo
+`WHERE (data_criacao, id) < (:data, :id)`. O custo de uma página não
+depende da sua posição na listagem.
+
+O total de registros é opcional e fica em cache por alguns segundos por
+combinação de filtros, já que só é usado como informação na tela.
+"""
+
+import base64
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, date
+from typing import Optional, List, Tuple, Any, Dict
+
+from sqlalchemy import tuple_, or_, and_, literal, DateTime, Date
+
+from apps.models.base import GUID
+
+# Limite de itens por página aceito nas rotas
+MAX_POR_PAGINA = 100
+
+# Validade (segundos) dos totais em cache
+TTL_CONTAGEM = 30
+
+DIRECAO_PROXIMA = 'next'
+DIRECAO_ANTERIOR = 'prev'
+
+
+# ============================================================================
+# CURSOR
+# ============================================================================
+
+def _serializar(valor: Any) -> Any:
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, uuid.UUID):
+        return str(valor)
+    return valor
+
+
+def _desserializar(valor: Any, coluna) -> Any:
+    tipo = coluna.type
+    if valor is None:
+        return None
+    if isinstance(tipo, DateTime):
+        return datetime.fromisoformat(valor)
+    if isinstance(tipo, Date):
+        return date.fromisoformat(valor)
+    if isinstance(tipo, GUID):
+        return uuid.UUID(valor)
+    return valor
+
+
+def codificar_cursor(valores: List[Any]) -> str:
+    """Codifica as chaves de ordenação de um item em um token opaco"""
+    dados = json.dumps([_serializar(v) for v in valores], separators=(',', ':'))
+    return base64.urlsafe_b64encode(dados.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor: str, ordem: List[Tuple[Any, bool]]) -> Optional[List[Any]]:
+    """
+    Decodifica um cursor para os valores das colunas de ordenação
+
+    Returns:
+        Lista de valores ou None se o cursor é inválido
+    """
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+        if not isinstance(valores, list) or len(valores) != len(ordem):
+            return None
+        return [_desserializar(valor, coluna) for valor, (coluna, _) in zip(valores, ordem)]
+    except (ValueError, TypeError):
+        return None
+
+
+# ============================================================================
+# PÁGINA
+# ============================================================================
+
+class PaginaCursor:
+    """Resultado de uma página paginada por cursor"""
+
+    def __init__(
+        self,
+        items: List[Any],
+        per_page: int,
+        has_next: bool,
+        has_prev: bool,
+        next_cursor: Optional[str],
+        prev_cursor: Optional[str],
+        total: Optional[int] = None
+    ):
+        self.items = items
+        self.per_page = per_page
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Metadados da página para respostas JSON"""
+        return {
+            'per_page': self.per_page,
+            'has_next': self.has_next,
+            'has_prev': self.has_prev,
+            'next_cursor': self.next_cursor,
+            'prev_cursor': self.prev_cursor,
+            'total': self.total
+        }
+
+
+def _condicao_apos(ordem: List[Tuple[Any, bool]], valores: List[Any], invertido: bool):
+    """Condição para os itens depois dos valores do cursor na ordem informada"""
+    def depois(coluna, descendente, valor):
+        return coluna < valor if descendente != invertido else coluna > valor
+
+    descendentes = {descendente for _, descendente in ordem}
+    if len(descendentes) == 1:
+        # Comparação de tupla: usa o índice composto diretamente
+        colunas = tuple_(*[coluna for coluna, _ in ordem])
+        chave = tuple_(*[literal(valor, coluna.type) for (coluna, _), valor in zip(ordem, valores)])
+        return depois(colunas, descendentes.pop(), chave)
+
+    # Direções mistas: (a > x) OR (a = x AND b > y) ...
+    condicoes = []
+    for i, (coluna, descendente) in enumerate(ordem):
+        iguais = [c == v for (c, _), v in zip(ordem[:i], valores[:i])]
+        condicoes.append(and_(*iguais, depois(coluna, descendente, valores[i])))
+    return or_(*condicoes)
+
+
+def paginar_por_cursor(
+    query,
+    ordem: List[Tuple[Any, bool]],
+    cursor: Optional[str] = None,
+    direcao: str = DIRECAO_PROXIMA,
+    per_page: int = 20,
+    contar: bool = False
+) -> PaginaCursor:
+    """
+    Pagina uma query por cursor
+
+    Args:
+        query: Query já filtrada (sem ordenação)
+        ordem: Colunas de ordenação e se são descendentes; a última deve ser
+            única e nenhuma deve mudar depois de gravada, senão um item alterado
+            entre duas páginas é repetido ou pulado
+            (ex.: [(Processo.data_criacao, True), (Processo.id, True)])
+        cursor: Token recebido em next_cursor/prev_cursor da página anterior
+        direcao: 'next' (itens depois do cursor) ou 'prev' (itens antes)
+        per_page: Itens por página
+        contar: Se True, inclui o total (em cache por TTL_CONTAGEM segundos)
+
+    Returns:
+        PaginaCursor
+    """
+    per_page = max(1, min(per_page, MAX_POR_PAGINA))
+    anterior = direcao == DIRECAO_ANTERIOR
+    valores = decodificar_cursor(cursor, ordem) if cursor else None
+    if valores is None:
+        anterior = False
+
+    total = contar_com_cache(query) if contar else None
+
+    paginada = query
+    if valores is not None:
+        paginada = paginada.filter(_condicao_apos(ordem, valores, invertido=anterior))
+
+    # Para a página anterior a ordem é invertida e o resultado revertido
+    criterios = [
+        (coluna.asc() if descendente else coluna.desc()) if anterior
+        else (coluna.desc() if descendente else coluna.asc())
+        for coluna, descendente in ordem
+    ]
+    items = paginada.order_by(*criterios).limit(per_page + 1).all()
+
+    mais = len(items) > per_page
+    items = items[:per_page]
+    if anterior:
+        items.reverse()
+        has_prev, has_next = mais, True
+    else:
+        has_prev, has_next = valores is not None, mais
+
+    def chaves(item):
+        return [getattr(item, coluna.key) for coluna, _ in ordem]
+
+    return PaginaCursor(
+        items=items,
+        per_page=per_page,
+        has_next=has_next and bool(items),
+        has_prev=has_prev and bool(items),
+        next_cursor=codificar_cursor(chaves(items[-1])) if items else None,
+        prev_cursor=codificar_cursor(chaves(items[0])) if items else None,
+        total=total
+    )
+
+
+# ============================================================================
+# CONTAGEM EM CACHE
+# ============================================================================
+
+_contagens: Dict[Tuple[str, str], Tuple[float, int]] = {}
+_contagens_lock = threading.Lock()
+
+
+def contar_com_cache(query, ttl: int = TTL_CONTAGEM) -> int:
+    """
+    Conta os registros da query, reaproveitando o resultado por `ttl` segundos
+
+    A chave do cache é o SQL da query com os parâmetros, de modo que cada
+    combinação de filtros tem o seu total.
+    """
+    consulta = query.enable_eagerloads(False).order_by(None)
+    compilado = consulta.statement.compile()
+    chave = (str(compilado), repr(sorted(compilado.params.items(), key=lambda item: item[0])))
+
+    agora = time.time()
+    with _contagens_lock:
+        em_cache = _contagens.get(chave)
+        if em_cache and agora - em_cache[0] < ttl:
+            return em_cache[1]
+
+    total = consulta.count()
+
+    with _contagens_lock:
+        # Descartar entradas vencidas para o cache não crescer indefinidamente
+        if len(_contagens) > 500:
+            for item in [k for k, (instante, _) in _contagens.items() if agora - instante >= ttl]:
+                del _contagens[item]
+        _contagens[chave] = (agora, total)
+    return total
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos índices compostos (migrar_indices_compostos.py)
+
+Gera uma massa de dados sintética em um banco próprio, executa as consultas
+mais usadas sem os índices compostos e depois com eles, e mostra o plano
+(EXPLAIN) e o tempo médio de cada consulta nos dois cenários.
+
+Por padrão usa um SQLite temporário. Para medir no PostgreSQL, informe um
+banco vazio em --database-url (o script recusa bancos com processos).
+
+Uso:
+    python benchmark_indices.py --processos 50000 --execucoes-por-processo 3
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import select, func, text
+
+from apps import create_app, db
+from apps.config import config_dict
+from apps.models import Operadora, Cliente, Processo, Execucao, Agendamento
+from apps.models.processo import StatusProcesso
+from apps.models.execucao import StatusExecucao, TipoExecucao
+from apps.models.agendamento import TipoAgendamento
+from migrar_indices_compostos import criar_indices, remover_indices
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE = 5000
+
+
+def _inserir_em_lotes(conexao, tabela, linhas):
+    for inicio in range(0, len(linhas), TAMANHO_LOTE):
+        conexao.execute(tabela.insert(), linhas[inicio:inicio + TAMANHO_LOTE])
+
+
+def gerar_dados(engine, total_processos: int, execucoes_por_processo: int, total_agendamentos: int):
+    """Gera operadoras, clientes (12 processos cada), processos, execuções e agendamentos"""
+    aleatorio = random.Random(42)
+    agora = datetime.now()
+
+    operadoras = [
+        {'id': uuid.uuid4(), 'nome': f'Operadora {i}', 'codigo': f'OP{i}'}
+        for i in range(5)
+    ]
+
+    total_clientes = max(1, total_processos // 12)
+    clientes = [
+        {
+            'id': uuid.uuid4(),
+            'hash_unico': uuid.uuid4().hex[:16],
+            'razao_social': f'Cliente Benchmark {i}',
+            'nome_sat': f'CLIENTE {i}',
+            'cnpj': f'{i:014d}',
+            'operadora_id': operadoras[i % len(operadoras)]['id'],
+            'servico': 'Internet',
+            'unidade': f'Unidade {i}'
+        }
+        for i in range(total_clientes)
+    ]
+
+    status_processos = [status.value for status in StatusProcesso]
+    processos = []
+    for i in range(total_processos):
+        cliente = clientes[i % total_clientes]
+        meses_atras = i // total_clientes
+        ano, mes = divmod(agora.year * 12 + agora.month - 1 - meses_atras, 12)
+        criado_em = agora - timedelta(days=meses_atras * 30, minutes=aleatorio.randint(0, 43200))
+        processos.append({
+            'id': uuid.uuid4(),
+            'cliente_id': cliente['id'],
+            'mes_ano': f'{mes + 1:02d}/{ano}',
+            'periodo': ano * 100 + mes + 1,
+            'status_processo': aleatorio.choice(status_processos),
+            'data_criacao': criado_em,
+            'data_atualizacao': criado_em
+        })
+
+    status_execucoes = [status.value for status in StatusExecucao]
+    execucoes = []
+    for processo in processos:
+        for tentativa in range(1, execucoes_por_processo + 1):
+            inicio = processo['data_criacao'] + timedelta(hours=tentativa)
+            execucoes.append({
+                'id': uuid.uuid4(),
+                'processo_id': processo['id'],
+                'tipo_execucao': TipoExecucao.DOWNLOAD_FATURA.value,
+                'status_execucao': aleatorio.choice(status_execucoes),
+                'data_inicio': inicio,
+                'numero_tentativa': tentativa
+            })
+
+    tipos_agendamento = [tipo.value for tipo in TipoAgendamento]
+    agendamentos = [
+        {
+            'id': uuid.uuid4(),
+            'nome_agendamento': f'Agendamento {i}',
+            'cron_expressao': '0 6 * * *',
+            'tipo_agendamento': aleatorio.choice(tipos_agendamento),
+            # Poucos agendamentos ativos, como em produção
+            'status_ativo': aleatorio.random() < 0.1,
+            'proxima_execucao': agora + timedelta(minutes=aleatorio.randint(-600, 43200))
+        }
+        for i in range(total_agendamentos)
+    ]
+
+    with engine.begin() as conexao:
+        _inserir_em_lotes(conexao, Operadora.__table__, operadoras)
+        _inserir_em_lotes(conexao, Cliente.__table__, clientes)
+        _inserir_em_lotes(conexao, Processo.__table__, processos)
+        _inserir_em_lotes(conexao, Execucao.__table__, execucoes)
+        _inserir_em_lotes(conexao, Agendamento.__table__, agendamentos)
+
+    # Processo com mais execuções para a consulta do relacionamento
+    return processos[len(processos) // 2]['id']
+
+
+def montar_consultas(processo_id):
+    """Consultas medidas, no mesmo formato das usadas pela aplicação"""
+    agora = datetime.now()
+    return {
+        'Processo.execucoes (processo_id, data_inicio desc)': select(
+            Execucao.id, Execucao.status_execucao, Execucao.data_inicio
+        ).where(Execucao.processo_id == processo_id).order_by(Execucao.data_inicio.desc()),
+
+        'Estatísticas de execuções (status, data_inicio)': select(func.count(Execucao.id)).where(
+            Execucao.status_execucao == StatusExecucao.FALHOU.value,
+            Execucao.data_inicio >= agora - timedelta(days=7)
+        ),
+
+        'rpa/processos-pendentes (status, data_criacao desc)': select(
+            Processo.id, Processo.mes_ano
+        ).where(
+            Processo.status_processo == StatusProcesso.AGUARDANDO_DOWNLOAD.value
+        ).order_by(Processo.data_criacao.desc()).limit(50),
+
+        'Executor de agendamentos (ativos, proxima_execucao)': select(Agendamento.id).where(
+            Agendamento.status_ativo == True,
+            Agendamento.proxima_execucao <= agora
+        ),
+    }
+
+
+def _sql(engine, consulta) -> str:
+    return str(consulta.compile(bind=engine, compile_kwargs={'literal_binds': True}))
+
+
+def medir(engine, consultas, repeticoes: int):
+    """Retorna {nome: (plano, tempo médio em ms)} para cada consulta"""
+    postgres = engine.dialect.name == 'postgresql'
+    prefixo_explain = 'EXPLAIN ' if postgres else 'EXPLAIN QUERY PLAN '
+
+    resultados = {}
+    with engine.connect() as conexao:
+        for nome, consulta in consultas.items():
+            sql = _sql(engine, consulta)
+            linhas = conexao.exec_driver_sql(prefixo_explain + sql).fetchall()
+            plano = [linha[0] if postgres else linha[-1] for linha in linhas]
+
+            conexao.exec_driver_sql(sql).fetchall()
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                conexao.exec_driver_sql(sql).fetchall()
+            tempo_ms = (time.perf_counter() - inicio) * 1000 / repeticoes
+
+            resultados[nome] = (plano, tempo_ms)
+    return resultados
+
+
+def imprimir(titulo: str, resultados):
+    print(f"\n{titulo}")
+    print("=" * 80)
+    for nome, (plano, tempo_ms) in resultados.items():
+        print(f"\n📊 {nome}: {tempo_ms:.3f} ms")
+        for linha in plano:
+            print(f"   {linha}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dos índices compostos')
+    parser.add_argument('--database-url', default=os.getenv('BENCHMARK_DATABASE_URL'),
+                        help='Banco vazio para o benchmark (padrão: SQLite temporário)')
+    parser.add_argument('--processos', type=int, default=20000)
+    parser.add_argument('--execucoes-por-processo', type=int, default=3)
+    parser.add_argument('--agendamentos', type=int, default=5000)
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    arquivo_temporario = None
+    database_url = args.database_url
+    if not database_url:
+        arquivo_temporario = os.path.join(tempfile.mkdtemp(), 'benchmark_indices.sqlite3')
+        database_url = f'sqlite:///{arquivo_temporario}'
+
+    class ConfigBenchmark(config_dict['Debug']):
+        SQLALCHEMY_DATABASE_URI = database_url
+
+    app = create_app(ConfigBenchmark)
+
+    with app.app_context():
+        engine = db.engine
+        with engine.connect() as conexao:
+            if conexao.execute(select(func.count(Processo.id))).scalar():
+                print("❌ O banco informado já possui processos; use um banco vazio para o benchmark")
+                sys.exit(1)
+
+        print(f"🚀 Benchmark de índices compostos ({engine.dialect.name})")
+        print(f"📦 Gerando {args.processos} processos, "
+              f"{args.processos * args.execucoes_por_processo} execuções e "
+              f"{args.agendamentos} agendamentos...")
+        remover_indices(engine)
+        processo_id = gerar_dados(engine, args.processos, args.execucoes_por_processo, args.agendamentos)
+        with engine.begin() as conexao:
+            conexao.exec_driver_sql('ANALYZE')
+
+        consultas = montar_consultas(processo_id)
+        antes = medir(engine, consultas, args.repeticoes)
+        imprimir("ANTES (apenas índices de coluna única)", antes)
+
+        criar_indices(engine)
+        depois = medir(engine, consultas, args.repeticoes)
+        imprimir("DEPOIS (índices compostos)", depois)
+
+        print("\nRESUMO")
+        print("=" * 80)
+        for nome in consultas:
+            tempo_antes, tempo_depois = antes[nome][1], depois[nome][1]
+            ganho = tempo_antes / tempo_depois if tempo_depois else float('inf')
+            print(f"{nome}: {tempo_antes:.3f} ms -> {tempo_depois:.3f} ms ({ganho:.1f}x)")
+
+        db.session.remove()
+        engine.dispose()
+
+    if arquivo_temporario:
+        os.remove(arquivo_temporario)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# -*- encoding: utf-8 -*-
+"""
+Configuração do processo de streaming (SSE)
+
+Serve apenas as rotas de Server-Sent Events com workers assíncronos
+(green threads), para que milhares de conexões ociosas não ocupem os
+workers síncronos das páginas normais. Uso:
+
+    gunicorn --config gunicorn-stream-cfg.py stream:app
+"""
+
+import os
+
+bind = os.getenv('STREAM_BIND', '0.0.0.0:5006')
+# Um único worker: os ids dos eventos de log (Last-Event-ID) e o buffer de
+# replay de cada job existem só no processo que os emitiu, e uma reconexão
+# que caísse em outro worker perderia ou repetiria eventos. Um worker gevent
+# atende milhares de conexões; escale com mais containers atrás de um
+# balanceador com afinidade por job.
+workers = 1
+worker_class = os.getenv('STREAM_WORKER_CLASS', 'gevent')
+worker_connections = int(os.getenv('STREAM_WORKER_CONNECTIONS', 5000))
+
+# Conexões SSE ficam abertas indefinidamente; o keepalive é enviado pela aplicação
+timeout = 0
+graceful_timeout = 30
+keepalive = 75
+
+accesslog = '-'
+loglevel = 'info'
+capture_output = True
+enable_stdio_inheritance = True
+
+
+def post_fork(server, worker):
+    """Torna o psycopg2 cooperativo: sem isso cada consulta bloqueia o loop do gevent"""
+    if worker_class == 'gevent':
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Script para copiar os logs das execuções (mensagem_log) para a tabela execucao_logs
+
+- Cria a tabela execucao_logs se ainda não existir
+- Divide o texto de mensagem_log em linhas ("[AAAA-MM-DD HH:MM:SS] mensagem");
+  linhas sem data recebem a data da linha anterior (ou o início da execução)
+- Processa as execuções em lotes, com commit por lote, ignorando as que já
+  têm linhas em execucao_logs (pode ser executado novamente)
+- Com --resumir, mensagem_log passa a guardar apenas a última linha (resumo)
+"""
+
+import logging
+import re
+import sys
+import os
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import select, exists, update
+
+from apps import create_app, db
+from apps.config import config_dict
+from apps.models import Execucao, ExecucaoLog
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE = int(os.getenv('MIGRACAO_TAMANHO_LOTE', 200))
+
+_LINHA_COM_DATA = re.compile(r'^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] ?(.*)$')
+
+
+def dividir_log(execucao_id, texto: str, inicio: datetime) -> list:
+    """Converte o texto do log nas linhas da tabela execucao_logs"""
+    linhas = []
+    ts = inicio or datetime.now()
+    for linha in texto.splitlines():
+        if not linha.strip():
+            continue
+        encontrada = _LINHA_COM_DATA.match(linha)
+        if encontrada:
+            ts = datetime.strptime(encontrada.group(1), '%Y-%m-%d %H:%M:%S')
+            linha = encontrada.group(2)
+        linhas.append({'execucao_id': execucao_id, 'ts': ts, 'level': 'INFO', 'message': linha})
+    return linhas
+
+
+def copiar_logs(engine, resumir: bool = False, tamanho_lote: int = TAMANHO_LOTE) -> int:
+    """Copia os logs em lotes; retorna a quantidade de execuções migradas"""
+    total = 0
+    ultimo_id = None
+    sem_linhas = ~exists().where(ExecucaoLog.execucao_id == Execucao.id)
+
+    while True:
+        with engine.begin() as conexao:
+            consulta = (
+                select(Execucao.id, Execucao.data_inicio, Execucao.mensagem_log)
+                .where(Execucao.mensagem_log.isnot(None), sem_linhas)
+                .order_by(Execucao.id)
+                .limit(tamanho_lote)
+            )
+            if ultimo_id is not None:
+                consulta = consulta.where(Execucao.id > ultimo_id)
+            execucoes = conexao.execute(consulta).fetchall()
+            if not execucoes:
+                return total
+
+            for execucao_id, data_inicio, mensagem_log in execucoes:
+                linhas = dividir_log(execucao_id, mensagem_log, data_inicio)
+                if linhas:
+                    conexao.execute(ExecucaoLog.__table__.insert(), linhas)
+                    if resumir:
+                        conexao.execute(
+                            update(Execucao.__table__)
+                            .where(Execucao.__table__.c.id == execucao_id)
+                            .values(mensagem_log=linhas[-1]['message'])
+                        )
+
+            ultimo_id = execucoes[-1][0]
+
+        total += len(execucoes)
+        logger.info(f"   ... {total} execuções migradas")
+
+
+def migrar_execucao_logs(resumir: bool = False):
+    """Cria a tabela execucao_logs e copia os logs existentes"""
+
+    modo = 'Debug' if os.getenv('DEBUG', 'True') == 'True' else 'Production'
+    app = create_app(config_dict[modo])
+
+    with app.app_context():
+        try:
+            engine = db.engine
+            ExecucaoLog.__table__.create(engine, checkfirst=True)
+            logger.info("✅ Tabela execucao_logs disponível")
+
+            logger.info(f"📦 Copiando logs em lotes de {TAMANHO_LOTE} execuções...")
+            total = copiar_logs(engine, resumir=resumir)
+            logger.info(f"✅ Logs de {total} execuções copiados para execucao_logs")
+            if resumir:
+                logger.info("✅ mensagem_log substituído pela última linha do log")
+
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Erro na migração dos logs das execuções: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return False
+
+
+if __name__ == "__main__":
+    print("🚀 Script de Migração - Logs das Execuções (execucao_logs)")
+    print("=" * 60)
+
+    if migrar_execucao_logs(resumir='--resumir' in sys.argv):
+        print("\n✅ Migração executada com sucesso!")
+    else:
+        print("\n❌ Migração falhou!")
+        sys.exit(1)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Script para criar e (re)construir o consolidado diário das execuções (execucao_stats_daily)
+
+- Cria a tabela execucao_stats_daily se ainda não existir
+- Recalcula o consolidado a partir das execuções finalizadas, lidas com
+  cursor no servidor; as linhas dos dias do período são apagadas e somadas
+  novamente (pode ser executado novamente)
+- Período opcional: --desde AAAA-MM-DD e --ate AAAA-MM-DD (inclusive);
+  sem período, reconstrói todo o histórico e grava o marcador que libera a
+  leitura do consolidado (obrigatório em bancos que já tinham execuções)
+- Use após alterações fora do ORM (update/delete em lote, cascatas no banco)
+  ou troca de operadora de clientes, que não atualizam o consolidado
+"""
+
+import argparse
+import logging
+import sys
+import os
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from apps import create_app, db
+from apps.config import config_dict
+from apps.models import ExecucaoStatsDaily
+from apps.services.consolidado_execucoes import reconstruir_consolidado
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE = int(os.getenv('MIGRACAO_TAMANHO_LOTE', 5000))
+
+
+def _data(valor: str):
+    return datetime.strptime(valor, '%Y-%m-%d').date()
+
+
+def migrar_execucao_stats_daily(desde=None, ate=None):
+    """Cria a tabela execucao_stats_daily e reconstrói o consolidado do período"""
+
+    modo = 'Debug' if os.getenv('DEBUG', 'True') == 'True' else 'Production'
+    app = create_app(config_dict[modo])
+
+    with app.app_context():
+        try:
+            ExecucaoStatsDaily.__table__.create(db.engine, checkfirst=True)
+            logger.info("✅ Tabela execucao_stats_daily disponível")
+
+            periodo = f"{desde or 'início'} a {ate or 'hoje'}"
+            logger.info(f"📦 Reconstruindo o consolidado ({periodo}) em lotes de {TAMANHO_LOTE} execuções...")
+            total = reconstruir_consolidado(desde=desde, ate=ate, tamanho_lote=TAMANHO_LOTE)
+            logger.info(f"✅ {total} execuções consolidadas em execucao_stats_daily")
+
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Erro na reconstrução do consolidado das execuções: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return False
+
+
+if __name__ == "__main__":
+    print("🚀 Script de Migração - Consolidado Diário das Execuções (execucao_stats_daily)")
+    print("=" * 60)
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--desde', type=_data, help='Primeiro dia (AAAA-MM-DD)')
+    parser.add_argument('--ate', type=_data, help='Último dia (AAAA-MM-DD)')
+    argumentos = parser.parse_args()
+
+    if migrar_execucao_stats_daily(desde=argumentos.desde, ate=argumentos.ate):
+        print("\n✅ Migração executada com sucesso!")
+    else:
+        print("\n❌ Migração falhou!")
+        sys.exit(1)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Script para criar o índice de busca de clientes e reindexar os dados existentes
+
+- PostgreSQL: extensão pg_trgm, tabela busca_clientes e índice GIN de trigramas
+- SQLite: tabela virtual FTS5 (tokenizer trigram) busca_clientes
+
+Pode ser executado novamente a qualquer momento para reconstruir o índice.
+"""
+
+import logging
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from apps import create_app, db
+from apps.config import config_dict
+from apps.services.busca_service import garantir_estrutura, reindexar_todos
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def migrar_indice_busca():
+    """Cria a estrutura do índice de busca e reindexa todos os clientes"""
+
+    modo = 'Debug' if os.getenv('DEBUG', 'True') == 'True' else 'Production'
+    app = create_app(config_dict[modo])
+
+    with app.app_context():
+        try:
+            logger.info(f"🔄 Criando índice de busca ({db.engine.dialect.name})...")
+            if not garantir_estrutura():
+                logger.error("❌ Índice de busca indisponível neste banco; as buscas continuarão usando LIKE")
+                return False
+
+            logger.info("📦 Reindexando clientes...")
+            total = reindexar_todos()
+            logger.info(f"✅ {total} clientes indexados")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Erro na migração do índice de busca: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return False
+
+
+if __name__ == "__main__":
+    print("🚀 Script de Migração - Índice de Busca de Clientes")
+    print("=" * 60)
+
+    if migrar_indice_busca():
+        print("\n✅ Migração executada com sucesso!")
+    else:
+        print("\n❌ Migração falhou!")
+        sys.exit(1)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Script para criar os índices compostos dos caminhos de consulta mais usados
+
+- execucoes (processo_id, data_inicio) INCLUDE (status_execucao) no PostgreSQL
+- execucoes (status_execucao, data_inicio)
+- processos (status_processo, data_criacao)
+- processos (data_criacao, id), chave da paginação por cursor da listagem
+- agendamentos (proxima_execucao) WHERE status_ativo (índice parcial)
+
+Os índices são definidos nos modelos (__table_args__); este script apenas os
+cria em bancos já existentes. Pode ser executado novamente.
+"""
+
+import logging
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+
+from apps import create_app, db
+from apps.config import config_dict
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INDICES_COMPOSTOS = [
+    'ix_execucoes_processo_data_inicio',
+    'ix_execucoes_status_data_inicio',
+    'ix_processos_status_data_criacao',
+    'ix_processos_data_criacao_id',
+    'ix_agendamentos_ativos_proxima_execucao',
+]
+
+
+def obter_indices(nomes=INDICES_COMPOSTOS):
+    """Retorna os objetos Index dos modelos com os nomes informados"""
+    indices = {
+        indice.name: indice
+        for tabela in db.metadata.tables.values()
+        for indice in tabela.indexes
+    }
+    return [indices[nome] for nome in nomes]
+
+
+def criar_indices(engine, nomes=INDICES_COMPOSTOS):
+    """Cria os índices que ainda não existem e atualiza as estatísticas das tabelas"""
+    indices = obter_indices(nomes)
+    for indice in indices:
+        indice.create(bind=engine, checkfirst=True)
+        logger.info(f"   ✅ {indice.name}")
+
+    with engine.begin() as conexao:
+        for tabela in sorted({indice.table.name for indice in indices}):
+            conexao.execute(text(f"ANALYZE {tabela}"))
+
+
+def remover_indices(engine, nomes=INDICES_COMPOSTOS):
+    """Remove os índices (usado pelo benchmark para medir o cenário anterior)"""
+    for indice in obter_indices(nomes):
+        indice.drop(bind=engine, checkfirst=True)
+
+
+def migrar_indices_compostos():
+    """Cria os índices compostos no banco configurado"""
+
+    modo = 'Debug' if os.getenv('DEBUG', 'True') == 'True' else 'Production'
+    app = create_app(config_dict[modo])
+
+    with app.app_context():
+        try:
+            logger.info(f"🔄 Criando índices compostos ({db.engine.dialect.name})...")
+            criar_indices(db.engine)
+            logger.info("✅ Índices compostos criados")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Erro na criação dos índices compostos: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return False
+
+
+if __name__ == "__main__":
+    print("🚀 Script de Migração - Índices Compostos")
+    print("=" * 60)
+
+    if migrar_indices_compostos():
+        print("\n✅ Migração executada com sucesso!")
+    else:
+        print("\n❌ Migração falhou!")
+        sys.exit(1)
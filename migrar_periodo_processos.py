@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Script para adicionar a coluna periodo (AAAAMM) à tabela processos
+
+- Adiciona a coluna periodo (INTEGER) se ainda não existir
+- Preenche o período a partir de mes_ano (MM/AAAA) em lotes, com commit por
+  lote; valores legados fora do formato (ex.: '__/____', '13/2025') ficam
+  sem período e são listados no fim
+- Cria o índice (status_processo, periodo) e troca a unicidade de
+  (cliente_id, mes_ano) por (cliente_id, periodo), se não houver duplicados
+- No PostgreSQL, torna a coluna NOT NULL quando não restam registros sem período
+
+A coluna mes_ano é mantida por compatibilidade. No SQLite a restrição antiga
+(cliente_id, mes_ano) faz parte da tabela e permanece. Pode ser executado
+novamente.
+"""
+
+import logging
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text, inspect
+
+from apps import create_app, db
+from apps.config import config_dict
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE = int(os.getenv('MIGRACAO_TAMANHO_LOTE', 1000))
+
+INDICES = {
+    'ix_processos_status_periodo': '(status_processo, periodo)',
+}
+
+# Substituído pela restrição única (cliente_id, periodo)
+INDICES_OBSOLETOS = ('ix_processos_cliente_periodo',)
+
+# mes_ano no formato MM/AAAA com mês de 01 a 12, por dialeto: o CAST só pode
+# ser avaliado em valores válidos (no PostgreSQL um valor como '__/____'
+# derrubaria o lote inteiro)
+MES_ANO_VALIDO = {
+    'postgresql': "mes_ano ~ '^(0[1-9]|1[0-2])/[0-9]{4}$'",
+    'mysql': "mes_ano REGEXP '^(0[1-9]|1[0-2])/[0-9]{4}$'",
+}
+MES_ANO_VALIDO_PADRAO = (
+    "mes_ano GLOB '[01][0-9]/[0-9][0-9][0-9][0-9]' "
+    "AND substr(mes_ano, 1, 2) BETWEEN '01' AND '12'"
+)
+
+
+def preencher_periodos(conexao_engine, tamanho_lote: int = TAMANHO_LOTE) -> int:
+    """Preenche periodo a partir de mes_ano em lotes; retorna a quantidade atualizada"""
+    valido = MES_ANO_VALIDO.get(conexao_engine.dialect.name, MES_ANO_VALIDO_PADRAO)
+    total = 0
+    while True:
+        with conexao_engine.begin() as conexao:
+            resultado = conexao.execute(text(f"""
+                UPDATE processos
+                SET periodo = CASE WHEN {valido}
+                                   THEN CAST(substr(mes_ano, 4, 4) AS INTEGER) * 100
+                                      + CAST(substr(mes_ano, 1, 2) AS INTEGER)
+                              END
+                WHERE id IN (
+                    SELECT id FROM processos
+                    WHERE periodo IS NULL AND {valido}
+                    LIMIT :limite
+                )
+            """), {'limite': tamanho_lote})
+            atualizados = resultado.rowcount or 0
+
+        if not atualizados:
+            return total
+        total += atualizados
+        logger.info(f"   ... {total} processos atualizados")
+
+
+def trocar_unicidade(engine) -> bool:
+    """Cria a restrição única (cliente_id, periodo) e remove a antiga (cliente_id, mes_ano)"""
+    with engine.connect() as conexao:
+        duplicados = conexao.execute(text("""
+            SELECT cliente_id, periodo, COUNT(*) FROM processos
+            WHERE periodo IS NOT NULL
+            GROUP BY cliente_id, periodo
+            HAVING COUNT(*) > 1
+        """)).fetchall()
+
+    if duplicados:
+        logger.warning(f"⚠️ {len(duplicados)} clientes com mais de um processo no mesmo período "
+                       f"(ex.: '1/2025' e '01/2025'); unicidade por período não criada:")
+        for cliente_id, periodo, quantidade in duplicados[:20]:
+            logger.warning(f"   - cliente {cliente_id}, período {periodo}: {quantidade} processos")
+        return False
+
+    with engine.begin() as conexao:
+        conexao.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_processo_cliente_periodo ON processos (cliente_id, periodo)"
+        ))
+        for nome in INDICES_OBSOLETOS:
+            conexao.execute(text(f"DROP INDEX IF EXISTS {nome}"))
+        if engine.dialect.name == 'postgresql':
+            conexao.execute(text("ALTER TABLE processos DROP CONSTRAINT IF EXISTS uq_processo_cliente_mes_ano"))
+    logger.info("✅ Unicidade por (cliente_id, periodo) criada")
+    return True
+
+
+def migrar_periodo_processos():
+    """Adiciona, preenche e indexa a coluna periodo de processos"""
+
+    modo = 'Debug' if os.getenv('DEBUG', 'True') == 'True' else 'Production'
+    app = create_app(config_dict[modo])
+
+    with app.app_context():
+        try:
+            engine = db.engine
+            colunas = [coluna['name'] for coluna in inspect(engine).get_columns('processos')]
+
+            if 'periodo' not in colunas:
+                logger.info("🔄 Adicionando coluna periodo à tabela processos...")
+                with engine.begin() as conexao:
+                    conexao.execute(text("ALTER TABLE processos ADD COLUMN periodo INTEGER"))
+                logger.info("✅ Coluna periodo adicionada")
+            else:
+                logger.info("✅ Coluna periodo já existe")
+
+            logger.info(f"📦 Preenchendo períodos em lotes de {TAMANHO_LOTE}...")
+            total = preencher_periodos(engine)
+            logger.info(f"✅ {total} processos com período preenchido")
+
+            with engine.begin() as conexao:
+                for nome, colunas_indice in INDICES.items():
+                    conexao.execute(text(f"CREATE INDEX IF NOT EXISTS {nome} ON processos {colunas_indice}"))
+            logger.info("✅ Índices de período criados")
+
+            trocar_unicidade(engine)
+
+            with engine.connect() as conexao:
+                invalidos = conexao.execute(text(
+                    "SELECT id, mes_ano FROM processos WHERE periodo IS NULL"
+                )).fetchall()
+
+            if invalidos:
+                logger.warning(f"⚠️ {len(invalidos)} processos com mes_ano inválido ficaram sem período:")
+                for processo_id, mes_ano in invalidos[:20]:
+                    logger.warning(f"   - {processo_id}: '{mes_ano}'")
+            elif engine.dialect.name == 'postgresql':
+                with engine.begin() as conexao:
+                    conexao.execute(text("ALTER TABLE processos ALTER COLUMN periodo SET NOT NULL"))
+                logger.info("✅ Coluna periodo definida como NOT NULL")
+
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Erro na migração do período de processos: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return False
+
+
+if __name__ == "__main__":
+    print("🚀 Script de Migração - Período de Processos (AAAAMM)")
+    print("=" * 60)
+
+    if migrar_periodo_processos():
+        print("\n✅ Migração executada com sucesso!")
+    else:
+        print("\n❌ Migração falhou!")
+        sys.exit(1)
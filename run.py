@@ -33,6 +33,16 @@ if not DEBUG:
 from apps.agendamentos.executor import iniciar_executor
 iniciar_executor(app)
 app.logger.info('Executor de agendamentos iniciado em background')
+
+# Iniciar reconciliador de execuções em background
+from apps.api_externa.reconciliador import iniciar_reconciliador
+iniciar_reconciliador(app)
+app.logger.info('Reconciliador de execuções iniciado em background')
+
+# Iniciar trabalhador de importações de clientes em background
+from apps.clientes.trabalhador_importacao import iniciar_trabalhador_importacoes
+iniciar_trabalhador_importacoes(app)
+app.logger.info('Trabalhador de importações iniciado em background')
     
 if DEBUG:
     app.logger.info('DEBUG            = ' + str(DEBUG))
@@ -0,0 +1,47 @@
+# -*- encoding: utf-8 -*-
+"""
+Entry point do processo de streaming (SSE)
+
+Usa a mesma configuração e os mesmos blueprints da aplicação principal,
+mas não inicia os serviços de background (executor de agendamentos e
+reconciliador), que continuam apenas no processo principal. O proxy
+reverso encaminha para cá somente as rotas de streaming.
+"""
+
+import os
+from sys import exit
+
+from apps.config import config_dict
+from apps import create_app
+
+# WARNING: Don't run with debug turned on in production!
+DEBUG = (os.getenv('DEBUG', 'True') == 'True')
+
+get_config_mode = 'Debug' if DEBUG else 'Production'
+
+try:
+    app_config = config_dict[get_config_mode.capitalize()]
+except KeyError:
+    exit('Error: Invalid <config_mode>. Expected values [Debug, Production] ')
+
+# A sessão de login precisa ser válida nos dois processos: sem SECRET_KEY
+# cada processo gera uma chave aleatória e nenhuma rota autenticada funciona
+if not os.getenv('SECRET_KEY'):
+    exit('Error: SECRET_KEY não definido; use o mesmo valor do processo principal')
+
+app = create_app(app_config)
+
+# O usuário da sessão é carregado do banco: um SQLite local (inclusive o
+# fallback de configure_database) não é o banco do processo principal
+if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    exit('Error: banco SQLite no processo de streaming; configure DB_ENGINE/DB_* com o banco do processo principal')
+
+# Os eventos SSE publicados pelo processo principal precisam chegar aqui
+from apps.processos.barramento_eventos import exigir_barramento_compartilhado
+try:
+    exigir_barramento_compartilhado(app)
+except RuntimeError as e:
+    exit('Error: ' + str(e))
+
+if __name__ == "__main__":
+    app.run(host='0.0.0.0', port=5006, debug=DEBUG, threaded=True)
@@ -0,0 +1,60 @@
+"""
+Fixtures compartilhadas dos testes
+
+A aplicação de teste usa SQLite em memória; cada módulo de testes cria os
+próprios dados sobre o fixture `app`.
+"""
+
+import pytest
+from sqlalchemy import event
+
+from apps import create_app, db
+from apps.config import config_dict
+from apps.authentication.models import Users
+
+
+class ConfigTeste(config_dict['Debug']):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    ESTATISTICAS_EXECUCOES_TTL = 0
+
+
+@pytest.fixture
+def app():
+    app = create_app(ConfigTeste)
+    with app.app_context():
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    """Cliente de teste com um usuário logado"""
+    usuario = Users(username='teste', email='teste@teste.com', password='teste')
+    db.session.add(usuario)
+    db.session.commit()
+    usuario_id = usuario.id
+
+    client = app.test_client()
+    with client.session_transaction() as sessao:
+        sessao['_user_id'] = str(usuario_id)
+        sessao['_fresh'] = True
+    return client
+
+
+@pytest.fixture
+def consultas(app):
+    """Registra as consultas (SQL e colunas retornadas) feitas durante o teste"""
+    registradas = []
+
+    def depois_de_executar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and 'FROM users' not in statement:
+            colunas = [descricao[0] for descricao in (cursor.description or [])]
+            registradas.append((statement, colunas))
+
+    event.listen(db.engine, 'after_cursor_execute', depois_de_executar)
+    yield registradas
+    event.remove(db.engine, 'after_cursor_execute', depois_de_executar)
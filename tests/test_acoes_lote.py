@@ -0,0 +1,93 @@
+"""
+Testes das ações em lote sobre processos (apps/processos/acoes_lote.py)
+"""
+
+import uuid
+from unittest import mock
+
+import pytest
+from sqlalchemy import update
+
+from apps import db
+from apps.models import Operadora, Cliente, Processo
+from apps.processos import acoes_lote
+from apps.processos.acoes_lote import rejeitar_em_lote
+
+AGUARDANDO_APROVACAO = 'AGUARDANDO_APROVACAO'
+
+
+@pytest.fixture(autouse=True)
+def processos(app):
+    operadora = Operadora(nome='Operadora Teste', codigo='OPT')
+    db.session.add(operadora)
+    db.session.flush()
+
+    cliente = Cliente(
+        hash_unico='hash0', razao_social='Cliente 0', nome_sat='CLIENTE 0',
+        cnpj='0' * 14, operadora_id=operadora.id, servico='Internet', unidade='Matriz'
+    )
+    db.session.add(cliente)
+    db.session.flush()
+
+    ids = []
+    for mes in range(1, 4):
+        processo = Processo(
+            cliente_id=cliente.id, mes_ano=f'{mes:02d}/2025',
+            status_processo=AGUARDANDO_APROVACAO, observacoes=f'conferido {mes}'
+        )
+        db.session.add(processo)
+        db.session.flush()
+        ids.append(processo.id)
+    db.session.commit()
+    return ids
+
+
+def _processo(processo_id):
+    db.session.expire_all()
+    return db.session.get(Processo, processo_id)
+
+
+def test_rejeicao_sem_motivo_preserva_observacoes(processos):
+    resultado = rejeitar_em_lote(processos[:1])
+    assert resultado.resumo() == {'rejeitado': 1}
+    assert _processo(processos[0]).observacoes == 'conferido 1'
+
+    rejeitar_em_lote(processos[1:2], 'valor divergente')
+    assert _processo(processos[1]).observacoes == 'valor divergente'
+
+
+@pytest.mark.parametrize('returning', [True, False])
+def test_processo_alterado_entre_validacao_e_update(processos, returning):
+    validar_status = acoes_lote._validar_status
+    concorrente = processos[1]
+
+    def validar_e_aprovar_em_paralelo(*args, **kwargs):
+        aptos = validar_status(*args, **kwargs)
+        # Outro usuário aprova o processo depois da validação do lote
+        db.session.execute(
+            update(Processo).where(Processo.id == concorrente).values(status_processo='AGUARDANDO_ENVIO_SAT')
+        )
+        return aptos
+
+    with mock.patch.object(acoes_lote, '_validar_status', side_effect=validar_e_aprovar_em_paralelo), \
+            mock.patch.object(db.engine.dialect, 'update_returning', returning):
+        resultado = rejeitar_em_lote([*processos, 'nao-e-uuid', uuid.uuid4()], 'valor divergente')
+
+    assert resultado.resultados[str(concorrente)] == {'resultado': acoes_lote.RESULTADO_STATUS_ALTERADO}
+    assert resultado.resumo() == {'rejeitado': 2, 'status_alterado': 1, 'id_invalido': 1, 'nao_encontrado': 1}
+
+    # A aprovação concorrente não é sobrescrita pela rejeição
+    processo = _processo(concorrente)
+    assert processo.status_processo == 'AGUARDANDO_ENVIO_SAT' and processo.observacoes == 'conferido 2'
+    assert _processo(processos[0]).status_processo == 'AGUARDANDO_DOWNLOAD'
+
+
+def test_rejeicao_de_processo_em_outro_status(processos):
+    rejeitar_em_lote(processos[:1], 'primeira')
+
+    resultado = rejeitar_em_lote(processos[:1], 'segunda')
+
+    assert resultado.resultados[str(processos[0])] == {
+        'resultado': acoes_lote.RESULTADO_STATUS_INVALIDO, 'status_atual': 'AGUARDANDO_DOWNLOAD'
+    }
+    assert _processo(processos[0]).observacoes == 'primeira'
@@ -0,0 +1,83 @@
+"""
+Testes do armazenamento local de logs de jobs (apps/api_externa/armazenamento_logs.py)
+"""
+
+import json
+import os
+import time
+from unittest import mock
+
+import pytest
+
+from apps.api_externa.armazenamento_logs import ArmazenamentoLogs
+
+
+def _gravar_job(armazenamento, job_id, linhas=3, fechado_ha=0):
+    armazenamento.iniciar(job_id)
+    for i in range(linhas):
+        armazenamento.anexar(job_id, json.dumps({'type': 'log', 'job_id': job_id, 'message': f'linha {i}' + 'x' * 200}))
+    armazenamento.fechar(job_id)
+    if fechado_ha:
+        instante = time.time() - fechado_ha
+        os.utime(os.path.join(armazenamento.diretorio, f'{job_id}.seg.gz'), (instante, instante))
+
+
+@pytest.fixture
+def armazenamento(tmp_path):
+    # Limpeza automática desligada: os testes chamam limpar() diretamente
+    return ArmazenamentoLogs(str(tmp_path), retencao_segundos=3600, intervalo_limpeza=10 ** 9)
+
+
+def test_historico_completo_do_job(armazenamento):
+    _gravar_job(armazenamento, 'job-1', linhas=5)
+
+    assert armazenamento.esta_completo('job-1')
+    assert armazenamento.contar('job-1') == 5
+    assert [e['message'][:7] for e in armazenamento.ler('job-1', inicio=3)] == ['linha 3', 'linha 4']
+
+
+def test_retencao_remove_segmentos_fechados_antigos(armazenamento):
+    _gravar_job(armazenamento, 'antigo', fechado_ha=7200)
+    _gravar_job(armazenamento, 'recente')
+    armazenamento.anexar('em-andamento', json.dumps({'type': 'log', 'message': 'rodando'}))
+
+    assert armazenamento.limpar() == 1
+
+    assert not armazenamento.existe('antigo') and armazenamento.obter_indice('antigo') is None
+    assert armazenamento.esta_completo('recente')
+    # Segmento aberto nunca é removido
+    assert armazenamento.contar('em-andamento') == 1
+
+
+def test_retencao_por_tamanho_remove_os_mais_antigos(armazenamento):
+    for indice, job_id in enumerate(['job-a', 'job-b', 'job-c']):
+        _gravar_job(armazenamento, job_id, fechado_ha=300 - indice * 100)
+    # Cabe exatamente os dois jobs mais novos (o gzip de cada job tem tamanho próprio)
+    armazenamento.tamanho_maximo = sum(
+        os.path.getsize(os.path.join(armazenamento.diretorio, f'{job_id}{extensao}'))
+        for job_id in ('job-b', 'job-c') for extensao in ('.seg.gz', '.idx')
+    )
+
+    assert armazenamento.limpar() == 1
+    assert [armazenamento.existe(job_id) for job_id in ('job-a', 'job-b', 'job-c')] == [False, True, True]
+
+
+def test_limpeza_automatica_no_fechamento(tmp_path):
+    armazenamento = ArmazenamentoLogs(str(tmp_path), retencao_segundos=3600, intervalo_limpeza=0)
+    _gravar_job(armazenamento, 'antigo', fechado_ha=7200)
+
+    _gravar_job(armazenamento, 'novo')
+
+    assert not armazenamento.existe('antigo') and armazenamento.existe('novo')
+
+
+def test_rota_de_historico(client, armazenamento):
+    _gravar_job(armazenamento, 'job-1', linhas=4)
+
+    with mock.patch('apps.api_externa.routes_logs_tempo_real.get_armazenamento_logs', return_value=armazenamento):
+        resposta = client.get('/api/v2/logs-tempo-real/historico/job-1?cauda=2').get_json()
+        ausente = client.get('/api/v2/logs-tempo-real/historico/job-2')
+
+    assert resposta['success'] and resposta['completo'] and resposta['total'] == 4
+    assert [log['message'][:7] for log in resposta['logs']] == ['linha 2', 'linha 3']
+    assert ausente.status_code == 404
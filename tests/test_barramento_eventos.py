@@ -0,0 +1,196 @@
+"""
+Testes do barramento de eventos SSE entre workers (apps/processos/barramento_eventos.py)
+"""
+
+import time
+from unittest import mock
+
+import pytest
+
+from apps.processos.barramento_eventos import (
+    BackendArquivo,
+    BackendLocal,
+    BackendPostgres,
+    BarramentoEventos,
+    EmissorEventos,
+    EventoSSE,
+    FilaAssinante,
+    POLITICA_DESCARTAR_ANTIGOS,
+    exigir_barramento_compartilhado
+)
+
+
+def _proximo(fila, limite=3.0):
+    fim = time.time() + limite
+    while time.time() < fim:
+        evento = fila.obter(timeout=0.1)
+        if evento is not None:
+            return evento
+    return None
+
+
+@pytest.fixture
+def barramentos(tmp_path):
+    """Dois workers compartilhando o mesmo arquivo de eventos"""
+    caminho = str(tmp_path / 'eventos.jsonl')
+    criados = [BarramentoEventos(BackendArquivo(caminho, intervalo=0.02)) for _ in range(2)]
+    for barramento in criados:
+        barramento.iniciar()
+    # O listener começa do fim do arquivo: aguardar que ele esteja ativo
+    time.sleep(0.1)
+    yield criados
+    for barramento in criados:
+        barramento.parar()
+
+
+def test_evento_publicado_em_um_worker_chega_aos_dois(barramentos):
+    origem, outro = barramentos
+    fila_origem, fila_outro = origem.assinar(), outro.assinar()
+
+    origem.publicar({'type': 'job_completed', 'job_id': 'job-1', 'status': 'CONCLUIDO'})
+
+    for fila in (fila_origem, fila_outro):
+        evento = _proximo(fila)
+        assert evento is not None
+        assert evento.tipo == 'job_completed' and evento.job_id == 'job-1'
+        assert b'"CONCLUIDO"' in evento.quadro
+        # Entregue uma única vez
+        assert fila.obter(timeout=0.2) is None
+
+
+def test_listener_postgres_usa_conexao_fora_do_pool():
+    conexao = mock.Mock()
+    conexao.driver_connection.notifies = []
+    engine = mock.Mock()
+    engine.raw_connection.return_value = conexao
+    ordem = []
+    conexao.detach.side_effect = lambda: ordem.append('detach')
+    type(conexao.driver_connection).autocommit = mock.PropertyMock(side_effect=lambda valor: ordem.append('autocommit'))
+
+    BackendPostgres(engine).escutar(lambda payload: None, lambda: False)
+
+    # Desanexada antes do autocommit e fechada de verdade (não devolvida ao pool)
+    assert ordem == ['detach', 'autocommit']
+    conexao.close.assert_called_once()
+
+
+def test_streaming_exige_barramento_compartilhado(app):
+    app.config['EVENTOS_SSE_ARQUIVO'] = None
+    with pytest.raises(RuntimeError):
+        exigir_barramento_compartilhado(app)
+
+    app.config['EVENTOS_SSE_ARQUIVO'] = '/var/lib/eventos-sse/eventos_sse.jsonl'
+    exigir_barramento_compartilhado(app)
+
+
+@pytest.fixture
+def publicados():
+    """Emissor sobre um barramento falso que só registra as publicações"""
+    barramento = mock.Mock()
+    registrados = []
+    barramento.publicar.side_effect = registrados.append
+    return EmissorEventos(barramento, janela_ms=100), registrados
+
+
+def test_rajada_de_progresso_publica_um_quadro_por_janela(publicados):
+    emissor, registrados = publicados
+    for progresso in range(1, 51):
+        emissor.emitir({'type': 'importacao_progresso', 'job_id': 'imp-1', 'progress': progresso})
+    emissor.emitir({'type': 'job_progress', 'job_id': 'job-2', 'progress': 5})
+
+    time.sleep(0.3)
+
+    assert sorted((e['job_id'], e['progress']) for e in registrados) == [('imp-1', 50), ('job-2', 5)]
+    assert emissor.get_stats()['agrupados'] == 49
+
+
+def test_evento_terminal_passa_direto_e_descarta_progresso_pendente(publicados):
+    emissor, registrados = publicados
+    emissor.emitir({'type': 'job_progress', 'job_id': 'job-1', 'progress': 90})
+    emissor.emitir({'type': 'job_completed', 'job_id': 'job-1', 'status': 'COMPLETED'})
+
+    # Publicado na hora, sem esperar a janela
+    assert registrados == [{'type': 'job_completed', 'job_id': 'job-1', 'status': 'COMPLETED'}]
+
+    time.sleep(0.3)
+    assert [e['type'] for e in registrados] == ['job_completed']
+
+
+def test_outros_eventos_do_job_publicam_antes_o_progresso_pendente(publicados):
+    emissor, registrados = publicados
+    emissor.emitir({'type': 'job_progress', 'job_id': 'job-1', 'progress': 40})
+    emissor.emitir({'type': 'log', 'job_id': 'job-1', 'message': 'etapa'})
+
+    assert [e['type'] for e in registrados] == ['job_progress', 'log']
+
+
+def _evento(tipo, job_id, **dados):
+    return EventoSSE.de_evento({'type': tipo, 'job_id': job_id, **dados})
+
+
+def _pendentes(fila):
+    eventos = []
+    while (evento := fila.obter(timeout=0)) is not None:
+        eventos.append((evento.tipo, evento.job_id))
+    return eventos
+
+
+def test_fila_cheia_agrupa_progresso_e_preserva_transicoes():
+    fila = FilaAssinante(tamanho_maximo=3)
+    fila.colocar(_evento('job_progress', 'job-1', progress=10))
+    fila.colocar(_evento('job_completed', 'job-2'))
+    fila.colocar(_evento('job_progress', 'job-1', progress=20))
+    fila.colocar(_evento('job_progress', 'job-3', progress=5))
+
+    # Fila cheia: sai o progresso mais antigo, não a transição
+    assert fila.colocar(_evento('job_failed', 'job-4'))
+
+    assert fila.get_stats()['agrupados'] == 1 and fila.get_stats()['descartados'] == 1
+    evento = fila.obter(timeout=0)
+    assert (evento.tipo, evento.job_id) == ('job_completed', 'job-2')
+    assert _pendentes(fila) == [('job_progress', 'job-3'), ('job_failed', 'job-4')]
+
+
+def test_fila_cheia_descartando_os_mais_antigos():
+    fila = FilaAssinante(tamanho_maximo=2, politica=POLITICA_DESCARTAR_ANTIGOS)
+    for job_id in ('job-1', 'job-2', 'job-3'):
+        fila.colocar(_evento('job_completed', job_id))
+    fila.colocar(_evento('job_progress', 'job-3', progress=50))
+    fila.colocar(_evento('job_progress', 'job-3', progress=60))
+
+    assert fila.get_stats()['descartados'] == 3 and fila.get_stats()['agrupados'] == 0
+    assert _pendentes(fila) == [('job_progress', 'job-3'), ('job_progress', 'job-3')]
+
+
+def test_consumidor_lento_e_desconectado_pelo_barramento():
+    barramento = BarramentoEventos(BackendLocal(), tamanho_fila=2, atraso_maximo=0.05)
+    lenta, rapida = barramento.assinar(), barramento.assinar()
+    barramento.iniciar()
+
+    try:
+        for indice in range(3):
+            barramento.publicar({'type': 'job_completed', 'job_id': f'job-{indice}'})
+            assert _proximo(rapida).job_id == f'job-{indice}'
+        # A fila lenta está cheia desde o terceiro evento; passou do atraso máximo
+        time.sleep(0.1)
+        barramento.publicar({'type': 'job_completed', 'job_id': 'job-3'})
+        assert _proximo(rapida).job_id == 'job-3'
+    finally:
+        barramento.parar()
+
+    assert lenta.desconectada and lenta.obter(timeout=0) is None
+    assert not lenta.colocar(_evento('job_completed', 'job-4'))
+    assert barramento.get_stats()['assinantes_desconectados'] == 1
+    assert [a['id'] for a in barramento.get_stats()['assinantes']] == [rapida.id]
+
+
+def test_fila_que_volta_a_esvaziar_nao_e_desconectada():
+    fila = FilaAssinante(tamanho_maximo=1, atraso_maximo=0.05)
+    fila.colocar(_evento('job_completed', 'job-1'))
+    fila.colocar(_evento('job_completed', 'job-2'))
+
+    time.sleep(0.1)
+    # O consumidor alcançou a fila antes do próximo evento
+    assert fila.obter(timeout=0).job_id == 'job-2'
+    assert fila.colocar(_evento('job_completed', 'job-3'))
+    assert not fila.desconectada
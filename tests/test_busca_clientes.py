@@ -0,0 +1,103 @@
+"""
+Testes do índice de busca de clientes (apps/services/busca_service.py)
+"""
+
+import pytest
+from sqlalchemy import select
+
+from apps import db
+from apps.models import Operadora, Cliente
+from apps.services import busca_service
+from apps.services.busca_service import BuscaService, busca_clientes, garantir_estrutura
+
+# razão social, CNPJ, operadora
+CLIENTES = [
+    ('Padaria São João', '12.345.678/0001-90', 'Vivo'),
+    ('Padaria Central', '98.765.432/0001-10', 'Claro'),
+    ('Mercado Joãozinho', '11.222.333/0001-44', 'Vivo'),
+]
+
+
+@pytest.fixture(autouse=True)
+def clientes(app):
+    operadoras = {}
+    for nome in sorted({operadora for _, _, operadora in CLIENTES}):
+        operadoras[nome] = Operadora(nome=nome, codigo=nome.upper())
+        db.session.add(operadoras[nome])
+    db.session.flush()
+
+    for indice, (razao, cnpj, operadora) in enumerate(CLIENTES):
+        db.session.add(Cliente(
+            hash_unico=f'hash{indice}', razao_social=razao, nome_sat=razao.upper(), cnpj=cnpj,
+            operadora_id=operadoras[operadora].id, servico='Internet', unidade='Matriz'
+        ))
+    db.session.commit()
+    return operadoras
+
+
+def _buscar(termo):
+    return sorted(cliente.razao_social for cliente in BuscaService.buscar_clientes(termo))
+
+
+def test_indice_disponivel_no_sqlite(app):
+    assert busca_service.indice_disponivel()
+    assert BuscaService.subconsulta_clientes('padaria') is not None
+
+
+@pytest.mark.parametrize('termo, esperados', [
+    # Sem acentos e sem diferenciar maiúsculas
+    ('sao joao', ['Padaria São João']),
+    ('JOÃO', ['Mercado Joãozinho', 'Padaria São João']),
+    # CNPJ com ou sem pontuação
+    ('12.345.678/0001-90', ['Padaria São João']),
+    ('98765432', ['Padaria Central']),
+    # Nome da operadora
+    ('claro', ['Padaria Central']),
+    # Tokens curtos (fora do trigram) combinados com tokens longos
+    ('pa central', ['Padaria Central']),
+    ('jo', ['Mercado Joãozinho', 'Padaria São João']),
+    ('padaria inexistente', []),
+])
+def test_busca_pelo_indice(termo, esperados):
+    assert _buscar(termo) == esperados
+
+
+def test_indice_acompanha_alteracoes_de_clientes_e_operadoras(clientes):
+    cliente = Cliente.query.filter_by(razao_social='Padaria Central').one()
+    cliente.razao_social, cliente.nome_sat = 'Confeitaria Central', 'CONFEITARIA CENTRAL'
+    clientes['Vivo'].nome = 'Telefônica'
+    db.session.commit()
+
+    assert _buscar('confeitaria') == ['Confeitaria Central']
+    assert _buscar('padaria') == ['Padaria São João']
+    assert _buscar('telefonica') == ['Mercado Joãozinho', 'Padaria São João']
+    assert _buscar('vivo') == []
+
+    db.session.delete(cliente)
+    db.session.commit()
+    assert _buscar('central') == []
+
+
+def test_indice_vazio_e_reindexado_na_inicializacao():
+    # Banco com clientes anterior ao índice
+    db.session.execute(busca_clientes.delete())
+    db.session.commit()
+
+    assert garantir_estrutura()
+
+    assert len(db.session.execute(select(busca_clientes.c.cliente_id)).all()) == len(CLIENTES)
+    assert _buscar('padaria') == ['Padaria Central', 'Padaria São João']
+
+
+def test_rota_de_busca_ordenada_por_relevancia(client):
+    resultado = client.get('/clientes/api/buscar?q=padaria sao joao').get_json()
+
+    assert [cliente['razao_social'] for cliente in resultado] == ['Padaria São João']
+    assert resultado[0]['operadora'] == 'Vivo'
+
+
+def test_listagem_de_clientes_filtra_por_cnpj_com_pontuacao(client):
+    resposta = client.get('/clientes/api/listar?cnpj=11.222.333')
+
+    assert resposta.status_code == 200, resposta.get_data(as_text=True)
+    assert [item['razao_social'] for item in resposta.get_json()['items']] == ['Mercado Joãozinho']
@@ -0,0 +1,117 @@
+"""
+Testes do consolidado diário das execuções (apps/services/consolidado_execucoes.py)
+
+O consolidado mantido de forma incremental nos flushes do ORM deve ser
+igual ao reconstruído a partir das execuções, e as estatísticas lidas dele
+devem bater com as calculadas sobre a tabela de execuções.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from apps import db
+from apps.models import Operadora, Cliente, Processo, Execucao, ExecucaoStatsDaily, ExecucaoStatsDailyControle
+from apps.execucoes.services import ExecucaoService, ExecucaoFiltros
+from apps.services import consolidado_execucoes
+from apps.services.consolidado_execucoes import reconstruir_consolidado
+
+STATUS = ('CONCLUIDO', 'CONCLUIDO', 'FALHOU', 'EXECUTANDO', 'CANCELADO', 'TIMEOUT')
+TIPOS = ('DOWNLOAD_FATURA', 'UPLOAD_SAT')
+
+
+@pytest.fixture(autouse=True)
+def dados(app):
+    processos = []
+    for i in range(2):
+        operadora = Operadora(nome=f'Operadora {i}', codigo=f'OP{i}')
+        db.session.add(operadora)
+        db.session.flush()
+
+        cliente = Cliente(
+            hash_unico=f'hash{i}', razao_social=f'Cliente {i}', nome_sat=f'CLIENTE {i}',
+            cnpj=f'{i:014d}', operadora_id=operadora.id, servico='Internet', unidade='Matriz'
+        )
+        db.session.add(cliente)
+        db.session.flush()
+
+        processo = Processo(cliente_id=cliente.id, mes_ano='01/2025', status_processo='AGUARDANDO_DOWNLOAD')
+        db.session.add(processo)
+        db.session.flush()
+        processos.append(processo)
+
+    inicio = datetime(2025, 1, 10, 12)
+    for i in range(60):
+        status = STATUS[i % len(STATUS)]
+        data_inicio = inicio - timedelta(days=i % 7, minutes=i)
+        db.session.add(Execucao(
+            processo_id=processos[i % 2].id, tipo_execucao=TIPOS[i % 3 % 2], status_execucao=status,
+            data_inicio=data_inicio,
+            data_fim=None if status == 'EXECUTANDO' else data_inicio + timedelta(seconds=7 * i + 3)
+        ))
+    db.session.commit()
+
+
+def _consolidado():
+    tabela = ExecucaoStatsDaily.__table__
+    return {
+        tuple(linha[:4]): (linha.quantidade, linha.quantidade_com_duracao, round(linha.soma_duracao, 6))
+        for linha in db.session.execute(select(tabela)).all()
+        if linha.quantidade or linha.quantidade_com_duracao
+    }
+
+
+def test_consolidado_incremental_igual_reconstruido(app):
+    # Finalização, troca de status com os atributos expirados, mudança de dia e remoção
+    for execucao in Execucao.query.filter_by(status_execucao='EXECUTANDO').limit(4):
+        execucao.finalizar_com_sucesso(mensagem='ok')
+    db.session.commit()
+
+    falhou = Execucao.query.filter_by(status_execucao='FALHOU').first()
+    db.session.expire_all()
+    falhou.status_execucao = 'CONCLUIDO'
+    timeout = Execucao.query.filter_by(status_execucao='TIMEOUT').first()
+    timeout.data_inicio = timeout.data_inicio - timedelta(days=2)
+    db.session.delete(Execucao.query.filter_by(status_execucao='CANCELADO').first())
+    db.session.commit()
+
+    incremental = _consolidado()
+    assert incremental
+
+    finalizadas = Execucao.query.filter(Execucao.status_execucao.notin_(('EXECUTANDO',))).count()
+    assert reconstruir_consolidado() == finalizadas
+    assert _consolidado() == incremental
+
+
+def test_estatisticas_do_consolidado_iguais_as_da_tabela(app):
+    operadora = Operadora.query.filter_by(codigo='OP1').first()
+    for filtros in (
+        ExecucaoFiltros(),
+        ExecucaoFiltros(data_inicio=datetime(2025, 1, 5), data_fim=datetime(2025, 1, 8, 23, 59, 59)),
+        ExecucaoFiltros(operadora_id=str(operadora.id), tipo='UPLOAD_SAT'),
+        ExecucaoFiltros(status='EXECUTANDO'),
+    ):
+        consolidado = ExecucaoService._estatisticas_consolidadas(filtros)
+        tabela = ExecucaoService._calcular_estatisticas(filtros)
+
+        # Percentis do consolidado são aproximados pelo histograma
+        for chave in ('duracao_p50_segundos', 'duracao_p95_segundos'):
+            consolidado.pop(chave)
+            tabela.pop(chave)
+        assert consolidado == tabela
+
+
+def test_estatisticas_sem_consolidado_completo_usam_a_tabela(app):
+    # Banco que já tinha execuções: consolidado vazio e sem o marcador
+    db.session.execute(ExecucaoStatsDaily.__table__.delete())
+    db.session.execute(ExecucaoStatsDailyControle.__table__.delete())
+    db.session.commit()
+    consolidado_execucoes._disponibilidade.clear()
+
+    assert not consolidado_execucoes.consolidado_disponivel()
+    assert ExecucaoService.obter_estatisticas()['total'] == Execucao.query.count()
+
+    reconstruir_consolidado()
+    assert consolidado_execucoes.consolidado_disponivel()
+    assert ExecucaoService.obter_estatisticas()['total'] == Execucao.query.count()
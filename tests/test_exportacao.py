@@ -0,0 +1,113 @@
+"""
+Testes da exportação em streaming (apps/services/exportacao.py e rotas /exportar)
+"""
+
+import csv
+import gzip
+import io
+import json
+from unittest import mock
+
+import pytest
+from sqlalchemy import select
+
+from apps import db
+from apps.models import Operadora, Cliente, Processo
+from apps.services import exportacao
+from apps.services.exportacao import gerar_exportacao
+
+TOTAL = 30
+
+
+@pytest.fixture(autouse=True)
+def clientes(app):
+    operadoras = [Operadora(nome=nome, codigo=nome.upper()) for nome in ('Vivo', 'Claro')]
+    db.session.add_all(operadoras)
+    db.session.flush()
+
+    for indice in range(TOTAL):
+        cliente = Cliente(
+            hash_unico=f'hash{indice}', razao_social=f'Cliente {indice:02d}', nome_sat=f'CLIENTE {indice}',
+            cnpj=f'{indice:014d}', operadora_id=operadoras[indice % 2].id, servico='Internet',
+            unidade='Matriz', login_portal='usuario', senha_portal='segredo', status_ativo=indice % 3 != 0
+        )
+        db.session.add(cliente)
+        db.session.flush()
+        db.session.add(Processo(cliente_id=cliente.id, mes_ano=f'{indice % 12 + 1:02d}/2025',
+                                status_processo='AGUARDANDO_DOWNLOAD', valor_fatura=indice + 0.5))
+    db.session.commit()
+    return {operadora.nome: str(operadora.id) for operadora in operadoras}
+
+
+def _csv(resposta):
+    assert resposta.status_code == 200, resposta.get_data(as_text=True)
+    texto = resposta.get_data().decode('utf-8')
+    # BOM para o Excel reconhecer UTF-8
+    assert texto.startswith('﻿')
+    return list(csv.DictReader(io.StringIO(texto[1:])))
+
+
+def test_exportacao_csv_de_clientes_filtrados(client, clientes):
+    resposta = client.get(f'/clientes/exportar?operadora={clientes["Claro"]}')
+
+    assert resposta.is_streamed
+    assert resposta.headers['Content-Disposition'].endswith('.csv')
+    linhas = _csv(resposta)
+    assert [linha['razao_social'] for linha in linhas] == [f'Cliente {i:02d}' for i in range(1, TOTAL, 2)]
+    assert {linha['operadora'] for linha in linhas} == {'Claro'}
+    # Clientes 01 (ativo) e 03 (inativo)
+    assert linhas[0]['status_ativo'] == '1' and linhas[1]['status_ativo'] == '0'
+    # Credenciais do portal não são exportadas
+    assert 'senha_portal' not in linhas[0] and 'login_portal' not in linhas[0]
+
+
+def test_exportacao_compactada_tem_o_mesmo_conteudo(client):
+    simples = client.get('/clientes/exportar').get_data()
+
+    resposta = client.get('/clientes/exportar?compactar=1')
+
+    assert resposta.mimetype == 'application/gzip'
+    assert resposta.headers['Content-Disposition'].endswith('.csv.gz')
+    assert gzip.decompress(resposta.get_data()) == simples
+
+
+def test_exportacao_ndjson_de_processos(client):
+    resposta = client.get('/processos/exportar?formato=ndjson&periodo_de=11/2025')
+
+    assert resposta.status_code == 200 and resposta.mimetype == 'application/x-ndjson'
+    itens = [json.loads(linha) for linha in resposta.get_data(as_text=True).splitlines()]
+    assert sorted(item['mes_ano'] for item in itens) == ['11/2025'] * 2 + ['12/2025'] * 2
+    assert all(isinstance(item['valor_fatura'], float) for item in itens)
+    assert {'cliente', 'operadora', 'cnpj'} <= set(itens[0])
+
+
+@pytest.mark.parametrize('rota', ['/clientes/exportar', '/processos/exportar', '/execucoes/exportar'])
+def test_formato_invalido_e_rejeitado(client, rota):
+    assert client.get(f'{rota}?formato=xlsx').status_code == 400
+
+
+def test_filtro_invalido_na_exportacao_de_processos(client):
+    resposta = client.get('/processos/exportar?periodo_de=2025')
+
+    assert resposta.status_code == 400
+    assert resposta.get_json()['error'] == 'INVALID_FILTER'
+
+
+def test_saida_gerada_em_blocos_a_partir_do_cursor(app):
+    consulta = select(Cliente.razao_social, Cliente.cnpj).order_by(Cliente.razao_social)
+    app.config['EXPORTACAO_TAMANHO_LOTE'] = 7
+
+    with mock.patch.object(exportacao, 'TAMANHO_BLOCO', 200):
+        blocos = list(gerar_exportacao(consulta, 'json'))
+
+    assert len(blocos) > 1 and all(isinstance(bloco, bytes) for bloco in blocos)
+    itens = json.loads(b''.join(blocos))
+    assert len(itens) == TOTAL and itens[0] == {'razao_social': 'Cliente 00', 'cnpj': '0' * 14}
+
+
+def test_gerador_nao_consulta_o_banco_antes_de_ser_consumido(app, consultas):
+    blocos = gerar_exportacao(select(Cliente.id), 'csv')
+    assert consultas == []
+
+    next(blocos)
+    assert len(consultas) == 1
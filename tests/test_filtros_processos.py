@@ -0,0 +1,78 @@
+"""
+Testes dos filtros de busca e operadora da listagem de processos
+(ProcessoService.aplicar_filtros em apps/processos/routes.py)
+"""
+
+from unittest import mock
+
+import pytest
+
+from apps import db
+from apps.models import Operadora, Cliente, Processo
+
+# operadora -> razões sociais dos clientes
+CLIENTES = {
+    'Vivo': ['Padaria Central', 'Mercado Bom Preço'],
+    'Claro': ['Padaria do Porto'],
+    'Oi': [],
+}
+
+
+@pytest.fixture(autouse=True)
+def operadoras(app):
+    ids = {}
+    for indice, (nome, razoes) in enumerate(CLIENTES.items()):
+        operadora = Operadora(nome=nome, codigo=nome.upper())
+        db.session.add(operadora)
+        db.session.flush()
+        ids[nome] = str(operadora.id)
+
+        for numero, razao in enumerate(razoes):
+            cliente = Cliente(
+                hash_unico=f'hash{indice}{numero}', razao_social=razao, nome_sat=razao.upper(),
+                cnpj=f'{indice}{numero}' * 7, operadora_id=operadora.id, servico='Internet', unidade='Matriz'
+            )
+            db.session.add(cliente)
+            db.session.flush()
+            for mes in ('01/2025', '02/2025'):
+                db.session.add(Processo(cliente_id=cliente.id, mes_ano=mes, status_processo='AGUARDANDO_DOWNLOAD'))
+    db.session.commit()
+    return ids
+
+
+@pytest.fixture(params=['indice', 'like'])
+def busca(request):
+    """Busca pelo índice de clientes e pelo LIKE usado quando o índice não existe"""
+    if request.param == 'like':
+        with mock.patch('apps.services.busca_service.indice_disponivel', return_value=False):
+            yield request.param
+    else:
+        yield request.param
+
+
+def _listar(client, consultas, consulta):
+    consultas.clear()
+    resposta = client.get(f'/processos/api/listar?{consulta}')
+    assert resposta.status_code == 200, resposta.get_json()
+    return sorted({item['cliente'] for item in resposta.get_json()['items']})
+
+
+def test_busca_por_cliente_e_por_operadora(client, consultas, busca):
+    assert _listar(client, consultas, 'busca=padaria') == ['Padaria Central', 'Padaria do Porto']
+    assert _listar(client, consultas, 'busca=claro') == ['Padaria do Porto']
+    assert _listar(client, consultas, 'busca=inexistente') == []
+
+
+def test_filtro_por_operadora(client, consultas, operadoras, busca):
+    assert _listar(client, consultas, f'operadora={operadoras["Vivo"]}') == ['Mercado Bom Preço', 'Padaria Central']
+    assert _listar(client, consultas, f'operadora={operadoras["Vivo"]}&busca=padaria') == ['Padaria Central']
+    # Operadora sem clientes: listagem vazia, não sem filtro
+    assert _listar(client, consultas, f'operadora={operadoras["Oi"]}') == []
+
+
+def test_filtros_na_mesma_consulta_da_listagem(client, consultas, operadoras, busca):
+    _listar(client, consultas, f'operadora={operadoras["Vivo"]}&busca=padaria')
+
+    # Nenhuma consulta prévia de clientes/operadoras para montar listas de IDs
+    assert len(consultas) == 1
+    assert consultas[0][0].lstrip().startswith('SELECT processos.')
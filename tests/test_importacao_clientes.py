@@ -0,0 +1,94 @@
+"""
+Testes da importação de clientes via CSV em lotes (apps/clientes/importacao.py)
+"""
+
+import io
+
+import pytest
+
+from apps import db
+from apps.models import Operadora, Cliente
+from apps.clientes.importacao import ImportadorClientes, ler_csv
+
+CABECALHO = 'CNPJ,RAZÃO SOCIAL,NOME SAT,OPERADORA,SERVIÇO,UNIDADE / FILTRO SAT,LOGIN,STATUS\n'
+
+
+def _csv(*linhas):
+    return io.BytesIO((CABECALHO + ''.join(linha + '\n' for linha in linhas)).encode('utf-8'))
+
+
+def _linha(indice, razao=None, operadora='VIVO', login=''):
+    return (f'{indice:02d}.345.678/0001-90,{razao or f"Cliente {indice}"},CLIENTE {indice},'
+            f'{operadora},Internet,Matriz,{login},1')
+
+
+def _clientes():
+    db.session.expire_all()
+    return {cliente.cnpj[:2]: cliente for cliente in Cliente.query.all()}
+
+
+@pytest.fixture(autouse=True)
+def operadora(app):
+    operadora = Operadora(nome='VIVO', codigo='VIV')
+    db.session.add(operadora)
+    db.session.commit()
+    return operadora
+
+
+def test_upsert_pela_chave_natural(operadora):
+    ImportadorClientes(tamanho_lote=2).importar(ler_csv(_csv(_linha(1), _linha(2))))
+
+    resultado = ImportadorClientes(sobrescrever=True, tamanho_lote=2).importar(ler_csv(_csv(
+        _linha(1, razao='Cliente Um Atualizado', login='novo-login'),
+        _linha(3),
+        _linha(3, razao='Cliente Três'),
+    )))
+
+    assert (resultado.criados, resultado.atualizados, resultado.total_erros) == (1, 2, 0)
+    assert resultado.lotes == 2 and resultado.processados == 3
+    clientes = _clientes()
+    assert sorted(clientes) == ['01', '02', '03']
+    assert clientes['01'].razao_social == 'Cliente Um Atualizado' and clientes['01'].login_portal == 'novo-login'
+    # Mesma chave repetida: a última linha prevalece
+    assert clientes['03'].razao_social == 'Cliente Três'
+
+
+def test_cliente_existente_sem_sobrescrever_e_erro_da_linha():
+    ImportadorClientes().importar(ler_csv(_csv(_linha(1))))
+
+    resultado = ImportadorClientes().importar(ler_csv(_csv(_linha(1, razao='Outro Nome'), _linha(2))))
+
+    assert resultado.criados == 1
+    assert resultado.erros == [(2, 'Cliente já existe (CNPJ: 01345678000190)')]
+    assert _clientes()['01'].razao_social == 'Cliente 1'
+
+
+def test_cliente_criado_por_outra_sessao_durante_a_importacao(operadora):
+    # As chaves existentes são carregadas antes de o cliente ser criado
+    importador = ImportadorClientes(tamanho_lote=10)
+    ImportadorClientes().importar(ler_csv(_csv(_linha(1))))
+
+    resultado = importador.importar(ler_csv(_csv(_linha(1, razao='Concorrente'), _linha(2))))
+
+    # O conflito não é sobrescrito nem some do relatório
+    assert (resultado.criados, resultado.processados) == (1, 1)
+    assert resultado.erros == [(2, 'Cliente já existe (CNPJ: 01345678000190)')]
+    assert _clientes()['01'].razao_social == 'Cliente 1'
+
+
+def test_linhas_invalidas_nao_impedem_as_demais():
+    resultado = ImportadorClientes(tamanho_lote=10).importar(ler_csv(_csv(
+        _linha(1),
+        ',Sem CNPJ,SEM CNPJ,VIVO,Internet,Matriz,,1',
+        _linha(2, operadora='OPERADORA DESCONHECIDA'),
+        # Mesmo NOME SAT/serviço/unidade do cliente 1: hash_unico duplicada no lote
+        '09.345.678/0001-90,Cliente 9,CLIENTE 1,VIVO,Internet,Matriz,,1',
+        _linha(4),
+    )))
+
+    assert resultado.criados == 2 and sorted(_clientes()) == ['01', '04']
+    assert [linha for linha, _ in sorted(resultado.erros)] == [3, 4, 5]
+    mensagens = dict(resultado.erros)
+    assert 'obrigatórios' in mensagens[3]
+    assert "Operadora 'OPERADORA DESCONHECIDA' não encontrada" in mensagens[4]
+    assert mensagens[5].startswith('Erro ao gravar')
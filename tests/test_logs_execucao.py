@@ -0,0 +1,102 @@
+"""
+Testes do log das execuções (apps/services/logs_execucao.py)
+
+As linhas de log ficam na tabela append-only execucao_logs, gravadas em
+lote nos flushes do ORM, e são servidas em páginas; o Text legado de
+Execucao.mensagem_log nunca é carregado por essas rotas.
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from apps import db
+from apps.models import Operadora, Cliente, Processo, Execucao, ExecucaoLog
+
+
+@pytest.fixture(autouse=True)
+def execucao_id(app):
+    operadora = Operadora(nome='Operadora Teste', codigo='OPT')
+    db.session.add(operadora)
+    db.session.flush()
+
+    cliente = Cliente(
+        hash_unico='hash0', razao_social='Cliente 0', nome_sat='CLIENTE 0',
+        cnpj='0' * 14, operadora_id=operadora.id, servico='Internet', unidade='Matriz'
+    )
+    db.session.add(cliente)
+    db.session.flush()
+
+    processo = Processo(cliente_id=cliente.id, mes_ano='01/2025', status_processo='AGUARDANDO_DOWNLOAD')
+    db.session.add(processo)
+    db.session.flush()
+
+    execucao = Execucao(
+        processo_id=processo.id, tipo_execucao='DOWNLOAD_FATURA', status_execucao='CONCLUIDO',
+        data_inicio=datetime.now(), parametros_entrada={'a': 1}, resultado_saida={'b': 2},
+        mensagem_log='log longo'
+    )
+    db.session.add(execucao)
+    db.session.commit()
+    return execucao.id
+
+
+def _sem_mensagem_log(consultas):
+    return not any(coluna.endswith('mensagem_log') for _, colunas in consultas for coluna in colunas)
+
+
+def test_log_paginado(client, consultas, execucao_id):
+    execucao = db.session.get(Execucao, execucao_id)
+    for i in range(100):
+        execucao.adicionar_log(f'linha {i}')
+    db.session.commit()
+    consultas.clear()
+
+    resposta = client.get(f'/execucoes/api/{execucao_id}/log?limite=30').get_json()
+    assert [linha['mensagem'] for linha in resposta['linhas']] == [f'linha {i}' for i in range(70, 100)]
+    assert resposta['tem_anteriores'] is True
+
+    anteriores = client.get(f'/execucoes/api/{execucao_id}/log?antes={resposta["primeiro_seq"]}&limite=80').get_json()
+    assert [linha['mensagem'] for linha in anteriores['linhas']] == [f'linha {i}' for i in range(70)]
+    assert anteriores['tem_anteriores'] is False
+
+    execucao = db.session.get(Execucao, execucao_id)
+    execucao.adicionar_log('nova linha')
+    db.session.commit()
+
+    novas = client.get(f'/execucoes/api/{execucao_id}/log?apos={resposta["ultimo_seq"]}').get_json()
+    assert [linha['mensagem'] for linha in novas['linhas']] == ['nova linha']
+
+    # O log é lido por intervalos de linhas, nunca o texto completo da execução
+    assert _sem_mensagem_log(consultas)
+
+
+def test_adicionar_log_grava_em_lote(execucao_id):
+    execucao = db.session.get(Execucao, execucao_id)
+    inserts = []
+
+    def antes_de_executar(conn, cursor, statement, parameters, context, executemany):
+        if 'INSERT INTO execucao_logs' in statement:
+            inserts.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', antes_de_executar)
+    try:
+        for i in range(50):
+            execucao.adicionar_log(f'linha {i}')
+        db.session.commit()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', antes_de_executar)
+
+    assert len(inserts) == 1
+    assert ExecucaoLog.query.filter_by(execucao_id=execucao_id).count() == 50
+    assert db.session.get(Execucao, execucao_id).mensagem_log == 'log longo'
+
+
+def test_detalhe_execucao_nao_carrega_log(client, consultas, execucao_id):
+    resposta = client.get(f'/execucoes/detalhes/{execucao_id}')
+
+    assert resposta.status_code == 200
+    colunas = [coluna for _, colunas in consultas for coluna in colunas]
+    assert any(coluna.endswith('parametros_entrada') for coluna in colunas)
+    assert _sem_mensagem_log(consultas)
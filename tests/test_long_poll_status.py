@@ -0,0 +1,89 @@
+"""
+Testes do long-poll de status de jobs (apps/processos/versoes_job.py e
+/processos/consultar-status-job)
+"""
+
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from apps.processos.versoes_job import RegistroVersoesJob, obter_registro_versoes
+
+
+def test_evento_do_barramento_acorda_quem_aguarda():
+    registro = RegistroVersoesJob()
+    versao = registro.atualizar('job-1', {'status': 'RUNNING', 'progress': 10})
+    resultado = {}
+
+    def aguardar():
+        inicio = time.time()
+        resultado['alterado'] = registro.aguardar('job-1', versao, 10)
+        resultado['tempo'] = time.time() - inicio
+
+    thread = threading.Thread(target=aguardar)
+    thread.start()
+    time.sleep(0.1)
+    registro.registrar_evento('job-1', {'type': 'job_completed', 'job_id': 'job-1'})
+    thread.join(timeout=5)
+
+    nova_versao, status = resultado['alterado']
+    assert nova_versao != versao
+    assert status['status'] == 'COMPLETED' and status['progress'] == 100
+    assert resultado['tempo'] < 2
+
+
+def test_consulta_a_api_e_reservada_uma_vez_por_intervalo():
+    registro = RegistroVersoesJob()
+    assert registro.reservar_consulta('desconhecido', 5)
+
+    registro.atualizar('job-1', {'status': 'RUNNING'})
+    assert not registro.reservar_consulta('job-1', 5)
+    assert registro.reservar_consulta('job-1', 0)
+    # Reservada: as demais requisições do intervalo aguardam o resultado
+    assert not registro.reservar_consulta('job-1', 5)
+
+
+@pytest.fixture
+def api_status(app):
+    app.config['LONG_POLL_HABILITADO'] = True
+    app.config['LONG_POLL_INTERVALO_CONSULTA'] = 0.2
+    respostas = []
+
+    def consultar(job_id):
+        status = respostas.pop(0) if len(respostas) > 1 else respostas[0]
+        return {'job_id': job_id, 'message': None, 'error': None, **status}
+
+    with mock.patch('apps.processos.routes._consultar_status_job_api', side_effect=consultar) as consulta, \
+            mock.patch('apps.processos.routes.obter_barramento'):
+        yield respostas, consulta
+
+
+def test_progresso_de_job_em_execucao_responde_no_intervalo(client, api_status):
+    respostas, consulta = api_status
+    respostas.extend([{'status': 'RUNNING', 'progress': 10}, {'status': 'RUNNING', 'progress': 60}])
+
+    atual = client.get('/processos/consultar-status-job/job-lp-1?wait=30').get_json()
+    assert atual['progress'] == 10
+
+    inicio = time.time()
+    resposta = client.get(f'/processos/consultar-status-job/job-lp-1?wait=30&since={atual["version"]}').get_json()
+
+    # Sem eventos de progresso no barramento, a mudança chega na próxima confirmação
+    assert time.time() - inicio < 5
+    assert resposta['progress'] == 60 and resposta['version'] != atual['version']
+    assert consulta.call_count == 2
+
+
+def test_sem_alteracao_responde_unchanged_no_fim_da_espera(client, api_status):
+    respostas, consulta = api_status
+    respostas.append({'status': 'RUNNING', 'progress': 30})
+
+    atual = client.get('/processos/consultar-status-job/job-lp-2?wait=1').get_json()
+    resposta = client.get(f'/processos/consultar-status-job/job-lp-2?wait=1&since={atual["version"]}').get_json()
+
+    assert resposta['unchanged'] is True and resposta['version'] == atual['version']
+    # Confirmações limitadas pelo intervalo, não uma por volta do laço
+    assert 2 <= consulta.call_count <= 7
+    assert obter_registro_versoes().obter('job-lp-2')[0] == atual['version']
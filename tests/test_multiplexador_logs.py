@@ -0,0 +1,143 @@
+"""
+Testes do multiplexador de logs em tempo real (apps/api_externa/multiplexador_logs.py)
+
+Um stream upstream de verdade (servidor HTTP local) é usado para que os
+timeouts e erros cheguem como o requests os entrega com stream=True.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import pytest
+
+from apps.api_externa.multiplexador_logs import MultiplexadorLogs
+
+
+class UpstreamSilencioso(BaseHTTPRequestHandler):
+    """Responde ao /events/logs com os cabeçalhos e as linhas configuradas, e fica em silêncio"""
+
+    linhas = []
+    conexoes = 0
+    silencio = 1.5
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        type(self).conexoes += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for linha in self.linhas:
+            dados = f"data: {json.dumps(linha)}\n\n".encode()
+            self.wfile.write(f"{len(dados):x}\r\n".encode() + dados + b"\r\n")
+        self.wfile.flush()
+        # Mais que o timeout de leitura do multiplexador, sem enviar nada
+        time.sleep(self.silencio)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def upstream():
+    UpstreamSilencioso.linhas = []
+    UpstreamSilencioso.conexoes = 0
+    UpstreamSilencioso.silencio = 1.5
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), UpstreamSilencioso)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{servidor.server_address[1]}"
+    servidor.shutdown()
+
+
+def _aguardar(condicao, limite=5.0):
+    fim = time.time() + limite
+    while time.time() < fim:
+        if condicao():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_stream_silencioso_reconecta_sem_erro_nem_backoff(upstream):
+    UpstreamSilencioso.linhas = [{'type': 'log', 'job_id': 'job-1', 'message': 'primeira'}]
+    armazenamento = mock.Mock()
+    multiplexador = MultiplexadorLogs(backoff_inicial=30, timeout_leitura=0.3, reconexao_carencia=0)
+    multiplexador.configurar(upstream, 'token', armazenamento)
+
+    assinatura = multiplexador.assinar('job-1')
+    try:
+        # Com backoff de 30s a segunda conexão só viria se o silêncio não fosse tratado como erro
+        assert _aguardar(lambda: UpstreamSilencioso.conexoes >= 2)
+    finally:
+        multiplexador.cancelar(assinatura)
+
+    mensagens = []
+    while (item := assinatura.proximo(timeout=0)) is not None:
+        mensagens.append(json.loads(item[1]))
+
+    assert [m['message'] for m in mensagens if m['type'] == 'log'][:1] == ['primeira']
+    assert not any(m['type'] == 'error' for m in mensagens)
+    assert multiplexador.estatisticas['timeouts_leitura'] >= 1
+    assert multiplexador.estatisticas['ultimo_erro'] is None
+    armazenamento.interromper.assert_not_called()
+
+
+def test_upstream_fora_do_ar_avisa_assinantes_e_interrompe_captura():
+    armazenamento = mock.Mock()
+    multiplexador = MultiplexadorLogs(backoff_inicial=30, timeout_leitura=0.3, reconexao_carencia=0)
+    # Porta fechada: erro de conexão real
+    multiplexador.configurar('http://127.0.0.1:9', 'token', armazenamento)
+
+    assinatura = multiplexador.assinar('job-1')
+    try:
+        item = assinatura.proximo(timeout=5)
+    finally:
+        multiplexador.cancelar(assinatura)
+
+    assert item is not None and json.loads(item[1])['type'] == 'error'
+    assert multiplexador.estatisticas['ultimo_erro']
+    armazenamento.interromper.assert_called_with('job-1')
+
+
+def _todos(assinatura):
+    itens = []
+    while (item := assinatura.proximo(timeout=0.5)) is not None:
+        itens.append(item)
+    return itens
+
+
+def test_reconexao_com_last_event_id_recebe_so_o_que_perdeu(upstream):
+    UpstreamSilencioso.linhas = [{'type': 'log', 'job_id': 'job-1', 'message': f'linha {i}'} for i in range(3)]
+    # Uma única conexão upstream durante o teste
+    UpstreamSilencioso.silencio = 10
+    multiplexador = MultiplexadorLogs(timeout_leitura=30, reconexao_carencia=60)
+    multiplexador.configurar(upstream, 'token')
+
+    primeira = multiplexador.assinar('job-1')
+    assert _aguardar(lambda: primeira.fila.qsize() >= 3)
+    recebidos = _todos(primeira)
+    multiplexador.cancelar(primeira)
+    ids = [event_id for event_id, _ in recebidos]
+    assert ids == sorted(ids) and len(set(ids)) == 3
+
+    # O cliente só processou o primeiro evento antes de cair
+    retomada = multiplexador.assinar('job-1', ultimo_id=ids[0])
+    try:
+        itens = _todos(retomada)
+    finally:
+        multiplexador.cancelar(retomada)
+
+    assert [event_id for event_id, _ in itens] == ids[1:]
+    assert [json.loads(dados)['message'] for _, dados in itens] == ['linha 1', 'linha 2']
+
+    # Conexão nova (sem Last-Event-ID): buffer completo
+    nova = multiplexador.assinar('job-1')
+    try:
+        assert [event_id for event_id, _ in _todos(nova)] == ids
+    finally:
+        multiplexador.cancelar(nova)
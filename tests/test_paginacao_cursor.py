@@ -0,0 +1,111 @@
+"""
+Testes da paginação por cursor das listagens (apps/services/paginacao.py)
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from apps import db
+from apps.models import Operadora, Cliente, Processo, Execucao
+
+TOTAL = 25
+POR_PAGINA = 10
+
+
+@pytest.fixture(autouse=True)
+def processos(app):
+    operadora = Operadora(nome='Operadora Teste', codigo='OPT')
+    db.session.add(operadora)
+    db.session.flush()
+
+    base = datetime.now() - timedelta(days=1)
+    ids = []
+    for indice in range(TOTAL):
+        # Razões sociais repetidas: o id desempata a ordem dos clientes
+        cliente = Cliente(
+            hash_unico=f'hash{indice}', razao_social=f'Cliente {indice % 3}', nome_sat=f'CLIENTE {indice}',
+            cnpj=f'{indice:014d}', operadora_id=operadora.id, servico='Internet', unidade='Matriz'
+        )
+        db.session.add(cliente)
+        db.session.flush()
+
+        instante = base + timedelta(minutes=indice)
+        processo = Processo(
+            cliente_id=cliente.id, mes_ano='01/2025', status_processo='AGUARDANDO_DOWNLOAD',
+            data_criacao=instante, data_atualizacao=instante
+        )
+        db.session.add(processo)
+        db.session.flush()
+        db.session.add(Execucao(
+            processo_id=processo.id, tipo_execucao='DOWNLOAD_FATURA', status_execucao='CONCLUIDO',
+            data_inicio=base + timedelta(minutes=indice % 5), parametros_entrada={}
+        ))
+        ids.append(str(processo.id))
+    db.session.commit()
+    # Do mais recente para o mais antigo
+    return ids[::-1]
+
+
+def _pagina(client, rota, cursor=None, direcao='next'):
+    consulta = f'{rota}?per_page={POR_PAGINA}&dir={direcao}' + (f'&cursor={cursor}' if cursor else '')
+    resposta = client.get(consulta)
+    assert resposta.status_code == 200, resposta.get_json()
+    return resposta.get_json()
+
+
+def _percorrer(client, rota, entre_paginas=None):
+    vistos, cursor = [], None
+    while True:
+        pagina = _pagina(client, rota, cursor)
+        vistos.extend(item['id'] for item in pagina['items'])
+        if not pagina['has_next']:
+            return vistos
+        cursor = pagina['next_cursor']
+        if entre_paginas:
+            entre_paginas(vistos)
+
+
+def test_processo_alterado_entre_paginas_nao_repete_nem_pula(client, processos):
+    def alterar(vistos):
+        # Um processo já listado e um ainda não listado mudam de status
+        alterados = [vistos[0], next(pid for pid in processos if pid not in vistos)]
+        for processo in Processo.query.filter(Processo.id.in_(alterados)):
+            processo.status_processo = 'AGUARDANDO_APROVACAO'
+        db.session.commit()
+
+    vistos = _percorrer(client, '/processos/api/listar', alterar)
+
+    assert vistos == processos
+
+
+def test_processo_atualizado_em_massa_entre_paginas(client, processos):
+    def atualizar(vistos):
+        db.session.execute(update(Processo).values(valor_fatura=10))
+        db.session.commit()
+
+    assert _percorrer(client, '/processos/api/listar', atualizar) == processos
+
+
+def test_pagina_anterior_volta_aos_mesmos_itens(client, processos):
+    primeira = _pagina(client, '/processos/api/listar')
+    segunda = _pagina(client, '/processos/api/listar', primeira['next_cursor'])
+
+    anterior = _pagina(client, '/processos/api/listar', segunda['prev_cursor'], direcao='prev')
+
+    assert [item['id'] for item in anterior['items']] == processos[:POR_PAGINA]
+    assert anterior['has_next'] and not anterior['has_prev']
+
+
+def test_cursor_invalido_volta_a_primeira_pagina(client, processos):
+    pagina = _pagina(client, '/processos/api/listar', 'nao-e-um-cursor')
+
+    assert [item['id'] for item in pagina['items']] == processos[:POR_PAGINA]
+
+
+@pytest.mark.parametrize('rota', ['/clientes/api/listar', '/execucoes/api/listar'])
+def test_listagens_com_chaves_repetidas_percorrem_todos_os_itens(client, rota):
+    vistos = _percorrer(client, rota)
+
+    assert len(vistos) == len(set(vistos)) == TOTAL
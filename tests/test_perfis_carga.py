@@ -0,0 +1,121 @@
+"""
+Testes dos perfis de carregamento das listagens (apps/models/perfis_carga.py)
+
+Cada endpoint de listagem deve buscar a página com uma única consulta, sem
+N+1 nos relacionamentos, e sem trazer as colunas pesadas (JSON/Text) e as
+credenciais que a listagem não exibe.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from apps import db
+from apps.models import Operadora, Cliente, Processo, Execucao
+
+TOTAL_CLIENTES = 5
+
+
+@pytest.fixture(autouse=True)
+def dados(app):
+    operadora = Operadora(
+        nome='Operadora Teste', codigo='OPT',
+        instrucoes_acesso='instruções longas', configuracao_rpa={'chave': 'valor'}
+    )
+    db.session.add(operadora)
+    db.session.flush()
+
+    for i in range(TOTAL_CLIENTES):
+        cliente = Cliente(
+            hash_unico=f'hash{i}', razao_social=f'Cliente {i}', nome_sat=f'CLIENTE {i}',
+            cnpj=f'{i:014d}', operadora_id=operadora.id, servico='Internet', unidade='Matriz',
+            dados_sat='dados sat', senha_portal='segredo'
+        )
+        db.session.add(cliente)
+        db.session.flush()
+
+        processo = Processo(
+            cliente_id=cliente.id, mes_ano='01/2025',
+            status_processo='AGUARDANDO_DOWNLOAD', observacoes='observação longa'
+        )
+        db.session.add(processo)
+        db.session.flush()
+
+        db.session.add(Execucao(
+            processo_id=processo.id, tipo_execucao='DOWNLOAD_FATURA', status_execucao='CONCLUIDO',
+            data_inicio=datetime.now() - timedelta(minutes=i),
+            parametros_entrada={'a': 1}, resultado_saida={'b': 2}, mensagem_log='log longo'
+        ))
+
+    db.session.commit()
+
+
+def _colunas(modelo, *excluidas):
+    return len([coluna for coluna in modelo.__table__.columns if coluna.name not in excluidas])
+
+
+COLUNAS_OPERADORA = 5  # id, nome, codigo, possui_rpa, status_ativo
+
+
+def _assert_sem_colunas(colunas, *proibidas):
+    for proibida in proibidas:
+        assert not any(coluna.endswith(proibida) for coluna in colunas), proibida
+
+
+def test_listagem_processos(client, consultas):
+    resposta = client.get('/processos/api/listar')
+
+    assert resposta.status_code == 200
+    assert len(resposta.get_json()['items']) == TOTAL_CLIENTES
+    assert len(consultas) == 1
+
+    _, colunas = consultas[0]
+    assert len(colunas) == _colunas(Processo, 'observacoes') + 4 + COLUNAS_OPERADORA
+    _assert_sem_colunas(colunas, 'observacoes', 'dados_sat', 'senha_portal', 'configuracao_rpa')
+
+
+def test_listagem_clientes(client, consultas):
+    resposta = client.get('/clientes/api/listar')
+
+    assert resposta.status_code == 200
+    assert len(resposta.get_json()['items']) == TOTAL_CLIENTES
+    assert len(consultas) == 1
+
+    _, colunas = consultas[0]
+    excluidas = ('dados_sat', 'login_portal', 'senha_portal')
+    assert len(colunas) == _colunas(Cliente, *excluidas) + COLUNAS_OPERADORA
+    _assert_sem_colunas(colunas, *excluidas, 'instrucoes_acesso', 'configuracao_rpa')
+
+
+def test_listagem_execucoes(client, consultas):
+    resposta = client.get('/execucoes/api/listar')
+
+    assert resposta.status_code == 200
+    assert len(resposta.get_json()['items']) == TOTAL_CLIENTES
+    assert len(consultas) == 1
+
+    _, colunas = consultas[0]
+    excluidas = ('parametros_entrada', 'resultado_saida', 'mensagem_log', 'detalhes_erro', 'user_agent')
+    # Processo: id, cliente_id, mes_ano, status_processo; Cliente: id, razao_social, operadora_id
+    assert len(colunas) == _colunas(Execucao, *excluidas) + 4 + 3 + COLUNAS_OPERADORA
+    _assert_sem_colunas(colunas, *excluidas, 'observacoes', 'dados_sat', 'configuracao_rpa')
+
+
+def test_contagem_nao_faz_join(client, consultas):
+    resposta = client.get('/execucoes/api/listar?total=1')
+
+    assert resposta.status_code == 200
+    assert resposta.get_json()['total'] == TOTAL_CLIENTES
+
+    contagem = [sql for sql, _ in consultas if 'count(' in sql.lower()]
+    assert len(contagem) == 1
+    assert 'JOIN' not in contagem[0].upper()
+
+
+def test_execucao_nao_carrega_processo_sem_perfil(app, consultas):
+    execucao = Execucao.query.first()
+
+    assert len(consultas) == 1
+    assert 'processos' not in consultas[0][0]
+    assert execucao.processo is not None
+    assert len(consultas) == 2
@@ -0,0 +1,87 @@
+"""
+Testes do período ordenável dos processos (Processo.periodo, filtros da
+listagem e migrar_periodo_processos.py)
+"""
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError
+
+from apps import db
+from apps.models import Operadora, Cliente, Processo
+from migrar_periodo_processos import preencher_periodos, trocar_unicidade
+
+MESES = ['11/2024', '12/2024', '01/2025', '02/2025', '03/2025']
+
+
+@pytest.fixture(autouse=True)
+def cliente_id(app):
+    operadora = Operadora(nome='Operadora Teste', codigo='OPT')
+    db.session.add(operadora)
+    db.session.flush()
+
+    cliente = Cliente(
+        hash_unico='hash0', razao_social='Cliente 0', nome_sat='CLIENTE 0',
+        cnpj='0' * 14, operadora_id=operadora.id, servico='Internet', unidade='Matriz'
+    )
+    db.session.add(cliente)
+    db.session.flush()
+
+    for mes_ano in MESES:
+        db.session.add(Processo(cliente_id=cliente.id, mes_ano=mes_ano, status_processo='AGUARDANDO_DOWNLOAD'))
+    db.session.commit()
+    return cliente.id
+
+
+def _meses(resposta):
+    assert resposta.status_code == 200, resposta.get_json()
+    return sorted(item['periodo'] for item in resposta.get_json()['items'])
+
+
+def test_filtro_por_intervalo_de_periodos(client):
+    assert _meses(client.get('/processos/api/listar?periodo_de=12/2024&periodo_ate=202502')) == [202412, 202501, 202502]
+    assert _meses(client.get('/processos/api/listar?mes_ano=1/2025')) == [202501]
+
+
+@pytest.mark.parametrize('filtro', ['mes_ano=13/2025', 'mes_ano=__/____', 'periodo_de=2025', 'periodo_ate=abc'])
+def test_filtro_de_periodo_invalido_e_rejeitado(client, filtro):
+    resposta = client.get(f'/processos/api/listar?{filtro}')
+
+    assert resposta.status_code == 400
+    assert resposta.get_json()['error'] == 'INVALID_FILTER'
+
+
+def test_um_processo_por_cliente_e_periodo(cliente_id):
+    # '1/2025' e '01/2025' são o mesmo período
+    db.session.add(Processo(cliente_id=cliente_id, mes_ano='1/2025', status_processo='AGUARDANDO_DOWNLOAD'))
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+    db.session.rollback()
+
+
+def test_migracao_ignora_mes_ano_legado_invalido():
+    engine = create_engine('sqlite://')
+    with engine.begin() as conexao:
+        conexao.execute(text("CREATE TABLE processos (id INTEGER PRIMARY KEY, cliente_id INTEGER, "
+                             "mes_ano VARCHAR(7), periodo INTEGER)"))
+        for indice, mes_ano in enumerate(['03/2025', '__/____', '13/2025', 'ab/cdef', '00/2025', '12/2024']):
+            conexao.execute(text("INSERT INTO processos (cliente_id, mes_ano) VALUES (:cliente, :mes_ano)"),
+                            {'cliente': indice, 'mes_ano': mes_ano})
+
+    assert preencher_periodos(engine, tamanho_lote=2) == 2
+
+    with engine.connect() as conexao:
+        periodos = dict(conexao.execute(text("SELECT mes_ano, periodo FROM processos")).fetchall())
+    assert periodos == {'03/2025': 202503, '12/2024': 202412,
+                        '__/____': None, '13/2025': None, 'ab/cdef': None, '00/2025': None}
+
+    assert trocar_unicidade(engine)
+    with pytest.raises(IntegrityError), engine.begin() as conexao:
+        conexao.execute(text("INSERT INTO processos (cliente_id, mes_ano, periodo) VALUES (0, '3/2025', 202503)"))
+
+
+def test_listagem_com_periodo_invalido_volta_sem_filtros(client):
+    resposta = client.get('/processos/?mes_ano=13/2025')
+
+    assert resposta.status_code == 302
+    assert resposta.headers['Location'].endswith('/processos/')
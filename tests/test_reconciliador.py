@@ -0,0 +1,121 @@
+"""
+Testes do reconciliador de execuções (apps/api_externa/reconciliador.py)
+"""
+
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pytest
+
+from apps import db
+from apps.api_externa.models import JobStatus
+from apps.api_externa.reconciliador import ReconciliadorExecucoes
+from apps.api_externa.transicoes import aplicar_resultado_sucesso, aplicar_resultado_job
+from apps.models import Operadora, Cliente, Processo, Execucao
+
+# job_id -> horas desde o início da execução
+EXECUCOES = {
+    'job-concluido': 1,
+    'job-falhou': 1,
+    'job-rodando': 3,
+    'job-rodando-limite': 30,
+    'job-sumiu': 3,
+    'job-sumiu-recente': 0.5,
+}
+
+JOBS_API = [
+    {'job_id': 'job-concluido', 'status': 'COMPLETED', 'operadora': 'VIVO',
+     'result': {'arquivo_fatura': 's3://faturas/1.pdf'}},
+    {'job_id': 'job-falhou', 'status': 'FAILED', 'operadora': 'VIVO', 'error': 'captcha'},
+    {'job_id': 'job-rodando', 'status': 'RUNNING', 'operadora': 'VIVO', 'progress': 50},
+    {'job_id': 'job-rodando-limite', 'status': 'RUNNING', 'operadora': 'VIVO', 'progress': 90},
+]
+
+
+@pytest.fixture(autouse=True)
+def execucoes(app):
+    operadora = Operadora(nome='Operadora Teste', codigo='OPT')
+    db.session.add(operadora)
+    db.session.flush()
+
+    cliente = Cliente(
+        hash_unico='hash0', razao_social='Cliente 0', nome_sat='CLIENTE 0',
+        cnpj='0' * 14, operadora_id=operadora.id, servico='Internet', unidade='Matriz'
+    )
+    db.session.add(cliente)
+    db.session.flush()
+
+    for mes, (job_id, horas) in enumerate(EXECUCOES.items(), start=1):
+        processo = Processo(cliente_id=cliente.id, mes_ano=f'{mes:02d}/2025', status_processo='AGUARDANDO_DOWNLOAD')
+        db.session.add(processo)
+        db.session.flush()
+        db.session.add(Execucao(
+            processo_id=processo.id, tipo_execucao='DOWNLOAD_FATURA', status_execucao='EXECUTANDO',
+            job_id=job_id, data_inicio=datetime.now() - timedelta(hours=horas), parametros_entrada={}
+        ))
+    db.session.commit()
+
+
+@pytest.fixture
+def reconciliador(app):
+    cliente_api = mock.Mock()
+    cliente_api.listar_jobs.return_value = {'jobs': JOBS_API}
+    cliente_api.consultar_status.side_effect = ValueError('Job não encontrado')
+
+    reconciliador = ReconciliadorExecucoes(timeout_minutos=120, limite_maximo_minutos=1440, app=app)
+    with mock.patch('apps.api_externa.reconciliador.APIExternaClient', return_value=cliente_api), \
+            mock.patch.object(reconciliador, '_notificar'):
+        yield reconciliador
+
+
+def _estado(job_id):
+    execucao = Execucao.query.filter_by(job_id=job_id).one()
+    return execucao.status_execucao, execucao.processo
+
+
+def test_aplica_transicoes_e_timeout_so_sem_job_ou_no_limite(reconciliador):
+    resumo = reconciliador.reconciliar()
+
+    assert resumo == {'verificadas': 6, 'concluidas': 1, 'falhas': 1, 'timeout': 2}
+
+    status, processo = _estado('job-concluido')
+    assert status == 'CONCLUIDO' and processo.status_processo == 'DOWNLOAD_CONCLUIDO'
+    assert processo.url_fatura == 's3://faturas/1.pdf'
+
+    status, processo = _estado('job-falhou')
+    assert status == 'FALHOU' and processo.status_processo == 'ERRO_DOWNLOAD'
+
+    # Ainda em andamento na API externa: passou do timeout, mas não do limite máximo
+    assert _estado('job-rodando')[0] == 'EXECUTANDO'
+    assert _estado('job-rodando-limite')[0] == 'TIMEOUT'
+
+    # Job que a API externa não encontra: timeout após EXECUCAO_TIMEOUT_MINUTOS
+    assert _estado('job-sumiu')[0] == 'TIMEOUT'
+    assert _estado('job-sumiu-recente')[0] == 'EXECUTANDO'
+
+
+def test_processos_do_lote_carregados_em_uma_consulta(reconciliador, consultas):
+    reconciliador.reconciliar()
+
+    # Processos e JSON das execuções lidos com o lote, não por execução
+    processos = [sql for sql, _ in consultas if sql.startswith('SELECT processos.id AS processos_id')]
+    assert len(processos) == 1
+    assert not any('WHERE execucoes.id = ?' in sql for sql, _ in consultas)
+
+
+def test_fatura_gravada_so_pelas_transicoes_em_background():
+    resultado = {'job_id': 'job-x', 'status': 'COMPLETED', 'result': {'arquivo_fatura': 's3://faturas/x.pdf'}}
+
+    # Transição de sucesso compartilhada: só o status do processo
+    processo = Processo(status_processo='AGUARDANDO_DOWNLOAD')
+    aplicar_resultado_sucesso(JobStatus.from_api_response({**resultado, 'operadora': 'VIVO'}), processo)
+    assert processo.status_processo == 'DOWNLOAD_CONCLUIDO' and processo.url_fatura is None
+
+    processo = Processo(status_processo='AGUARDANDO_DOWNLOAD')
+    aplicar_resultado_job(JobStatus.from_api_response({**resultado, 'operadora': 'VIVO'}), processo)
+    assert processo.url_fatura == processo.caminho_s3_fatura == 's3://faturas/x.pdf'
+
+    # Envio ao SAT não altera a fatura
+    processo = Processo(status_processo='AGUARDANDO_SAT')
+    aplicar_resultado_job(JobStatus.from_api_response({**resultado, 'operadora': 'SAT'}), processo)
+    assert processo.status_processo == 'SAT_CONCLUIDO' and processo.url_fatura is None
@@ -0,0 +1,140 @@
+"""
+Testes das importações de clientes em background
+(apps/clientes/trabalhador_importacao.py)
+"""
+
+import io
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from apps import db
+from apps.models import Operadora, Cliente
+from apps.models.importacao import ImportacaoClientes, StatusImportacao
+from apps.clientes import trabalhador_importacao
+from apps.clientes.importacao import ler_csv
+from apps.clientes.trabalhador_importacao import TrabalhadorImportacoes, enfileirar_importacao, retomar_importacao
+
+CABECALHO = 'CNPJ,RAZÃO SOCIAL,NOME SAT,OPERADORA,SERVIÇO,UNIDADE / FILTRO SAT,STATUS\n'
+TOTAL = 7
+TAMANHO_LOTE = 3
+
+
+@pytest.fixture(autouse=True)
+def ambiente(app, tmp_path):
+    app.config['IMPORTACOES_DIR'] = str(tmp_path)
+    db.session.add(Operadora(nome='VIVO', codigo='VIV'))
+    db.session.commit()
+
+
+@pytest.fixture
+def eventos():
+    """Eventos SSE publicados pelo trabalhador"""
+    publicados = []
+    with mock.patch.object(trabalhador_importacao, '_notificar',
+                           side_effect=lambda tipo, progresso: publicados.append((tipo, progresso))):
+        yield publicados
+
+
+@pytest.fixture
+def importacao():
+    linhas = ''.join(f'{i:02d}.345.678/0001-90,Cliente {i},CLIENTE {i},VIVO,Internet,Matriz,1\n'
+                     for i in range(1, TOTAL + 1))
+    arquivo = FileStorage(io.BytesIO((CABECALHO + linhas).encode('utf-8')), filename='clientes.csv')
+    return enfileirar_importacao(arquivo, sobrescrever=False, tamanho_lote=TAMANHO_LOTE).id
+
+
+def _interromper_apos(linhas):
+    """ler_csv que derruba o worker depois de entregar algumas linhas"""
+    def ler_e_interromper(arquivo):
+        for numero, linha in enumerate(ler_csv(arquivo)):
+            if numero == linhas:
+                raise RuntimeError('worker interrompido')
+            yield linha
+    return mock.patch.object(trabalhador_importacao, 'ler_csv', ler_e_interromper)
+
+
+def _importacao(importacao_id):
+    return db.session.get(ImportacaoClientes, importacao_id, populate_existing=True)
+
+
+def test_importacao_interrompida_retoma_do_ultimo_lote_confirmado(importacao, eventos):
+    trabalhador = TrabalhadorImportacoes()
+
+    with _interromper_apos(5):
+        assert trabalhador.processar_proxima()
+
+    interrompida = _importacao(importacao)
+    assert interrompida.status_importacao == StatusImportacao.FALHOU.value
+    # Só o primeiro lote (linhas 2 a 4) foi confirmado
+    assert interrompida.ultima_linha_confirmada == 1 + TAMANHO_LOTE
+    assert (interrompida.criados, Cliente.query.count()) == (TAMANHO_LOTE, TAMANHO_LOTE)
+
+    assert retomar_importacao(interrompida)
+    assert trabalhador.processar_proxima()
+
+    concluida = _importacao(importacao)
+    assert concluida.status_importacao == StatusImportacao.CONCLUIDA.value
+    assert (concluida.linhas_lidas, concluida.criados, concluida.total_erros) == (TOTAL, TOTAL, 0)
+    assert concluida.ultima_linha_confirmada == TOTAL + 1
+    assert Cliente.query.count() == TOTAL
+    assert [tipo for tipo, _ in eventos][-1] == 'importacao_concluida'
+
+
+def test_progresso_publicado_depois_do_commit_do_lote(importacao, eventos):
+    gravados_no_evento = []
+
+    def registrar(tipo, progresso):
+        # Outra conexão só enxerga o que já foi confirmado
+        with db.engine.connect() as conexao:
+            gravados_no_evento.append((tipo, progresso.get('criados'), conexao.exec_driver_sql(
+                'SELECT COUNT(*) FROM clientes').scalar()))
+
+    with mock.patch.object(trabalhador_importacao, '_notificar', side_effect=registrar):
+        TrabalhadorImportacoes().processar_proxima()
+
+    progresso = [(criados, no_banco) for tipo, criados, no_banco in gravados_no_evento if tipo == 'importacao_progresso']
+    assert [criados for criados, _ in progresso] == [3, 6, 7]
+    assert all(criados <= no_banco for criados, no_banco in progresso)
+
+
+def test_importacao_sem_heartbeat_e_assumida_por_outro_worker(importacao, eventos):
+    primeiro = TrabalhadorImportacoes(timeout_segundos=60)
+    assumida = primeiro._assumir()
+    assert assumida.tentativas == 1
+    # Cópia do primeiro worker, como em outro processo
+    db.session.expunge(assumida)
+
+    # Heartbeat recente: nenhum outro worker assume
+    segundo = TrabalhadorImportacoes(timeout_segundos=60)
+    assert segundo._assumir() is None
+
+    db.session.execute(ImportacaoClientes.__table__.update().values(
+        data_heartbeat=datetime.now() - timedelta(minutes=5)))
+    db.session.commit()
+    retomada = segundo._assumir()
+    assert retomada.id == importacao and retomada.tentativas == 2
+
+    # O primeiro worker perdeu a importação: o progresso dele não é gravado
+    primeiro.processar(assumida)
+    assert Cliente.query.count() == 0
+    assert _importacao(importacao).status_importacao == StatusImportacao.PROCESSANDO.value
+
+    segundo.processar(retomada)
+    assert _importacao(importacao).status_importacao == StatusImportacao.CONCLUIDA.value
+    assert Cliente.query.count() == TOTAL
+
+
+def test_importacao_interrompida_vezes_demais_falha(importacao, eventos):
+    db.session.execute(ImportacaoClientes.__table__.update().values(
+        status_importacao=StatusImportacao.PROCESSANDO.value, tentativas=3, data_heartbeat=None))
+    db.session.commit()
+
+    assert TrabalhadorImportacoes(maximo_tentativas=3)._assumir() is None
+
+    falhou = _importacao(importacao)
+    assert falhou.status_importacao == StatusImportacao.FALHOU.value
+    assert 'interrompida 3 vezes' in falhou.mensagem_erro
+    assert eventos[-1][0] == 'importacao_falhou'
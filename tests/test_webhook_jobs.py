@@ -0,0 +1,91 @@
+"""
+Testes do webhook de jobs (apps/api_externa/routes_webhook.py e webhook.py)
+"""
+
+import json
+import time
+
+import pytest
+
+from apps.api_externa import webhook
+from apps.api_externa.webhook import calcular_assinatura, CABECALHO_ASSINATURA, CABECALHO_TIMESTAMP
+from apps.models import EventoWebhookJob
+
+SEGREDO = 'segredo-teste'
+
+
+@pytest.fixture(autouse=True)
+def instancias(app):
+    """Escritor e deduplicador novos a cada teste, ligados ao app do teste"""
+    app.config['WEBHOOK_SECRET'] = SEGREDO
+    webhook._escritor_instance = None
+    webhook._deduplicador_instance = None
+    yield
+    if webhook._escritor_instance is not None:
+        webhook._escritor_instance.parar()
+    webhook._escritor_instance = None
+    webhook._deduplicador_instance = None
+
+
+def _enviar(client, evento, timestamp=None, segredo=SEGREDO):
+    corpo = json.dumps(evento).encode('utf-8')
+    timestamp = str(int(timestamp if timestamp is not None else time.time()))
+    return client.post('/api/v2/webhook/jobs', data=corpo, content_type='application/json', headers={
+        CABECALHO_TIMESTAMP: timestamp,
+        CABECALHO_ASSINATURA: calcular_assinatura(segredo, timestamp, corpo)
+    })
+
+
+EVENTO = {'job_id': 'job-1', 'status': 'RUNNING', 'sequence': 3, 'progress': 40}
+
+
+def test_assinatura_invalida_e_rejeitada(client):
+    resposta = _enviar(client, EVENTO, segredo='outro-segredo')
+
+    assert resposta.status_code == 401
+    assert resposta.get_json()['error'] == 'INVALID_SIGNATURE'
+    assert EventoWebhookJob.query.count() == 0
+
+
+def test_timestamp_fora_da_janela_e_rejeitado(client, app):
+    tolerancia = app.config['WEBHOOK_TOLERANCIA_SEGUNDOS']
+    resposta = _enviar(client, EVENTO, timestamp=time.time() - tolerancia - 60)
+
+    assert resposta.status_code == 401
+    assert 'janela' in resposta.get_json()['message']
+
+    assert _enviar(client, EVENTO, timestamp=time.time() - tolerancia + 60).status_code == 202
+
+
+def test_reenvio_e_duplicado_em_qualquer_worker(client):
+    primeira = _enviar(client, EVENTO).get_json()
+    assert (primeira['aceitos'], primeira['duplicados']) == (1, 0)
+
+    # Outro worker (ou o mesmo depois de reiniciar): nenhuma chave em memória
+    webhook._deduplicador_instance = None
+    segunda = _enviar(client, {**EVENTO, 'sequence': '3'}).get_json()
+    assert (segunda['aceitos'], segunda['duplicados']) == (0, 1)
+
+    # Outra sequence do mesmo job é um evento novo
+    assert _enviar(client, {**EVENTO, 'sequence': 4}).get_json()['aceitos'] == 1
+    assert EventoWebhookJob.query.count() == 2
+
+
+def test_chave_removida_aceita_o_reenvio(app):
+    deduplicador = webhook.obter_deduplicador(app)
+    chave = ('job-1', 'COMPLETED', 7)
+
+    assert deduplicador.registrar(chave)
+    assert not deduplicador.registrar(chave)
+
+    # Lote que falhou ao gravar: o reenvio da API externa precisa ser aceito
+    deduplicador.remover([chave])
+    assert deduplicador.registrar(chave)
+
+
+def test_estatisticas_exigem_login(app):
+    assert app.test_client().get('/api/v2/webhook/jobs/stats').status_code == 403
+
+
+def test_estatisticas_com_usuario_logado(client):
+    assert client.get('/api/v2/webhook/jobs/stats').get_json()['success'] is True